@@ -0,0 +1,108 @@
+"""
+F1TenthRL の action_repeat ごとのシミュレーション速度と方策の性能を比較するベンチマーク
+
+action_repeat = k ごとに、ランダムアクションで env.step を回して以下を表示します（コンテナ内で実行）。
+
+    sim s / wall s : 進めた sim 時間 / 実時間（大きいほど速い）
+    us / tick      : 物理 tick 1 回あたりの実時間
+    raycasts / s   : sim 時間 1 秒あたりの LiDAR レイキャスト回数（1 / (tick 幅 x k)）
+
+--models で k ごとに学習したモデル（train.py --action-repeat k の出力）を同じ順に渡すと、
+各モデルを同じ k で評価し、平均報酬・平均走行距離・衝突率も表示します。
+
+使い方:
+    python3 scripts/benchmarks/bench_action_repeat.py --repeats 1 2 4 --steps 3000
+    python3 scripts/benchmarks/bench_action_repeat.py --repeats 1 2 4 \\
+        --models models/ar1.zip models/ar2.zip models/ar4.zip --episodes 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+import config
+from src.f1_env import F1TenthRL
+
+
+def bench_speed(action_repeat, steps, seed):
+    """ランダムアクションで steps 回 step し、(sim 秒 / 実時間秒, 1 tick あたりの実時間 [us], step の sim 時間 [s]) を返す"""
+    env = F1TenthRL(config.MAP_PATH, seed=seed, share_obs_buffer=True, include_raw_scan=False,
+                    action_repeat=action_repeat)
+    rng = np.random.default_rng(seed)
+    actions = rng.uniform(-1.0, 1.0, size=(steps, 2)).astype(np.float32)
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    env.close()
+    return steps * env.step_dt / elapsed, elapsed / (steps * action_repeat) * 1e6, env.step_dt
+
+
+def evaluate(model_path, action_repeat, episodes, max_sim_sec, seed):
+    """モデルを action_repeat で評価し、(平均報酬, 平均走行距離 [m], 衝突率) を返す"""
+    from evaluate import load_policy
+
+    env = F1TenthRL(config.MAP_PATH, share_obs_buffer=True, include_raw_scan=False, action_repeat=action_repeat)
+    model = load_policy(model_path)
+    max_steps = int(round(max_sim_sec / env.step_dt))
+    rewards, distances, collisions = [], [], 0
+    for episode in range(episodes):
+        env.seed(seed + episode)
+        obs = env.reset()
+        total, distance, done = 0.0, 0.0, False
+        for _ in range(max_steps):
+            prev = np.array([env.prev_x, env.prev_y])
+            action, _ = model.predict(obs, deterministic=True)
+            obs, reward, done, _ = env.step(action)
+            total += reward
+            distance += float(np.hypot(env.prev_x - prev[0], env.prev_y - prev[1]))
+            if done:
+                collisions += 1
+                break
+        rewards.append(total)
+        distances.append(distance)
+    env.close()
+    return float(np.mean(rewards)), float(np.mean(distances)), collisions / episodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='action_repeat ごとのシミュレーション速度と方策の性能の比較')
+    parser.add_argument('--repeats', type=int, nargs='+', default=[1, 2, 4], help='比較する action_repeat')
+    parser.add_argument('--steps', type=int, default=3000, help='速度の計測に使う env.step の回数')
+    parser.add_argument('--models', type=str, nargs='*', default=None,
+                        help='--repeats と同じ順の、各 action_repeat で学習したモデル')
+    parser.add_argument('--episodes', type=int, default=10, help='モデルごとの評価エピソード数')
+    parser.add_argument('--max-sim-sec', type=float, default=20.0, help='1 エピソードの最大 sim 時間 [s]')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.models and len(args.models) != len(args.repeats):
+        parser.error('--models は --repeats と同じ数だけ指定してください')
+
+    print(f"{'k':>3} {'sim s / wall s':>15} {'us / tick':>10} {'raycasts / s':>13}")
+    baseline = None
+    for k in args.repeats:
+        sim_per_wall, us_per_tick, step_dt = bench_speed(k, args.steps, args.seed)
+        if baseline is None:
+            baseline = sim_per_wall
+        print(f"{k:3d} {sim_per_wall:15.1f} {us_per_tick:10.1f} {1.0 / step_dt:13.1f}"
+              f"   ({sim_per_wall / baseline:.2f}x)")
+
+    if args.models:
+        print(f"\n{'k':>3} {'avg reward':>11} {'avg dist [m]':>13} {'collision':>10}  model")
+        for k, model_path in zip(args.repeats, args.models):
+            reward, distance, collision_rate = evaluate(model_path, k, args.episodes, args.max_sim_sec, args.seed)
+            print(f"{k:3d} {reward:11.1f} {distance:13.1f} {collision_rate:10.1%}  {model_path}")
+
+
+if __name__ == '__main__':
+    main()
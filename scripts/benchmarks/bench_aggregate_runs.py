@@ -0,0 +1,68 @@
+"""
+学習ログ集計 (scripts/utils/aggregate_runs.py) のベンチマーク
+
+--runs 個のランに --records レコードずつの合成 event ファイルを作り、以下の所要時間を比較します。
+
+    cold          : キャッシュなし（全ファイルを解析）
+    warm          : 変更なし（キャッシュの読み込みのみ）
+    1 run grew    : 1 ランにだけ --append レコードを追記した後（そのファイルは続きだけを読む）
+
+使い方:
+    python3 scripts/benchmarks/bench_aggregate_runs.py --runs 40 --records 50000 --workers 1 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from bench_tfevents import SB3_TAGS, synthetic_records
+from utils.aggregate_runs import CACHE_DIR_NAME, load_runs, summarize
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='学習ログ集計のベンチマーク')
+    parser.add_argument('--runs', type=int, default=40)
+    parser.add_argument('--records', type=int, default=50000, help='1 ランあたりのレコード数')
+    parser.add_argument('--append', type=int, default=1000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp()
+    try:
+        body = synthetic_records(0, args.records, SB3_TAGS)
+        for run in range(args.runs):
+            os.makedirs(os.path.join(log_dir, f"PPO_{run}"))
+            with open(os.path.join(log_dir, f"PPO_{run}", "events.out.tfevents.1700000000.bench.1.0"), "wb") as f:
+                f.write(body)
+        size = sum(os.path.getsize(os.path.join(r, n)) for r, _, ns in os.walk(log_dir) for n in ns) / 1e6
+        print(f"{args.runs} ラン x {args.records} レコード ({size:.0f} MB)\n")
+
+        def aggregate(workers):
+            summarize(load_runs(log_dir, workers=workers)[0])
+
+        for workers in args.workers:
+            shutil.rmtree(os.path.join(log_dir, CACHE_DIR_NAME), ignore_errors=True)
+            print(f"cold (workers={workers}): {timed(lambda: aggregate(workers)):.2f} s")
+        print(f"warm: {timed(lambda: aggregate(1)):.3f} s")
+        with open(os.path.join(log_dir, "PPO_0", "events.out.tfevents.1700000000.bench.1.0"), "ab") as f:
+            f.write(synthetic_records(args.records, args.append, SB3_TAGS))
+        print(f"1 run grew (+{args.append}): {timed(lambda: aggregate(1)):.3f} s")
+    finally:
+        shutil.rmtree(log_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+非同期の環境プール（src/env_pool.py）と同期的な stepping の比較ベンチマーク
+
+環境数 N ごとに、ランダムアクションで回して env-steps/sec とワーカーの稼働率を表示します。
+
+    --env synthetic : 1 ステップに --step-ms（±--jitter の一様乱数）かかり、エピソード終了時の reset に
+                      --reset-ms かかる合成環境（f110_gym 不要。reset や遅い step による待ちを見る）
+    --env f1tenth   : make_env で作る実際の F1TenthRL（コンテナ内で実行）
+
+比較する構成:
+    subproc       : SubprocVecEnv（同期。参考値で稼働率は測らない）
+    pool M=N      : AsyncEnvPool で全環境がそろうまで待つ（同期と同じ動き）
+    pool M=N/2    : AsyncEnvPool で先に終わった半分だけ受け取る
+
+使い方:
+    python3 scripts/benchmarks/bench_env_pool.py --num-envs 8 16 32 --steps 2000
+    python3 scripts/benchmarks/bench_env_pool.py --env f1tenth --num-envs 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+import gymnasium
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+from src.env_pool import AsyncEnvPool
+
+
+class SyntheticEnv(gymnasium.Env):
+    """step と reset に決まった時間がかかる合成環境"""
+
+    def __init__(self, step_ms, jitter, reset_ms, seed, obs_dim=1082):
+        self.observation_space = gymnasium.spaces.Box(-30, 30, (obs_dim,), np.float32)
+        self.action_space = gymnasium.spaces.Box(-1, 1, (2,), np.float32)
+        self.step_ms = step_ms
+        self.jitter = jitter
+        self.reset_ms = reset_ms
+        self.rng = np.random.default_rng(seed)
+        self._obs = np.zeros(obs_dim, dtype=np.float32)
+        self._remaining = 0
+
+    def reset(self, seed=None, options=None):
+        time.sleep(self.reset_ms * 1e-3)
+        self._remaining = int(self.rng.integers(50, 300))
+        return self._obs.copy(), {}
+
+    def step(self, action):
+        time.sleep(self.step_ms * 1e-3 * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+        self._remaining -= 1
+        return self._obs.copy(), 0.1, self._remaining <= 0, False, {}
+
+
+def make_env_fns(args, num_envs):
+    if args.env == "synthetic":
+        return [lambda rank=rank: SyntheticEnv(args.step_ms, args.jitter, args.reset_ms, args.seed + rank)
+                for rank in range(num_envs)]
+    import config
+    from src.vec_env import make_env
+    return [make_env(config.MAP_PATH, rank, args.seed, include_raw_scan=False) for rank in range(num_envs)]
+
+
+def run_subproc(args, num_envs, rng):
+    env = SubprocVecEnv(make_env_fns(args, num_envs))
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(args.steps // num_envs):
+        env.step(rng.uniform(-1.0, 1.0, size=(num_envs, 2)).astype(np.float32))
+    elapsed = time.perf_counter() - start
+    env.close()
+    return (args.steps // num_envs) * num_envs / elapsed, None
+
+
+def run_pool(args, num_envs, batch_size, rng):
+    pool = AsyncEnvPool(make_env_fns(args, num_envs), batch_size=batch_size)
+    pool.async_reset()
+    while True:
+        _, _, _, _, env_ids = pool.recv()
+        # reset 直後の受け取りは数えないよう、stats() の steps で終了を判定する
+        if pool.stats()["steps"] >= args.steps:
+            break
+        pool.send(rng.uniform(-1.0, 1.0, size=(len(env_ids), 2)).astype(np.float32), env_ids)
+    stats = pool.stats()
+    pool.close()
+    return stats["steps_per_sec"], stats["utilization"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='非同期の環境プールと同期的な stepping の比較ベンチマーク')
+    parser.add_argument('--env', type=str, default='synthetic', choices=['synthetic', 'f1tenth'], help='計測に使う環境')
+    parser.add_argument('--num-envs', type=int, nargs='+', default=[8, 16, 32], help='環境数 N')
+    parser.add_argument('--steps', type=int, default=2000, help='計測する env-steps の合計')
+    parser.add_argument('--step-ms', type=float, default=1.0, help='合成環境の 1 ステップの時間 [ms]')
+    parser.add_argument('--jitter', type=float, default=0.5, help='合成環境の step 時間のばらつき（±割合）')
+    parser.add_argument('--reset-ms', type=float, default=20.0, help='合成環境の reset の時間 [ms]')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'mode':>12} {'N':>4} {'M':>4} {'steps/s':>10} {'vs sync':>8} {'util':>6}")
+    for num_envs in args.num_envs:
+        sps, _ = run_subproc(args, num_envs, rng)
+        print(f"{'subproc':>12} {num_envs:4d} {num_envs:4d} {sps:10.1f} {'':>8} {'-':>6}")
+        baseline = None
+        for batch_size in (num_envs, max(1, num_envs // 2)):
+            sps, util = run_pool(args, num_envs, batch_size, rng)
+            if baseline is None:
+                baseline = sps
+            print(f"{'pool':>12} {num_envs:4d} {batch_size:4d} {sps:10.1f} {sps / baseline:7.2f}x {util:6.1%}")
+
+
+if __name__ == '__main__':
+    main()
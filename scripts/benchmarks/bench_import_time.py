@@ -0,0 +1,137 @@
+"""
+各エントリポイントの import 時間のベンチマーク（回帰チェック付き）
+
+エントリポイントを新しい Python プロセスで `python -X importtime` を付けて import し
+（main() は実行しない）、以下を確認します。
+
+    time      : そのモジュールの import にかかった時間（cumulative、複数回の中央値）
+    budget    : 許容する import 時間。超えた場合は FAIL
+    forbidden : モジュール読み込み時に import してはいけない重い依存（gym / SB3 / matplotlib など）。
+                読み込まれていた場合は FAIL
+
+どれか 1 つでも FAIL の場合は終了コード 1 を返すため、CI の回帰チェックとして使えます。
+予算はマシンの速度に依存するため、遅いマシンでは --budget-scale で緩めてください。
+
+使い方:
+    python3 scripts/benchmarks/bench_import_time.py
+    python3 scripts/benchmarks/bench_import_time.py --entry evaluate src.f1_env --top 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+_SB3 = {"stable_baselines3", "torch"}
+_PLOT = {"matplotlib", "imageio"}
+_SIM = {"f110_gym", "numba"}
+
+# エントリポイント: (import するモジュール名, 予算 [ms], 読み込み時に import してはいけないモジュール)
+ENTRY_POINTS = {
+    "train": ("train", 3000, _PLOT | _SIM),
+    "evaluate": ("evaluate", 500, _SB3 | _PLOT | _SIM),
+    "enjoy_wide": ("enjoy_wide", 600, _SB3 | _PLOT | _SIM),
+    "export_policy": ("export_policy", 200, _SB3 | _PLOT | _SIM | {"gym"}),
+    "verify_workflow": ("verify_workflow", 500, _SB3 | _PLOT | _SIM),
+    "src.f1_env": ("src.f1_env", 500, _SB3 | _PLOT | _SIM),
+    "src.vec_env": ("src.vec_env", 50, _SB3 | _PLOT | _SIM | {"gym"}),
+    "src.policy_runtime": ("src.policy_runtime", 200, _SB3 | _PLOT | _SIM | {"gym"}),
+}
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime の出力を [(モジュール名, self [us], cumulative [us], 深さ)] に変換する
+
+    出力の各行は "import time: <self> | <cumulative> | <名前>" で、名前の字下げが import の深さを表す。
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        raw_name = fields[2].rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        records.append((raw_name.strip(), int(fields[0]), int(fields[1]), depth))
+    return records
+
+
+def measure(module):
+    """新しいプロセスで module を 1 回 import し、(cumulative [ms], 読み込まれたモジュール, 記録) を返す"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([PROJECT_ROOT, SCRIPT_DIR, env.get("PYTHONPATH", "")])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, cwd=PROJECT_ROOT)
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(last)
+    records = parse_importtime(proc.stderr)
+    total = next(cum for name, _, cum, _ in reversed(records) if name == module)
+    loaded = {name.split(".")[0] for name, _, _, _ in records}
+    return total / 1000.0, loaded, records
+
+
+def top_imports(records, module, count):
+    """module が直接 import したもののうち、時間のかかった順に count 件を返す"""
+    children = []
+    target_depth = None
+    # 出力は子が先・親が後に並ぶため、後ろから走査して module 直下の子を集める
+    for name, _, cum, depth in reversed(records):
+        if target_depth is None:
+            if name == module:
+                target_depth = depth
+            continue
+        if depth <= target_depth:
+            break
+        if depth == target_depth + 1:
+            children.append((name, cum / 1000.0))
+    return sorted(children, key=lambda c: -c[1])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='エントリポイントの import 時間のベンチマーク')
+    parser.add_argument('--entry', type=str, nargs='+', default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（中央値を使用）')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='予算の倍率（遅いマシン用）')
+    parser.add_argument('--top', type=int, default=5, help='時間のかかった直接の import を表示する件数')
+    args = parser.parse_args()
+
+    failed = []
+    print(f"{'entry':>20}{'time [ms]':>12}{'budget [ms]':>13}  result")
+    for entry in args.entry:
+        module, budget, forbidden = ENTRY_POINTS[entry]
+        budget *= args.budget_scale
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{entry:>20}{'-':>12}{budget:13.0f}  ERROR ({e})")
+            failed.append(entry)
+            continue
+
+        elapsed = float(np.median([r[0] for r in runs]))
+        heavy = sorted(runs[0][1] & forbidden)
+        problems = []
+        if elapsed > budget:
+            problems.append("予算超過")
+        if heavy:
+            problems.append("重い依存を import: " + ", ".join(heavy))
+        print(f"{entry:>20}{elapsed:12.1f}{budget:13.0f}  {'FAIL (' + '; '.join(problems) + ')' if problems else 'OK'}")
+        if problems:
+            failed.append(entry)
+        for name, ms in top_imports(runs[0][2], module, args.top):
+            print(f"{'':>24}{ms:8.1f} ms  {name}")
+
+    if failed:
+        print(f"\nFAIL: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nすべてのエントリポイントが予算内です。")
+
+
+if __name__ == '__main__':
+    main()
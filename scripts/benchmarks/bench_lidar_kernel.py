@@ -0,0 +1,81 @@
+"""
+LiDAR 前処理カーネルのベンチマーク
+
+LIDAR_DOWNSAMPLE_FACTOR ごとに、以下の実装の 1 回あたりの処理時間を比較します。
+
+    reference : 変更前の reshape().min() + 正規化 + concatenate
+    numpy     : src.lidar_kernel.process_lidar_numpy
+    numba     : src.lidar_kernel.process_lidar_numba（Numba がある場合のみ）
+
+使い方:
+    python3 scripts/benchmarks/bench_lidar_kernel.py --batch 1 32 --repeat 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from src import lidar_kernel
+from src.lidar_kernel import normalization_params
+
+# 1080 の約数のうち、実用的なダウンサンプリング率
+FACTORS = [1, 2, 3, 4, 5, 6, 8, 9, 10, 12, 15, 20]
+PARAMS = normalization_params(True, 4.555, 3.894, -0.012, 0.096)
+
+
+def reference(scans, prev, cur, lidar_out, residual_out, factor, params, tmp=None):
+    """変更前の F1TenthRL._get_obs と同じ計算"""
+    lm, ls, rm, rs = params
+    size = scans.shape[-1] // factor
+    downsampled = scans.reshape(scans.shape[:-1] + (size, factor)).min(axis=-1)
+    delta = downsampled - prev
+    return np.concatenate([(downsampled - lm) / ls, (delta - rm) / rs], axis=-1).astype(np.float32)
+
+
+def bench(kernel, batch, factor, repeat):
+    rng = np.random.default_rng(0)
+    size = 1080 // factor
+    shape = (batch, 1080) if batch > 1 else (1080,)
+    scans = rng.uniform(0.1, 30.0, size=shape)
+    prev = rng.uniform(0.1, 30.0, size=shape[:-1] + (size,))
+    cur = np.empty_like(prev)
+    tmp = np.empty_like(prev)
+    obs = np.empty(shape[:-1] + (2 * size,), dtype=np.float32)
+    args = (scans, prev, cur, obs[..., :size], obs[..., size:], factor, PARAMS, tmp)
+    kernel(*args)  # JIT コンパイル・ウォームアップ
+    start = time.perf_counter()
+    for _ in range(repeat):
+        kernel(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LiDAR 前処理カーネルのベンチマーク')
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 32], help='バッチサイズ (環境数)')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    kernels = [("reference", reference), ("numpy", lidar_kernel.process_lidar_numpy)]
+    if lidar_kernel.process_lidar_numba is not None:
+        kernels.append(("numba", lidar_kernel.process_lidar_numba))
+    print(f"BACKEND (自動選択): {lidar_kernel.BACKEND}")
+
+    header = "".join(f"{name + ' [us]':>16}" for name, _ in kernels)
+    for batch in args.batch:
+        print(f"\n--- batch = {batch} ---")
+        print(f"{'factor':>6}{header}{'speed-up':>10}")
+        for factor in FACTORS:
+            times = [bench(kernel, batch, factor, args.repeat) for _, kernel in kernels]
+            row = "".join(f"{t:16.2f}" for t in times)
+            print(f"{factor:6d}{row}{times[0] / min(times[1:]):9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+マップの距離場（src/map_index.py）のベンチマーク
+
+--size 四方の合成コース（幅 --width [m] の周回路、解像度 0.05 m）を作り、以下の時間を計測します。
+
+    edt (numpy)         : NumPy 実装の距離変換
+    edt (scipy)         : scipy.ndimage の距離変換（scipy がある場合）
+    build               : 距離場・コースの向き・索引の計算（キャッシュなしで環境を生成したときに相当）
+    load (cache)        : キャッシュ済みの .mapindex.npz の読み込み（2 回目以降の環境生成に相当）
+    sample_poses        : 壁から --clearance [m] 以上の位置を --poses 個サンプリング
+    rejection (pixel)   : 比較用。ランダムな座標を 1 つずつ引き、周囲の画素を調べて棄却する素朴な方法
+
+使い方:
+    python3 scripts/benchmarks/bench_map_index.py --size 2000 --poses 10000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from src.map_index import FREE_THRESHOLD, MapIndex, _edt_numpy
+
+RESOLUTION = 0.05
+
+
+def synthetic_track(size, width_m):
+    """外周と内周の壁に挟まれた楕円の周回路"""
+    yy, xx = np.mgrid[:size, :size]
+    r = np.hypot((xx - size / 2) / (size * 0.45), (yy - size / 2) / (size * 0.3))
+    half = width_m / RESOLUTION / (size * 0.45) / 2
+    img = np.full((size, size), 205, dtype=np.uint8)
+    img[np.abs(r - 0.8) < half + 0.01] = 0
+    img[np.abs(r - 0.8) < half] = 254
+    return img
+
+
+def rejection_sample(img, n, clearance_px, rng):
+    """ランダムな画素を引き、半径 clearance_px の円内がすべて空きなら採用する"""
+    height, width = img.shape
+    r = int(np.ceil(clearance_px))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    disk = dy ** 2 + dx ** 2 <= clearance_px ** 2
+    poses = []
+    while len(poses) < n:
+        row, col = rng.randint(r, height - r), rng.randint(r, width - r)
+        if np.all(img[row - r:row + r + 1, col - r:col + r + 1][disk] > FREE_THRESHOLD):
+            poses.append((row, col))
+    return poses
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='マップの距離場のベンチマーク')
+    parser.add_argument('--size', type=int, default=2000, help='マップの一辺のセル数')
+    parser.add_argument('--width', type=float, default=2.0, help='コース幅 [m]')
+    parser.add_argument('--clearance', type=float, default=0.3, help='壁までの最小距離 [m]')
+    parser.add_argument('--poses', type=int, default=10000, help='サンプリングする位置の数')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    map_path = os.path.join(tmp, "track")
+    try:
+        img = synthetic_track(args.size, args.width)
+        Image.fromarray(img).save(map_path + ".pgm")
+        with open(map_path + ".yaml", "w") as f:
+            f.write(f"image: track.pgm\nresolution: {RESOLUTION}\norigin: [0.0, 0.0, 0.0]\n")
+        print(f"{args.size}x{args.size} セル, 空きセル {np.count_nonzero(img > FREE_THRESHOLD)}\n")
+        print(f"{'':>30}{'seconds':>10}")
+
+        def report(name, seconds):
+            print(f"{name:>30}{seconds:10.4f}")
+
+        free = img > FREE_THRESHOLD
+        report("edt (numpy)", timed(lambda: _edt_numpy(free)))
+        try:
+            from scipy.ndimage import distance_transform_edt
+            report("edt (scipy)", timed(lambda: distance_transform_edt(free)))
+        except ImportError:
+            print(f"{'edt (scipy)':>30}  (scipy が無いためスキップ)")
+        report("build", timed(lambda: MapIndex.build(map_path)))
+
+        MapIndex.load(map_path)
+        report("load (cache)", timed(lambda: MapIndex.load(map_path)))
+        index = MapIndex.load(map_path)
+        rng = np.random.RandomState(0)
+        report(f"sample_poses ({args.poses})", timed(lambda: index.sample_poses(args.poses, args.clearance, rng)))
+        report(f"rejection (pixel) ({args.poses})",
+               timed(lambda: rejection_sample(img, args.poses, args.clearance / RESOLUTION, rng)))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
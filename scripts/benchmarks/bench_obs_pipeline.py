@@ -0,0 +1,127 @@
+"""
+F1TenthRL._get_obs の 1 ステップあたりのレイテンシとメモリ確保量を計測するベンチマーク
+
+変更前の実装（リスト + np.concatenate）と、事前確保バッファに書き込む現在の実装を
+同じ LiDAR 列で比較します。シミュレータは使わず、観測計算だけを切り出して計測します。
+
+    legacy : 変更前の _get_obs（比較用にこのファイル内に保持）
+    copy   : 現在の _get_obs（share_obs_buffer=False, 返り値のみコピー）
+    shared : 現在の _get_obs（share_obs_buffer=True, 確保なし）
+
+使い方（コンテナ内で実行）:
+    python3 scripts/benchmarks/bench_obs_pipeline.py --steps 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+import config
+from src.env_config import load_env_config
+from src.f1_env import F1TenthRL
+
+
+def legacy_get_obs(self, raw_obs):
+    """変更前の F1TenthRL._get_obs（比較用）"""
+    scans = raw_obs['scans'][0]
+    downsampled = scans.reshape(self.lidar_size, config.LIDAR_DOWNSAMPLE_FACTOR).min(axis=1)
+    delta_lidar = downsampled - self.legacy_prev_lidar
+    self.legacy_prev_lidar = downsampled.copy()
+    parts = [downsampled]
+    if config.INCLUDE_LIDAR_RESIDUAL:
+        parts.append(delta_lidar)
+    if config.INCLUDE_VEHICLE_STATE:
+        state = self.env.sim.agents[0].state
+        vel = state[3] / config.MAX_SPEED
+        steer = state[2]
+        parts.append(np.array([vel, steer], dtype=np.float32))
+    if config.NORMALIZE_OBSERVATIONS:
+        norm_parts = []
+        lidar_norm = (downsampled - config.LIDAR_MEAN) / config.LIDAR_STD
+        norm_parts.append(lidar_norm)
+        if config.INCLUDE_LIDAR_RESIDUAL:
+            delta_norm = (delta_lidar - config.LIDAR_RESIDUAL_MEAN) / config.LIDAR_RESIDUAL_STD
+            norm_parts.append(delta_norm)
+        if config.INCLUDE_VEHICLE_STATE:
+            state_arr = np.array([vel, steer], dtype=np.float32)
+            state_norm = (state_arr - config.VEHICLE_STATE_MEAN) / config.VEHICLE_STATE_STD
+            norm_parts.append(state_norm)
+        return np.concatenate(norm_parts).astype(np.float32)
+    return np.concatenate(parts).astype(np.float32)
+
+
+def make_env(share_obs_buffer):
+    """シミュレータを起動せずに観測計算だけを行う F1TenthRL を作る"""
+    env = F1TenthRL.__new__(F1TenthRL)
+    env.env_config = load_env_config()
+    env.lidar_size = env.env_config.lidar_size
+    env.state_size = 2 if env.env_config.include_vehicle_state else 0
+    env.residual_size = env.lidar_size if env.env_config.include_lidar_residual else 0
+    env._init_obs_buffers(env.lidar_size + env.residual_size + env.state_size, share_obs_buffer)
+    env.legacy_prev_lidar = np.zeros(env.lidar_size)
+    agent = SimpleNamespace(state=np.array([0.0, 0.0, 0.05, 1.5, 0.0, 0.0, 0.0]))
+    env.env = SimpleNamespace(sim=SimpleNamespace(agents=[agent]))
+    return env
+
+
+def run(env, fn, raw_obs_list):
+    n = len(raw_obs_list)
+    for raw_obs in raw_obs_list[:100]:
+        fn(env, raw_obs)
+
+    start = time.perf_counter()
+    for raw_obs in raw_obs_list:
+        fn(env, raw_obs)
+    latency_us = (time.perf_counter() - start) / n * 1e6
+
+    tracemalloc.start()
+    base_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for raw_obs in raw_obs_list:
+        fn(env, raw_obs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency_us, current - base_current, peak - base_current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='観測計算パイプラインのベンチマーク')
+    parser.add_argument('--steps', type=int, default=100000, help='計測するステップ数')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # 同じ配列を循環させて、LiDAR 生成自体のコストやメモリを計測に含めない
+    pool = [{'scans': [rng.uniform(0.2, 10.0, size=1080)]} for _ in range(64)]
+    raw_obs_list = [pool[i % len(pool)] for i in range(args.steps)]
+
+    # 結果が一致することを先に確認する
+    check_legacy = make_env(False)
+    check_new = make_env(False)
+    for raw_obs in pool:
+        expected = legacy_get_obs(check_legacy, raw_obs)
+        actual = F1TenthRL._get_obs(check_new, raw_obs)
+        assert np.array_equal(expected, actual), "legacy と現在の実装で観測が一致しません"
+
+    print(f"obs_dim={check_new._obs_buf.shape[0]}, {args.steps} steps")
+    print(f"{'mode':>8} {'us/step':>9} {'残留 [B]':>10} {'ピーク [B]':>11}")
+    modes = [
+        ("legacy", make_env(False), legacy_get_obs),
+        ("copy", make_env(False), F1TenthRL._get_obs),
+        ("shared", make_env(True), F1TenthRL._get_obs),
+    ]
+    for name, env, fn in modes:
+        latency_us, retained, peak = run(env, fn, raw_obs_list)
+        print(f"{name:>8} {latency_us:9.2f} {retained:10d} {peak:11d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+NumPy 推論ランタイムと stable-baselines3 の比較ベンチマーク
+
+    cold start : 新しい Python プロセスで import + モデル読み込み + 初回 predict までの時間と最大メモリ (RSS)
+    latency    : 1 回の predict(deterministic=True) あたりの時間（1 本の観測 / バッチ）
+
+使い方:
+    python3 scripts/export_policy.py --model sharing/ppo_f1_custom_map_steps25000000_arch2.zip --out /tmp/actor.npz
+    python3 scripts/benchmarks/bench_policy_runtime.py --model sharing/ppo_f1_custom_map_steps25000000_arch2.zip --npz /tmp/actor.npz
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from src.policy_runtime import NumpyPolicy
+
+# 子プロセスで実行するコード。import から初回 predict までを計測して JSON で返す
+_COLD_START = {
+    "sb3": """
+from stable_baselines3 import PPO
+model = PPO.load({path!r}, device="cpu")
+model.predict(np.zeros(model.observation_space.shape, dtype=np.float32), deterministic=True)
+""",
+    "numpy": """
+from src.policy_runtime import NumpyPolicy
+policy = NumpyPolicy.load({path!r})
+policy.predict(np.zeros(policy.obs_dim, dtype=np.float32))
+""",
+}
+
+_CHILD = """
+import time
+start = time.perf_counter()
+import resource, sys, json
+import numpy as np
+sys.path.insert(0, {root!r})
+{body}
+elapsed = time.perf_counter() - start
+# ru_maxrss は fork 元（このベンチマーク自身）の値を引き継ぐため、Linux では VmHWM を使う
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"sec": elapsed, "rss_mb": rss_kb / 1024}}))
+"""
+
+
+def cold_start(kind, path, repeat):
+    """新しいプロセスでの起動時間（中央値）と最大 RSS を返す"""
+    code = _CHILD.format(root=PROJECT_ROOT, body=_COLD_START[kind].format(path=path))
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return float(np.median([r["sec"] for r in results])), max(r["rss_mb"] for r in results)
+
+
+def latency(predict, obs, repeat):
+    """1 回の predict あたりの時間 [us]"""
+    predict(obs)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predict(obs)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NumPy 推論ランタイムと SB3 の比較ベンチマーク')
+    parser.add_argument('--model', type=str, required=True, help='SB3 モデル (.zip)')
+    parser.add_argument('--npz', type=str, required=True, help='export_policy.py で書き出した .npz')
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 32], help='predict に渡す観測数')
+    parser.add_argument('--repeat', type=int, default=2000, help='latency の繰り返し回数')
+    parser.add_argument('--cold-repeat', type=int, default=3, help='cold start の計測回数')
+    args = parser.parse_args()
+
+    from stable_baselines3 import PPO
+    model = PPO.load(args.model, device="cpu")
+    policy = NumpyPolicy.load(args.npz)
+    runtimes = [
+        ("sb3", lambda obs: model.predict(obs, deterministic=True)),
+        ("numpy", policy.predict),
+    ]
+
+    print("--- cold start (import + load + 初回 predict) ---")
+    print(f"{'runtime':>8}{'time [s]':>12}{'max RSS [MB]':>14}")
+    for kind, path in (("sb3", args.model), ("numpy", args.npz)):
+        sec, rss = cold_start(kind, path, args.cold_repeat)
+        print(f"{kind:>8}{sec:12.3f}{rss:14.1f}")
+
+    rng = np.random.default_rng(0)
+    print("\n--- latency (predict 1 回あたり) ---")
+    print(f"{'batch':>6}{'sb3 [us]':>12}{'numpy [us]':>12}{'speed-up':>10}{'max |diff|':>12}")
+    for batch in args.batch:
+        shape = (policy.obs_dim,) if batch == 1 else (batch, policy.obs_dim)
+        obs = rng.uniform(0.0, 30.0, size=shape).astype(np.float32)
+        times = [latency(predict, obs, args.repeat) for _, predict in runtimes]
+        diff = np.max(np.abs(runtimes[0][1](obs)[0] - runtimes[1][1](obs)[0]))
+        print(f"{batch:6d}{times[0]:12.1f}{times[1]:12.1f}{times[0] / times[1]:9.1f}x{diff:12.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+MapRenderer (matplotlib) と FastMapRenderer (NumPy) の描画速度のベンチマーク
+
+マップ上を周回する合成の走行データで update() を繰り返し、1 フレームあたりの時間と frames/sec、
+最後のフレームの画素差（平均絶対誤差）を表示します。--save を指定すると 2 つのフレームを横に並べた PNG を保存します。
+
+使い方:
+    python3 scripts/benchmarks/bench_renderer.py --frames 200 --save /tmp/renderer_compare.png
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from utils.render import RENDERERS
+
+
+def synthetic_run(frames, seed=0):
+    """原点付近を周回する車両状態と LiDAR を生成する"""
+    rng = np.random.default_rng(seed)
+    for i in range(frames):
+        theta = i / 20
+        car_state = (1.0 + 2.0 * np.cos(theta), 2.0 + 2.0 * np.sin(theta), theta + np.pi / 2, 1.5)
+        scans = 2.0 + rng.random(1080) * 2.0
+        yield car_state, scans, (0.1, 0.2), 1.0, i, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MapRenderer の描画速度のベンチマーク')
+    parser.add_argument('--map', type=str, default=os.path.join(PROJECT_ROOT, 'my_maps', 'my_map'),
+                        help='マップのパス（拡張子なし）')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--renderers', type=str, nargs='+', default=list(RENDERERS), choices=list(RENDERERS))
+    parser.add_argument('--save', type=str, default=None, help='比較画像 (PNG) の保存先')
+    args = parser.parse_args()
+
+    last_frames = {}
+    times = {}
+    print(f"{'renderer':>12}{'ms/frame':>10}{'frames/s':>10}")
+    for name in args.renderers:
+        renderer = RENDERERS[name](args.map)
+        start = time.perf_counter()
+        for record in synthetic_run(args.frames):
+            frame = renderer.update(*record)
+        times[name] = (time.perf_counter() - start) / args.frames
+        last_frames[name] = np.array(frame)
+        renderer.close()
+        print(f"{name:>12}{times[name] * 1e3:10.2f}{1 / times[name]:10.1f}")
+
+    if len(last_frames) == 2:
+        a, b = (last_frames[name].astype(np.int16) for name in args.renderers)
+        print(f"\nspeed-up: {times[args.renderers[0]] / times[args.renderers[1]]:.1f}x, "
+              f"平均画素差: {np.abs(a - b).mean():.2f} / 255")
+        if args.save:
+            from PIL import Image
+            Image.fromarray(np.concatenate(list(last_frames.values()), axis=1)).save(args.save)
+            print(f"保存完了: {args.save}")
+
+
+if __name__ == '__main__':
+    main()
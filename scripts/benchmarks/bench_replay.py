@@ -0,0 +1,67 @@
+"""
+記録からのリプレイ描画 (render_replay.py) の並列化のベンチマーク
+
+合成の走行記録（--steps ステップ）を作り、ワーカー数を変えて GIF/MP4 を書き出すまでの時間と frames/sec を表示します。
+
+使い方:
+    python3 scripts/benchmarks/bench_replay.py --steps 1500 --workers 1 2 4 --renderer fast
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from render_replay import render_replay
+from utils.render import RENDERERS
+from utils.replay import RolloutRecorder
+
+
+def synthetic_rollout(path, map_path, steps, seed=0):
+    """原点付近を周回する走行記録を保存する"""
+    rng = np.random.default_rng(seed)
+    recorder = RolloutRecorder(map_path)
+    for i in range(steps):
+        theta = i / 40
+        car_state = (1.0 + 2.0 * np.cos(theta), 2.0 + 2.0 * np.sin(theta), theta + np.pi / 2, 1.5)
+        recorder.append(car_state, 2.0 + rng.random(1080) * 2.0, (0.1, 0.2), 1.0, False)
+    recorder.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='リプレイ描画の並列化のベンチマーク')
+    parser.add_argument('--map', type=str, default=os.path.join(PROJECT_ROOT, 'my_maps', 'my_map'),
+                        help='マップのパス（拡張子なし）')
+    parser.add_argument('--steps', type=int, default=1500)
+    parser.add_argument('--stride', type=int, default=2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--renderer', type=str, default='fast', choices=list(RENDERERS))
+    parser.add_argument('--format', type=str, default='gif', choices=['gif', 'mp4'])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    rollout_path = os.path.join(tmp, 'rollout.npz')
+    synthetic_rollout(rollout_path, args.map, args.steps)
+
+    print(f"{'workers':>8}{'seconds':>10}{'frames/s':>10}")
+    baseline = None
+    for workers in args.workers:
+        save_path = os.path.join(tmp, f'w{workers}.{args.format}')
+        start = time.perf_counter()
+        frames = render_replay(rollout_path, save_path, renderer=args.renderer, stride=args.stride,
+                               workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:10.2f}{frames / elapsed:10.1f}   ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
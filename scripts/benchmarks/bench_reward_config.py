@@ -0,0 +1,79 @@
+"""
+報酬計算 1 ステップあたりのコストを RewardConfig の扱い方ごとに比較するベンチマーク
+
+    legacy : 毎ステップ sys.path に追加して RewardConfig を作り直す（従来の reward_config=None の挙動）
+    cached : config.py から読み込んだ RewardConfig のキャッシュを使う（現在の reward_config=None）
+    held   : 環境が保持する RewardConfig を渡す（F1TenthRL.step の挙動）
+
+使い方:
+    python3 scripts/benchmarks/bench_reward_config.py --steps 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from src import rewards
+from src.rewards import RewardConfig, calculate_reward, load_reward_config
+
+
+def _legacy_load_default_config():
+    """変更前の _load_default_config() と同じ処理（比較用）"""
+    sys.path.append(os.path.join(os.path.dirname(rewards.__file__), '..', 'scripts'))
+    import config
+    return RewardConfig(
+        reward_collision=config.REWARD_COLLISION,
+        reward_survival=config.REWARD_SURVIVAL,
+        reward_front_weight=config.REWARD_FRONT_WEIGHT,
+        reward_speed_weight=config.REWARD_SPEED_WEIGHT,
+        reward_centrality_weight=config.REWARD_CENTRALITY_WEIGHT,
+        reward_distance_weight=config.REWARD_DISTANCE_WEIGHT,
+        reward_progress_weight=config.REWARD_PROGRESS_WEIGHT,
+        max_speed=config.MAX_SPEED,
+    )
+
+
+def run(mode, steps, scans, action):
+    held = load_reward_config()
+    path_len = len(sys.path)
+    start = time.perf_counter()
+    for i in range(steps):
+        if mode == "legacy":
+            cfg = _legacy_load_default_config()
+        elif mode == "cached":
+            cfg = None
+        else:
+            cfg = held
+        calculate_reward(scans, action, False, 2.0, 0.0, 0.0, 0.01 * i, 0.0, reward_config=cfg)
+    elapsed = time.perf_counter() - start
+    return elapsed / steps * 1e6, len(sys.path) - path_len
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RewardConfig キャッシュのベンチマーク')
+    parser.add_argument('--steps', type=int, default=200000, help='計測するステップ数')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scans = rng.uniform(0.5, 10.0, size=1080)
+    action = np.array([0.1, 0.5], dtype=np.float32)
+
+    print(f"{args.steps} steps")
+    print(f"{'mode':>8} {'us/step':>9} {'sys.path 増加':>14}")
+    results = {}
+    for mode in ("legacy", "cached", "held"):
+        us, growth = run(mode, args.steps, scans, action)
+        results[mode] = us
+        print(f"{mode:>8} {us:9.2f} {growth:14d}")
+    print(f"speed-up (legacy -> held): {results['legacy'] / results['held']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
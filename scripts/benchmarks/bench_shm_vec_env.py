@@ -0,0 +1,116 @@
+"""
+共有メモリ VecEnv（src/shm_vec_env.py）と SubprocVecEnv（pickle + パイプ）の比較ベンチマーク
+
+ワーカー数ごとに、ランダムアクションで VecEnv.step を回して env-steps/sec を表示します。
+
+    --env synthetic : F1TenthRL と同じ大きさの観測 (obs_dim float32) と info['raw_scan'] (1080 float64) を返し、
+                      1 ステップに --step-us [us] だけ計算する合成環境（f110_gym 不要。受け渡しのコストを見る）
+    --env f1tenth   : make_vec_env で作る実際の F1TenthRL（コンテナ内で実行）
+
+比較する構成:
+    subproc (raw_scan)  : 従来どおり info に生の LiDAR を入れて pickle で送る
+    subproc             : info から生の LiDAR を省いて pickle で送る（include_raw_scan=False）
+    shm                 : 観測・報酬・終了フラグを共有メモリで受け渡す（info は終了時のみ）
+
+使い方:
+    python3 scripts/benchmarks/bench_shm_vec_env.py --workers 8 16 32 --steps 300
+    python3 scripts/benchmarks/bench_shm_vec_env.py --env f1tenth --workers 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+import gymnasium
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+from src.shm_vec_env import SharedMemoryVecEnv
+
+
+class SyntheticEnv(gymnasium.Env):
+    """F1TenthRL と同じ大きさのデータを返す合成環境"""
+
+    def __init__(self, obs_dim, step_us, raw_scan, episode_steps=500):
+        self.observation_space = gymnasium.spaces.Box(-30, 30, (obs_dim,), np.float32)
+        self.action_space = gymnasium.spaces.Box(-1, 1, (2,), np.float32)
+        self.step_us = step_us
+        self.raw_scan = raw_scan
+        self.episode_steps = episode_steps
+        self._obs = np.zeros(obs_dim, dtype=np.float32)
+        self._scan = np.full(1080, 5.0)
+        self._t = 0
+
+    def reset(self, seed=None, options=None):
+        self._t = 0
+        return self._obs.copy(), {}
+
+    def step(self, action):
+        deadline = time.perf_counter() + self.step_us * 1e-6
+        while time.perf_counter() < deadline:
+            pass
+        self._t += 1
+        self._obs[:2] = action
+        info = {'checkpoint_done': np.zeros(1, dtype=bool)}
+        if self.raw_scan:
+            info['raw_scan'] = self._scan.copy()
+        return self._obs.copy(), 0.1, self._t >= self.episode_steps, False, info
+
+
+def make_envs(kind, workers, obs_dim, step_us, raw_scan, seed):
+    if kind == "synthetic":
+        return [lambda: SyntheticEnv(obs_dim, step_us, raw_scan) for _ in range(workers)]
+    import config
+    from src.vec_env import make_env
+    return [make_env(config.MAP_PATH, rank, seed, include_raw_scan=raw_scan) for rank in range(workers)]
+
+
+def run(env, workers, steps, seed):
+    rng = np.random.default_rng(seed)
+    env.reset()
+    env.step(rng.uniform(-1.0, 1.0, size=(workers, 2)).astype(np.float32))
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(rng.uniform(-1.0, 1.0, size=(workers, 2)).astype(np.float32))
+    elapsed = time.perf_counter() - start
+    env.close()
+    return steps * workers / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='共有メモリ VecEnv と SubprocVecEnv の比較ベンチマーク')
+    parser.add_argument('--env', type=str, default='synthetic', choices=['synthetic', 'f1tenth'], help='計測に使う環境')
+    parser.add_argument('--workers', type=int, nargs='+', default=[8, 16, 32], help='ワーカー数（= 環境数）')
+    parser.add_argument('--steps', type=int, default=300, help='VecEnv.step の呼び出し回数')
+    parser.add_argument('--obs-dim', type=int, default=1082, help='合成環境の観測の次元')
+    parser.add_argument('--step-us', type=float, default=0.0, help='合成環境の 1 ステップの計算時間 [us]')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.env == "f1tenth":
+        from src.vec_env import make_vec_env
+        import config
+
+    print(f"{'transport':>20} {'workers':>8} {'total steps/s':>14} {'vs subproc':>11}")
+    for workers in args.workers:
+        baseline = None
+        for name, raw_scan, shm in [("subproc (raw_scan)", True, False), ("subproc", False, False), ("shm", False, True)]:
+            if args.env == "f1tenth" and shm:
+                env = make_vec_env(config.MAP_PATH, num_envs=workers, backend="shm", seed=args.seed)
+            else:
+                env_fns = make_envs(args.env, workers, args.obs_dim, args.step_us, raw_scan, args.seed)
+                env = SharedMemoryVecEnv(env_fns) if shm else SubprocVecEnv(env_fns)
+            sps = run(env, workers, args.steps, args.seed)
+            if baseline is None:
+                baseline = sps
+            print(f"{name:>20} {workers:8d} {sps:14.1f} {sps / baseline:10.2f}x")
+
+
+if __name__ == '__main__':
+    main()
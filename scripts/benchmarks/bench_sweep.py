@@ -0,0 +1,107 @@
+"""
+ASHA による打ち切り（src/sweep.py）と全試行を最後まで学習する探索の比較ベンチマーク
+
+実際には学習せず、パラメータから決まる合成の学習曲線（評価にはノイズが乗る）と、
+1 試行あたりの学習速度 --steps-per-sec・1 回の評価時間 --eval-sec から試行の所要時間を決め、
+--workers 個のワーカーで動かした場合を事象駆動でシミュレーションします。探索ごとに以下を表示します。
+
+    total steps : 全試行の学習ステップ数の合計
+    wall [h]    : 全試行が終わるまでの時間（シミュレーション上の実時間）
+    best rank   : 最終的に 1 位になった試行の、真の性能（ノイズなし・最後の段）での順位（1 が最良）
+
+使い方:
+    python3 scripts/benchmarks/bench_sweep.py --trials 27 --workers 4 --etas 2 3 4
+"""
+import argparse
+import heapq
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from src.sweep import AshaScheduler, SweepStore, rung_budgets
+
+SPACE = {
+    "LEARNING_RATE": {"loguniform": [1e-5, 1e-3]},
+    "PPO_ENT_COEF": {"uniform": [0.0, 0.02]},
+}
+
+
+def true_quality(params):
+    """学習率 3e-4・エントロピー係数 0.005 付近で最良になる、最後まで学習したときの性能"""
+    return (-abs(math.log10(params["LEARNING_RATE"] / 3e-4))
+            - 30.0 * abs(params["PPO_ENT_COEF"] - 0.005))
+
+
+def evaluate(params, steps, max_steps, noise, rng):
+    """steps まで学習したときの評価値（学習が進むほど真の性能に近づき、評価ノイズが乗る）"""
+    progress = 1.0 - math.exp(-3.0 * steps / max_steps)
+    return true_quality(params) * progress - (1.0 - progress) + rng.normal(0.0, noise)
+
+
+def simulate(args, budgets, eta, seed):
+    """ワーカー args.workers 個で探索をシミュレーションし、(total steps, wall [s], 1 位の試行の真の順位) を返す"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SweepStore.open(os.path.join(tmp, "sweep.json"), {})
+        scheduler = AshaScheduler(store, SPACE, budgets, eta, args.trials, "score", seed=seed)
+        rng = np.random.default_rng(seed)
+        running = {}
+        events = []
+        now = 0.0
+        while True:
+            while len(running) < args.workers:
+                job = scheduler.next_job(running)
+                if job is None:
+                    break
+                trial_id, rung = job
+                steps = budgets[rung] - (budgets[rung - 1] if rung > 0 else 0)
+                heapq.heappush(events, (now + steps / args.steps_per_sec + args.eval_sec, trial_id, rung))
+                running[trial_id] = rung
+            if not events:
+                break
+            now, trial_id, rung = heapq.heappop(events)
+            del running[trial_id]
+            value = evaluate(store.trials[trial_id]["params"], budgets[rung], budgets[-1], args.noise, rng)
+            store.record(trial_id, rung, {"steps": budgets[rung], "metrics": {"score": value}, "checkpoint": ""})
+
+        best = scheduler.leaderboard()[0][0]
+        qualities = sorted((true_quality(trial["params"]) for trial in store.trials.values()), reverse=True)
+        rank = qualities.index(true_quality(store.trials[best]["params"])) + 1
+        return scheduler.total_steps(), now, rank
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ASHA による打ち切りと全試行を最後まで学習する探索の比較')
+    parser.add_argument('--trials', type=int, default=27, help='試行の数')
+    parser.add_argument('--workers', type=int, default=4, help='同時に実行する試行の数')
+    parser.add_argument('--min-steps', type=int, default=100000, help='最初の段の学習ステップ数')
+    parser.add_argument('--max-steps', type=int, default=1500000, help='最後の段の学習ステップ数')
+    parser.add_argument('--etas', type=int, nargs='+', default=[2, 3, 4], help='比較する eta')
+    parser.add_argument('--steps-per-sec', type=float, default=2000.0, help='1 試行の学習速度 [steps/s]')
+    parser.add_argument('--eval-sec', type=float, default=60.0, help='1 回の評価にかかる時間 [s]')
+    parser.add_argument('--noise', type=float, default=0.1, help='評価値のノイズの標準偏差')
+    parser.add_argument('--repeats', type=int, default=5, help='シードを変えて繰り返す回数（平均を表示）')
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'rungs':>6} {'total steps':>13} {'wall [h]':>9} {'vs full':>8} {'best rank':>10}")
+    configs = [("full", None)] + [(f"asha η={eta}", eta) for eta in args.etas]
+    baseline = None
+    for name, eta in configs:
+        # 全試行を最後まで学習する探索は、段が 1 つだけの探索と同じ
+        budgets = [args.max_steps] if eta is None else rung_budgets(args.min_steps, args.max_steps, eta)
+        runs = [simulate(args, budgets, eta or 2, seed) for seed in range(args.repeats)]
+        total_steps, wall, rank = (float(np.mean(values)) for values in zip(*runs))
+        if baseline is None:
+            baseline = wall
+        print(f"{name:>10} {len(budgets):6d} {total_steps:13.0f} {wall / 3600:9.2f} {baseline / wall:7.2f}x {rank:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
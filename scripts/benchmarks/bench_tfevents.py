@@ -0,0 +1,95 @@
+"""
+TFEvents リーダのベンチマーク
+
+SB3 の学習ログと同じく 1 イベントに 1 スカラーの合成 event ファイル（--events レコード、--tags 種類のタグ）を作り、
+以下の読み込み時間を比較します。
+
+    read_tfevents      : scripts/utils/read_tfevents.py（pure Python、毎回全体を解析）
+    EventAccumulator   : read_logs.py が使う TensorBoard の読み込み（tensorboard がある場合）
+    stream             : scripts/utils/tfevents_stream.py の初回読み込み（--check-crc 付きも計測）
+    stream poll        : --append 件だけ追記された後の poll()（ダッシュボードの定期更新に相当）
+
+使い方:
+    python3 scripts/benchmarks/bench_tfevents.py --events 200000 --append 1000
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from utils.read_tfevents import read_tfevents
+from utils.tfevents_stream import TFEventsReader, encode_record, encode_scalar_event
+
+SB3_TAGS = [
+    "rollout/ep_len_mean", "rollout/ep_rew_mean", "time/fps", "train/approx_kl", "train/clip_fraction",
+    "train/clip_range", "train/entropy_loss", "train/explained_variance", "train/learning_rate",
+    "train/loss", "train/policy_gradient_loss", "train/std", "train/value_loss",
+]
+
+
+def synthetic_records(start, count, tags):
+    return b"".join(
+        encode_record(encode_scalar_event((i // len(tags)) * 2048, 1.7e9 + i, {tags[i % len(tags)]: i * 0.001}))
+        for i in range(start, start + count))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TFEvents リーダのベンチマーク')
+    parser.add_argument('--events', type=int, default=200000, help='event ファイルのレコード数')
+    parser.add_argument('--tags', type=int, default=len(SB3_TAGS), help='タグの種類数')
+    parser.add_argument('--append', type=int, default=1000, help='追記後の poll() で読むレコード数')
+    args = parser.parse_args()
+    tags = (SB3_TAGS * (args.tags // len(SB3_TAGS) + 1))[:args.tags]
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "events.out.tfevents.1700000000.bench.1.0")
+    try:
+        with open(path, "wb") as f:
+            f.write(synthetic_records(0, args.events, tags))
+        size = os.path.getsize(path) / 1e6
+        print(f"{args.events} レコード, {size:.1f} MB\n")
+        print(f"{'reader':>24}{'seconds':>10}{'records/s':>12}")
+
+        def report(name, seconds, records):
+            print(f"{name:>24}{seconds:10.3f}{records / seconds:12.0f}")
+
+        report("read_tfevents", timed(lambda: read_tfevents(path)), args.events)
+        if importlib.util.find_spec("tensorboard") is not None:
+            from tensorboard.backend.event_processing import event_accumulator
+
+            def accumulate():
+                # size_guidance=0 で全件保持（既定では 1 タグ 10000 件に間引かれる）
+                ea = event_accumulator.EventAccumulator(path, size_guidance={event_accumulator.SCALARS: 0})
+                ea.Reload()
+            report("EventAccumulator", timed(accumulate), args.events)
+        else:
+            print(f"{'EventAccumulator':>24}  (tensorboard が無いためスキップ)")
+        report("stream", timed(lambda: TFEventsReader(path).poll()), args.events)
+        report("stream --check-crc", timed(lambda: TFEventsReader(path, check_crc=True).poll()), args.events)
+
+        reader = TFEventsReader(path)
+        reader.poll()
+        with open(path, "ab") as f:
+            f.write(synthetic_records(args.events, args.append, tags))
+        report(f"stream poll (+{args.append})", timed(reader.poll), args.append)
+        report(f"read_tfevents (+{args.append})", timed(lambda: read_tfevents(path)), args.append)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+コースの中心線と進みの参照表（src/track.py）のベンチマーク
+
+--size 四方の合成コース（幅 --width [m] の楕円の周回路、解像度 0.05 m）を作り、以下の時間を計測します。
+射影・更新は 1 点あたりのマイクロ秒で表示します。
+
+    build               : 細線化・中心線の抽出・最近傍の格子の作成（キャッシュなしで環境を生成したときに相当）
+    load (cache)        : キャッシュ済みの .track.npz の読み込み（2 回目以降の環境生成に相当）
+    project (array)     : --points 個の位置をまとめて射影（1 点あたりの時間）
+    project_point       : 1 点ずつ射影（1 点あたりの時間）
+    tracker.update      : ProgressTracker の 1 台分の更新（1 ステップあたりの時間）
+    brute force         : 比較用。中心線の全点との距離を毎回計算して最も近い点を探す方法（1 点あたりの時間）
+
+使い方:
+    python3 scripts/benchmarks/bench_track.py --size 1000 --points 100000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from benchmarks.bench_map_index import RESOLUTION, synthetic_track, timed
+from src.map_index import MapIndex
+from src.track import ProgressTracker, Track
+
+
+def main():
+    parser = argparse.ArgumentParser(description='コースの中心線と進みの参照表のベンチマーク')
+    parser.add_argument('--size', type=int, default=1000, help='マップの一辺のセル数')
+    parser.add_argument('--width', type=float, default=2.0, help='コース幅 [m]')
+    parser.add_argument('--points', type=int, default=100000, help='射影する位置の数')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    map_path = os.path.join(tmp, "track")
+    try:
+        Image.fromarray(synthetic_track(args.size, args.width)).save(map_path + ".pgm")
+        with open(map_path + ".yaml", "w") as f:
+            f.write(f"image: track.pgm\nresolution: {RESOLUTION}\norigin: [0.0, 0.0, 0.0]\n")
+        map_index = MapIndex.load(map_path)
+
+        print(f"{'':>30}{'seconds':>12}")
+
+        def report(name, seconds, per=None):
+            if per is None:
+                print(f"{name:>30}{seconds:12.4f}")
+            else:
+                print(f"{name:>30}{seconds / per * 1e6:12.3f} us/pt")
+
+        report("build", timed(lambda: Track.build(map_index)))
+        Track.load(map_path)
+        report("load (cache)", timed(lambda: Track.load(map_path)))
+        track = Track.load(map_path)
+        print(f"  中心線 {track.length:.1f} m, {len(track.points)} 点, 周回={track.closed}\n")
+
+        rng = np.random.RandomState(0)
+        poses = map_index.sample_poses(args.points, 0.0, rng)
+        xs, ys = poses[:, 0], poses[:, 1]
+        report("project (array)", timed(lambda: track.project(xs, ys)), args.points)
+
+        n = min(args.points, 20000)
+        report("project_point", timed(lambda: [track.project_point(x, y) for x, y in zip(xs[:n], ys[:n])]), n)
+
+        tracker = ProgressTracker(track)
+        tracker.reset(xs[0], ys[0])
+        report("tracker.update", timed(lambda: [tracker.update(x, y) for x, y in zip(xs[:n], ys[:n])]), n)
+
+        m = min(n, 2000)
+        points = track.points
+
+        def brute_force():
+            for x, y in zip(xs[:m], ys[:m]):
+                np.argmin((points[:, 0] - x) ** 2 + (points[:, 1] - y) ** 2)
+
+        report("brute force", timed(brute_force), m)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+ステップ単位の走行ログ (src/trajlog.py) の書き込み・読み込みのベンチマーク
+
+合成の走行データ（--steps ステップ、--episode-len ステップごとにエピソード終了）を書き込み、
+append 1 回あたりの時間・書き込み速度 (MB/s)・ファイルサイズを表示します。
+読み込みは memmap でランダムなエピソードを切り出す時間と、比較として同じデータを
+np.savez から全体を読み込む時間を表示します。
+
+使い方:
+    python3 scripts/benchmarks/bench_trajlog.py --steps 200000 --downsample 1 4 0
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+
+from src.trajlog import TrajectoryLog, TrajectoryWriter
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bench_write(path, steps, episode_len, downsample, chunk_size):
+    rng = np.random.default_rng(0)
+    scans = rng.random((64, 1080)) * 10  # 生成コストを除くため、使い回す LiDAR
+    action = np.zeros(2, dtype=np.float32)
+    writer = TrajectoryWriter(path, record_scans=downsample > 0, scan_downsample=max(downsample, 1),
+                              chunk_size=chunk_size)
+    start = time.perf_counter()
+    for i in range(steps):
+        if i % episode_len == 0:
+            writer.start_episode()
+        writer.append(i * 0.01, 0.0, 0.0, 1.0, 0.0, action, 0.1, (i + 1) % episode_len == 0, scans[i % 64])
+    writer.close()
+    return time.perf_counter() - start
+
+
+def bench_read(path, repeats=20):
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    log = TrajectoryLog(path)
+    num_episodes = log.num_episodes
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in rng.integers(num_episodes, size=repeats):
+        ep = log.episode(index)
+        float(np.asarray(ep["x"]).mean())
+        if "scans" in ep:
+            float(np.asarray(ep["scans"], dtype=np.float32).mean())
+    return open_time, (time.perf_counter() - start) / repeats
+
+
+def bench_npz(path, log_path):
+    """比較: 同じ列を 1 つの .npz に保存し、エピソード 1 つを読むために全体を読み込む"""
+    log = TrajectoryLog(log_path)
+    np.savez(path, **{name: np.asarray(log[name]) for name in log.columns})
+    start = time.perf_counter()
+    with np.load(path) as data:
+        columns = {name: data[name] for name in data.files}
+        episode = columns["episode"]
+        float(columns["x"][episode == 0].mean())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='走行ログの書き込み・読み込みのベンチマーク')
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--episode-len', type=int, default=1000)
+    parser.add_argument('--downsample', type=int, nargs='+', default=[1, 4, 0],
+                        help='LiDAR のダウンサンプリング（0 は LiDAR なし）')
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"{'scans':>8}{'us/append':>11}{'MB/s':>9}{'MB':>9}{'open ms':>9}{'ep ms':>8}{'npz ms':>9}")
+    for downsample in args.downsample:
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'bench.traj')
+        try:
+            elapsed = bench_write(path, args.steps, args.episode_len, downsample, args.chunk_size)
+            size = dir_size(path) / 1e6
+            open_time, episode_time = bench_read(path)
+            npz_time = bench_npz(os.path.join(tmp, 'bench.npz'), path)
+            label = f"1/{downsample}" if downsample else "none"
+            print(f"{label:>8}{elapsed / args.steps * 1e6:11.2f}{size / elapsed:9.1f}{size:9.1f}"
+                  f"{open_time * 1e3:9.2f}{episode_time * 1e3:8.2f}{npz_time * 1e3:9.1f}")
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
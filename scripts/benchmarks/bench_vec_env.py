@@ -0,0 +1,59 @@
+"""
+並列環境のスケーリングを計測するベンチマーク
+
+環境数 N と backend（dummy / subproc）の組み合わせごとに、
+ランダムアクションで VecEnv を回して env-steps/sec を表示します。
+方策推論や PPO の更新は含まないため、シミュレータ側の上限性能の目安になります。
+
+使い方（コンテナ内で実行）:
+    python3 scripts/benchmarks/bench_vec_env.py --num-envs 1 2 4 8 16 32 --steps 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+import config
+from src.vec_env import VEC_BACKENDS, make_vec_env
+
+
+def run(backend, num_envs, steps, seed):
+    env = make_vec_env(config.MAP_PATH, num_envs=num_envs, backend=backend, seed=seed)
+    rng = np.random.default_rng(seed)
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = rng.uniform(-1.0, 1.0, size=(num_envs, 2)).astype(np.float32)
+        env.step(actions)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return steps * num_envs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VecEnv スケーリングベンチマーク')
+    parser.add_argument('--num-envs', type=int, nargs='+', default=[1, 2, 4, 8], help='計測する環境数')
+    parser.add_argument('--backends', type=str, nargs='+', default=list(VEC_BACKENDS), choices=VEC_BACKENDS)
+    parser.add_argument('--steps', type=int, default=500, help='VecEnv.step の呼び出し回数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} {'envs':>5} {'total steps/s':>14} {'per env':>10} {'speed-up':>9}")
+    for backend in args.backends:
+        baseline = None
+        for n in args.num_envs:
+            sps = run(backend, n, args.steps, args.seed)
+            if baseline is None:
+                baseline = sps / n
+            print(f"{backend:>8} {n:5d} {sps:14.1f} {sps / n:10.1f} {sps / baseline:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
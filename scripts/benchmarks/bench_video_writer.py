@@ -0,0 +1,100 @@
+"""
+動画書き出し（scripts/utils/video.py）のベンチマーク
+
+enjoy_wide.py と同じサイズの合成フレームを N 枚書き出し、エンコーダごとに
+最大メモリ (peak RSS) と frames/sec を比較します。各計測は新しいプロセスで行います。
+
+    buffer : 全フレームを保持して最後に imageio.mimsave（変更前の動作）
+    stream : 1 フレームずつその場でエンコード
+    thread : バックグラウンドスレッドでエンコード（--render-ms の描画時間と重なる）
+
+使い方:
+    python3 scripts/benchmarks/bench_video_writer.py --frames 750 --format gif mp4 --render-ms 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPT_DIR)
+
+from utils.video import ENCODERS, open_frame_writer
+
+
+def peak_rss_mb():
+    """このプロセスの最大 RSS [MB]（Linux は VmHWM）"""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_frames(count, width, height):
+    """マップ背景の上を点が動くフレームを 1 枚ずつ生成する（描画結果に近い色数にする）"""
+    rng = np.random.default_rng(0)
+    background = np.full((height, width, 3), 18, dtype=np.uint8)
+    walls = rng.random((-(-height // 8), -(-width // 8))) < 0.15
+    background[walls.repeat(8, axis=0).repeat(8, axis=1)[:height, :width]] = 200
+    frame = np.empty_like(background)
+    for i in range(count):
+        np.copyto(frame, background)
+        cx = int(width / 2 + width / 3 * np.cos(i / 50))
+        cy = int(height / 2 + height / 3 * np.sin(i / 50))
+        frame[max(cy - 6, 0):cy + 6, max(cx - 6, 0):cx + 6] = (255, 0, 85)
+        frame[20:120, 20:220] = (0, 40 + i % 200, 0)
+        yield frame
+
+
+def child(args):
+    """1 つのエンコーダ・形式で書き出して結果を JSON で出力する"""
+    path = os.path.join(tempfile.mkdtemp(), f"bench.{args.format[0]}")
+    start = time.perf_counter()
+    with open_frame_writer(path, fps=25, encoder=args.encoder[0]) as writer:
+        for frame in synthetic_frames(args.frames, args.width, args.height):
+            if args.render_ms > 0:
+                time.sleep(args.render_ms / 1000)  # matplotlib の描画時間の代わり
+            writer.append(frame)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"fps": args.frames / elapsed, "rss_mb": peak_rss_mb(),
+                      "size_mb": os.path.getsize(path) / 1e6}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='動画書き出しのベンチマーク')
+    parser.add_argument('--frames', type=int, default=750, help='フレーム数 (1500 ステップ / 2)')
+    parser.add_argument('--width', type=int, default=575)
+    parser.add_argument('--height', type=int, default=800)
+    parser.add_argument('--format', type=str, nargs='+', default=['gif', 'mp4'], choices=['gif', 'mp4'])
+    parser.add_argument('--encoder', type=str, nargs='+', default=list(ENCODERS), choices=ENCODERS)
+    parser.add_argument('--render-ms', type=float, default=0.0, help='1 フレームあたりの描画時間の代わりに待つ時間')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    print(f"{args.frames} frames, {args.width}x{args.height}, render={args.render_ms} ms/frame")
+    print(f"{'format':>6}{'encoder':>9}{'frames/s':>10}{'peak RSS [MB]':>15}{'file [MB]':>11}")
+    for fmt in args.format:
+        for encoder in args.encoder:
+            cmd = [sys.executable, os.path.abspath(__file__), '--child', '--format', fmt, '--encoder', encoder,
+                   '--frames', str(args.frames), '--width', str(args.width), '--height', str(args.height),
+                   '--render-ms', str(args.render_ms)]
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{fmt:>6}{encoder:>9}{r['fps']:10.1f}{r['rss_mb']:15.1f}{r['size_mb']:11.2f}")
+
+
+if __name__ == '__main__':
+    main()
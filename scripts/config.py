@@ -45,6 +45,9 @@ REWARD_SPEED_WEIGHT = 1.0   # 速度に対する報酬の重み
 REWARD_CENTRALITY_WEIGHT = 0.5 # コース中央を走ることへの報酬
 REWARD_DISTANCE_WEIGHT = 1.0   # 壁からの距離（安全マージン）への報酬
 REWARD_PROGRESS_WEIGHT = 2.0   # 走行距離報酬（円形走行を抑制）
+# コースの中心線（src/track.py）を使う報酬。0 以外にすると初回にマップから中心線を作ってキャッシュする
+REWARD_TRACK_PROGRESS_WEIGHT = 0.0  # 中心線に沿った進み [m] への報酬（逆走は負）
+REWARD_LATERAL_WEIGHT = 0.0         # 中心線からの横ずれ（コース半幅に対する比）へのペナルティ
 
 # --- パス設定 ---
 # 環境変数で上書き可能。未設定の場合は Docker 内デフォルト値を使用。
@@ -80,6 +83,13 @@ START_POSES = [
     [5.0, 4.5, -2.0],
 ]
 
+# スタート位置のサンプリング（Trueの場合、上記リストの代わりにマップの空き領域から毎回ランダムに選ぶ）
+# 壁までの距離が START_MIN_CLEARANCE [m] 以上のセルから一様に選び、向きはコースに沿った 2 方向のどちらかにする。
+# 距離場は src/map_index.py が初回に計算し、マップの隣に <マップ名>.mapindex.npz としてキャッシュする
+START_POSE_SAMPLING = False
+START_MIN_CLEARANCE = 0.3   # 壁までの最小距離 [m]（view_spawn.py の判定にも使用）
+START_YAW_NOISE = 0.2       # コースの向きに加える一様ノイズの幅 [rad]
+
 # モデル名に設定を反映させて管理しやすくする
 MAP_NAME   = os.path.basename(MAP_PATH)
 MODEL_NAME = f"ppo_f1_{MAP_NAME}_steps{TOTAL_TIMESTEPS}_arch{len(NET_ARCH)}"
@@ -1,108 +1,16 @@
 import config
 import os
 import sys
-import yaml
 import numpy as np
-import matplotlib.pyplot as plt
-from stable_baselines3 import PPO
-from PIL import Image
-import imageio
 import argparse
 
 # 共通モジュールのimport
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.f1_env import F1TenthRL
+from utils.render import RENDERERS
+from utils.replay import RolloutRecorder
+from utils.video import ENCODERS, open_frame_writer
 
-class MapRenderer:
-    def __init__(self, map_path, fig_size=8):
-        # マップメタデータの読み込み
-        map_yaml_path = map_path + ".yaml"
-        with open(map_yaml_path, 'r') as f:
-            map_conf = yaml.safe_load(f)
-        
-        self.origin = map_conf['origin'] # [x, y, theta]
-        self.resolution = map_conf['resolution']
-        img_name = map_conf['image']
-        
-        map_dir = os.path.dirname(map_path)
-        img_path = os.path.join(map_dir, img_name)
-        
-        # 画像読み込み
-        img = Image.open(img_path)
-        self.map_img = np.array(img)
-        self.height, self.width = self.map_img.shape
-        
-        # グラフ設定
-        aspect = self.width / self.height
-        self.fig, self.ax = plt.subplots(figsize=(fig_size * aspect, fig_size), facecolor='#121212')
-        plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
-        
-        # 初期描画（背景）
-        self.ax.imshow(self.map_img, cmap='gray', origin='upper')
-        self.ax.axis('off')
-
-        # 描画オブジェクトの初期化
-        self.trail, = self.ax.plot([], [], color='#00aaff', alpha=0.5, linewidth=1, label='Trail')
-        self.scans_scatter = self.ax.scatter([], [], s=1, c='#00ffff', alpha=0.3)
-        self.car_dot, = self.ax.plot([], [], 'o', color='#ff0055', markersize=8, markeredgecolor='white', zorder=5)
-        self.car_arrow = None # 後で作成
-        
-        self.hud_text = self.ax.text(20, 40, '', color='#00ff00', fontsize=12, fontfamily='monospace',
-                                    bbox=dict(facecolor='black', alpha=0.7, edgecolor='none'))
-        
-        # 軌跡データ
-        self.trail_x = []
-        self.trail_y = []
-
-    def world_to_pixel(self, x, y):
-        px = (x - self.origin[0]) / self.resolution
-        py = self.height - (y - self.origin[1]) / self.resolution
-        return px, py
-
-    def update(self, car_state, scans, action, reward, step, collisions):
-        car_x, car_y, car_theta, car_vel = car_state
-        px, py = self.world_to_pixel(car_x, car_y)
-
-        # 軌跡の更新
-        self.trail_x.append(px)
-        self.trail_y.append(py)
-        self.trail.set_data(self.trail_x, self.trail_y)
-
-        # 自車の位置
-        self.car_dot.set_data([px], [py])
-
-        # 向きの矢印
-        if self.car_arrow:
-            self.car_arrow.remove()
-        
-        # マップ解像度(0.075)に合わせて矢印のサイズを調整
-        arrow_len = 10 
-        dx = arrow_len * np.cos(car_theta)
-        dy = -arrow_len * np.sin(car_theta) # 画像座標系(y軸反転)
-        self.car_arrow = self.ax.arrow(px, py, dx, dy, head_width=4, head_length=5, fc='#ff0055', ec='white', zorder=6)
-
-        # LiDAR点群
-        angles = np.linspace(-2.35, 2.35, 1080) + car_theta
-        scan_x_world = car_x + scans * np.cos(angles)
-        scan_y_world = car_y + scans * np.sin(angles)
-        scan_px, scan_py = self.world_to_pixel(scan_x_world, scan_y_world)
-        self.scans_scatter.set_offsets(np.c_[scan_px, scan_py])
-
-        # HUD
-        info_str = (
-            f"STEP: {step:04d}\n"
-            f"SPD : {car_vel:.2f} m/s\n"
-            f"STR : {action[0]:.2f}\n"
-            f"ACC : {action[1]:.2f}\n"
-            f"RWD : {reward:.2f}\n"
-            f"COL : {collisions}"
-        )
-        self.hud_text.set_text(info_str)
-
-        # 画面キャプチャ
-        self.fig.canvas.draw()
-        frame = np.array(self.fig.canvas.buffer_rgba())[:, :, :3]
-        return frame
 
 def main():
     parser = argparse.ArgumentParser(description='F1Tenth PPO Model Viewer')
@@ -110,6 +18,12 @@ def main():
     parser.add_argument('--model', type=str, default=None, help='モデルファイルのパス(拡張子なし)')
     parser.add_argument('--save', type=str, default=config.GIF_PATH, help='保存先のパス')
     parser.add_argument('--no-render', action='store_true', help='GIFを生成しない(デバッグ用)')
+    parser.add_argument('--renderer', type=str, default='matplotlib', choices=list(RENDERERS),
+                        help='matplotlib: 従来の描画 / fast: NumPy で直接描画（10 倍以上高速）')
+    parser.add_argument('--encoder', type=str, default='stream', choices=ENCODERS,
+                        help='stream: 1 フレームずつ書き出す / thread: 別スレッドで書き出す / buffer: 全フレームを保持して最後に保存')
+    parser.add_argument('--record', type=str, default=None,
+                        help='走行を .npz に記録する (render_replay.py で後から描画できる)')
     args = parser.parse_args()
 
     # 保存先の調整 (ディレクトリ指定がない場合は config.GIF_DIR を使用)
@@ -121,8 +35,8 @@ def main():
     if save_dir:
         os.makedirs(save_dir, exist_ok=True)
 
-    # 環境の初期化
-    env = F1TenthRL(config.MAP_PATH)
+    # 環境の初期化 (観測は predict で即座に消費するためバッファを共有する)
+    env = F1TenthRL(config.MAP_PATH, share_obs_buffer=True)
     
     # モデルの読み込み (ディレクトリ指定がない場合は config.MODEL_DIR を指定)
     if args.model:
@@ -136,17 +50,20 @@ def main():
         target_model += ".zip"
     
     if os.path.exists(target_model):
+        from stable_baselines3 import PPO
         model = PPO.load(target_model, device=config.DEVICE)
         print(f"モデルをロードしました: {target_model}")
     else:
         print(f"エラー: モデルファイルが見つかりません: {target_model}")
         return
 
-    # 描画クラスの初期化
-    renderer = MapRenderer(config.MAP_PATH)
+    # 描画クラスの初期化 (--no-render の場合は matplotlib を読み込まない)
+    renderer = None if args.no_render else RENDERERS[args.renderer](config.MAP_PATH)
+    # フレームは生成するたびにエンコードし、メモリに溜めない
+    writer = None if args.no_render else open_frame_writer(save_path, fps=25, encoder=args.encoder)
+    recorder = RolloutRecorder(config.MAP_PATH) if args.record else None
 
     obs = env.reset()
-    frames = []
     collisions = 0
     total_reward = 0
     
@@ -168,10 +85,13 @@ def main():
             except Exception as e:
                 car_state = (0, 0, 0, 0)
 
+            if recorder is not None:
+                recorder.append(car_state, raw_scan, action, reward, done)
+
             # 描画更新 (2ステップに1回)
             if i % 2 == 0 and not args.no_render:
                 frame = renderer.update(car_state, raw_scan, action, reward, i, collisions)
-                frames.append(frame)
+                writer.append(frame)
                 
                 if (i // 2) % 50 == 0:
                     print(f"レンダリング中... Step: {i}")
@@ -186,19 +106,22 @@ def main():
     except KeyboardInterrupt:
         print("\n中断されました。")
     finally:
-        plt.close(renderer.fig)
-        
-        if len(frames) > 0 and not args.no_render:
-            print(f"動画生成中... ({len(frames)} frames)")
-            if save_path.lower().endswith('.mp4'):
-                # MP4の場合 (fps=25 は duration=40ms に相当)
-                imageio.mimsave(save_path, frames, fps=25, quality=8, macro_block_size=16)
-            else:
-                # GIFの場合
-                imageio.mimsave(save_path, frames, duration=40)
-            print(f"保存完了: {save_path}")
+        if renderer is not None:
+            renderer.close()
+
+        if writer is not None:
+            writer.close()
+        if writer is not None and writer.frames > 0:
+            print(f"保存完了: {save_path} ({writer.frames} frames)")
         else:
             print("保存はスキップされました。")
 
+        if recorder is not None and len(recorder) > 0:
+            record_dir = os.path.dirname(args.record)
+            if record_dir:
+                os.makedirs(record_dir, exist_ok=True)
+            recorder.save(args.record)
+            print(f"走行を記録しました: {args.record} ({len(recorder)} steps)")
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -2,111 +2,451 @@ import config
 import os
 import sys
 import numpy as np
-from stable_baselines3 import PPO
 import argparse
 import time
 import csv
 import json
 import datetime
+import multiprocessing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.f1_env import F1TenthRL
+from src.profiling import StageProfiler, format_summary
+from src.track import LapTimer, Track
 
 
-def main():
-    parser = argparse.ArgumentParser(description='F1Tenth Model Benchmark Evaluator')
-    parser.add_argument('--episodes', type=int, default=10, help='評価するエピソード数')
-    parser.add_argument('--max_steps', type=int, default=2000, help='1エピソードあたりの最大ステップ数')
-    parser.add_argument('--model', type=str, default=None, help='モデルファイルのパス(拡張子なし)')
-    args = parser.parse_args()
+def load_policy(model_path):
+    """
+    評価に使う方策を読み込む
 
-    # 環境の初期化
-    env = F1TenthRL(config.MAP_PATH)
-    print(f"現在の観測空間の形状: {env.observation_space.shape}")
+    .npz（export_policy.py の出力）は NumpyPolicy で読み込み、stable-baselines3 / torch を import しない。
+    それ以外は PPO.load で読み込む。どちらも predict(obs, deterministic=True) で行動を返す。
+    """
+    if model_path.endswith('.npz'):
+        from src.policy_runtime import NumpyPolicy
+        return NumpyPolicy.load(model_path)
+    from stable_baselines3 import PPO
+    return PPO.load(model_path, device=config.DEVICE)
 
-    # モデルの読み込み
-    target_model = args.model if args.model else config.MODEL_PATH
-    if not target_model.endswith('.zip'):
-        target_model += '.zip'
 
-    if os.path.exists(target_model):
+def load_track():
+    """中心線に沿った走行距離の指標に使うコースを読み込む（初回のみ計算してキャッシュ）。取り出せないマップでは None"""
+    try:
+        return Track.load(config.MAP_PATH, start_pose=config.START_POSE)
+    except ValueError as e:
+        print(f"警告: コースの中心線が取り出せないため、走行距離の指標を省略します ({e})")
+        return None
+
+
+def start_lap_timer(env):
+    """env.reset() の直後に呼び、周回コースならスタート/ゴールラインの通過を計るタイマーを返す（それ以外は None）"""
+    if env.progress is None or not env.track.closed:
+        return None
+    return LapTimer(env.progress)
+
+
+def episode_status(done, timer, target_laps):
+    """衝突・指定周回数の完了・最大ステップ数到達を区別する"""
+    if done:
+        return "Collision"
+    if target_laps and timer is not None and timer.laps >= target_laps:
+        return "Success (Laps)"
+    return "Success (Max Steps)"
+
+
+def track_metrics(env, timer, offset_sum, steps, wall_time):
+    """
+    エピソード終了時の中心線に沿った指標
+
+    progress_m: 中心線に沿って進んだ距離 [m]（逆走は負）、laps: progress_m / 1 周の長さ、
+    mean_abs_offset_m: 中心線からの横ずれの絶対値の平均 [m]、m_per_wall_sec: 実時間 1 秒あたりの progress_m、
+    laps_completed / lap_times / best_lap_sec: スタート/ゴールラインの通過で区切った完了周回数・
+    各周の時間 [s]（sim 時間）・最速の周。コースが無い場合はすべて None（周回しないコースではラップ関連が None）。
+    """
+    if env.progress is None:
+        return {"progress_m": None, "laps": None, "mean_abs_offset_m": None, "m_per_wall_sec": None,
+                "laps_completed": None, "lap_times": None, "best_lap_sec": None}
+    progress = float(env.progress.total[0])
+    return {
+        "progress_m": progress,
+        "laps": progress / env.track.length if env.track.closed else None,
+        "mean_abs_offset_m": offset_sum / steps if steps else 0.0,
+        "m_per_wall_sec": progress / wall_time if wall_time > 0 else 0.0,
+        "laps_completed": timer.laps if timer is not None else None,
+        "lap_times": list(timer.lap_times) if timer is not None else None,
+        "best_lap_sec": timer.best_lap if timer is not None else None,
+    }
+
+
+def episode_seed(base_seed, episode):
+    """エピソード番号 (0 始まり) からスタート位置選択用のシードを決める"""
+    return base_seed + episode
+
+
+def run_episode(env, model, max_steps, seed, target_laps=0):
+    """
+    1 エピソードを実行して結果を返す
+
+    スタート位置と LiDAR のノイズは env.seed(seed) で決まるため、どのワーカーで実行しても同じ結果になる。
+    target_laps > 0 の場合は、その周回数を完了した時点でエピソードを終える（周回コースのみ）。
+    env.profiler がある場合は、方策推論の時間も "policy" として記録する。
+    """
+    episode_start = time.perf_counter()
+    profiler = env.profiler
+    env.seed(seed)
+    obs = env.reset()
+    timer = start_lap_timer(env)
+    step_dt = env.step_dt
+    done = False
+    ep_reward = 0
+    ep_steps = 0
+    speeds = []
+    policy_time = 0.0
+    sim_time = 0.0
+    offset_sum = 0.0
+
+    while not done and ep_steps < max_steps:
+        t0 = time.perf_counter()
+        action, _ = model.predict(obs, deterministic=True)
+        t1 = time.perf_counter()
+        obs, reward, done, info = env.step(action)
+        policy_time += t1 - t0
+        sim_time += time.perf_counter() - t1
+        if profiler is not None:
+            profiler.record("policy", int((t1 - t0) * 1e9))
+
         try:
-            model = PPO.load(target_model, device=config.DEVICE)
-            print(f"モデルをロードしました: {target_model}")
-        except ValueError as e:
-            print("--- 読み込みエラー ---")
-            print(f"モデル '{target_model}' の読み込みに失敗しました。")
-            print("観測空間の次元設定（LIDAR_DOWNSAMPLE_FACTOR 等）が学習時と異なっている可能性があります。")
-            print(f"詳細: {e}")
-            return
-    else:
-        print(f"エラー: モデルファイルが見つかりません: {target_model}")
-        return
+            speed = env.env.sim.agents[0].state[3]
+            speeds.append(speed)
+        except:
+            pass
 
-    print(f"\n--- ベンチマーク開始 ({args.episodes} エピソード) ---")
+        ep_reward += reward
+        ep_steps += 1
+        if 'lateral_offset' in info:
+            offset_sum += abs(info['lateral_offset'])
+        if timer is not None and timer.update(ep_steps * step_dt) and target_laps and timer.laps >= target_laps:
+            break
 
-    results = {
-        "steps": [],
-        "rewards": [],
-        "avg_speeds": [],
-        "collisions": 0,
-        "success": 0
+    # 成功/衝突の判定
+    # F1Tenth gym では done=True が衝突（壁接触によるエピソード終了）を意味する
+    # done=False のままループを抜けた場合は指定周回数の完了か最大ステップ数到達（完走）
+    wall_time = time.perf_counter() - episode_start
+    return {
+        "seed": seed,
+        "steps": ep_steps,
+        "reward": float(ep_reward),
+        "avg_speed": float(np.mean(speeds)) if speeds else 0.0,
+        "status": episode_status(done, timer, target_laps),
+        "wall_time_sec": wall_time,
+        "policy_time_sec": policy_time,
+        "sim_time_sec": sim_time,
+        "simulated_sec": ep_steps * step_dt,
+        **track_metrics(env, timer, offset_sum, ep_steps, wall_time),
     }
-    statuses = []
 
-    start_time = time.time()
 
-    for ep in range(args.episodes):
-        obs = env.reset()
-        done = False
-        ep_reward = 0
-        ep_steps = 0
-        speeds = []
+def run_episodes_batched(model_path, tasks, batch, report, track=None, profiler=None, action_repeat=1,
+                         env_config=None):
+    """
+    batch 個の環境を同時に進め、方策推論を (batch, obs_dim) の 1 回の predict で行う
+
+    終了したエピソードの枠は待たずに次のエピソードで埋め、残りが無くなった枠は
+    推論バッチから外す。各エピソードの結果は run_episode() と同じ形式で report に渡す。
+    エピソードごとの wall_time_sec は、そのエピソードの sim 時間と推論時間の按分の合計。
+    profiler を渡すと全環境で共有し、"policy" にはまとめた predict 1 回分の時間を記録する。
+    """
+    envs = [F1TenthRL(config.MAP_PATH, share_obs_buffer=True, track=track, profiler=profiler,
+                      action_repeat=action_repeat, env_config=env_config) for _ in range(batch)]
+    print(f"現在の観測空間の形状: {envs[0].observation_space.shape}")
+    model = load_policy(model_path)
+    print(f"モデルをロードしました: {model_path} ({batch} エピソードをまとめて推論)")
+
+    pending = list(reversed(tasks))
+    slots = [None] * batch
+    obs_batch = np.zeros((batch,) + envs[0].observation_space.shape, dtype=np.float32)
+
+    def start(slot):
+        episode, seed, max_steps, target_laps = pending.pop()
+        env = envs[slot]
+        env.seed(seed)
+        obs_batch[slot] = env.reset()
+        slots[slot] = {"episode": episode, "seed": seed, "max_steps": max_steps, "target_laps": target_laps,
+                       "steps": 0, "reward": 0.0, "speeds": [], "policy_time": 0.0, "sim_time": 0.0,
+                       "offset_sum": 0.0, "timer": start_lap_timer(env)}
+
+    for slot in range(min(batch, len(pending))):
+        start(slot)
+
+    while True:
+        active = [i for i, st in enumerate(slots) if st is not None]
+        if not active:
+            break
+        t0 = time.perf_counter()
+        actions, _ = model.predict(obs_batch[active], deterministic=True)
+        policy_elapsed = time.perf_counter() - t0
+        policy_share = policy_elapsed / len(active)
+        if profiler is not None:
+            profiler.record("policy", int(policy_elapsed * 1e9))
 
-        while not done and ep_steps < args.max_steps:
-            action, _ = model.predict(obs, deterministic=True)
+        for action, slot in zip(actions, active):
+            st = slots[slot]
+            env = envs[slot]
+            t1 = time.perf_counter()
             obs, reward, done, info = env.step(action)
+            st["sim_time"] += time.perf_counter() - t1
+            st["policy_time"] += policy_share
+            st["speeds"].append(env.env.sim.agents[0].state[3])
+            st["reward"] += reward
+            st["steps"] += 1
+            if 'lateral_offset' in info:
+                st["offset_sum"] += abs(info['lateral_offset'])
+            timer = st["timer"]
+            laps_done = (timer is not None and timer.update(st["steps"] * env.step_dt)
+                         and st["target_laps"] and timer.laps >= st["target_laps"])
 
-            try:
-                speed = env.env.sim.agents[0].state[3]
-                speeds.append(speed)
-            except:
-                pass
+            if done or laps_done or st["steps"] >= st["max_steps"]:
+                wall_time = st["sim_time"] + st["policy_time"]
+                report({
+                    "episode": st["episode"],
+                    "seed": st["seed"],
+                    "steps": st["steps"],
+                    "reward": float(st["reward"]),
+                    "avg_speed": float(np.mean(st["speeds"])),
+                    "status": episode_status(done, timer, st["target_laps"]),
+                    "wall_time_sec": wall_time,
+                    "policy_time_sec": st["policy_time"],
+                    "sim_time_sec": st["sim_time"],
+                    "simulated_sec": st["steps"] * env.step_dt,
+                    **track_metrics(env, timer, st["offset_sum"], st["steps"], wall_time),
+                })
+                slots[slot] = None
+                if pending:
+                    start(slot)
+            else:
+                obs_batch[slot] = obs
 
-            ep_reward += reward
-            ep_steps += 1
 
-        results["steps"].append(ep_steps)
-        results["rewards"].append(ep_reward)
-        results["avg_speeds"].append(np.mean(speeds) if speeds else 0)
+# --- 並列評価用ワーカー（プロセスごとに環境とモデルを 1 度だけ読み込む） ---
+_worker_env = None
+_worker_model = None
 
-        # 成功/衝突の判定
-        # F1Tenth gym では done=True が衝突（壁接触によるエピソード終了）を意味する
-        # done=False のままループを抜けた場合は最大ステップ数到達（完走）
-        if done:
-            results["collisions"] += 1
-            status = "Collision"
-        else:
-            results["success"] += 1
-            status = "Success (Max Steps)"
 
-        statuses.append(status)
-        print(f"Episode {ep+1:02d}: Steps={ep_steps:4d}, Reward={ep_reward:7.1f}, Speed={np.mean(speeds):.2f}m/s, {status}")
+def _init_worker(model_path, profile=False, action_repeat=1, env_config=None):
+    global _worker_env, _worker_model
+    # ワーカー数 x PyTorch スレッド数でコアを奪い合わないよう、推論は 1 スレッドで行う
+    if not model_path.endswith('.npz'):
+        import torch
+        torch.set_num_threads(1)
+    _worker_env = F1TenthRL(config.MAP_PATH, share_obs_buffer=True, track=load_track(),
+                            profiler=StageProfiler() if profile else None, action_repeat=action_repeat,
+                            env_config=env_config)
+    _worker_model = load_policy(model_path)
 
+
+def _run_worker_episode(task):
+    episode, seed, max_steps, target_laps = task
+    result = run_episode(_worker_env, _worker_model, max_steps, seed, target_laps)
+    result["episode"] = episode
+    if _worker_env.profiler is not None:
+        # エピソードごとの計測結果を親プロセスへ返して合算する
+        result["profile"] = _worker_env.profile_snapshot()
+    return result
+
+
+def run_episodes(model_path, episodes, max_steps, base_seed, workers, batch=1, trajectory_log=None, target_laps=0,
+                 profiler=None, action_repeat=1, env_config=None):
+    """
+    全エピソードを実行し、エピソード番号順の結果リストを返す
+
+    workers > 1 の場合はエピソードをプロセスプールに分配する。
+    batch > 1 の場合は 1 プロセス内で batch エピソードを同時に進め、推論をまとめて行う。
+    trajectory_log (src.trajlog.TrajectoryWriter) を渡すと、ステップ単位のログを記録する（逐次実行のみ）。
+    target_laps > 0 の場合は、その周回数を完了したエピソードを "Success (Laps)" として打ち切る。
+    profiler (src.profiling.StageProfiler) を渡すと、env.step の内訳と方策推論の実行時間を記録する
+    （並列実行ではワーカーの結果を合算する）。
+    action_repeat は F1TenthRL の action_repeat（1 回の行動を保つ物理 tick 数）。
+    env_config (src.env_config.EnvConfig) を渡すと、config.py の値の代わりにその設定で環境を作る。
+    """
+    results = []
+    # 並列評価のワーカーはキャッシュから読むだけで済むよう、先に中心線を作っておく
+    track = load_track()
+    if target_laps and (track is None or not track.closed):
+        print("警告: 周回コースの中心線が無いため、周回数での打ち切りは行いません")
+        target_laps = 0
+    tasks = [(ep + 1, episode_seed(base_seed, ep), max_steps, target_laps) for ep in range(episodes)]
+
+    def report(result):
+        if "profile" in result:
+            profiler.merge(result.pop("profile"))
+        results.append(result)
+        progress = f", Progress={result['progress_m']:6.1f}m" if result['progress_m'] is not None else ""
+        if result['best_lap_sec'] is not None:
+            progress += f", Laps={result['laps_completed']} (best {result['best_lap_sec']:.2f}s)"
+        print(f"Episode {result['episode']:02d}: Steps={result['steps']:4d}, Reward={result['reward']:7.1f}, "
+              f"Speed={result['avg_speed']:.2f}m/s{progress}, {result['status']}")
+
+    if batch > 1:
+        run_episodes_batched(model_path, tasks, batch, report, track, profiler, action_repeat, env_config)
+    elif workers <= 1:
+        # 環境の初期化 (観測は predict で即座に消費するためバッファを共有する)
+        env = F1TenthRL(config.MAP_PATH, share_obs_buffer=True, trajectory_log=trajectory_log, track=track,
+                        profiler=profiler, action_repeat=action_repeat, env_config=env_config)
+        print(f"現在の観測空間の形状: {env.observation_space.shape}")
+        model = load_policy(model_path)
+        print(f"モデルをロードしました: {model_path}")
+        for episode, seed, steps, laps in tasks:
+            result = run_episode(env, model, steps, seed, laps)
+            result["episode"] = episode
+            report(result)
+    else:
+        print(f"{workers} ワーカーで並列評価します")
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(model_path, profiler is not None, action_repeat, env_config)) as pool:
+            for result in pool.imap_unordered(_run_worker_episode, tasks):
+                report(result)
+
+    return sorted(results, key=lambda r: r["episode"])
+
+
+def summarize_episodes(episode_results):
+    """
+    エピソードごとの結果から全体の指標を求める（JSON に保存する集計値。scripts/sweep.py の評価指標にも使う）
+
+    中心線に沿った指標はコースが取り出せないマップでは None、ラップの指標は周回しないコースでは None。
+    各周の時間は sim 時間。
+    """
+    n = len(episode_results)
+    has_track = episode_results[0]["progress_m"] is not None
+    laps = [r["laps"] for r in episode_results if r["laps"] is not None]
+    has_laps = episode_results[0]["laps_completed"] is not None
+    lap_times = [t for r in episode_results if r["lap_times"] for t in r["lap_times"]]
+    return {
+        "success_rate": sum(r["status"] != "Collision" for r in episode_results) / n,
+        "collision_rate": sum(r["status"] == "Collision" for r in episode_results) / n,
+        "avg_steps": float(np.mean([r["steps"] for r in episode_results])),
+        "avg_reward": float(np.mean([r["reward"] for r in episode_results])),
+        "avg_speed": float(np.mean([r["avg_speed"] for r in episode_results])),
+        "avg_progress_m": float(np.mean([r["progress_m"] for r in episode_results])) if has_track else None,
+        "avg_laps": float(np.mean(laps)) if laps else None,
+        "avg_abs_offset_m": float(np.mean([r["mean_abs_offset_m"] for r in episode_results])) if has_track else None,
+        "lap_success_rate": sum(r["status"] == "Success (Laps)" for r in episode_results) / n,
+        "total_laps_completed": sum(r["laps_completed"] for r in episode_results) if has_laps else None,
+        "best_lap_sec": min(lap_times) if lap_times else None,
+        "avg_lap_sec": float(np.mean(lap_times)) if lap_times else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='F1Tenth Model Benchmark Evaluator')
+    parser.add_argument('--episodes', type=int, default=10, help='評価するエピソード数')
+    parser.add_argument('--max_steps', type=int, default=2000, help='1エピソードあたりの最大ステップ数')
+    parser.add_argument('--model', type=str, default=None,
+                        help='モデルファイルのパス(拡張子なし)。export_policy.py の .npz も指定可能（SB3 を読み込まず高速に起動）')
+    parser.add_argument('--workers', type=int, default=1, help='並列に評価するプロセス数')
+    parser.add_argument('--seed', type=int, default=0, help='基準シード(エピソード i には seed + i を使用)')
+    parser.add_argument('--batch', type=int, default=1, help='同時に進めて推論をまとめるエピソード数')
+    parser.add_argument('--trajlog', type=str, default=None,
+                        help='ステップ単位の走行ログ (src/trajlog.py 形式) の保存先ディレクトリ')
+    parser.add_argument('--trajlog-downsample', type=int, default=1,
+                        help='走行ログの LiDAR を何ビームごとに 1 つにまとめるか')
+    parser.add_argument('--trajlog-no-scans', action='store_true', help='走行ログに LiDAR を記録しない')
+    parser.add_argument('--profile', action='store_true',
+                        help='env.step の内訳（sim / 報酬 / 観測）と方策推論の実行時間の分布 (p50/p95/p99) を表示・保存する')
+    parser.add_argument('--laps', type=int, default=0,
+                        help='この周回数を完了したエピソードを打ち切る（0 = --max_steps まで走る。周回コースのみ）')
+    parser.add_argument('--action-repeat', type=int, default=1,
+                        help='1 回の行動を保つ物理 tick 数（学習時と同じ値を指定。--max_steps は行動の回数）')
+    args = parser.parse_args()
+    if args.batch > 1 and args.workers > 1:
+        parser.error('--batch と --workers は同時に指定できません')
+    if args.trajlog and (args.batch > 1 or args.workers > 1):
+        parser.error('--trajlog は逐次実行 (--batch 1 --workers 1) でのみ使用できます')
+
+    # モデルの読み込み
+    target_model = args.model if args.model else config.MODEL_PATH
+    if not target_model.endswith(('.zip', '.npz')):
+        target_model += '.zip'
+
+    if not os.path.exists(target_model):
+        print(f"エラー: モデルファイルが見つかりません: {target_model}")
+        return
+
+    print(f"\n--- ベンチマーク開始 ({args.episodes} エピソード) ---")
+
+    trajectory_log = None
+    if args.trajlog:
+        from src.trajlog import TrajectoryWriter
+        trajectory_log = TrajectoryWriter(args.trajlog, record_scans=not args.trajlog_no_scans,
+                                          scan_downsample=args.trajlog_downsample)
+
+    profiler = StageProfiler() if args.profile else None
+    start_time = time.time()
+    try:
+        episode_results = run_episodes(target_model, args.episodes, args.max_steps, args.seed,
+                                       args.workers, args.batch, trajectory_log, args.laps, profiler,
+                                       args.action_repeat)
+    except ValueError as e:
+        print("--- 読み込みエラー ---")
+        print(f"モデル '{target_model}' の読み込みに失敗しました。")
+        print("観測空間の次元設定（LIDAR_DOWNSAMPLE_FACTOR 等）が学習時と異なっている可能性があります。")
+        print(f"詳細: {e}")
+        return
+    finally:
+        if trajectory_log is not None:
+            trajectory_log.close()
     total_time = time.time() - start_time
+    if trajectory_log is not None:
+        print(f"走行ログを保存しました: {args.trajlog} ({trajectory_log.rows} steps)")
+
+    statuses = [r["status"] for r in episode_results]
+    # 逐次実行した場合の所要時間（各エピソードの実行時間の合計）との比
+    episode_time_total = sum(r["wall_time_sec"] for r in episode_results)
+    speedup = episode_time_total / total_time if total_time > 0 else 0.0
+    total_steps = sum(r["steps"] for r in episode_results)
+    policy_time = sum(r["policy_time_sec"] for r in episode_results)
+    sim_time = sum(r["sim_time_sec"] for r in episode_results)
+    # 進めた sim 時間（ステップ数 x action_repeat x 物理 tick）と実時間の比
+    simulated = sum(r["simulated_sec"] for r in episode_results)
+    sim_sec_per_wall_sec = simulated / total_time if total_time > 0 else 0.0
+    # 全体の指標（中心線に沿った指標・ラップタイムはコースが取り出せない / 周回しないマップでは None）
+    summary = summarize_episodes(episode_results)
+    # 実時間 1 秒あたりの走行距離（並列実行・バッチ推論の効果も含む）
+    has_track = summary["avg_progress_m"] is not None
+    m_per_wall_sec = sum(r["progress_m"] for r in episode_results) / total_time if has_track and total_time > 0 else None
 
     print("\n" + "="*40)
     print("📊 最終ベンチマーク結果")
     print("="*40)
     print(f"モデル: {os.path.basename(target_model)}")
-    print(f"総計時間: {total_time:.2f} 秒")
-    print(f"成功率 (完走): {results['success'] / args.episodes * 100:.1f}%")
-    print(f"衝突率: {results['collisions'] / args.episodes * 100:.1f}%")
+    print(f"総計時間: {total_time:.2f} 秒 ({args.workers} ワーカー, 逐次換算 {episode_time_total:.2f} 秒, {speedup:.2f}x)")
+    print(f"推論時間: {policy_time:.2f} 秒 ({policy_time / max(total_steps, 1) * 1e6:.1f} us/step, batch={args.batch})")
+    print(f"sim 時間: {sim_time:.2f} 秒 ({sim_time / max(total_steps, 1) * 1e6:.1f} us/step)")
+    print(f"シミュレーション速度: {sim_sec_per_wall_sec:.1f} sim 秒 / 実時間 1 秒 (action repeat {args.action_repeat})")
+    print(f"成功率 (完走): {summary['success_rate'] * 100:.1f}%")
+    if args.laps and summary["total_laps_completed"] is not None:
+        print(f"  うち {args.laps} 周完了: {summary['lap_success_rate'] * 100:.1f}%")
+    print(f"衝突率: {summary['collision_rate'] * 100:.1f}%")
     print("-"*40)
-    print(f"平均ステップ数: {np.mean(results['steps']):.1f} steps")
-    print(f"平均累積報酬: {np.mean(results['rewards']):.1f}")
-    print(f"全体平均速度: {np.mean(results['avg_speeds']):.2f} m/s")
-    print(f"最高平均速度: {np.max(results['avg_speeds']):.2f} m/s")
+    print(f"平均ステップ数: {summary['avg_steps']:.1f} steps")
+    print(f"平均累積報酬: {summary['avg_reward']:.1f}")
+    print(f"全体平均速度: {summary['avg_speed']:.2f} m/s")
+    print(f"最高平均速度: {max(r['avg_speed'] for r in episode_results):.2f} m/s")
+    if has_track:
+        laps_text = f" ({summary['avg_laps']:.2f} 周)" if summary["avg_laps"] is not None else ""
+        print(f"平均走行距離 (中心線): {summary['avg_progress_m']:.1f} m{laps_text}")
+        print(f"中心線からの平均横ずれ: {summary['avg_abs_offset_m']:.3f} m")
+        print(f"実時間あたりの走行距離: {m_per_wall_sec:.1f} m/s")
+    if summary["total_laps_completed"] is not None:
+        total_laps = summary["total_laps_completed"]
+        print(f"完了周回数: {total_laps} 周 (1 エピソード平均 {total_laps / args.episodes:.2f} 周)")
+        if summary["best_lap_sec"] is not None:
+            print(f"ベストラップ: {summary['best_lap_sec']:.2f} 秒 / 平均ラップ: {summary['avg_lap_sec']:.2f} 秒 (sim 時間)")
     print("="*40)
+    profile_summary = profiler.summary() if profiler is not None else None
+    if profile_summary:
+        print("⏱️ ステージごとの実行時間")
+        print(format_summary(profile_summary))
+        print("="*40)
 
     # 結果を CSV と JSON に保存
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -117,26 +457,50 @@ def main():
 
     with open(csv_path, "w", newline='') as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(["episode", "steps", "reward", "avg_speed", "status"])
+        writer.writerow(["episode", "steps", "reward", "avg_speed", "status", "progress_m", "laps", "mean_abs_offset_m",
+                         "m_per_wall_sec", "laps_completed", "best_lap_sec", "lap_times"])
         for i in range(args.episodes):
-            writer.writerow([i+1, results["steps"][i], results["rewards"][i], results["avg_speeds"][i], statuses[i]])
+            r = episode_results[i]
+            lap_times_text = ";".join(f"{t:.3f}" for t in r["lap_times"]) if r["lap_times"] is not None else None
+            writer.writerow([i+1, r["steps"], r["reward"], r["avg_speed"], statuses[i],
+                             r["progress_m"], r["laps"], r["mean_abs_offset_m"],
+                             r["m_per_wall_sec"], r["laps_completed"], r["best_lap_sec"], lap_times_text])
 
     with open(json_path, "w") as jsonfile:
         json.dump({
             "model": os.path.basename(target_model),
             "episodes": args.episodes,
             "max_steps": args.max_steps,
+            "seed": args.seed,
+            "workers": args.workers,
+            "batch": args.batch,
             "total_time_sec": total_time,
-            "success_rate": results['success'] / args.episodes,
-            "collision_rate": results['collisions'] / args.episodes,
-            "avg_steps": float(np.mean(results['steps'])),
-            "avg_reward": float(np.mean(results['rewards'])),
-            "avg_speed": float(np.mean(results['avg_speeds'])),
+            "episode_time_total_sec": episode_time_total,
+            "speedup": speedup,
+            "policy_time_sec": policy_time,
+            "sim_time_sec": sim_time,
+            "policy_us_per_step": policy_time / max(total_steps, 1) * 1e6,
+            "sim_us_per_step": sim_time / max(total_steps, 1) * 1e6,
+            "action_repeat": args.action_repeat,
+            "simulated_sec": simulated,
+            "sim_sec_per_wall_sec": sim_sec_per_wall_sec,
+            **summary,
+            "m_per_wall_sec": m_per_wall_sec,
+            "target_laps": args.laps,
+            "profile": profile_summary,
             "per_episode": [
-                {"episode": i+1, "steps": results["steps"][i],
-                 "reward": results["rewards"][i],
-                 "avg_speed": results["avg_speeds"][i],
-                 "status": statuses[i]}
+                {"episode": i+1, "steps": episode_results[i]["steps"],
+                 "reward": episode_results[i]["reward"],
+                 "avg_speed": episode_results[i]["avg_speed"],
+                 "status": statuses[i],
+                 "seed": episode_results[i]["seed"],
+                 "progress_m": episode_results[i]["progress_m"],
+                 "laps": episode_results[i]["laps"],
+                 "mean_abs_offset_m": episode_results[i]["mean_abs_offset_m"],
+                 "m_per_wall_sec": episode_results[i]["m_per_wall_sec"],
+                 "laps_completed": episode_results[i]["laps_completed"],
+                 "lap_times": episode_results[i]["lap_times"],
+                 "best_lap_sec": episode_results[i]["best_lap_sec"]}
                 for i in range(args.episodes)
             ]
         }, jsonfile, indent=2, ensure_ascii=False)
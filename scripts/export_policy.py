@@ -0,0 +1,216 @@
+"""
+学習済み PPO モデル (.zip) から決定論的アクターを取り出し、
+stable-baselines3 なしで推論できる .npz（および任意で ONNX）に書き出すスクリプト
+
+.npz には重みに加えて、観測の前処理に必要な config.py の定数（ダウンサンプリング率・正規化定数など）も保存されます。
+読み込みと推論は src/policy_runtime.py の NumpyPolicy / ObservationPreprocessor を使用します。
+
+使い方:
+    python3 scripts/export_policy.py --model sharing/ppo_f1_custom_map_steps25000000_arch2.zip
+    python3 scripts/export_policy.py --model models/ppo_f1_final.zip --out models/actor.npz --onnx models/actor.onnx --verify
+"""
+import argparse
+import base64
+import inspect
+import io
+import json
+import os
+import pickletools
+import sys
+import zipfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.env_config import load_env_config
+from src.policy_runtime import NumpyPolicy, save_policy_npz
+
+
+def config_preprocess():
+    """観測の前処理に使う config.py の定数を JSON に保存できる形で返す（EnvConfig.preprocess と同じ）"""
+    return load_env_config().preprocess()
+
+
+def _parse_array(text):
+    """SB3 が data に書き出す numpy 配列の文字列表現 ("[-1. -1.]") を配列に戻す"""
+    return np.array(text.strip("[]").split(), dtype=np.float32)
+
+
+# 対応している活性化関数（torch.nn のクラス名 -> NumpyPolicy の名前）
+_ACTIVATION_CLASSES = {"torch.nn.modules.activation.ReLU": "relu", "torch.nn.modules.activation.Tanh": "tanh"}
+
+
+def _pickled_class_name(blob):
+    """cloudpickle でシリアライズされたクラスの完全修飾名を、unpickle せずに読み出す（見つからなければ None）"""
+    strings = []
+    for opcode, arg, _ in pickletools.genops(blob):
+        if opcode.name == "GLOBAL":
+            # プロトコル 3 以前: "モジュール名 クラス名"
+            return ".".join(arg.split(" ", 1))
+        if opcode.name == "STACK_GLOBAL" and len(strings) >= 2:
+            return f"{strings[-2]}.{strings[-1]}"
+        if isinstance(arg, str):
+            strings.append(arg)
+    return None
+
+
+def _detect_activation(policy_kwargs):
+    """policy_kwargs から隠れ層の活性化関数名を推定する（未指定なら SB3 の既定値 Tanh）"""
+    activation = policy_kwargs.get("activation_fn")
+    if activation is None:
+        return "tanh"
+    # クラスは cloudpickle でシリアライズされているため、pickle に書かれたクラス名を完全一致で比べる
+    # （部分一致では LeakyReLU / ReLU6 も ReLU と判定してしまう）
+    blob = base64.b64decode(activation.get(":serialized:", "")) if isinstance(activation, dict) else b""
+    try:
+        name = _pickled_class_name(blob)
+    except ValueError:
+        name = None
+    if name in _ACTIVATION_CLASSES:
+        return _ACTIVATION_CLASSES[name]
+    raise ValueError(f"活性化関数を判別できませんでした ({name}。対応しているのは ReLU / Tanh)。"
+                     "--activation で指定してください")
+
+
+def _linear_indices(state_dict, prefix):
+    """prefix 以下の Linear 層の番号を昇順で返す (例: mlp_extractor.policy_net.0, .2)"""
+    indices = {int(key[len(prefix):].split(".")[0]) for key in state_dict
+               if key.startswith(prefix) and key.endswith(".weight")}
+    return sorted(indices)
+
+
+def load_actor(model_path, activation=None):
+    """
+    モデル .zip から決定論的アクターの重みを読み出す
+
+    torch は .pth の読み込みにのみ使用し、stable-baselines3 は import しない。
+    SB3 1.x の shared_net（共有層）にも対応する。
+    """
+    import torch
+
+    with zipfile.ZipFile(model_path) as archive:
+        data = json.loads(archive.read("data"))
+        state_dict = torch.load(io.BytesIO(archive.read("policy.pth")), map_location="cpu")
+
+    policy_kwargs = data.get("policy_kwargs") or {}
+    if policy_kwargs.get("squash_output"):
+        raise ValueError("squash_output=True の方策には対応していません")
+    if "log_std" not in state_dict or "action_net.weight" not in state_dict:
+        raise ValueError("連続行動（ガウス方策）の ActorCriticPolicy ではありません")
+
+    weights, biases = [], []
+    for prefix in ("mlp_extractor.shared_net.", "mlp_extractor.policy_net."):
+        for i in _linear_indices(state_dict, prefix):
+            weights.append(state_dict[f"{prefix}{i}.weight"].numpy())
+            biases.append(state_dict[f"{prefix}{i}.bias"].numpy())
+
+    action_space = data["action_space"]
+    return {
+        "hidden_weights": weights,
+        "hidden_biases": biases,
+        "action_weight": state_dict["action_net.weight"].numpy(),
+        "action_bias": state_dict["action_net.bias"].numpy(),
+        "activation": activation or _detect_activation(policy_kwargs),
+        "action_low": _parse_array(action_space["low"]),
+        "action_high": _parse_array(action_space["high"]),
+    }
+
+
+def export_onnx(actor, path):
+    """アクター（クリップ込み）を ONNX に書き出す。入力 "obs" (N, obs_dim) / 出力 "action" (N, action_dim)"""
+    import importlib.util
+    import torch
+    from torch import nn
+
+    if importlib.util.find_spec("onnx") is None:
+        raise ImportError("ONNX の書き出しには onnx パッケージが必要です (pip install onnx)")
+
+    activation = {"tanh": nn.Tanh, "relu": nn.ReLU}[actor["activation"]]
+    layers = []
+    for w, b in zip(actor["hidden_weights"], actor["hidden_biases"]):
+        linear = nn.Linear(w.shape[1], w.shape[0])
+        linear.weight.data = torch.from_numpy(w)
+        linear.bias.data = torch.from_numpy(b)
+        layers += [linear, activation()]
+    head = nn.Linear(actor["action_weight"].shape[1], actor["action_weight"].shape[0])
+    head.weight.data = torch.from_numpy(actor["action_weight"])
+    head.bias.data = torch.from_numpy(actor["action_bias"])
+    layers.append(head)
+
+    class _Actor(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.net = nn.Sequential(*layers)
+            self.register_buffer("low", torch.from_numpy(actor["action_low"]))
+            self.register_buffer("high", torch.from_numpy(actor["action_high"]))
+
+        def forward(self, obs):
+            return torch.max(torch.min(self.net(obs), self.high), self.low)
+
+    obs_dim = actor["hidden_weights"][0].shape[1] if actor["hidden_weights"] else head.in_features
+    dummy = torch.zeros(1, obs_dim)
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # dynamo=False: TorchScript ベースの従来のエクスポータ（onnxscript 不要）を使う
+        # （引数 dynamo は torch 2.5 以降。それより前は従来のエクスポータしか無い）
+        kwargs["dynamo"] = False
+    torch.onnx.export(_Actor().eval(), dummy, path, input_names=["obs"], output_names=["action"],
+                      dynamic_axes={"obs": {0: "batch"}, "action": {0: "batch"}}, **kwargs)
+
+
+def verify(model_path, policy, num_samples=1000, seed=0):
+    """SB3 の model.predict(deterministic=True) と比較し、最大誤差を返す"""
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    rng = np.random.default_rng(seed)
+    space = model.observation_space
+    low = np.maximum(space.low, -10.0)
+    high = np.minimum(space.high, 30.0)
+    obs = rng.uniform(low, high, size=(num_samples,) + space.shape).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PPO モデルを NumPy / ONNX 推論用にエクスポート')
+    parser.add_argument('--model', type=str, required=True, help='モデルファイルのパス (.zip)')
+    parser.add_argument('--out', type=str, default=None,
+                        help='出力先 .npz（省略時はモデルと同じ場所に <名前>_actor.npz）')
+    parser.add_argument('--onnx', type=str, default=None, help='ONNX の出力先（指定時のみ書き出す）')
+    parser.add_argument('--activation', type=str, default=None, choices=['tanh', 'relu'],
+                        help='隠れ層の活性化関数（省略時は policy_kwargs から判定）')
+    parser.add_argument('--verify', action='store_true',
+                        help='stable-baselines3 の model.predict と出力を比較する')
+    args = parser.parse_args()
+
+    out_path = args.out or os.path.splitext(args.model)[0] + "_actor.npz"
+    actor = load_actor(args.model, args.activation)
+    preprocess = config_preprocess()
+    save_policy_npz(out_path, preprocess=preprocess, **actor)
+
+    policy = NumpyPolicy.load(out_path)
+    arch = [w.shape[0] for w in actor["hidden_weights"]]
+    print(f"Exported: {out_path}")
+    print(f"  obs_dim={policy.obs_dim}, net_arch={arch}, activation={policy.activation}, "
+          f"action_dim={len(policy.action_low)}")
+
+    factor = preprocess["lidar_downsample_factor"]
+    expected_dim = (1080 // factor) * (2 if preprocess["include_lidar_residual"] else 1) \
+        + (2 if preprocess["include_vehicle_state"] else 0)
+    if expected_dim != policy.obs_dim:
+        print(f"警告: 現在の config.py から求まる観測次元 ({expected_dim}) とモデルの観測次元 ({policy.obs_dim}) が一致しません。")
+        print("      学習時の config.py でエクスポートし直さないと ObservationPreprocessor は使用できません。")
+
+    if args.onnx:
+        export_onnx(actor, args.onnx)
+        print(f"Exported: {args.onnx}")
+
+    if args.verify:
+        max_error = verify(args.model, policy)
+        print(f"  model.predict との最大誤差: {max_error:.3e}")
+
+
+if __name__ == '__main__':
+    main()
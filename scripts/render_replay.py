@@ -0,0 +1,149 @@
+"""
+記録した走行 (enjoy_wide.py --record) から GIF/MP4 を並列に描画する
+
+方策もシミュレータも動かさず、記録のフレームをチャンクに分けてプロセスプールで描画（GIF はエンコードまで）し、
+順番通りに 1 つの動画へ連結します。描画スタイル (--renderer) やフレーム間隔 (--stride) を変えた描き直しも高速です。
+
+使い方:
+    python3 scripts/enjoy_wide.py --no-render --record run.npz
+    python3 scripts/render_replay.py run.npz --save run.gif --renderer fast --workers 4
+    python3 scripts/render_replay.py run.npz --save run.mp4 --stride 1
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# 画面の無い環境でも matplotlib で描画できるようにする
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+import config
+from utils.render import RENDERERS
+from utils.replay import load_rollout, render_frames
+from utils.video import ENCODERS, GifFrameEncoder, GifStreamWriter, open_frame_writer
+
+# ワーカープロセスごとに 1 度だけ読み込んだ記録
+_rollout = None
+
+
+def _init_worker(rollout_path):
+    global _rollout
+    _rollout = load_rollout(rollout_path)
+
+
+def _render_chunk(frame_steps, trail_steps, renderer, map_path):
+    return render_frames(_rollout, frame_steps, renderer=renderer, trail_steps=trail_steps, map_path=map_path)
+
+
+def _render_gif_chunk(frame_steps, trail_steps, renderer, map_path, fps):
+    """
+    チャンクを描画して GIF のバイト列までエンコードする
+
+    2 つ目以降のチャンクは直前のフレームとの差分で始まるため、直前のフレームも描画して基準にする。
+    """
+    if trail_steps:
+        prev, *frames = render_frames(_rollout, trail_steps[-1:] + frame_steps, renderer=renderer,
+                                      trail_steps=trail_steps[:-1], map_path=map_path)
+    else:
+        prev, frames = None, _render_chunk(frame_steps, trail_steps, renderer, map_path)
+    encoder = GifFrameEncoder(fps=fps, prev=prev)
+    return b''.join(encoder.encode(frame) for frame in frames)
+
+
+def split_chunks(steps, chunk_size):
+    """描画するステップ列をチャンクに分け、(チャンク, それより前のステップ) の組を返す"""
+    return [(steps[i:i + chunk_size], steps[:i]) for i in range(0, len(steps), chunk_size)]
+
+
+def _map_ordered(pool, fn, tasks, max_pending):
+    """pool で tasks を実行し、投入順に結果を返す（未回収の結果は max_pending 個まで）"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, *task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def render_replay(rollout_path, save_path, renderer="fast", stride=2, workers=None, chunk_size=50,
+                  encoder="stream", fps=25, map_path=None):
+    """
+    記録を描画して save_path に書き出し、書き出したフレーム数を返す
+
+    GIF は減色・エンコードまでワーカーで行い、親プロセスはバイト列を順に連結するだけにする。
+    MP4 はワーカーが描画したフレームを親プロセスの ffmpeg に順に渡す（encoder で書き出し方を選ぶ）。
+    """
+    steps = load_rollout(rollout_path)["steps"]
+    chunks = split_chunks(list(range(0, steps, stride)), chunk_size)
+    workers = workers or os.cpu_count() or 1
+    is_gif = not save_path.lower().endswith('.mp4')
+    if is_gif:
+        fn, tasks = _render_gif_chunk, [(f, t, renderer, map_path, fps) for f, t in chunks]
+    else:
+        fn, tasks = _render_chunk, [(f, t, renderer, map_path) for f, t in chunks]
+
+    if workers == 1:
+        _init_worker(rollout_path)
+        results = (fn(*task) for task in tasks)
+        return _write_results(results, chunks, save_path, is_gif, encoder, fps)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rollout_path,)) as pool:
+        # 先行して投入するチャンク数を制限し、書き出し待ちの結果がメモリに溜まらないようにする
+        results = _map_ordered(pool, fn, tasks, max_pending=2 * workers)
+        return _write_results(results, chunks, save_path, is_gif, encoder, fps)
+
+
+def _write_results(results, chunks, save_path, is_gif, encoder, fps):
+    if is_gif:
+        with GifStreamWriter(save_path, fps=fps) as writer:
+            for data, (frame_steps, _) in zip(results, chunks):
+                writer.append_encoded(data, len(frame_steps))
+        return writer.frames
+
+    with open_frame_writer(save_path, fps=fps, encoder=encoder) as writer:
+        for frames in results:
+            for frame in frames:
+                writer.append(frame)
+    return writer.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='記録した走行から GIF/MP4 を並列に描画する')
+    parser.add_argument('rollout', type=str, help='enjoy_wide.py --record で保存した .npz')
+    parser.add_argument('--save', type=str, default=config.GIF_PATH, help='保存先のパス (.gif / .mp4)')
+    parser.add_argument('--renderer', type=str, default='fast', choices=list(RENDERERS),
+                        help='matplotlib: 従来の描画 / fast: NumPy で直接描画')
+    parser.add_argument('--stride', type=int, default=2, help='何ステップごとに 1 フレーム描画するか')
+    parser.add_argument('--workers', type=int, default=None, help='描画プロセス数（省略時は CPU 数）')
+    parser.add_argument('--chunk-size', type=int, default=50, help='1 タスクで描画するフレーム数')
+    parser.add_argument('--encoder', type=str, default='stream', choices=ENCODERS,
+                        help='MP4 の書き出し方（GIF はワーカーでエンコードするため使わない）')
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--map', type=str, default=None, help='記録と別のマップで描画する場合のパス（拡張子なし）')
+    args = parser.parse_args()
+
+    save_path = args.save
+    if os.path.dirname(save_path) == '':
+        save_path = os.path.join(config.GIF_DIR, save_path)
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+    start = time.perf_counter()
+    frames = render_replay(args.rollout, save_path, renderer=args.renderer, stride=args.stride,
+                           workers=args.workers, chunk_size=args.chunk_size, encoder=args.encoder,
+                           fps=args.fps, map_path=args.map)
+    elapsed = time.perf_counter() - start
+    if frames > 0:
+        print(f"保存完了: {save_path} ({frames} frames, {elapsed:.1f} s, {frames / elapsed:.1f} frames/s)")
+    else:
+        print("記録が空のため保存はスキップされました。")
+
+
+if __name__ == '__main__':
+    main()
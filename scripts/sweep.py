@@ -0,0 +1,327 @@
+"""
+ハイパーパラメータの並列探索（ASHA による早期打ち切り付き）
+
+探索空間（JSON, 書き方は src/sweep.py）からパラメータを選んで試行を作り、ローカルのプロセスで並列に学習します。
+各試行は学習ステップ数の段（--min-steps から --eta 倍ずつ --max-steps まで）ごとにチェックポイントを保存し、
+evaluate.py と同じ指標（既定は平均累積報酬）で評価します。段ごとに上位 1 / eta に入った試行だけが
+次の段へ進み、残りはそこで打ち切られます（ASHA）。config.py を書き換えずに、試行ごとの EnvConfig で学習します。
+
+各試行は --cores-per-trial 個の CPU コアに固定され（Linux のみ）、PyTorch のスレッド数と並列環境数もその数にそろえます。
+結果は --out/sweep.json に段が終わるたびに保存されるため、中断しても同じコマンドで再実行すれば続きから再開します。
+
+    --out/
+      sweep.json           設定・試行のパラメータ・段ごとの評価結果
+      leaderboard.csv      到達した段と評価指標の順位表
+      trial_0003/
+        rung_1.zip         段 1 の終わりのモデル（次の段はここから学習を続ける）
+        train.log          学習・評価の出力
+        tb/                TensorBoard ログ（utils/aggregate_runs.py でまとめて比較できる）
+
+使い方:
+    python3 scripts/sweep.py --space sweeps/space.json --out sweeps/lr_ent --trials 27 --workers 4 --cores-per-trial 4
+    python3 scripts/sweep.py --space sweeps/space.json --out sweeps/lr_ent --trials 27 --workers 4 --cores-per-trial 4 \\
+        --min-steps 100000 --max-steps 1500000 --eta 3 --metric avg_progress_m
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from src.env_config import load_env_config
+from src.sweep import AshaScheduler, SweepStore, rung_budgets, sample_params, trial_settings
+from src.vec_env import VEC_BACKENDS
+
+# 評価指標（evaluate.summarize_episodes のキー）と、大きいほど良いか
+METRICS = {
+    "avg_reward": True,
+    "avg_progress_m": True,
+    "avg_laps": True,
+    "avg_speed": True,
+    "success_rate": True,
+    "collision_rate": False,
+}
+
+
+def core_slots(workers, cores_per_trial):
+    """ワーカーごとに使う CPU コアの番号のリスト（コアが足りない場合は重ねて割り当てる）"""
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    if workers * cores_per_trial > len(available):
+        print(f"警告: {workers} ワーカー x {cores_per_trial} コアが使えるコア数 ({len(available)}) を超えるため、コアを共有します")
+    return [[available[(slot * cores_per_trial + i) % len(available)] for i in range(cores_per_trial)]
+            for slot in range(workers)]
+
+
+def train_and_evaluate(job):
+    """1 つの段を学習し、チェックポイントを保存して評価する（子プロセスで実行）"""
+    if hasattr(os, "sched_setaffinity"):
+        # SubprocVecEnv のワーカーもこのコアの割り当てを引き継ぐ
+        os.sched_setaffinity(0, job["cores"])
+    import torch
+    torch.set_num_threads(len(job["cores"]))
+    from stable_baselines3 import PPO
+    from src.vec_env import make_vec_env
+    from evaluate import run_episodes, summarize_episodes
+
+    settings = job["settings"]
+    ppo_kwargs, env_config = trial_settings(job["params"], load_env_config())
+    trial_dir = job["trial_dir"]
+    checkpoint = os.path.join(trial_dir, f"rung_{job['rung']}")
+    tb_dir = os.path.join(trial_dir, "tb")
+
+    with open(os.path.join(trial_dir, "train.log"), "a") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        print(f"--- 段 {job['rung']}: {job['budget']} steps まで学習 (コア {job['cores']}) ---")
+        print(f"パラメータ: {json.dumps(job['params'])}")
+        start = time.perf_counter()
+        env = make_vec_env(config.MAP_PATH, num_envs=settings["num_envs"], backend=settings["vec_backend"],
+                           seed=settings["seed"], env_config=env_config)
+        if job["resume"]:
+            model = PPO.load(job["resume"], env=env, device=config.DEVICE, tensorboard_log=tb_dir)
+        else:
+            model = PPO(
+                "MlpPolicy",
+                env,
+                learning_rate=ppo_kwargs.get("learning_rate", config.LEARNING_RATE),
+                ent_coef=ppo_kwargs.get("ent_coef", config.PPO_ENT_COEF),
+                policy_kwargs=dict(net_arch=ppo_kwargs.get("net_arch", config.NET_ARCH)),
+                verbose=1,
+                tensorboard_log=tb_dir,
+                device=config.DEVICE,
+                seed=settings["seed"],
+            )
+        # ロールアウト単位で進むため、前の段で予算を超えている場合は学習しない
+        remaining = job["budget"] - model.num_timesteps
+        if remaining > 0:
+            model.learn(total_timesteps=remaining, reset_num_timesteps=False, tb_log_name="PPO")
+        model.save(checkpoint)
+        env.close()
+        train_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        episode_results = run_episodes(checkpoint + ".zip", settings["eval_episodes"], settings["eval_max_steps"],
+                                       settings["seed"], workers=1, batch=settings["eval_batch"],
+                                       env_config=env_config)
+        metrics = summarize_episodes(episode_results)
+        eval_sec = time.perf_counter() - start
+        print(f"評価: {json.dumps(metrics)}")
+
+    return {
+        "steps": int(model.num_timesteps),
+        "metrics": metrics,
+        "train_sec": train_sec,
+        "eval_sec": eval_sec,
+        "checkpoint": os.path.relpath(checkpoint + ".zip", os.path.dirname(trial_dir)),
+    }
+
+
+def run_job(job, results):
+    """子プロセスの入口。結果（または例外のトレースバック）を results キューに入れる"""
+    message = {"trial_id": job["trial_id"], "rung": job["rung"]}
+    try:
+        message["result"] = train_and_evaluate(job)
+    except Exception:
+        # Ctrl+C（KeyboardInterrupt）は試行の失敗として記録せず、再開時にやり直す
+        message["error"] = traceback.format_exc()
+    results.put(message)
+
+
+def _receive(results, running, timeout):
+    """
+    終わった段の結果を 1 つ受け取る（無ければ None）
+
+    結果を送らずに終了した子プロセス（メモリ不足で kill された場合など）は失敗として扱う。
+    """
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        pass
+    for trial_id, (process, _, rung) in running.items():
+        if not process.is_alive():
+            # 終了直前に送った結果がキューに残っている場合はそちらを返す
+            try:
+                return results.get(timeout=1.0)
+            except queue.Empty:
+                return {"trial_id": trial_id, "rung": rung,
+                        "error": f"結果を返さずに終了しました (exit code {process.exitcode})"}
+    return None
+
+
+def print_leaderboard(scheduler, out_dir, top):
+    """到達した段と評価指標の順位表を表示し、leaderboard.csv に保存する"""
+    rows = scheduler.leaderboard()
+    metric = scheduler.metric
+    csv_path = os.path.join(out_dir, "leaderboard.csv")
+    with open(csv_path, "w", newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "trial", "rung", "steps", metric, "status", "checkpoint", "params"])
+        for rank, (trial_id, result) in enumerate(rows, 1):
+            writer.writerow([rank, trial_id, len(scheduler.store.trials[trial_id]["results"]) - 1, result["steps"],
+                             result["metrics"].get(metric), scheduler.status(trial_id), result["checkpoint"],
+                             json.dumps(scheduler.store.trials[trial_id]["params"])])
+
+    print(f"{'順位':>4} {'試行':>4} {'段':>3} {'steps':>9} {metric:>15} {'状態':>10}  パラメータ")
+    for rank, (trial_id, result) in enumerate(rows[:top], 1):
+        value = result["metrics"].get(metric)
+        value_text = f"{value:15.3f}" if value is not None else f"{'-':>15}"
+        print(f"{rank:4d} {trial_id:4d} {len(scheduler.store.trials[trial_id]['results']) - 1:3d} "
+              f"{result['steps']:9d} {value_text} {scheduler.status(trial_id):>10}  "
+              f"{json.dumps(scheduler.store.trials[trial_id]['params'])}")
+    print(f"順位表を保存しました: {csv_path}")
+
+
+def open_sweep(args, space):
+    """
+    --out の記録を開き（無ければ作り）、スケジューラを返す
+
+    Raises:
+        ValueError: 既存の記録と設定が異なる場合、段の指定が不正な場合
+    """
+    budgets = rung_budgets(args.min_steps, args.max_steps, args.eta)
+    num_envs = args.num_envs if args.num_envs is not None else args.cores_per_trial
+    # 再開時に結果の意味が変わる設定だけを記録する（--trials / --workers は再開時に変えてよい）
+    settings = {
+        "space": space,
+        "budgets": budgets,
+        "eta": args.eta,
+        "metric": args.metric,
+        "seed": args.seed,
+        "map_path": config.MAP_PATH,
+        "num_envs": num_envs,
+        "vec_backend": args.vec_backend if num_envs > 1 else "dummy",
+        "eval_episodes": args.eval_episodes,
+        "eval_max_steps": args.eval_max_steps,
+        "eval_batch": args.eval_batch,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    store = SweepStore.open(os.path.join(args.out, "sweep.json"), settings)
+    return AshaScheduler(store, space, budgets, args.eta, args.trials, args.metric,
+                         maximize=METRICS[args.metric], seed=args.seed)
+
+
+def run_sweep(args, scheduler):
+    """空いたワーカーに段を割り当て、結果を記録しながら全試行が終わるか打ち切られるまで回す"""
+    store = scheduler.store
+    budgets = scheduler.budgets
+    settings = store.settings
+    slots = core_slots(args.workers, args.cores_per_trial)
+
+    finished = sum(len(trial["results"]) for trial in store.trials.values())
+    print(f"--- sweep: {args.out} ---")
+    print(f"段 (steps): {budgets}  eta={args.eta}  評価指標: {args.metric}")
+    print(f"{args.workers} ワーカー x {args.cores_per_trial} コア, 試行 {len(store.trials)}/{args.trials}")
+    if finished:
+        print(f"評価済みの段 {finished} 個から再開します")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    running = {}  # trial_id -> (process, slot, rung)
+    free_slots = list(range(args.workers))
+    start = time.perf_counter()
+    try:
+        while True:
+            while free_slots:
+                job = scheduler.next_job(running)
+                if job is None:
+                    break
+                trial_id, rung = job
+                slot = free_slots.pop(0)
+                trial_dir = os.path.join(args.out, f"trial_{trial_id:04d}")
+                os.makedirs(trial_dir, exist_ok=True)
+                resume = None
+                if rung > 0:
+                    resume = os.path.join(args.out, store.trials[trial_id]["results"][rung - 1]["checkpoint"])
+                process = ctx.Process(target=run_job, args=({
+                    "trial_id": trial_id, "rung": rung, "budget": budgets[rung],
+                    "params": store.trials[trial_id]["params"], "settings": settings,
+                    "trial_dir": trial_dir, "resume": resume, "cores": slots[slot],
+                }, results))
+                process.start()
+                running[trial_id] = (process, slot, rung)
+                print(f"[{time.perf_counter() - start:8.0f}s] 開始: 試行 {trial_id} 段 {rung} "
+                      f"({budgets[rung]} steps, コア {slots[slot]})")
+            if not running:
+                break
+
+            message = _receive(results, running, timeout=5.0)
+            if message is None:
+                continue
+            trial_id, rung = message["trial_id"], message["rung"]
+            if trial_id not in running:
+                continue
+            process, slot, _ = running.pop(trial_id)
+            process.join()
+            free_slots.append(slot)
+            elapsed = time.perf_counter() - start
+            if "error" in message:
+                store.record_error(trial_id, rung, message["error"])
+                print(f"[{elapsed:8.0f}s] 失敗: 試行 {trial_id} 段 {rung}\n{message['error']}")
+                continue
+            store.record(trial_id, rung, message["result"])
+            value = message["result"]["metrics"].get(args.metric)
+            print(f"[{elapsed:8.0f}s] 評価: 試行 {trial_id} 段 {rung} ({message['result']['steps']} steps) "
+                  f"{args.metric}={value} (学習 {message['result']['train_sec']:.0f}s, "
+                  f"評価 {message['result']['eval_sec']:.0f}s)")
+    except KeyboardInterrupt:
+        for process, _, _ in running.values():
+            process.terminate()
+        for process, _, _ in running.values():
+            process.join()
+        print("\n中断しました。同じ --out で再実行すると、評価済みの段をやり直さずに再開します。")
+        return
+
+    # 打ち切りで節約できた学習ステップ数（全試行を最後の段まで学習した場合との比）
+    total = scheduler.total_steps()
+    full = len(store.trials) * budgets[-1]
+    print("\n" + "=" * 40)
+    print(f"完了: 試行 {len(store.trials)} 個, 学習ステップ数の合計 {total} "
+          f"(全試行を {budgets[-1]} steps まで学習した場合の {total / max(full, 1):.1%})")
+    print("=" * 40)
+    print_leaderboard(scheduler, args.out, args.top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ASHA による早期打ち切り付きのハイパーパラメータ並列探索')
+    parser.add_argument('--space', type=str, required=True, help='探索空間の JSON ファイル')
+    parser.add_argument('--out', type=str, required=True, help='結果の保存先ディレクトリ（同じ値で再実行すると再開）')
+    parser.add_argument('--trials', type=int, default=27, help='作成する試行の数')
+    parser.add_argument('--workers', type=int, default=2, help='同時に実行する試行の数')
+    parser.add_argument('--cores-per-trial', type=int, default=4, help='1 試行が使う CPU コア数')
+    parser.add_argument('--num-envs', type=int, default=None, help='1 試行の並列環境数（既定は --cores-per-trial）')
+    parser.add_argument('--vec-backend', type=str, default='subproc', choices=VEC_BACKENDS,
+                        help='1 試行の並列環境の backend（環境数が 1 の場合は dummy）')
+    parser.add_argument('--min-steps', type=int, default=100000, help='最初の段の学習ステップ数')
+    parser.add_argument('--max-steps', type=int, default=config.TOTAL_TIMESTEPS, help='最後の段の学習ステップ数')
+    parser.add_argument('--eta', type=int, default=3, help='段ごとのステップ数の倍率（上位 1 / eta が次の段へ進む）')
+    parser.add_argument('--metric', type=str, default='avg_reward', choices=sorted(METRICS), help='試行を比べる評価指標')
+    parser.add_argument('--eval-episodes', type=int, default=10, help='段ごとの評価エピソード数')
+    parser.add_argument('--eval-max-steps', type=int, default=2000, help='評価の 1 エピソードあたりの最大ステップ数')
+    parser.add_argument('--eval-batch', type=int, default=1, help='評価で同時に進めて推論をまとめるエピソード数')
+    parser.add_argument('--seed', type=int, default=0, help='パラメータの選択・学習・評価の基準シード')
+    parser.add_argument('--top', type=int, default=10, help='表示する順位表の行数')
+    args = parser.parse_args()
+    if args.workers < 1 or args.cores_per_trial < 1:
+        parser.error('--workers と --cores-per-trial は 1 以上を指定してください')
+
+    with open(args.space) as f:
+        space = json.load(f)
+    try:
+        # 子プロセスを起動する前に、探索空間の書き間違いを見つける
+        trial_settings(sample_params(space, np.random.default_rng(args.seed)), load_env_config())
+        scheduler = open_sweep(args, space)
+    except ValueError as e:
+        parser.error(str(e))
+    run_sweep(args, scheduler)
+
+
+if __name__ == '__main__':
+    main()
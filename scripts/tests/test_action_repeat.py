@@ -0,0 +1,75 @@
+"""
+F1TenthRL の action_repeat のテスト（コンテナ内で実行。f110_gym が必要）
+
+- action_repeat=4 の 1 step が、action_repeat=1 の 4 step と同じ位置・sim 時間まで進むこと
+- LiDAR のレイキャストが step ごとに 1 回だけ行われること
+- 途中の tick で壁に当たってもエピソードが終わること
+"""
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.env_config import load_env_config
+from src.f1_env import F1TenthRL
+
+MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine'
+# 固定のスタート位置から始める
+ENV_CONFIG = load_env_config(start_pose_randomize=False, start_pose_sampling=False)
+
+
+class _CountingScanner:
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.calls = 0
+
+    def scan(self, *args, **kwargs):
+        self.calls += 1
+        return self.scanner.scan(*args, **kwargs)
+
+
+def _pose(env):
+    state = env.env.sim.agents[0].state
+    return np.array([state[0], state[1], state[4]])
+
+
+def test_action_repeat_matches_single_ticks():
+    action = np.array([0.1, 0.5], dtype=np.float32)
+    env1 = F1TenthRL(MAP_PATH, env_config=ENV_CONFIG)
+    env4 = F1TenthRL(MAP_PATH, action_repeat=4, env_config=ENV_CONFIG)
+    assert env4.step_dt == 4 * env1.step_dt
+    env1.reset()
+    env4.reset()
+
+    car_class = type(env4.env.sim.agents[0])
+    counter = _CountingScanner(car_class.scan_simulator)
+    car_class.scan_simulator = counter
+    try:
+        for _ in range(5):
+            for _ in range(4):
+                env1.step(action)
+            calls = counter.calls
+            _, _, done, _ = env4.step(action)
+            assert counter.calls - calls == 1
+            assert not done
+            np.testing.assert_allclose(_pose(env4), _pose(env1), atol=1e-9)
+        assert abs(env4.env.current_time - env1.env.current_time) < 1e-9
+    finally:
+        car_class.scan_simulator = counter.scanner
+
+
+def test_collision_on_intermediate_tick():
+    env = F1TenthRL(MAP_PATH, action_repeat=8, env_config=ENV_CONFIG)
+    env.reset()
+    # 全速で直進し続ければいずれ壁に当たる
+    for _ in range(2000):
+        obs, reward, done, info = env.step(np.array([0.0, 1.0], dtype=np.float32))
+        if done:
+            break
+    assert done
+    assert obs.shape == env.observation_space.shape
+    # 衝突した tick の報酬（衝突ペナルティ）が含まれる
+    assert reward < env.reward_config.reward_collision / 2
@@ -0,0 +1,83 @@
+"""
+学習ログの集計（scripts/utils/aggregate_runs.py）のテスト
+
+- 各ランの最終・最大報酬などがキャッシュの有無で変わらないこと
+- 2 回目は変更のないファイルを解析せず、追記されたファイルは続きだけを読むこと
+- 削除されたファイルのキャッシュが消えること
+"""
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from utils.aggregate_runs import CACHE_DIR_NAME, load_runs, summarize
+from utils.tfevents_stream import encode_record, encode_scalar_event
+
+
+def _write_run(log_dir, run, rewards, start=0, name='events.out.tfevents.1700000000.host.1.0'):
+    directory = os.path.join(log_dir, run)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, 'ab') as f:
+        for i, reward in enumerate(rewards, start=start):
+            f.write(encode_record(encode_scalar_event(i * 2048, 1.7e9 + i * 60, {
+                "rollout/ep_rew_mean": reward, "time/fps": 500.0 + i, "train/explained_variance": 0.5})))
+    return path
+
+
+def _rows(log_dir, **kwargs):
+    runs, stats = load_runs(log_dir, **kwargs)
+    return {row["run"]: row for row in summarize(runs)}, stats
+
+
+def test_cache_and_incremental_update():
+    log_dir = tempfile.mkdtemp()
+    _write_run(log_dir, "PPO_1", [1.0, 5.0, 3.0])
+    _write_run(log_dir, "PPO_2", [2.0, 4.0])
+    _write_run(log_dir, "sweep/trial_0", [0.5])
+
+    rows, stats = _rows(log_dir, workers=2)
+    assert stats == {"files": 3, "cached": 0, "resumed": 0, "parsed": 3}
+    assert rows["PPO_1"]["final_reward"] == 3.0 and rows["PPO_1"]["best_reward"] == 5.0
+    assert rows["PPO_1"]["timesteps"] == 2 * 2048 and rows["PPO_1"]["fps"] == 502.0
+    assert rows["sweep/trial_0"]["explained_variance"] == 0.5
+
+    rows_cached, stats = _rows(log_dir)
+    assert stats["cached"] == 3 and stats["parsed"] == 0
+    assert rows_cached == rows
+
+    # 追記されたファイルだけを、前回の続きから読む
+    _write_run(log_dir, "PPO_2", [9.0], start=2)
+    rows, stats = _rows(log_dir)
+    assert stats == {"files": 3, "cached": 2, "resumed": 1, "parsed": 0}
+    assert rows["PPO_2"]["final_reward"] == 9.0 and rows["PPO_2"]["timesteps"] == 2 * 2048
+    no_cache, _ = _rows(log_dir, use_cache=False)
+    assert no_cache == rows
+
+    # 削除したランはキャッシュからも消える
+    shutil.rmtree(os.path.join(log_dir, "PPO_1"))
+    rows, stats = _rows(log_dir)
+    assert "PPO_1" not in rows and stats["files"] == 2
+    cache_files = [n for n in os.listdir(os.path.join(log_dir, CACHE_DIR_NAME)) if n.endswith('.npz')]
+    assert len(cache_files) == 2
+
+
+def test_multiple_files_per_run_are_concatenated():
+    log_dir = tempfile.mkdtemp()
+    _write_run(log_dir, "PPO_1", [1.0, 2.0], name='events.out.tfevents.1700000000.host.1.0')
+    _write_run(log_dir, "PPO_1", [7.0], start=2, name='events.out.tfevents.1700009999.host.1.0')
+    runs, _ = load_runs(log_dir, workers=1)
+    steps, values, _ = runs["PPO_1"]["rollout/ep_rew_mean"]
+    assert list(steps) == [0, 2048, 4096]
+    assert np.allclose(values, [1.0, 2.0, 7.0])
+
+
+if __name__ == '__main__':
+    test_cache_and_incremental_update()
+    test_multiple_files_per_run_are_concatenated()
+    print("SUCCESS! 学習ログの集計は変更のあったファイルだけを読み直しています。")
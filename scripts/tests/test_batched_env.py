@@ -0,0 +1,100 @@
+"""
+BatchedF1TenthRL（src/batched_env.py）のテスト（コンテナ内で実行。f110_gym が必要）
+
+- K 台の観測・報酬が、同じシード・スタート位置の F1TenthRL を K 個別々に動かした結果と一致すること
+- 衝突した車両だけがリセットされ、terminal_observation がその車両のリセット前の観測になること
+- リセット後も全車両の観測（残差を含む）が個別の環境と一致し続けること
+"""
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.batched_env import BatchedF1TenthRL
+from src.env_config import load_env_config
+from src.f1_env import F1TenthRL
+
+MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine'
+# 固定のスタート位置から始める
+ENV_CONFIG = load_env_config(start_pose_randomize=False, start_pose_sampling=False)
+NUM_CARS = 3
+SEED = 7
+ATOL = 1e-5
+
+
+def _make():
+    """K 台のバッチ環境と、車両 i と同じシード (SEED + i) の F1TenthRL を K 個作って reset する"""
+    batched = BatchedF1TenthRL(MAP_PATH, num_cars=NUM_CARS, seed=SEED, env_config=ENV_CONFIG)
+    singles = [F1TenthRL(MAP_PATH, seed=SEED + i, env_config=ENV_CONFIG) for i in range(NUM_CARS)]
+    obs = batched.reset()
+    for i, env in enumerate(singles):
+        np.testing.assert_allclose(obs[i], env.reset(), atol=ATOL)
+    return batched, singles
+
+
+def _step_all(batched, singles, actions):
+    """両方を 1 ステップ進め、バッチ環境の結果と個別の環境の (観測, 報酬, 終了) のリストを返す"""
+    result = batched.step(actions)
+    single_results = [env.step(action)[:3] for env, action in zip(singles, actions)]
+    return result, single_results
+
+
+def test_matches_independent_envs():
+    batched, singles = _make()
+    try:
+        for t in range(40):
+            # 車両ごとに異なる行動（ステアリングを左右に振る）
+            actions = np.array([[0.3 * np.sin(t / 5 + i), 0.2 * i - 0.5] for i in range(NUM_CARS)], dtype=np.float32)
+            (obs, rewards, dones, infos), single_results = _step_all(batched, singles, actions)
+            assert not dones.any()
+            for i, (single_obs, single_reward, single_done) in enumerate(single_results):
+                assert not single_done
+                np.testing.assert_allclose(obs[i], single_obs, atol=ATOL, err_msg=f"step {t} car {i}")
+                assert abs(rewards[i] - single_reward) < 1e-4, (t, i, rewards[i], single_reward)
+    finally:
+        batched.close()
+
+
+def test_collision_resets_only_that_car():
+    batched, singles = _make()
+    try:
+        # 車両 0 だけ全速で直進し、他の車両は最低速度で直進する（車両 0 が先に壁に当たる）
+        actions = np.array([[0.0, 1.0]] + [[0.0, -1.0]] * (NUM_CARS - 1), dtype=np.float32)
+        for _ in range(2000):
+            (obs, rewards, dones, infos), single_results = _step_all(batched, singles, actions)
+            if dones.any():
+                break
+        assert dones.tolist() == [True] + [False] * (NUM_CARS - 1)
+        assert single_results[0][2]
+
+        # terminal_observation は車両 0 の衝突した時点の観測、報酬は衝突ペナルティを含む
+        np.testing.assert_allclose(infos[0]['terminal_observation'], single_results[0][0], atol=ATOL)
+        assert abs(rewards[0] - single_results[0][1]) < 1e-4
+        assert all('terminal_observation' not in info for info in infos[1:])
+        # 他の車両はリセットされずに走り続けている
+        for i in range(1, NUM_CARS):
+            np.testing.assert_allclose(obs[i], single_results[i][0], atol=ATOL)
+
+        # 車両 0 はスタート位置に戻り、観測は個別の環境を reset した場合と同じ
+        state = batched.sim.agents[0].state
+        np.testing.assert_allclose([state[0], state[1], state[4]], ENV_CONFIG.start_pose, atol=1e-9)
+        np.testing.assert_allclose(obs[0], singles[0].reset(), atol=ATOL)
+
+        # リセット後も全車両の観測・報酬が個別の環境と一致する
+        for t in range(10):
+            (obs, rewards, dones, infos), single_results = _step_all(batched, singles, actions)
+            assert not dones.any()
+            for i, (single_obs, single_reward, _) in enumerate(single_results):
+                np.testing.assert_allclose(obs[i], single_obs, atol=ATOL, err_msg=f"step {t} car {i}")
+                assert abs(rewards[i] - single_reward) < 1e-4
+    finally:
+        batched.close()
+
+
+if __name__ == '__main__':
+    test_matches_independent_envs()
+    test_collision_resets_only_that_car()
+    print("SUCCESS! BatchedF1TenthRL は個別の F1TenthRL と同じ観測・報酬を返しています。")
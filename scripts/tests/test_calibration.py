@@ -6,15 +6,14 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.append(PROJECT_ROOT)
 sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
 
-import config
-# データ収集時は一時的に正規化を無効化
-config.NORMALIZE_OBSERVATIONS = False
-config.MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine' # default map for safety
-
+from src.env_config import load_env_config
 from src.f1_env import F1TenthRL
 
+MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine' # default map for safety
+
 def calibrate():
-    env = F1TenthRL(config.MAP_PATH)
+    # データ収集時は正規化を無効化（config.py は書き換えない）
+    env = F1TenthRL(MAP_PATH, env_config=load_env_config(normalize_observations=False))
     
     lidar_data = []
     residual_data = []
@@ -37,12 +36,12 @@ def calibrate():
         lidar_data.append(lidar)
         
         idx = lidar_size
-        if config.INCLUDE_LIDAR_RESIDUAL:
+        if env.env_config.include_lidar_residual:
             residual = obs[idx:idx+lidar_size]
             residual_data.append(residual)
             idx += lidar_size
             
-        if config.INCLUDE_VEHICLE_STATE:
+        if env.env_config.include_vehicle_state:
             state = obs[idx:idx+2]
             state_data.append(state)
             
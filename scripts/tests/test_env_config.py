@@ -0,0 +1,82 @@
+"""
+環境の設定（src/env_config.py）のテスト
+
+- load_env_config が config.py の値を読み、引数で一部だけ上書きできること
+- EnvConfig は変更できず、replace で作った設定が元の設定に影響しないこと
+- 報酬の max_speed が常に EnvConfig.max_speed と同じ値になること
+- obs_size / preprocess が config.py から求めた値と一致すること
+- make_vec_env に観測の次元が異なる設定を並べるとエラーになること
+"""
+import sys
+import os
+import dataclasses
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+import config
+from src.env_config import EnvConfig, load_env_config
+from src.vec_env import make_vec_env
+
+
+def test_load_env_config_reads_config_module():
+    cfg = load_env_config()
+    assert cfg.lidar_downsample_factor == config.LIDAR_DOWNSAMPLE_FACTOR
+    assert cfg.max_speed == config.MAX_SPEED
+    assert cfg.start_pose == tuple(config.START_POSE)
+    assert len(cfg.start_poses) == len(config.START_POSES)
+    assert cfg.reward.max_speed == config.MAX_SPEED
+
+    override = load_env_config(normalize_observations=False, max_speed=4.0)
+    assert not override.normalize_observations and override.max_speed == 4.0
+    assert override.lidar_downsample_factor == cfg.lidar_downsample_factor
+
+
+def test_env_config_is_immutable():
+    cfg = load_env_config()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.max_speed = 5.0
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.reward.reward_collision = 0.0
+
+    fast = dataclasses.replace(cfg, max_speed=cfg.max_speed + 1.0)
+    assert fast.max_speed == cfg.max_speed + 1.0
+    assert cfg == load_env_config()
+    # 設定は比較・ハッシュでき、同じ値なら等しい
+    assert hash(cfg) == hash(load_env_config())
+
+
+def test_reward_max_speed_follows_env():
+    cfg = load_env_config()
+    fast = dataclasses.replace(cfg, max_speed=3.5)
+    assert fast.reward.max_speed == 3.5
+    # 報酬だけを差し替えても速度制限は EnvConfig.max_speed のまま
+    other = dataclasses.replace(fast, reward=dataclasses.replace(cfg.reward, max_speed=9.0, reward_collision=-1.0))
+    assert other.reward.max_speed == 3.5 and other.reward.reward_collision == -1.0
+    assert EnvConfig(max_speed=4.0).reward.max_speed == 4.0
+
+
+def test_obs_size_and_preprocess():
+    cfg = load_env_config()
+    lidar_size = 1080 // config.LIDAR_DOWNSAMPLE_FACTOR
+    expected = (lidar_size * (2 if config.INCLUDE_LIDAR_RESIDUAL else 1)
+                + (2 if config.INCLUDE_VEHICLE_STATE else 0))
+    assert cfg.lidar_size == lidar_size
+    assert cfg.obs_size == expected
+
+    assert EnvConfig(lidar_downsample_factor=4, include_lidar_residual=False, include_vehicle_state=False).obs_size == 270
+
+    pre = cfg.preprocess()
+    assert pre["lidar_downsample_factor"] == config.LIDAR_DOWNSAMPLE_FACTOR
+    assert pre["vehicle_state_mean"] == [float(v) for v in config.VEHICLE_STATE_MEAN]
+
+
+def test_make_vec_env_rejects_mismatched_obs_size():
+    cfg = load_env_config()
+    other = dataclasses.replace(cfg, lidar_downsample_factor=cfg.lidar_downsample_factor * 2)
+    with pytest.raises(ValueError):
+        make_vec_env("unused", num_envs=2, env_config=[cfg, other])
+    with pytest.raises(ValueError):
+        make_vec_env("unused", num_envs=3, env_config=[cfg, cfg])
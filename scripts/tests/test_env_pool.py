@@ -0,0 +1,112 @@
+"""
+非同期の環境プール（src/env_pool.py）のテスト
+
+- recv() が先に終わった batch_size 個の環境を返し、遅い環境を待たないこと
+- 観測・報酬が env_ids の環境のものと一致すること（ロールアウトの取り違えがない）
+- エピソードの終了時にワーカー内で reset され、terminal_observation が info に入ること
+- step 中の環境に send() するとエラーになること
+"""
+import sys
+import os
+import time
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.env_pool import AsyncEnvPool
+
+# テスト内で定義した環境をそのまま子プロセスで使うため fork で起動する
+START_METHOD = "fork"
+
+
+class _Space:
+    def __init__(self, shape):
+        self.shape = shape
+
+
+class _CounterEnv:
+    """観測 = [env_id, エピソード内のステップ数, 行動]。step ごとに delay [s] かかる"""
+
+    def __init__(self, env_id, delay, episode_steps=1000):
+        self.observation_space = _Space((3,))
+        self.action_space = _Space((1,))
+        self.env_id = env_id
+        self.delay = delay
+        self.episode_steps = episode_steps
+        self.t = 0
+
+    def reset(self):
+        self.t = 0
+        return np.array([self.env_id, 0, 0], dtype=np.float32)
+
+    def step(self, action):
+        time.sleep(self.delay)
+        self.t += 1
+        obs = np.array([self.env_id, self.t, action[0]], dtype=np.float32)
+        return obs, float(self.env_id), self.t >= self.episode_steps, {}
+
+    def close(self):
+        pass
+
+
+def _make(env_id, delay, episode_steps=1000):
+    return lambda: _CounterEnv(env_id, delay, episode_steps)
+
+
+def test_recv_returns_fastest_envs():
+    # env 3 だけ 1 step に 0.5 秒かかる
+    env_fns = [_make(i, 0.5 if i == 3 else 0.0) for i in range(4)]
+    pool = AsyncEnvPool(env_fns, batch_size=2, start_method=START_METHOD)
+    try:
+        obs = pool.reset()
+        assert obs[:, 0].tolist() == [0, 1, 2, 3]
+
+        pool.send(np.ones((4, 1)), np.arange(4))
+        start = time.perf_counter()
+        seen = []
+        for _ in range(10):
+            obs, rewards, dones, infos, env_ids = pool.recv()
+            assert len(env_ids) == 2 and 3 not in env_ids
+            # 観測・報酬は env_ids の環境のもの
+            assert obs[:, 0].tolist() == env_ids.tolist()
+            assert rewards.tolist() == env_ids.tolist()
+            seen.extend(env_ids.tolist())
+            pool.send(np.full((2, 1), 2.0), env_ids)
+        assert time.perf_counter() - start < 0.5
+        # 速い 3 環境はどれも待たされずに受け取れる
+        assert set(seen) == {0, 1, 2}
+
+        with pytest.raises(ValueError):
+            pool.send(np.ones((1, 1)), [3])
+    finally:
+        pool.close()
+
+
+def test_auto_reset_and_stats():
+    env_fns = [_make(i, 0.0, episode_steps=3) for i in range(3)]
+    pool = AsyncEnvPool(env_fns, start_method=START_METHOD)
+    try:
+        pool.async_reset()
+        obs, rewards, dones, infos, env_ids = pool.recv()
+        assert env_ids.tolist() == [0, 1, 2] and not dones.any()
+        for t in range(1, 4):
+            obs, rewards, dones, infos, env_ids = pool.step(np.full((3, 1), t), env_ids)
+        assert dones.all()
+        # obs は reset 後、terminal_observation は終了時の観測
+        assert obs[:, 1].tolist() == [0, 0, 0]
+        for env_id, info in zip(env_ids, infos):
+            assert info["terminal_observation"].tolist() == [env_id, 3, 3]
+
+        stats = pool.stats()
+        assert stats["steps"] == 9
+        assert stats["steps_per_sec"] > 0 and 0.0 <= stats["utilization"] <= 1.0
+    finally:
+        pool.close()
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        AsyncEnvPool([_make(0, 0.0)], batch_size=2, start_method=START_METHOD)
@@ -0,0 +1,84 @@
+"""
+LiDAR 前処理カーネル（src/lidar_kernel.py）が、変更前の
+reshape().min() + 正規化と一致することを確認するテスト
+"""
+import sys
+import os
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src import lidar_kernel
+from src.lidar_kernel import normalization_params, process_lidar_numpy
+
+FACTORS = [1, 2, 3, 4, 5, 6, 8, 9, 10, 12]
+PARAMS = (4.555, 3.894, -0.012, 0.096)
+
+
+def _reference(scans, prev, factor, normalize, with_residual):
+    """変更前の F1TenthRL._get_obs と同じ計算"""
+    size = scans.shape[-1] // factor
+    downsampled = scans.reshape(scans.shape[:-1] + (size, factor)).min(axis=-1)
+    lm, ls, rm, rs = PARAMS
+    lidar = (downsampled - lm) / ls if normalize else downsampled
+    parts = [lidar]
+    if with_residual:
+        delta = downsampled - prev
+        parts.append((delta - rm) / rs if normalize else delta)
+    return downsampled, np.concatenate(parts, axis=-1).astype(np.float32)
+
+
+def _run(kernel, scans, prev, factor, normalize, with_residual):
+    size = scans.shape[-1] // factor
+    batch = scans.shape[:-1]
+    residual_size = size if with_residual else 0
+    obs = np.zeros(batch + (size + residual_size,), dtype=np.float32)
+    cur = np.empty(batch + (size,))
+    params = normalization_params(normalize, *PARAMS)
+    kernel(scans, prev, cur, obs[..., :size], obs[..., size:size + residual_size], factor, params)
+    return cur, obs
+
+
+def _check(kernel):
+    rng = np.random.default_rng(0)
+    for factor in FACTORS:
+        size = 1080 // factor
+        for shape in [(1080,), (7, 1080)]:
+            scans = rng.uniform(0.1, 30.0, size=shape)
+            prev = rng.uniform(0.1, 30.0, size=shape[:-1] + (size,))
+            for normalize in (True, False):
+                for with_residual in (True, False):
+                    ref_cur, ref_obs = _reference(scans, prev, factor, normalize, with_residual)
+                    cur, obs = _run(kernel, scans, prev, factor, normalize, with_residual)
+                    assert np.array_equal(cur, ref_cur), f"factor={factor} shape={shape}"
+                    assert np.array_equal(obs, ref_obs), \
+                        f"factor={factor} shape={shape} normalize={normalize} residual={with_residual}"
+
+
+def test_numpy_kernel_matches_reference():
+    _check(process_lidar_numpy)
+
+
+def test_numba_kernel_matches_reference():
+    pytest.importorskip("numba")
+    if lidar_kernel.process_lidar_numba is None:
+        pytest.skip("F1_LIDAR_KERNEL=numpy で Numba カーネルが無効になっています")
+    _check(lidar_kernel.process_lidar_numba)
+
+
+def test_nan_propagates():
+    scans = np.full(1080, 5.0)
+    scans[3] = np.nan
+    cur, _ = _run(process_lidar_numpy, scans, np.zeros(540), 2, True, True)
+    assert np.isnan(cur[1]) and not np.isnan(cur[0])
+
+
+if __name__ == '__main__':
+    print(f"BACKEND: {lidar_kernel.BACKEND}")
+    test_numpy_kernel_matches_reference()
+    test_numba_kernel_matches_reference()
+    test_nan_propagates()
+    print("SUCCESS! LiDAR カーネルは変更前の計算と一致しています。")
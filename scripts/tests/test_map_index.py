@@ -0,0 +1,127 @@
+"""
+マップの距離場と空きセルの索引（src/map_index.py）のテスト
+
+- NumPy 実装の距離変換が総当たりの厳密解（scipy があれば scipy）と一致すること
+- サンプリングした位置がすべて壁から min_clearance 以上離れ、向きが通路に沿っていること
+- キャッシュを再利用し、マップが変わったら作り直すこと
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.map_index import CACHE_SUFFIX, MapIndex, _edt_numpy
+
+RESOLUTION = 0.05
+ORIGIN = [-1.0, -2.0, 0.0]
+
+
+def _brute_force_edt(free):
+    rows, cols = np.nonzero(~free)
+    yy, xx = np.mgrid[:free.shape[0], :free.shape[1]]
+    d2 = (yy[..., None] - rows) ** 2 + (xx[..., None] - cols) ** 2
+    return np.where(free, np.sqrt(d2.min(axis=-1)), 0.0)
+
+
+def _write_map(directory, img, name="track"):
+    """PGM と YAML を書き出し、拡張子なしのマップパスを返す"""
+    Image.fromarray(img).save(os.path.join(directory, name + ".pgm"))
+    with open(os.path.join(directory, name + ".yaml"), "w") as f:
+        f.write(f"image: {name}.pgm\nresolution: {RESOLUTION}\norigin: {ORIGIN}\n"
+                "negate: 0\noccupied_thresh: 0.65\nfree_thresh: 0.196\n")
+    return os.path.join(directory, name)
+
+
+def _corridor_map():
+    """幅 20 セルの横向きの通路（上下は壁、その外側は未知領域）"""
+    img = np.full((60, 120), 205, dtype=np.uint8)
+    img[18:42, 2:118] = 0
+    img[20:40, 4:116] = 254
+    return img
+
+
+def test_numpy_edt_matches_exact():
+    rng = np.random.RandomState(0)
+    for shape, density in [((31, 47), 0.05), ((40, 40), 0.3), ((1, 20), 0.2)]:
+        free = rng.rand(*shape) > density
+        free[0, 0] = False
+        assert np.allclose(_edt_numpy(free), _brute_force_edt(free))
+
+
+def test_numpy_edt_matches_scipy():
+    distance_transform_edt = pytest.importorskip("scipy.ndimage").distance_transform_edt
+    free = np.random.RandomState(0).rand(200, 300) > 0.02
+    assert np.allclose(_edt_numpy(free), distance_transform_edt(free))
+
+
+def test_clearance_and_sampling():
+    index = MapIndex.build(_write_map(tempfile.mkdtemp(), _corridor_map()))
+
+    # 通路の中央（上下の壁から 10 セル）、壁の上、地図の外
+    x, y = index.cell_to_world(29, 60)
+    assert np.isclose(index.clearance_at(x, y), 10 * RESOLUTION)
+    assert index.clearance_at(*index.cell_to_world(19, 60)) == 0.0
+    assert index.clearance_at(100.0, 0.0) == 0.0
+    assert list(index.is_valid_pose(np.array([x, x]), np.array([y, 100.0]), 0.3)) == [True, False]
+
+    rng = np.random.RandomState(1)
+    poses = index.sample_poses(20000, 0.3, rng, yaw_noise=0.0)
+    assert poses.shape == (20000, 3)
+    assert np.all(index.clearance_at(poses[:, 0], poses[:, 1]) >= 0.3)
+    assert len({tuple(p) for p in poses[:, :2]}) == index.num_valid_cells(0.3)
+    # 横向きの通路なので、向きは +x か -x（通路の端の曲がり角は除く）
+    middle = np.abs(poses[:, 0] - poses[:, 0].mean()) < 1.5
+    assert np.all(np.abs(np.sin(poses[middle, 2])) < 0.05)
+    assert np.any(np.cos(poses[:, 2]) > 0) and np.any(np.cos(poses[:, 2]) < 0)
+
+    try:
+        index.sample_poses(1, 1.0, rng)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("条件を満たすセルが無いのに例外が出ませんでした")
+
+
+def test_cache_is_reused_and_invalidated():
+    directory = tempfile.mkdtemp()
+    img = _corridor_map()
+    map_path = _write_map(directory, img)
+    cache_path = map_path + CACHE_SUFFIX
+
+    first = MapIndex.load(map_path)
+    assert os.path.exists(cache_path)
+    mtime = os.stat(cache_path).st_mtime_ns
+    cached = MapIndex.load(map_path)
+    assert os.stat(cache_path).st_mtime_ns == mtime
+    assert np.array_equal(first.clearance, cached.clearance)
+    assert np.array_equal(first.free_cells, cached.free_cells)
+
+    # マップを描き直すとキャッシュも作り直される
+    img[25:35, 60] = 0
+    _write_map(directory, img)
+    rebuilt = MapIndex.load(map_path)
+    assert rebuilt.clearance[29, 60] == 0.0 and first.clearance[29, 60] > 0.0
+
+
+def test_repository_map():
+    map_path = os.path.join(PROJECT_ROOT, 'my_maps', 'my_map')
+    import config
+    index = MapIndex.load(map_path, cache_dir=tempfile.mkdtemp())
+    x, y, _ = config.START_POSE
+    assert index.is_valid_pose(x, y, config.START_MIN_CLEARANCE)
+    assert index.num_valid_cells(config.START_MIN_CLEARANCE) > 100
+
+
+if __name__ == '__main__':
+    test_numpy_edt_matches_exact()
+    test_numpy_edt_matches_scipy()
+    test_clearance_and_sampling()
+    test_cache_is_reused_and_invalidated()
+    test_repository_map()
+    print("SUCCESS! 距離場によるスポーン位置の検証・サンプリングは正しく動作しています。")
@@ -6,15 +6,14 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.append(PROJECT_ROOT)
 sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
 
-import config
-# Ensure normalization is active
-config.NORMALIZE_OBSERVATIONS = True
-config.MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine'
-
+from src.env_config import load_env_config
 from src.f1_env import F1TenthRL
 
+MAP_PATH = '/opt/f1tenth_gym/gym/f110_gym/envs/maps/levine'
+
 def test_norm():
-    env = F1TenthRL(config.MAP_PATH)
+    # Ensure normalization is active
+    env = F1TenthRL(MAP_PATH, env_config=load_env_config(normalize_observations=True))
     
     np.random.seed(42)
     obs = env.reset()
@@ -37,12 +36,12 @@ def test_norm():
     print(f"Normalized LiDAR - Mean: {np.mean(lidar_norm):.3f}, Std: {np.std(lidar_norm):.3f}")
     
     idx = lidar_size
-    if config.INCLUDE_LIDAR_RESIDUAL:
+    if env.env_config.include_lidar_residual:
         delta_norm = all_obs[:, idx:idx+lidar_size]
         print(f"Normalized Residual - Mean: {np.mean(delta_norm):.3f}, Std: {np.std(delta_norm):.3f}")
         idx += lidar_size
         
-    if config.INCLUDE_VEHICLE_STATE:
+    if env.env_config.include_vehicle_state:
         state_norm = all_obs[:, idx:idx+2]
         s_mean = np.mean(state_norm, axis=0)
         s_std = np.std(state_norm, axis=0)
@@ -0,0 +1,147 @@
+"""
+NumPy 推論ランタイム（src/policy_runtime.py）と export_policy.py のテスト
+
+- .npz への保存・読み込み後の出力が、重みから直接計算した値と一致すること
+- 共有のモデル (sharing/*.zip) をエクスポートした結果が torch / SB3 の出力と一致すること（インストール時のみ）
+- ObservationPreprocessor が F1TenthRL._get_obs と同じ計算をすること
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.policy_runtime import NumpyPolicy, ObservationPreprocessor, save_policy_npz
+from export_policy import _detect_activation, config_preprocess, load_actor
+
+SHARED_MODEL = os.path.join(PROJECT_ROOT, 'sharing', 'ppo_f1_custom_map_steps25000000_arch2.zip')
+TOLERANCE = 1e-5
+
+
+def _random_actor(rng, obs_dim=20, arch=(16, 8), action_dim=2):
+    dims = [obs_dim] + list(arch)
+    return {
+        "hidden_weights": [rng.normal(size=(dims[i + 1], dims[i])).astype(np.float32) for i in range(len(arch))],
+        "hidden_biases": [rng.normal(size=dims[i + 1]).astype(np.float32) for i in range(len(arch))],
+        "action_weight": rng.normal(size=(action_dim, dims[-1])).astype(np.float32),
+        "action_bias": rng.normal(size=action_dim).astype(np.float32),
+        "activation": "tanh",
+        "action_low": -np.ones(action_dim, dtype=np.float32),
+        "action_high": np.ones(action_dim, dtype=np.float32),
+    }
+
+
+def _reference_predict(actor, obs):
+    x = obs.astype(np.float64)
+    for w, b in zip(actor["hidden_weights"], actor["hidden_biases"]):
+        x = np.tanh(x @ w.T.astype(np.float64) + b)
+    x = x @ actor["action_weight"].T.astype(np.float64) + actor["action_bias"]
+    return np.clip(x, actor["action_low"], actor["action_high"])
+
+
+def _save_and_load(actor):
+    path = os.path.join(tempfile.mkdtemp(), "actor.npz")
+    save_policy_npz(path, preprocess=config_preprocess(), **actor)
+    return NumpyPolicy.load(path)
+
+
+def test_roundtrip_matches_reference():
+    rng = np.random.default_rng(0)
+    actor = _random_actor(rng)
+    policy = _save_and_load(actor)
+    obs = rng.normal(size=(64, 20)).astype(np.float32)
+
+    action, state = policy.predict(obs)
+    assert state is None
+    assert action.shape == (64, 2) and action.dtype == np.float32
+    assert np.max(np.abs(action - _reference_predict(actor, obs))) < TOLERANCE
+    # クリップが効いていること（ランダムな重みなので範囲外の値が出る）
+    assert np.all(np.abs(action) <= 1.0) and np.any(np.abs(action) == 1.0)
+
+    # 1 本の観測でも同じ値になること
+    single, _ = policy.predict(obs[3])
+    assert single.shape == (2,)
+    assert np.allclose(single, action[3], atol=TOLERANCE)
+    assert policy.preprocess == config_preprocess()
+
+
+def test_shared_model_matches_torch():
+    torch = pytest.importorskip("torch")
+
+    actor = load_actor(SHARED_MODEL)
+    policy = _save_and_load(actor)
+    obs = np.random.default_rng(1).uniform(0.0, 30.0, size=(256, policy.obs_dim)).astype(np.float32)
+
+    # SB3 の ActorCriticPolicy と同じ計算 (mlp_extractor.policy_net -> action_net -> clip)
+    x = torch.from_numpy(obs)
+    for w, b in zip(actor["hidden_weights"], actor["hidden_biases"]):
+        x = torch.tanh(torch.nn.functional.linear(x, torch.from_numpy(w), torch.from_numpy(b)))
+    x = torch.nn.functional.linear(x, torch.from_numpy(actor["action_weight"]), torch.from_numpy(actor["action_bias"]))
+    expected = np.clip(x.numpy(), -1.0, 1.0)
+    assert np.max(np.abs(policy.predict(obs)[0] - expected)) < TOLERANCE
+
+
+def test_shared_model_matches_sb3_predict():
+    PPO = pytest.importorskip("stable_baselines3").PPO
+    policy = _save_and_load(load_actor(SHARED_MODEL))
+    obs = np.random.default_rng(1).uniform(0.0, 30.0, size=(256, policy.obs_dim)).astype(np.float32)
+    model = PPO.load(SHARED_MODEL, device="cpu")
+    expected, _ = model.predict(obs, deterministic=True)
+    assert np.max(np.abs(policy.predict(obs)[0] - expected)) < TOLERANCE
+
+
+def test_detect_activation_exact_class():
+    torch = pytest.importorskip("torch")
+    import base64
+    import cloudpickle
+
+    def kwargs(cls):
+        return {"activation_fn": {":serialized:": base64.b64encode(cloudpickle.dumps(cls)).decode()}}
+
+    assert _detect_activation({}) == "tanh"
+    assert _detect_activation(kwargs(torch.nn.Tanh)) == "tanh"
+    assert _detect_activation(kwargs(torch.nn.ReLU)) == "relu"
+    # 名前に ReLU を含むだけの別の活性化関数は ReLU として書き出さない
+    for cls in (torch.nn.LeakyReLU, torch.nn.ReLU6, torch.nn.ELU):
+        with pytest.raises(ValueError):
+            _detect_activation(kwargs(cls))
+    with pytest.raises(ValueError):
+        _detect_activation({"activation_fn": {":serialized:": base64.b64encode(b"ReLU").decode()}})
+
+
+def test_preprocessor_matches_env():
+    pre = ObservationPreprocessor(config_preprocess())
+    p = config_preprocess()
+    factor = p["lidar_downsample_factor"]
+    rng = np.random.default_rng(2)
+    scans = [rng.uniform(0.1, 30.0, size=1080) for _ in range(3)]
+
+    prev = None
+    for i, scan in enumerate(scans):
+        speed, steer = 1.0 + i * 0.5, 0.1 * i
+        obs = pre.reset(scan, speed, steer) if i == 0 else pre(scan, speed, steer)
+
+        # 変更前の F1TenthRL._get_obs と同じ計算
+        downsampled = scan.reshape(-1, factor).min(axis=1)
+        if prev is None:
+            prev = downsampled
+        lidar = (downsampled - p["lidar_mean"]) / p["lidar_std"]
+        residual = ((downsampled - prev) - p["lidar_residual_mean"]) / p["lidar_residual_std"]
+        state = np.array([speed / p["max_speed"], steer], dtype=np.float32)
+        state = (state - np.array(p["vehicle_state_mean"])) / np.array(p["vehicle_state_std"])
+        expected = np.concatenate([lidar, residual, state]).astype(np.float32)
+        assert np.array_equal(obs, expected), f"step {i}"
+        prev = downsampled
+
+
+if __name__ == '__main__':
+    test_roundtrip_matches_reference()
+    test_shared_model_matches_torch()
+    test_shared_model_matches_sb3_predict()
+    test_detect_activation_exact_class()
+    test_preprocessor_matches_env()
+    print("SUCCESS! NumPy 推論ランタイムは元のモデルと一致しています。")
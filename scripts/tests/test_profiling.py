@@ -0,0 +1,73 @@
+"""
+ステージ単位の実行時間プロファイラ（src/profiling.py）のテスト
+
+- ストリーミングヒストグラムの p50 / p95 / p99 が全サンプルから求めた分位点と約 2% 以内で一致すること
+- 別プロセスの結果の合算（pickle 経由）が、全サンプルを 1 つに記録した場合と一致すること
+- snapshot() で計測結果を取り出すと計測がやり直されること
+"""
+import sys
+import os
+import pickle
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.profiling import StageProfiler, StreamingHistogram, format_summary
+
+
+def _samples(n, seed=0):
+    """実行時間らしい裾の重い分布 [ns]（中央値 約 50 us）"""
+    rng = np.random.RandomState(seed)
+    return np.round(np.exp(rng.normal(np.log(50e3), 0.6, n))).astype(np.int64)
+
+
+def test_quantiles():
+    samples = _samples(50000)
+    hist = StreamingHistogram()
+    for ns in samples.tolist():
+        hist.add(ns)
+    assert hist.count == len(samples) and hist.total_ns == samples.sum()
+    assert hist.min_ns == samples.min() and hist.max_ns == samples.max()
+    for q in (0.5, 0.95, 0.99):
+        exact = np.percentile(samples, q * 100)
+        assert abs(hist.quantile(q) / exact - 1) < 0.03, (q, hist.quantile(q), exact)
+    assert hist.quantile(0.0) == samples.min() and hist.quantile(1.0) == samples.max()
+
+    empty = StreamingHistogram()
+    assert np.isnan(empty.quantile(0.5)) and np.isnan(empty.mean_ns)
+    # 0 ns（タイマーの分解能未満）も記録できる
+    empty.add(0)
+    assert empty.quantile(0.5) == 0
+
+
+def test_merge_and_snapshot():
+    samples = _samples(20000, seed=1).tolist()
+    combined = StageProfiler()
+    workers = [StageProfiler() for _ in range(4)]
+    for i, ns in enumerate(samples):
+        combined.record("env.step", ns)
+        workers[i % 4].record("env.step", ns)
+        if i % 10 == 0:
+            combined.record("env.reset", ns * 3)
+            workers[i % 4].record("env.reset", ns * 3)
+
+    merged = StageProfiler()
+    for worker in workers:
+        merged.merge(pickle.loads(pickle.dumps(worker.snapshot())))
+        assert worker.stages == {}
+    assert merged.summary() == combined.summary()
+    assert list(merged.summary()) == ["env.step", "env.reset"]
+
+    summary = combined.summary()["env.step"]
+    assert summary["count"] == len(samples)
+    assert summary["p50_us"] <= summary["p95_us"] <= summary["p99_us"] <= summary["max_us"]
+    table = format_summary(combined.summary())
+    assert "env.step" in table and "p99" in table
+
+
+if __name__ == '__main__':
+    test_quantiles()
+    test_merge_and_snapshot()
+    print("SUCCESS! ステージ単位のプロファイラは正しく動作しています。")
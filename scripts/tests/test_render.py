@@ -0,0 +1,88 @@
+"""
+FastMapRenderer（scripts/utils/render.py）のテスト
+
+- 出力サイズが MapRenderer と同じで、見た目がほぼ一致すること（matplotlib がある場合）
+- 毎フレームの描画（LiDAR 点・自車・HUD）が背景に残らず、軌跡だけが残ること
+- HUD が画像の上端からはみ出す大きいマップでも描画できること
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from utils.render import FastMapRenderer, MapRenderer
+
+MAP_PATH = os.path.join(PROJECT_ROOT, 'my_maps', 'my_map')
+
+
+def _records(count=40):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        theta = i / 20
+        car_state = (1.0 + 2.0 * np.cos(theta), 2.0 + 2.0 * np.sin(theta), theta + np.pi / 2, 1.5)
+        yield car_state, 2.0 + rng.random(1080) * 2.0, (0.1, 0.2), 1.0, i, 0
+
+
+def test_matches_matplotlib():
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+
+    frames = {}
+    for cls in (MapRenderer, FastMapRenderer):
+        renderer = cls(MAP_PATH)
+        for record in _records():
+            frame = renderer.update(*record)
+        frames[cls] = np.array(frame, dtype=np.int16)
+        renderer.close()
+
+    reference, fast = frames[MapRenderer], frames[FastMapRenderer]
+    assert reference.shape == fast.shape, (reference.shape, fast.shape)
+    assert np.abs(reference - fast).mean() < 2.0
+    # 画素の 97% 以上がほぼ同じ色
+    assert (np.abs(reference - fast).max(axis=2) <= 8).mean() > 0.97
+
+
+def test_only_trail_persists():
+    renderer = FastMapRenderer(MAP_PATH)
+    background = renderer._base.copy()
+    records = list(_records(10))
+    for record in records:
+        frame = renderer.update(*record)
+        assert frame.dtype == np.uint8 and frame.shape == (renderer.out_h, renderer.out_w, 3)
+
+    changed = np.any(renderer._base != background, axis=2)
+    # 背景に残るのは軌跡の画素だけ
+    assert changed.any()
+    assert not (changed & ~renderer._trail_mask).any()
+
+
+def test_large_map_clips_hud():
+    # 2000x1800 のマップは 800x720 に縮小され、複数行の HUD が上端からはみ出す
+    directory = tempfile.mkdtemp()
+    height, width = 2000, 1800
+    with open(os.path.join(directory, 'large.pgm'), 'wb') as f:
+        f.write(f"P5\n{width} {height}\n255\n".encode())
+        img = np.full((height, width), 254, dtype=np.uint8)
+        img[:, :10] = 0
+        f.write(img.tobytes())
+    with open(os.path.join(directory, 'large.yaml'), 'w') as f:
+        f.write("image: large.pgm\nresolution: 0.05\norigin: [0.0, 0.0, 0.0]\n")
+
+    renderer = FastMapRenderer(os.path.join(directory, 'large'))
+    assert (renderer.out_h, renderer.out_w) == (800, 720)
+    for record in _records(3):
+        frame = renderer.update(*record)
+    # 画像の上端の行にも HUD の背景（暗くした画素）が描かれる
+    assert (frame[0] < renderer._base[0]).any()
+
+
+if __name__ == '__main__':
+    test_matches_matplotlib()
+    test_only_trail_persists()
+    test_large_map_clips_hud()
+    print("SUCCESS! FastMapRenderer は MapRenderer と同等のフレームを描画しています。")
@@ -0,0 +1,95 @@
+"""
+calculate_reward_batch() が calculate_reward() とビット単位で一致することを確認するテスト
+"""
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.rewards import RewardConfig, calculate_reward, calculate_reward_batch
+
+
+def _make_batch(n, scan_dtype, seed=0):
+    """各分岐（前方 <2m / <4m / >5m、壁接近、衝突）を網羅する入力を生成する"""
+    rng = np.random.default_rng(seed)
+    scans = rng.uniform(0.3, 12.0, size=(n, 1080)).astype(scan_dtype)
+    # 前方距離を分岐の境界付近に寄せる
+    front = rng.choice([0.5, 1.9999, 2.0, 3.0, 4.0, 4.5, 5.0, 5.0001, 8.0], size=n)
+    scans[:, 350:730] = np.maximum(scans[:, 350:730], front[:, None].astype(scan_dtype))
+    scans[np.arange(n), rng.integers(350, 730, size=n)] = front.astype(scan_dtype)
+    actions = rng.uniform(-1.0, 1.0, size=(n, 2)).astype(np.float32)
+    speeds = (1.0 + (actions[:, 1] + 1.0) * (2.5 - 1.0) / 2.0).astype(np.float32)
+    dones = rng.random(n) < 0.1
+    prev_xy = rng.uniform(-5.0, 5.0, size=(n, 2))
+    cur_xy = prev_xy + rng.normal(0.0, 0.03, size=(n, 2))
+    return scans, actions, dones, speeds, prev_xy, cur_xy
+
+
+def _check_bitwise(scan_dtype, use_track=False):
+    cfg = RewardConfig()
+    scans, actions, dones, speeds, prev_xy, cur_xy = _make_batch(2000, scan_dtype)
+    track_progress = lateral_ratio = None
+    if use_track:
+        cfg = RewardConfig(reward_track_progress_weight=5.0, reward_lateral_weight=0.3)
+        rng = np.random.default_rng(1)
+        track_progress = rng.normal(0.02, 0.05, size=len(scans))
+        lateral_ratio = rng.uniform(0.0, 1.0, size=len(scans))
+
+    batch = calculate_reward_batch(scans, actions, dones, speeds, prev_xy, cur_xy, cfg, track_progress, lateral_ratio)
+    scalar = np.array([
+        calculate_reward(scans[i], actions[i], dones[i], speeds[i],
+                         prev_xy[i, 0], prev_xy[i, 1], cur_xy[i, 0], cur_xy[i, 1],
+                         reward_config=cfg,
+                         track_progress=None if track_progress is None else track_progress[i],
+                         lateral_ratio=None if lateral_ratio is None else lateral_ratio[i])
+        for i in range(len(scans))
+    ], dtype=batch.dtype)
+
+    assert batch.shape == (len(scans),)
+    # 値の比較ではなくバイト列で比較する（-0.0 と 0.0 の違いも検出する）
+    batch_bytes = batch.view(np.uint8).reshape(len(batch), -1)
+    scalar_bytes = scalar.view(np.uint8).reshape(len(scalar), -1)
+    mismatch = np.flatnonzero(np.any(batch_bytes != scalar_bytes, axis=1))
+    assert len(mismatch) == 0, f"{scan_dtype.__name__}: {len(mismatch)} 件不一致 (例: index {mismatch[:5]})"
+
+
+def test_batch_matches_scalar_float64():
+    _check_bitwise(np.float64)
+
+
+def test_batch_matches_scalar_float32():
+    _check_bitwise(np.float32)
+
+
+def test_batch_matches_scalar_with_track_terms():
+    _check_bitwise(np.float64, use_track=True)
+
+
+def test_track_terms_default_to_zero():
+    # 既定の設定では中心線の項を渡しても報酬は変わらない
+    cfg = RewardConfig()
+    scans, actions, dones, speeds, prev_xy, cur_xy = _make_batch(64, np.float64)
+    base = calculate_reward_batch(scans, actions, dones, speeds, prev_xy, cur_xy, cfg)
+    with_track = calculate_reward_batch(scans, actions, dones, speeds, prev_xy, cur_xy, cfg,
+                                        np.full(64, 0.1), np.full(64, 0.5))
+    assert np.array_equal(base, with_track)
+
+
+def test_batch_collision():
+    cfg = RewardConfig(reward_collision=-123.0)
+    scans, actions, _, speeds, prev_xy, cur_xy = _make_batch(16, np.float64)
+    dones = np.ones(16, dtype=bool)
+    batch = calculate_reward_batch(scans, actions, dones, speeds, prev_xy, cur_xy, cfg)
+    assert np.all(batch == -123.0)
+
+
+if __name__ == '__main__':
+    test_batch_matches_scalar_float64()
+    test_batch_matches_scalar_float32()
+    test_batch_matches_scalar_with_track_terms()
+    test_track_terms_default_to_zero()
+    test_batch_collision()
+    print("SUCCESS! calculate_reward_batch は calculate_reward とビット単位で一致しています。")
@@ -0,0 +1,173 @@
+"""
+共有メモリ VecEnv（src/shm_vec_env.py）のテスト
+
+- 観測・報酬・終了フラグ・terminal_observation がエピソードの切れ目をまたいで DummyVecEnv と一致すること
+- raw_scans=True で各ステップの info['raw_scan'] に環境の生の LiDAR が入ること
+- close() で共有メモリが解放されること（info['raw_scan'] のビューを持ったままでも）
+- gym 0.23 の API の環境（render_mode が無く、step が 4 要素を返す）も動かせ、
+  ワーカーで起きた属性エラーが親プロセスで AttributeError になること
+- 初期化に失敗しても共有メモリが残らないこと
+"""
+import sys
+import os
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+import gymnasium
+from stable_baselines3.common.vec_env import DummyVecEnv
+from src.shm_vec_env import SCAN_SIZE, SharedMemoryVecEnv
+
+# テスト内で定義した環境をそのまま子プロセスで使うため fork で起動する
+START_METHOD = "fork"
+
+
+class _CounterEnv(gymnasium.Env):
+    """観測 = [env_id, エピソード内のステップ数, 行動]。episode_steps ステップで終了する"""
+
+    def __init__(self, env_id, episode_steps):
+        self.observation_space = gymnasium.spaces.Box(-100.0, 100.0, shape=(3,), dtype=np.float32)
+        self.action_space = gymnasium.spaces.Box(-1.0, 1.0, shape=(2,), dtype=np.float32)
+        self.env_id = env_id
+        self.episode_steps = episode_steps
+        self.t = 0
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        return np.array([self.env_id, 0, 0], dtype=np.float32), {}
+
+    def step(self, action):
+        self.t += 1
+        obs = np.array([self.env_id, self.t, action[0]], dtype=np.float32)
+        info = {"raw_scan": np.full(SCAN_SIZE, self.env_id * 100 + self.t, dtype=np.float64)}
+        return obs, float(self.env_id + self.t), self.t >= self.episode_steps, False, info
+
+
+class _GymCounterEnv:
+    """F1TenthRL と同じ gym 0.23 の API の _CounterEnv（render_mode を持たず、reset は観測だけを返す）"""
+
+    def __init__(self, env_id, episode_steps):
+        import gym
+        self.observation_space = gym.spaces.Box(-100.0, 100.0, shape=(3,), dtype=np.float32)
+        self.action_space = gym.spaces.Box(-1.0, 1.0, shape=(2,), dtype=np.float32)
+        self.env_id = env_id
+        self.episode_steps = episode_steps
+        self.t = 0
+
+    def seed(self, seed=None):
+        return [seed]
+
+    def reset(self):
+        self.t = 0
+        return np.array([self.env_id, 0, 0], dtype=np.float32)
+
+    def step(self, action):
+        self.t += 1
+        obs = np.array([self.env_id, self.t, action[0]], dtype=np.float32)
+        return obs, float(self.env_id + self.t), self.t >= self.episode_steps, {}
+
+    def close(self):
+        pass
+
+
+def _env_fns():
+    # 環境ごとにエピソードの長さを変え、終了するステップをずらす
+    return [lambda i=i: _CounterEnv(i, 3 + i) for i in range(3)]
+
+
+def test_matches_dummy_vec_env():
+    dummy = DummyVecEnv(_env_fns())
+    shm = SharedMemoryVecEnv(_env_fns(), start_method=START_METHOD)
+    try:
+        assert np.array_equal(shm.reset(), dummy.reset())
+        rng = np.random.default_rng(0)
+        dones_seen = 0
+        for _ in range(8):
+            actions = rng.uniform(-1.0, 1.0, size=(3, 2)).astype(np.float32)
+            obs, rewards, dones, infos = shm.step(actions)
+            ref_obs, ref_rewards, ref_dones, ref_infos = dummy.step(actions)
+            assert np.array_equal(obs, ref_obs)
+            assert np.array_equal(rewards, ref_rewards)
+            assert np.array_equal(dones, ref_dones)
+            for done, info, ref_info in zip(dones, infos, ref_infos):
+                if done:
+                    assert np.array_equal(info["terminal_observation"], ref_info["terminal_observation"])
+                else:
+                    assert "terminal_observation" not in info
+            dones_seen += int(dones.sum())
+        assert dones_seen >= 4
+    finally:
+        shm.close()
+        dummy.close()
+
+
+def test_raw_scans_and_close_unlinks():
+    shm = SharedMemoryVecEnv(_env_fns(), raw_scans=True, start_method=START_METHOD)
+    name = shm._shm.name
+    shm.reset()
+    for t in range(1, 4):
+        _, _, dones, infos = shm.step(np.zeros((3, 2), dtype=np.float32))
+        for env_id, info in enumerate(infos):
+            assert info["raw_scan"].shape == (SCAN_SIZE,)
+            assert np.all(info["raw_scan"] == env_id * 100 + t)
+    # env 0 はエピソードが終わっても、終了したステップの raw_scan が入る
+    assert dones[0] and "terminal_observation" in infos[0]
+
+    # raw_scan のビューを持ったままでも close でき、共有メモリは削除される
+    view = infos[0]["raw_scan"]
+    shm.close()
+    shm.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    del view
+
+
+def test_gym_api_env():
+    pytest.importorskip("gym")
+    env_fns = [lambda i=i: _GymCounterEnv(i, 2 + i) for i in range(2)]
+    with pytest.warns(UserWarning, match="render_mode"):
+        shm = SharedMemoryVecEnv(env_fns, start_method=START_METHOD)
+    name = shm._shm.name
+    try:
+        assert shm.render_mode is None
+        obs = shm.reset()
+        assert obs[:, 0].tolist() == [0, 1]
+        for t in range(1, 3):
+            obs, rewards, dones, infos = shm.step(np.full((2, 2), 0.5, dtype=np.float32))
+        assert dones.tolist() == [True, False]
+        assert infos[0]["terminal_observation"].tolist() == [0, 2, 0.5]
+        assert obs[0].tolist() == [0, 0, 0] and obs[1].tolist() == [1, 2, 0.5]
+
+        # ワーカーの例外は親で送出し直され、ワーカーはそのまま使える
+        with pytest.raises(AttributeError):
+            shm.get_attr("no_such_attribute")
+        assert shm.env_method("seed", 3) == [[3], [3]]
+    finally:
+        shm.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_failed_init_unlinks():
+    def make(i):
+        env = _CounterEnv(i, 3)
+        # render_mode が環境ごとに異なると VecEnv.__init__ が失敗する（共有メモリを作った後）
+        env.render_mode = "rgb_array" if i else None
+        return env
+
+    before = set(os.listdir("/dev/shm"))
+    with pytest.raises(AssertionError):
+        SharedMemoryVecEnv([lambda i=i: make(i) for i in range(2)], start_method=START_METHOD)
+    assert set(os.listdir("/dev/shm")) <= before
+
+
+if __name__ == '__main__':
+    test_matches_dummy_vec_env()
+    test_raw_scans_and_close_unlinks()
+    test_gym_api_env()
+    test_failed_init_unlinks()
+    print("SUCCESS! SharedMemoryVecEnv は DummyVecEnv と同じ結果を返しています。")
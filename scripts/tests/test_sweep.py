@@ -0,0 +1,135 @@
+"""
+ハイパーパラメータ探索（src/sweep.py）のテスト
+
+- 探索空間からのパラメータの選択が試行番号とシードだけで決まること
+- 探索パラメータが PPO の引数と EnvConfig / RewardConfig に振り分けられること
+- ASHA が段ごとに上位 1 / eta だけを昇格させ、最良の試行が最後の段まで進むこと
+- 記録を開き直すと評価済みの段をやり直さずに再開し、設定の異なる記録は開けないこと
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.env_config import load_env_config
+from src.sweep import AshaScheduler, SweepStore, rung_budgets, sample_params, trial_settings
+
+SPACE = {
+    "LEARNING_RATE": {"loguniform": [1e-5, 1e-3]},
+    "PPO_ENT_COEF": {"uniform": [0.0, 0.02]},
+    "NET_ARCH": [[64, 64], [128, 128]],
+    "REWARD_FRONT_WEIGHT": {"int": [1, 5]},
+}
+
+
+def _fake_result(params, steps):
+    """学習率が 1e-4 に近く、長く学習するほど良くなる評価結果"""
+    value = -abs(np.log10(params["LEARNING_RATE"]) + 4.0) + steps * 1e-6
+    return {"steps": steps, "metrics": {"avg_reward": value}, "checkpoint": "unused"}
+
+
+def _run(scheduler, limit=None):
+    """ワーカー 1 つで next_job がなくなるまで（または limit 回）実行し、実行した (試行, 段) を返す"""
+    jobs = []
+    while limit is None or len(jobs) < limit:
+        job = scheduler.next_job()
+        if job is None:
+            break
+        trial_id, rung = job
+        params = scheduler.store.trials[trial_id]["params"]
+        scheduler.store.record(trial_id, rung, _fake_result(params, scheduler.budgets[rung]))
+        jobs.append(job)
+    return jobs
+
+
+def test_sample_params():
+    a = sample_params(SPACE, np.random.default_rng([0, 3]))
+    b = sample_params(SPACE, np.random.default_rng([0, 3]))
+    assert a == b
+    assert 1e-5 <= a["LEARNING_RATE"] <= 1e-3
+    assert a["NET_ARCH"] in SPACE["NET_ARCH"]
+    assert isinstance(a["REWARD_FRONT_WEIGHT"], int) and 1 <= a["REWARD_FRONT_WEIGHT"] <= 5
+    with pytest.raises(ValueError):
+        sample_params({"LEARNING_RATE": {"normal": [0, 1]}}, np.random.default_rng(0))
+
+
+def test_trial_settings():
+    base = load_env_config()
+    params = {"LEARNING_RATE": 3e-4, "NET_ARCH": [64, 64], "MAX_SPEED": 3.5,
+              "REWARD_FRONT_WEIGHT": 2.0, "START_POSE": [1.0, 2.0, 0.0]}
+    ppo_kwargs, env_config = trial_settings(params, base)
+    assert ppo_kwargs == {"learning_rate": 3e-4, "net_arch": [64, 64]}
+    # MAX_SPEED は行動の変換と報酬の両方に反映される
+    assert env_config.max_speed == 3.5 and env_config.reward.max_speed == 3.5
+    assert env_config.reward.reward_front_weight == 2.0
+    assert env_config.start_pose == (1.0, 2.0, 0.0)
+    assert base == load_env_config()
+    with pytest.raises(ValueError):
+        trial_settings({"LEARNING_RATES": 1e-4}, base)
+
+
+def test_rung_budgets():
+    assert rung_budgets(100, 1500, 3) == [100, 300, 900, 1500]
+    assert rung_budgets(100, 900, 3) == [100, 300, 900]
+    with pytest.raises(ValueError):
+        rung_budgets(100, 900, 1)
+
+
+def test_asha_promotes_top_fraction():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SweepStore.open(os.path.join(tmp, "sweep.json"), {"space": SPACE})
+        budgets = rung_budgets(100, 900, 3)
+        scheduler = AshaScheduler(store, SPACE, budgets, eta=3, max_trials=27, metric="avg_reward")
+        while True:
+            job = scheduler.next_job()
+            if job is None:
+                break
+            trial_id, rung = job
+            if rung > 0:
+                # 昇格した時点で、前の段の評価済みの試行のうち上位 1 / eta に入っている
+                scores = sorted((scheduler.score(trial["results"][rung - 1]) for trial in store.trials.values()
+                                 if len(trial["results"]) >= rung), reverse=True)
+                assert len(scores) >= 3
+                assert scheduler.score(store.trials[trial_id]["results"][rung - 1]) >= scores[len(scores) // 3 - 1]
+            store.record(trial_id, rung, _fake_result(store.trials[trial_id]["params"], budgets[rung]))
+
+        reached = [len(trial["results"]) for trial in store.trials.values()]
+        assert len(reached) == 27
+        assert sum(r > 1 for r in reached) < 27 / 2 and sum(r > 2 for r in reached) < sum(r > 1 for r in reached)
+        # 学習率が最も 1e-4 に近い試行が最後の段まで進み、順位表の先頭になる
+        best = min(store.trials, key=lambda tid: abs(np.log10(store.trials[tid]["params"]["LEARNING_RATE"]) + 4))
+        assert scheduler.status(best) == "completed"
+        assert scheduler.leaderboard()[0][0] == best
+        # 全試行を最後の段まで学習するより少ないステップ数で済む
+        assert scheduler.total_steps() < 27 * budgets[-1] / 2
+
+
+def test_resume_skips_finished_rungs():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sweep.json")
+        settings = {"space": SPACE, "budgets": [100, 300, 900]}
+        scheduler = AshaScheduler(SweepStore.open(path, settings), SPACE, settings["budgets"], 3, 9, "avg_reward")
+        first = _run(scheduler, limit=5)
+        # 実行中に中断した試行（結果なし）を模擬する
+        scheduler.next_job()
+
+        resumed = AshaScheduler(SweepStore.open(path, settings), SPACE, settings["budgets"], 3, 9, "avg_reward")
+        assert resumed.store.trials[0]["params"] == scheduler.store.trials[0]["params"]
+        rest = _run(resumed)
+        assert not set(first) & set(rest)
+        # 中断した試行の段 0 をやり直してから新しい試行を作る
+        assert (5, 0) in rest
+        assert len(resumed.store.trials) == 9
+
+        # 最初から 1 回で実行した場合と同じ試行・段になる
+        fresh = AshaScheduler(SweepStore.open(os.path.join(tmp, "fresh.json"), settings), SPACE,
+                              settings["budgets"], 3, 9, "avg_reward")
+        assert sorted(first + rest) == sorted(_run(fresh))
+
+        with pytest.raises(ValueError):
+            SweepStore.open(path, dict(settings, budgets=[100, 900]))
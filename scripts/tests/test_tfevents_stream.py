@@ -0,0 +1,132 @@
+"""
+TFEvents ストリーミングリーダ（scripts/utils/tfevents_stream.py）のテスト
+
+- 既存の read_tfevents.py と同じスカラーを NumPy 配列で返すこと
+- 追記分だけを読み、書き込み途中のレコードは次の poll() で読むこと
+- CRC-32C の検証で壊れたレコードを検出すること（tensorboard があれば、その書き出したファイルも検証する）
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from utils.read_tfevents import crc32c, read_tfevents
+from utils.tfevents_stream import TFEventsReader, encode_record, encode_scalar_event
+
+TAGS = ["rollout/ep_rew_mean", "train/loss"]
+
+
+def _records(start, count):
+    # 20M ステップ台の step（4 バイトの varint）も含める
+    return [encode_record(encode_scalar_event(step * 2048 + 20_000_000 * (step % 2), 1.7e9 + step,
+                                              {tag: step * (k + 1) * 0.5 for k, tag in enumerate(TAGS)}))
+            for step in range(start, start + count)]
+
+
+def _event_file(directory, records):
+    path = os.path.join(directory, 'events.out.tfevents.1700000000.host.1.0')
+    with open(path, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def test_crc32c_check_value():
+    assert crc32c(b"123456789") == 0xE3069283
+
+
+def test_matches_read_tfevents():
+    path = _event_file(tempfile.mkdtemp(), _records(0, 50))
+    reader = TFEventsReader(path, check_crc=True)
+    assert reader.poll() == 50
+    expected = read_tfevents(path)
+    assert reader.tags() == sorted(expected)
+    for tag in TAGS:
+        steps, values, wall_times = reader.scalars(tag)
+        assert values.dtype == np.float32 and steps.dtype == np.int64
+        assert list(steps) == [s for s, _ in expected[tag]]
+        assert np.allclose(values, [v for _, v in expected[tag]])
+        assert wall_times[3] == 1.7e9 + 3
+
+
+def test_mixed_layouts_keep_order():
+    # まとめて解析できない形（1 イベントに複数の値・大きな step）が混ざっても、タグごとの順序が保たれる
+    records = _records(0, 6)
+    records.insert(2, encode_record(encode_scalar_event(2 ** 40, 1.7e9, {TAGS[0]: -1.0, TAGS[1]: -2.0})))
+    records.insert(5, encode_record(encode_scalar_event(7, 1.7e9, {TAGS[0]: -3.0})))
+    path = _event_file(tempfile.mkdtemp(), records)
+    reader = TFEventsReader(path)
+    reader.poll()
+    expected = read_tfevents(path)
+    for tag in TAGS:
+        steps, values, _ = reader.scalars(tag)
+        assert list(steps) == [s for s, _ in expected[tag]]
+        assert np.allclose(values, [v for _, v in expected[tag]])
+
+
+def test_follow_reads_only_appended_records():
+    directory = tempfile.mkdtemp()
+    records = _records(0, 30)
+    path = _event_file(directory, records[:10])
+    reader = TFEventsReader(directory)
+    assert reader.poll() == 10
+    assert reader.poll() == 0
+
+    # 末尾のレコードが途中まで書かれた状態では、そのレコードを読まない
+    partial = records[10] + records[11][:7]
+    with open(path, 'ab') as f:
+        f.write(partial)
+    assert reader.poll() == 1
+    with open(path, 'ab') as f:
+        f.write(records[11][7:] + b''.join(records[12:]))
+    assert reader.poll() == 19
+
+    steps, values, _ = reader.scalars(TAGS[0])
+    full = TFEventsReader(path)
+    full.poll()
+    assert np.array_equal(steps, full.scalars(TAGS[0]).steps)
+    assert np.array_equal(values, full.scalars(TAGS[0]).values)
+
+
+def test_crc_detects_corruption():
+    data = bytearray(b''.join(_records(0, 5)))
+    data[40] ^= 0xFF
+    path = _event_file(tempfile.mkdtemp(), [bytes(data)])
+    try:
+        TFEventsReader(path, check_crc=True).poll()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("CRC の不一致が検出されませんでした")
+
+
+def test_tensorboard_written_file():
+    pytest.importorskip("tensorboard")
+    from tensorboard.summary.writer.event_file_writer import EventFileWriter
+    from tensorboard.compat.proto import event_pb2, summary_pb2
+    directory = tempfile.mkdtemp()
+    writer = EventFileWriter(directory)
+    for step in range(20):
+        summary = summary_pb2.Summary(value=[summary_pb2.Summary.Value(tag="time/fps", simple_value=step * 1.5)])
+        writer.add_event(event_pb2.Event(wall_time=1.7e9 + step, step=step * 1000, summary=summary))
+    writer.close()
+
+    reader = TFEventsReader(directory, check_crc=True)
+    reader.poll()
+    steps, values, _ = reader.scalars("time/fps")
+    assert list(steps) == [s * 1000 for s in range(20)]
+    assert np.allclose(values, np.arange(20) * 1.5)
+
+
+if __name__ == '__main__':
+    test_crc32c_check_value()
+    test_matches_read_tfevents()
+    test_mixed_layouts_keep_order()
+    test_follow_reads_only_appended_records()
+    test_crc_detects_corruption()
+    test_tensorboard_written_file()
+    print("SUCCESS! ストリーミングリーダは追記分だけを正しく読み込んでいます。")
@@ -0,0 +1,220 @@
+"""
+コースの中心線と進みの参照表（src/track.py）のテスト
+
+- 円環のコースで、中心線の長さ・弧長の向き・横ずれの符号が解析解と合うこと
+- 1 周したときの進みの合計が 1 周の長さになり、スタート地点をまたいでも連続すること（逆走は負）
+- 薄い壁を挟んだヘアピンで、壁際の位置が壁の向こう側の中心線に割り当てられないこと
+- ラップタイムがスタート/ゴールラインの通過時刻の差になり、ライン付近の行き来を重複して数えないこと
+- 周回していないコース、キャッシュの再利用
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.map_index import MapIndex
+from src.track import CACHE_SUFFIX, LapTimer, ProgressTracker, Track
+
+RESOLUTION = 0.05
+SIZE = 200
+CENTER = SIZE * RESOLUTION / 2   # 画像の中心のワールド座標（origin = [0, 0]）
+R_IN, R_OUT = 2.5, 4.0
+
+
+def _write_map(directory, img, name="track"):
+    Image.fromarray(img).save(os.path.join(directory, name + ".pgm"))
+    with open(os.path.join(directory, name + ".yaml"), "w") as f:
+        f.write(f"image: {name}.pgm\nresolution: {RESOLUTION}\norigin: [0.0, 0.0, 0.0]\n")
+    return os.path.join(directory, name)
+
+
+def _ring_map():
+    """内径 R_IN・外径 R_OUT の円環（壁の外は未知領域）"""
+    rows, cols = np.mgrid[:SIZE, :SIZE]
+    r = np.hypot((cols + 0.5) * RESOLUTION - CENTER, (SIZE - rows - 0.5) * RESOLUTION - CENTER)
+    img = np.full((SIZE, SIZE), 205, dtype=np.uint8)
+    img[(r > R_IN - 0.2) & (r < R_OUT + 0.2)] = 0
+    img[(r > R_IN) & (r < R_OUT)] = 254
+    return img
+
+
+def _ring_track(start_pose=None):
+    return Track.build(MapIndex.build(_write_map(tempfile.mkdtemp(), _ring_map())), start_pose)
+
+
+def test_ring_geometry():
+    r_mid = (R_IN + R_OUT) / 2
+    # 真下 (x = CENTER, y = CENTER - r_mid) から +x 向き = 反時計回りにスタート
+    track = _ring_track(start_pose=[CENTER, CENTER - r_mid, 0.0])
+    assert track.closed
+    assert abs(track.length - 2 * np.pi * r_mid) / (2 * np.pi * r_mid) < 0.02
+
+    angles = np.linspace(-np.pi / 2, 1.4 * np.pi, 50)
+    x = CENTER + r_mid * np.cos(angles)
+    y = CENTER + r_mid * np.sin(angles)
+    s, offset, half_width = track.project(x, y)
+    expected = (angles + np.pi / 2) * r_mid
+    assert np.all(np.abs(s - expected) < 0.1)
+    # 細線化は 1 セル単位なので、中心線は真の中心から 1 セル程度ずれうる
+    assert np.all(np.abs(offset) < 1.5 * RESOLUTION)
+    assert np.all(np.abs(half_width - (R_OUT - R_IN) / 2) < 0.1)
+
+    # 反時計回りでは左 = 内側なので、内側へのずれは正
+    _, inner, _ = track.project(CENTER + (r_mid - 0.4), CENTER)
+    _, outer, _ = track.project(CENTER + (r_mid + 0.4), CENTER)
+    assert abs(inner - 0.4) < 1.5 * RESOLUTION and abs(outer + 0.4) < 1.5 * RESOLUTION
+
+    # コース外
+    s, offset, _ = track.project(CENTER, CENTER)
+    assert np.isnan(s) and np.isnan(offset)
+
+    # 1 点版と配列版は同じ値を返す
+    for xi, yi in zip(x[:5], y[:5]):
+        assert np.allclose(track.project_point(xi, yi), [v for v in track.project(xi, yi)])
+
+    # スタートの向きを逆にすると弧長の向きも逆になる
+    reverse = _ring_track(start_pose=[CENTER, CENTER - r_mid, np.pi])
+    s_fwd, _, _ = track.project(CENTER + r_mid, CENTER)
+    s_rev, _, _ = reverse.project(CENTER + r_mid, CENTER)
+    assert abs(s_fwd + s_rev - track.length) < 0.2
+
+
+def test_progress_tracker_laps():
+    r_mid = (R_IN + R_OUT) / 2
+    track = _ring_track(start_pose=[CENTER, CENTER - r_mid, 0.0])
+    angles = np.linspace(-np.pi / 2, -np.pi / 2 + 2.5 * np.pi, 400)
+    xs = CENTER + r_mid * np.cos(angles)
+    ys = CENTER + r_mid * np.sin(angles)
+
+    tracker = ProgressTracker(track)
+    tracker.reset(xs[0], ys[0])
+    deltas = [tracker.update(x, y) for x, y in zip(xs[1:], ys[1:])]
+    assert all(d > 0 for d in deltas)
+    assert abs(tracker.total[0] - 1.25 * track.length) < 0.1
+    assert 0.0 <= tracker.lateral_ratio() < 0.1
+
+    # 逆走は負の進み
+    tracker.reset(xs[-1], ys[-1])
+    for x, y in zip(xs[::-1][1:101], ys[::-1][1:101]):
+        tracker.update(x, y)
+    assert tracker.total[0] < 0
+
+    # 複数台をまとめて追跡しても 1 台ずつと同じ
+    batch = ProgressTracker(track, num=3)
+    batch.reset(xs[[0, 100, 200]], ys[[0, 100, 200]])
+    for k in range(1, 100):
+        batch.update(xs[[k, 100 + k, 200 + k]], ys[[k, 100 + k, 200 + k]])
+    single = ProgressTracker(track)
+    single.reset(xs[200], ys[200])
+    for k in range(1, 100):
+        single.update(xs[200 + k], ys[200 + k])
+    assert np.isclose(batch.total[2], single.total[0])
+    batch.reset(xs[0], ys[0], index=[1])
+    assert batch.total[1] == 0.0 and batch.total[0] > 0
+
+
+def test_lap_timer():
+    r_mid = (R_IN + R_OUT) / 2
+    track = _ring_track(start_pose=[CENTER, CENTER - r_mid, 0.0])
+    dt = 0.01
+
+    def drive(start_angle, omega, steps):
+        """角速度 omega [rad/s] で中心線上を周回し、ステップごとに update() を呼ぶ"""
+        angles = start_angle + omega * dt * np.arange(steps + 1)
+        xs, ys = CENTER + r_mid * np.cos(angles), CENTER + r_mid * np.sin(angles)
+        tracker = ProgressTracker(track)
+        tracker.reset(xs[0], ys[0])
+        timer = LapTimer(tracker)
+        for k in range(1, steps + 1):
+            tracker.update(xs[k], ys[k])
+            timer.update(k * dt)
+        return timer
+
+    # スタート/ゴールライン上から 1 周 2 秒で 2.6 周: スタート時刻も通過に数え、2 周分のタイム
+    omega = np.pi
+    timer = drive(-np.pi / 2, omega, 520)
+    assert timer.laps == 2 and len(timer.crossings) == 3 and timer.crossings[0] == 0.0
+    lap = track.length / (r_mid * omega)
+    assert all(abs(t - lap) < 0.02 for t in timer.lap_times)
+    assert timer.best_lap == min(timer.lap_times)
+
+    # ラインから離れた位置からスタート: 最初の通過まではアウトラップで計測しない
+    timer = drive(0.0, omega, 500)
+    assert timer.laps == 1 and len(timer.crossings) == 2
+    assert abs(timer.crossings[0] - 1.5) < 0.02
+
+    # ライン付近で行き来しても 1 回だけ数える
+    tracker = ProgressTracker(track)
+    tracker.reset(CENTER - 1.0, CENTER - r_mid)
+    timer = LapTimer(tracker)
+    for k, dx in enumerate([0.6, 0.8, 1.1, 0.8, 0.6, 0.8, 1.1, 1.3], start=1):
+        tracker.update(CENTER - 1.0 + dx, CENTER - r_mid)
+        timer.update(k * dt)
+    assert len(timer.crossings) == 1 and abs(timer.crossings[0] - 2.5 * dt) < 0.5 * dt and timer.laps == 0
+
+
+def test_hairpin_thin_wall():
+    """幅 1 m の通路 2 本を厚さ 2 セルの壁で仕切り、右端でつないだヘアピン（周回しない）"""
+    img = np.full((80, 200), 205, dtype=np.uint8)
+    img[8:72, 8:192] = 0
+    img[10:70, 10:190] = 254
+    img[39:41, 10:160] = 0
+    track = Track.build(MapIndex.build(_write_map(tempfile.mkdtemp(), img)))
+    assert not track.closed
+    try:
+        LapTimer(ProgressTracker(track))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("周回しないコースでラップタイマーが作れてしまいました")
+
+    # 壁のすぐ上と下（同じ x）は、それぞれの通路の中心線に割り当てられる
+    x = 3.0
+    y_upper = (80 - 38 - 0.5) * RESOLUTION
+    y_lower = (80 - 41 - 0.5) * RESOLUTION
+    s_upper, off_upper, _ = track.project(x, y_upper)
+    s_lower, off_lower, _ = track.project(x, y_lower)
+    s_upper_mid, _, _ = track.project(x, (80 - 25) * RESOLUTION)
+    s_lower_mid, _, _ = track.project(x, (80 - 55) * RESOLUTION)
+    assert abs(s_upper - s_upper_mid) < 0.1 and abs(s_lower - s_lower_mid) < 0.1
+    assert abs(s_upper - s_lower) > 5.0
+    assert abs(abs(off_upper) - 0.7) < 0.1 and abs(abs(off_lower) - 0.7) < 0.1
+
+
+def test_cache():
+    directory = tempfile.mkdtemp()
+    map_path = _write_map(directory, _ring_map())
+    pose = [CENTER, CENTER - 3.25, 0.0]
+    first = Track.load(map_path, start_pose=pose)
+    cache_path = map_path + CACHE_SUFFIX
+    mtime = os.stat(cache_path).st_mtime_ns
+    cached = Track.load(map_path, start_pose=pose)
+    assert os.stat(cache_path).st_mtime_ns == mtime
+    assert np.array_equal(first.nearest, cached.nearest) and cached.length == first.length
+    # スタート位置が変わると作り直す
+    Track.load(map_path, start_pose=[CENTER, CENTER + 3.25, np.pi])
+    assert os.stat(cache_path).st_mtime_ns != mtime
+
+
+def test_repository_map():
+    import config
+    track = Track.load(os.path.join(PROJECT_ROOT, 'my_maps', 'my_map'), start_pose=config.START_POSE,
+                       cache_dir=tempfile.mkdtemp())
+    assert track.closed and 5.0 < track.length < 20.0
+    s, _, _ = track.project(*config.START_POSE[:2])
+    assert min(s, track.length - s) < 0.1
+
+
+if __name__ == '__main__':
+    test_ring_geometry()
+    test_progress_tracker_laps()
+    test_lap_timer()
+    test_hairpin_thin_wall()
+    test_cache()
+    test_repository_map()
+    print("SUCCESS! コースの中心線と進みの参照表は正しく動作しています。")
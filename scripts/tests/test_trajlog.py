@@ -0,0 +1,92 @@
+"""
+ステップ単位の走行ログ（src/trajlog.py）のテスト
+
+- 書き込んだ値がチャンク境界をまたいでもそのまま memmap で読めること（LiDAR は float16・ダウンサンプリング）
+- エピソード単位・ステップ範囲で切り出せること
+- close() していないログも書き出し済みのチャンクまで読めること
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from src.trajlog import TrajectoryLog, TrajectoryWriter
+
+EPISODE_LENGTHS = [7, 1, 12, 5]
+
+
+def _rows(seed=0):
+    rng = np.random.default_rng(seed)
+    for length in EPISODE_LENGTHS:
+        rows = []
+        for i in range(length):
+            rows.append(dict(x=rng.normal(), y=rng.normal(), yaw=rng.normal(), velocity=rng.random(),
+                             steer=rng.normal() * 0.1, action=rng.uniform(-1, 1, 2), reward=rng.normal(),
+                             done=i == length - 1, scan=rng.random(1080) * 10))
+        yield rows
+
+
+def _write(path, chunk_size=4, scan_downsample=2, close=True):
+    writer = TrajectoryWriter(path, scan_downsample=scan_downsample, chunk_size=chunk_size)
+    episodes = list(_rows())
+    for rows in episodes:
+        writer.start_episode()
+        for row in rows:
+            writer.append(**row)
+    if close:
+        writer.close()
+    return writer, episodes
+
+
+def test_roundtrip_and_episodes():
+    path = os.path.join(tempfile.mkdtemp(), 'eval.traj')
+    writer, episodes = _write(path)
+    log = TrajectoryLog(path)
+    assert len(log) == writer.rows == sum(EPISODE_LENGTHS)
+    assert isinstance(log["x"], np.memmap) and log["scans"].dtype == np.float16
+    assert log["scans"].shape == (len(log), 540)
+    assert log.num_episodes == len(EPISODE_LENGTHS)
+
+    for index, rows in enumerate(episodes):
+        ep = log.episode(index)
+        assert len(ep["x"]) == len(rows)
+        assert np.all(ep["episode"] == index)
+        assert np.allclose(ep["x"], [r["x"] for r in rows], atol=1e-6)
+        assert np.allclose(ep["action"], [r["action"] for r in rows], atol=1e-6)
+        assert list(ep["done"]) == [r["done"] for r in rows]
+        expected_scans = np.array([r["scan"].reshape(-1, 2).min(axis=1) for r in rows])
+        assert np.allclose(ep["scans"], expected_scans, rtol=1e-3)
+
+    # ステップ範囲はエピソードをまたいで切り出せる
+    flat = [r for rows in episodes for r in rows]
+    part = log.steps(5, 10, columns=["reward", "episode"])
+    assert set(part) == {"reward", "episode"}
+    assert np.allclose(part["reward"], [r["reward"] for r in flat[5:10]], atol=1e-6)
+
+
+def test_unclosed_log_is_readable():
+    path = os.path.join(tempfile.mkdtemp(), 'partial.traj')
+    writer, _ = _write(path, chunk_size=4, close=False)
+    # 書き出し済みのチャンク (4 行単位) までが読める
+    log = TrajectoryLog(path)
+    assert len(log) == writer.rows == sum(EPISODE_LENGTHS) // 4 * 4
+    writer.close()
+    assert len(TrajectoryLog(path)) == sum(EPISODE_LENGTHS)
+
+
+def test_without_scans():
+    path = os.path.join(tempfile.mkdtemp(), 'noscan.traj')
+    with TrajectoryWriter(path, record_scans=False) as writer:
+        writer.append(0.0, 0.0, 0.0, 1.0, 0.0, (0.0, 0.5), 1.0, False, np.zeros(1080))
+    log = TrajectoryLog(path)
+    assert "scans" not in log.columns and len(log) == 1
+
+
+if __name__ == '__main__':
+    test_roundtrip_and_episodes()
+    test_unclosed_log_is_readable()
+    test_without_scans()
+    print("SUCCESS! 走行ログは書き込んだ値をそのまま memmap で読み出せます。")
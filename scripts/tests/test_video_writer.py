@@ -0,0 +1,103 @@
+"""
+ストリーミング動画ライタ（scripts/utils/video.py）のテスト
+
+- GIF を 1 フレームずつ書き出しても、全フレームが元の画素と一致すること（差分書き込み・透過を含む）
+- thread / stream で同じファイルになること
+- フレームが無い場合はファイルを作らないこと
+"""
+import sys
+import os
+import tempfile
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from utils.video import open_frame_writer
+
+
+def _frames(count=12):
+    """背景の上で矩形が動き、HUD 部分の色が変わるフレーム（同じフレームの連続も含む）"""
+    background = np.zeros((64, 80, 3), dtype=np.uint8)
+    background[40:, :] = (200, 200, 200)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame[5 + i:15 + i, 10 + 2 * i:20 + 2 * i] = (255, 0, 85)
+        frame[0:4, 0:30] = (0, 20 * i % 255, 0)
+        frames.append(frame)
+    frames.append(frames[-1].copy())
+    return frames
+
+
+def _read_gif(path):
+    from PIL import Image
+    with Image.open(path) as im:
+        out = []
+        for i in range(im.n_frames):
+            im.seek(i)
+            out.append(np.array(im.convert('RGB')))
+        return out
+
+
+def test_gif_frames_are_exact():
+    frames = _frames()
+    tmp = tempfile.mkdtemp()
+    paths = {}
+    for encoder in ('stream', 'thread'):
+        paths[encoder] = os.path.join(tmp, f'{encoder}.gif')
+        with open_frame_writer(paths[encoder], fps=25, encoder=encoder) as writer:
+            for frame in frames:
+                writer.append(frame)
+        assert writer.frames == len(frames)
+
+    decoded = _read_gif(paths['stream'])
+    assert len(decoded) == len(frames)
+    for i, (got, expected) in enumerate(zip(decoded, frames)):
+        assert np.array_equal(got, expected), f"frame {i}"
+    with open(paths['stream'], 'rb') as a, open(paths['thread'], 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_thread_writer_copies_reused_buffer():
+    # 呼び出し元が同じバッファを書き換えながら渡しても、各フレームが保存されること
+    frames = _frames(6)
+    path = os.path.join(tempfile.mkdtemp(), 'reuse.gif')
+    buf = np.empty_like(frames[0])
+    with open_frame_writer(path, encoder='thread', queue_size=2) as writer:
+        for frame in frames:
+            np.copyto(buf, frame)
+            writer.append(buf)
+    for got, expected in zip(_read_gif(path), frames):
+        assert np.array_equal(got, expected)
+
+
+def test_no_file_without_frames():
+    for name in ('empty.gif', 'empty.mp4'):
+        path = os.path.join(tempfile.mkdtemp(), name)
+        with open_frame_writer(path, encoder='stream'):
+            pass
+        assert not os.path.exists(path)
+
+
+def test_mp4_frame_count():
+    pytest.importorskip("imageio_ffmpeg")
+    import imageio
+    frames = _frames()
+    path = os.path.join(tempfile.mkdtemp(), 'out.mp4')
+    with open_frame_writer(path, fps=25, encoder='thread') as writer:
+        for frame in frames:
+            writer.append(frame)
+    reader = imageio.get_reader(path)
+    assert sum(1 for _ in reader) == len(frames)
+    reader.close()
+
+
+if __name__ == '__main__':
+    test_gif_frames_are_exact()
+    test_thread_writer_copies_reused_buffer()
+    test_no_file_without_frames()
+    test_mp4_frame_count()
+    print("SUCCESS! ストリーミング動画ライタは全フレームを正しく書き出しています。")
@@ -1,24 +1,152 @@
-import gym
-import f110_gym
 import numpy as np
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
-from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, CheckpointCallback
+from stable_baselines3.common.vec_env import VecEnvWrapper
 import os
 import sys
+import time
 
 # 共通モジュールのimport
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.f1_env import F1TenthRL
+from src.vec_env import VEC_BACKENDS, make_vec_env
+from src.profiling import StageProfiler, format_summary
 import config
 
 import argparse
 
+
+class ThroughputCallback(BaseCallback):
+    """
+    ロールアウト収集のスループット（env-steps/sec）を計測するコールバック
+
+    ロールアウト収集区間（方策推論を含み、PPO の更新は含まない）の経過時間から
+    全体のスループットとワーカー1つあたりのスループットを求め、
+    TensorBoard の throughput/ 以下に記録します。
+    """
+
+    def __init__(self, verbose: int = 0):
+        super().__init__(verbose)
+        self._rollout_start = 0.0
+        self._rollout_steps = 0
+        self.total_steps = 0
+        self.total_time = 0.0
+
+    def _on_rollout_start(self) -> None:
+        self._rollout_start = time.perf_counter()
+        self._rollout_steps = 0
+
+    def _on_step(self) -> bool:
+        self._rollout_steps += self.training_env.num_envs
+        return True
+
+    def _on_rollout_end(self) -> None:
+        elapsed = time.perf_counter() - self._rollout_start
+        if elapsed <= 0 or self._rollout_steps == 0:
+            return
+        self.total_steps += self._rollout_steps
+        self.total_time += elapsed
+        aggregate = self._rollout_steps / elapsed
+        self.logger.record("throughput/env_steps_per_sec", aggregate)
+        self.logger.record("throughput/env_steps_per_sec_per_env", aggregate / self.training_env.num_envs)
+
+    def report(self) -> None:
+        """学習全体の平均スループットを表示する"""
+        if self.total_time <= 0:
+            return
+        num_envs = self.training_env.num_envs
+        aggregate = self.total_steps / self.total_time
+        print(f"--- スループット ({num_envs} envs) ---")
+        print(f"  全体        : {aggregate:10.1f} env-steps/sec")
+        print(f"  1 env あたり: {aggregate / num_envs:10.1f} env-steps/sec")
+        print(f"  収集時間合計: {self.total_time:10.1f} sec ({self.total_steps} steps)")
+
+
+class ProfiledVecEnv(VecEnvWrapper):
+    """
+    VecEnv の step にかかった時間（vec_env.step）と、step を返してから次の step を呼ぶまでの時間（policy）を記録する
+
+    policy には方策推論のほか、ロールアウトバッファへの追加とコールバックの処理が含まれる。
+    PPO の更新をまたがないよう、ロールアウトの開始ごとに restart() で区切る。
+    """
+
+    def __init__(self, venv, profiler):
+        super().__init__(venv)
+        self.profiler = profiler
+        self._step_start = 0
+        self._step_end = None
+
+    def restart(self):
+        self._step_end = None
+
+    def reset(self):
+        self._step_end = None
+        return self.venv.reset()
+
+    def step_async(self, actions):
+        self._step_start = time.perf_counter_ns()
+        if self._step_end is not None:
+            self.profiler.record("policy", self._step_start - self._step_end)
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        result = self.venv.step_wait()
+        self._step_end = time.perf_counter_ns()
+        self.profiler.record("vec_env.step", self._step_end - self._step_start)
+        return result
+
+
+class StageProfileCallback(BaseCallback):
+    """
+    ステージごとの実行時間（src/profiling.py）をロールアウトごとに集計するコールバック
+
+    ProfiledVecEnv の記録（policy / vec_env.step）と、各環境の step / reset の内訳
+    （env_method("profile_snapshot") でワーカープロセスから回収）を合算し、
+    TensorBoard の profile/<ステージ>/{mean,p50,p95,p99}_us に記録します。
+    """
+
+    def __init__(self, vec_env: ProfiledVecEnv, verbose: int = 0):
+        super().__init__(verbose)
+        self.vec_env = vec_env
+        self.total = StageProfiler()
+
+    def _on_rollout_start(self) -> None:
+        self.vec_env.restart()
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        profiler = self.vec_env.profiler.snapshot()
+        for snapshot in self.vec_env.env_method("profile_snapshot"):
+            if snapshot is not None:
+                profiler.merge(snapshot)
+        self.total.merge(profiler)
+        for stage, stats in profiler.summary().items():
+            for key in ("mean_us", "p50_us", "p95_us", "p99_us"):
+                self.logger.record(f"profile/{stage}/{key}", stats[key])
+
+    def report(self) -> None:
+        """学習全体のステージごとの実行時間を表示する"""
+        if not self.total.stages:
+            return
+        print("--- ステージごとの実行時間 ---")
+        print(format_summary(self.total.summary()))
+
+
 def main():
     parser = argparse.ArgumentParser(description='F1Tenth PPO Training')
     parser.add_argument('--steps', type=int, default=config.TOTAL_TIMESTEPS, help='学習ステップ数')
     parser.add_argument('--model', type=str, default=config.MODEL_PATH, help='保存するモデルファイル名(拡張子なし)')
     parser.add_argument('--resume', type=str, default=None, help='継続学習元のモデルパス(拡張子なし)')
+    parser.add_argument('--num-envs', type=int, default=1, help='並列に動かす環境数')
+    parser.add_argument('--vec-backend', type=str, default='dummy', choices=VEC_BACKENDS,
+                        help='dummy: 同一プロセスで逐次実行 / subproc: ワーカープロセスで並列実行 / '
+                             'batched: 1 つのシミュレータで N 台を同時に実行 / shm: subproc と同じで観測を共有メモリで受け渡す')
+    parser.add_argument('--seed', type=int, default=None, help='基準シード(ワーカー i には seed + i を使用。省略時は実行ごとにランダム)')
+    parser.add_argument('--profile', action='store_true',
+                        help='env.step の内訳（sim / 報酬 / 観測）と方策推論の実行時間を計測して TensorBoard に記録する')
+    parser.add_argument('--action-repeat', type=int, default=1,
+                        help='1 回の行動を保つ物理 tick 数（LiDAR は最後の tick でだけ計算する。評価時も同じ値を指定）')
     args = parser.parse_args()
 
     if not os.path.exists(config.MODEL_DIR):
@@ -31,15 +159,24 @@ def main():
     os.makedirs(checkpoint_dir, exist_ok=True)
     
     # 学習の進捗に合わせて保存
-    save_freq = max(args.steps // 5, 1000)
+    # (save_freq は VecEnv の step 呼び出し回数単位のため、環境数で割る)
+    save_freq = max(args.steps // 5 // args.num_envs, 1000)
     checkpoint_callback = CheckpointCallback(
         save_freq=save_freq, 
         save_path=checkpoint_dir,
         name_prefix=os.path.basename(args.model)
     )
+    throughput_callback = ThroughputCallback()
 
-    env = F1TenthRL(config.MAP_PATH)
-    env = DummyVecEnv([lambda: env])
+    env = make_vec_env(config.MAP_PATH, num_envs=args.num_envs, backend=args.vec_backend, seed=args.seed,
+                       action_repeat=args.action_repeat)
+    callbacks = [checkpoint_callback, throughput_callback]
+    profile_callback = None
+    if args.profile:
+        env.env_method("enable_profiling")
+        env = ProfiledVecEnv(env, StageProfiler())
+        profile_callback = StageProfileCallback(env)
+        callbacks.append(profile_callback)
 
     if args.resume:
         # --- 継続学習: 既存モデルをロードして学習を再開 ---
@@ -61,19 +198,26 @@ def main():
             policy_kwargs=dict(net_arch=config.NET_ARCH),
             verbose=1,
             tensorboard_log=config.LOG_DIR,
-            device=config.DEVICE
+            device=config.DEVICE,
+            seed=args.seed
         )
 
     print(f"--- 学習開始: {os.path.basename(args.model)} ---")
     print(f"Total Timesteps: {args.steps}")
+    print(f"並列環境: {args.num_envs} ({args.vec_backend})")
+    print(f"action repeat: {args.action_repeat} tick")
     print(f"TensorBoard ログ: {config.LOG_DIR}")
     
     model.learn(
         total_timesteps=args.steps,
-        callback=checkpoint_callback
+        callback=CallbackList(callbacks)
     )
     
     model.save(args.model)
+    env.close()
+    throughput_callback.report()
+    if profile_callback is not None:
+        profile_callback.report()
     print(f"--- 完了: {args.model} ---")
 
 
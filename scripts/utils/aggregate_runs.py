@@ -0,0 +1,256 @@
+"""
+複数の学習ログ（TensorBoard の event ファイル）を集計し、ラン同士を比較する表を表示する
+
+ログディレクトリ以下の event ファイルを探し、変更のあったファイルだけをプロセスプールで並列に解析します。
+タグごとのスカラー列はファイルごとに .npz としてキャッシュし（パス・サイズ・更新時刻で判定）、
+追記されただけのファイルは前回読み終えた位置から続きを読みます。2 回目以降はほぼキャッシュの読み込みだけで表が出ます。
+
+    python3 scripts/utils/aggregate_runs.py                    # config.LOG_DIR 以下を集計
+    python3 scripts/utils/aggregate_runs.py logs --sort best_reward --csv logs/runs.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# スクリプトとして実行した場合も utils パッケージを import できるようにする（重複して追加しない）
+_SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.append(_SCRIPTS_DIR)
+from utils.tfevents_stream import EVENT_FILE_PREFIX, EventFileStream, ScalarSeries
+
+CACHE_DIR_NAME = ".aggregate_cache"
+INDEX_FILE = "index.json"
+CACHE_VERSION = 1
+
+REWARD_TAG = "rollout/ep_rew_mean"
+FPS_TAG = "time/fps"
+EXPLAINED_VARIANCE_TAG = "train/explained_variance"
+
+COLUMNS = ["run", "timesteps", "hours", "final_reward", "best_reward", "fps", "explained_variance"]
+
+
+def find_event_files(log_dir):
+    """log_dir 以下の event ファイル（ファイル名順）"""
+    found = []
+    for root, dirs, files in os.walk(log_dir):
+        dirs[:] = [d for d in dirs if d != CACHE_DIR_NAME]
+        found.extend(os.path.join(root, name) for name in files if name.startswith(EVENT_FILE_PREFIX))
+    return sorted(found)
+
+
+def _save_series(path, series):
+    arrays = {}
+    for i, (steps, values, wall_times) in enumerate(series.values()):
+        arrays[f"steps_{i}"] = steps
+        arrays[f"values_{i}"] = values
+        arrays[f"wall_times_{i}"] = wall_times
+    np.savez(path, **arrays)
+
+
+def _load_series(path, tags):
+    with np.load(path) as data:
+        return {tag: ScalarSeries(data[f"steps_{i}"], data[f"values_{i}"], data[f"wall_times_{i}"])
+                for i, tag in enumerate(tags)}
+
+
+def _parse_file(path, cached):
+    """
+    1 ファイルを解析し、(読み終えた位置, {タグ: ScalarSeries}) を返す（ワーカープロセスで実行）
+
+    cached = (読み終えた位置, キャッシュの .npz, タグ) があれば、その位置から追記分だけを読む。
+    """
+    if cached is not None:
+        offset, cache_file, tags = cached
+        stream = EventFileStream.resume(path, offset, _load_series(cache_file, tags))
+    else:
+        stream = EventFileStream(path)
+    stream.poll()
+    return stream.offset, {tag: stream.scalars(tag) for tag in stream.tags()}
+
+
+class SummaryCache:
+    """
+    event ファイルごとのスカラー列のキャッシュ
+
+    cache_dir/index.json にファイルパス -> (サイズ, 更新時刻, 読み終えた位置, タグ, .npz 名) を保存し、
+    スカラー列は cache_dir/<パスのハッシュ>.npz に保存する。
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index = {}
+        index_path = os.path.join(cache_dir, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            if index.get("version") == CACHE_VERSION:
+                self.index = index["files"]
+
+    def _cache_file(self, path):
+        return os.path.join(self.cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".npz")
+
+    def lookup(self, path, size, mtime_ns):
+        """
+        ("hit", None) : 変更なし
+        ("resume", (offset, .npz, tags)) : 追記されている（続きから読む）
+        ("miss", None) : キャッシュなし・ファイルが作り直された
+        """
+        entry = self.index.get(path)
+        if entry is None or not os.path.exists(self._cache_file(path)):
+            return "miss", None
+        if entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            return "hit", None
+        if size > entry["offset"]:
+            return "resume", (entry["offset"], self._cache_file(path), entry["tags"])
+        return "miss", None
+
+    def load(self, path):
+        return _load_series(self._cache_file(path), self.index[path]["tags"])
+
+    def store(self, path, size, mtime_ns, offset, series):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _save_series(self._cache_file(path), series)
+        self.index[path] = {"size": size, "mtime_ns": mtime_ns, "offset": offset, "tags": list(series)}
+
+    def prune(self, paths):
+        """paths に無いファイルのキャッシュを削除する"""
+        for path in set(self.index) - set(paths):
+            cache_file = self._cache_file(path)
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            del self.index[path]
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.index}, f)
+        os.replace(tmp_path, index_path)  # 途中で中断しても壊れた index を残さない
+
+
+def load_runs(log_dir, cache_dir=None, workers=None, use_cache=True):
+    """
+    log_dir 以下の全ランのスカラー列を読み込む
+
+    Returns:
+        runs: {ラン名 (log_dir からの相対ディレクトリ): {タグ: ScalarSeries}}（同じランの複数ファイルは連結）
+        stats: {"files", "cached", "resumed", "parsed"} の件数
+    """
+    cache = SummaryCache(cache_dir or os.path.join(log_dir, CACHE_DIR_NAME)) if use_cache else None
+    files = find_event_files(log_dir)
+    stats = {"files": len(files), "cached": 0, "resumed": 0, "parsed": 0}
+
+    per_file = {}
+    tasks = []
+    for path in files:
+        st = os.stat(path)
+        state, cached = cache.lookup(path, st.st_size, st.st_mtime_ns) if cache else ("miss", None)
+        if state == "hit":
+            per_file[path] = cache.load(path)
+            stats["cached"] += 1
+        else:
+            tasks.append((path, st.st_size, st.st_mtime_ns, cached))
+            stats["resumed" if state == "resume" else "parsed"] += 1
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_file, [t[0] for t in tasks], [t[3] for t in tasks]))
+    else:
+        results = [_parse_file(path, cached) for path, _, _, cached in tasks]
+    for (path, size, mtime_ns, _), (offset, series) in zip(tasks, results):
+        per_file[path] = series
+        if cache:
+            cache.store(path, size, mtime_ns, offset, series)
+    if cache:
+        cache.prune(files)
+        cache.save()
+
+    runs = {}
+    for path in files:
+        run = os.path.relpath(os.path.dirname(path), log_dir)
+        merged = runs.setdefault(run, {})
+        for tag, series in per_file[path].items():
+            if tag in merged:
+                series = ScalarSeries(*(np.concatenate(pair) for pair in zip(merged[tag], series)))
+            merged[tag] = series
+    return runs, stats
+
+
+def _last(series):
+    return float(series.values[-1]) if series is not None and len(series.values) else None
+
+
+def summarize(runs):
+    """ラン 1 つを 1 行にまとめた表（COLUMNS のキーを持つ dict のリスト）"""
+    rows = []
+    for run, tags in sorted(runs.items()):
+        nonempty = [s for s in tags.values() if len(s.steps)]
+        reward = tags.get(REWARD_TAG)
+        rows.append({
+            "run": run,
+            "timesteps": int(max(s.steps.max() for s in nonempty)) if nonempty else 0,
+            "hours": (max(s.wall_times.max() for s in nonempty) - min(s.wall_times.min() for s in nonempty)) / 3600
+            if nonempty else 0.0,
+            "final_reward": _last(reward),
+            "best_reward": float(reward.values.max()) if reward is not None and len(reward.values) else None,
+            "fps": _last(tags.get(FPS_TAG)),
+            "explained_variance": _last(tags.get(EXPLAINED_VARIANCE_TAG)),
+        })
+    return rows
+
+
+def format_table(rows):
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    width = max([len("run")] + [len(r["run"]) for r in rows])
+    lines = [f"{'run':<{width}}{'timesteps':>12}{'hours':>8}{'final_rew':>11}{'best_rew':>10}{'fps':>8}{'expl_var':>10}"]
+    for r in rows:
+        lines.append(f"{r['run']:<{width}}{r['timesteps']:>12d}{r['hours']:8.2f}{fmt(r['final_reward'], '11.2f')}"
+                     f"{fmt(r['best_reward'], '10.2f')}{fmt(r['fps'], '8.0f')}{fmt(r['explained_variance'], '10.3f')}")
+    return "\n".join(lines)
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description='複数の学習ログを集計してラン同士を比較する')
+    parser.add_argument('log_dir', type=str, nargs='?', default=config.LOG_DIR, help='ログディレクトリ')
+    parser.add_argument('--workers', type=int, default=None, help='解析に使うプロセス数（省略時は CPU 数）')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help=f'キャッシュの保存先（省略時は <log_dir>/{CACHE_DIR_NAME}）')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使わずにすべて解析する')
+    parser.add_argument('--sort', type=str, default='run', choices=COLUMNS, help='並べ替えに使う列')
+    parser.add_argument('--csv', type=str, default=None, help='表を CSV にも保存する')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    runs, stats = load_runs(args.log_dir, args.cache_dir, args.workers, use_cache=not args.no_cache)
+    rows = summarize(runs)
+    # 値の無い行は末尾、数値の列は大きい順
+    if args.sort != 'run':
+        rows.sort(key=lambda r: (r[args.sort] is None, -(r[args.sort] or 0)))
+    elapsed = time.perf_counter() - start
+
+    print(format_table(rows))
+    print(f"\n{len(rows)} ラン / {stats['files']} ファイル (キャッシュ {stats['cached']}, 追記分のみ {stats['resumed']}, "
+          f"全体を解析 {stats['parsed']}) を {elapsed:.2f} 秒で集計しました")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"保存しました: {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,30 @@ TFEventsファイルを依存ライブラリなしで読み取るスクリプト
 """
 import struct
 import sys
-import zlib
+
+def _make_crc32c_table():
+    # CRC-32C (Castagnoli, 反転多項式 0x82F63B78)。zlib.crc32 とは多項式が異なる
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+def crc32c(data):
+    crc = 0xffffffff
+    table = _CRC32C_TABLE
+    for b in data:
+        crc = table[(crc ^ b) & 0xff] ^ (crc >> 8)
+    return crc ^ 0xffffffff
 
 def masked_crc32c(data):
-    crc = zlib.crc32(data) & 0xffffffff
-    return (((crc >> 15) | (crc << 17)) & 0xffffffff + 0xa282ead8) & 0xffffffff
+    """TFRecord のヘッダ・データに付く CRC（crc32c を回転して定数を足したもの）"""
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + 0xa282ead8) & 0xffffffff
 
 def read_tfevents(path):
     results = {}
@@ -0,0 +1,354 @@
+"""
+マップ上に走行の様子を描画するクラス
+
+    MapRenderer     : matplotlib で描画する（従来の enjoy_wide.py の描画）
+    FastMapRenderer : matplotlib を使わず NumPy の uint8 バッファへ直接描画する（同じ見た目で 10 倍以上高速）
+
+どちらも update(car_state, scans, action, reward, step, collisions) で (H, W, 3) の uint8 フレームを返します。
+
+    from utils.render import RENDERERS
+    renderer = RENDERERS["fast"](config.MAP_PATH)
+    frame = renderer.update((x, y, yaw, speed), scans, action, reward, step, collisions)
+"""
+import os
+
+import numpy as np
+import yaml
+from PIL import Image
+
+
+def load_map(map_path):
+    """マップの画像 (H, W) と origin [x, y, theta]、resolution を読み込む"""
+    # マップメタデータの読み込み
+    map_yaml_path = map_path + ".yaml"
+    with open(map_yaml_path, 'r') as f:
+        map_conf = yaml.safe_load(f)
+
+    map_dir = os.path.dirname(map_path)
+    img_path = os.path.join(map_dir, map_conf['image'])
+
+    # 画像読み込み
+    map_img = np.array(Image.open(img_path))
+    return map_img, map_conf['origin'], map_conf['resolution']
+
+
+class MapRenderer:
+    def __init__(self, map_path, fig_size=8):
+        # matplotlib は描画するときだけ必要なので、ここで import する
+        import matplotlib.pyplot as plt
+
+        self.map_img, self.origin, self.resolution = load_map(map_path)
+        self.height, self.width = self.map_img.shape
+        
+        # グラフ設定
+        aspect = self.width / self.height
+        self.fig, self.ax = plt.subplots(figsize=(fig_size * aspect, fig_size), facecolor='#121212')
+        plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
+        
+        # 初期描画（背景）
+        self.ax.imshow(self.map_img, cmap='gray', origin='upper')
+        self.ax.axis('off')
+
+        # 描画オブジェクトの初期化
+        self.trail, = self.ax.plot([], [], color='#00aaff', alpha=0.5, linewidth=1, label='Trail')
+        self.scans_scatter = self.ax.scatter([], [], s=1, c='#00ffff', alpha=0.3)
+        self.car_dot, = self.ax.plot([], [], 'o', color='#ff0055', markersize=8, markeredgecolor='white', zorder=5)
+        self.car_arrow = None # 後で作成
+        
+        self.hud_text = self.ax.text(20, 40, '', color='#00ff00', fontsize=12, fontfamily='monospace',
+                                    bbox=dict(facecolor='black', alpha=0.7, edgecolor='none'))
+        
+        # 軌跡データ
+        self.trail_x = []
+        self.trail_y = []
+
+    def world_to_pixel(self, x, y):
+        px = (x - self.origin[0]) / self.resolution
+        py = self.height - (y - self.origin[1]) / self.resolution
+        return px, py
+
+    def seed_trail(self, xs, ys):
+        """描画済みとみなす軌跡 (ワールド座標) を先に設定する。記録の途中から描画を始めるときに使う"""
+        px, py = self.world_to_pixel(np.asarray(xs), np.asarray(ys))
+        self.trail_x.extend(px.tolist())
+        self.trail_y.extend(py.tolist())
+
+    def update(self, car_state, scans, action, reward, step, collisions):
+        car_x, car_y, car_theta, car_vel = car_state
+        px, py = self.world_to_pixel(car_x, car_y)
+
+        # 軌跡の更新
+        self.trail_x.append(px)
+        self.trail_y.append(py)
+        self.trail.set_data(self.trail_x, self.trail_y)
+
+        # 自車の位置
+        self.car_dot.set_data([px], [py])
+
+        # 向きの矢印
+        if self.car_arrow:
+            self.car_arrow.remove()
+        
+        # マップ解像度(0.075)に合わせて矢印のサイズを調整
+        arrow_len = 10 
+        dx = arrow_len * np.cos(car_theta)
+        dy = -arrow_len * np.sin(car_theta) # 画像座標系(y軸反転)
+        self.car_arrow = self.ax.arrow(px, py, dx, dy, head_width=4, head_length=5, fc='#ff0055', ec='white', zorder=6)
+
+        # LiDAR点群
+        angles = np.linspace(-2.35, 2.35, 1080) + car_theta
+        scan_x_world = car_x + scans * np.cos(angles)
+        scan_y_world = car_y + scans * np.sin(angles)
+        scan_px, scan_py = self.world_to_pixel(scan_x_world, scan_y_world)
+        self.scans_scatter.set_offsets(np.c_[scan_px, scan_py])
+
+        # HUD
+        info_str = (
+            f"STEP: {step:04d}\n"
+            f"SPD : {car_vel:.2f} m/s\n"
+            f"STR : {action[0]:.2f}\n"
+            f"ACC : {action[1]:.2f}\n"
+            f"RWD : {reward:.2f}\n"
+            f"COL : {collisions}"
+        )
+        self.hud_text.set_text(info_str)
+
+        # 画面キャプチャ
+        self.fig.canvas.draw()
+        frame = np.array(self.fig.canvas.buffer_rgba())[:, :, :3]
+        return frame
+
+    def close(self):
+        import matplotlib.pyplot as plt
+        plt.close(self.fig)
+
+
+def _hex_to_rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32)
+
+
+def _find_monospace_font(size_px):
+    """HUD 用の等幅フォント。matplotlib 同梱の DejaVu Sans Mono を (import せずに) 探し、無ければ既定フォント"""
+    import importlib.util
+    from PIL import ImageFont
+
+    candidates = ["DejaVuSansMono.ttf"]
+    spec = importlib.util.find_spec("matplotlib")
+    if spec is not None and spec.submodule_search_locations:
+        candidates.insert(0, os.path.join(spec.submodule_search_locations[0],
+                                          "mpl-data", "fonts", "ttf", "DejaVuSansMono.ttf"))
+    for path in candidates:
+        try:
+            return ImageFont.truetype(path, size_px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size_px)
+
+
+class FastMapRenderer:
+    """
+    matplotlib を使わずに NumPy の uint8 バッファへ直接描画する MapRenderer 互換の描画クラス
+
+    マップは初期化時に 1 度だけ出力解像度へ拡大し、軌跡は背景のコピーに追記していく。
+    毎フレームはそのコピーを複製して LiDAR 点・自車・矢印・HUD だけを描き込む。
+    出力サイズ・色・配置は MapRenderer (dpi=100) に合わせている。
+
+    update() の返り値は内部バッファで、次の update() で上書きされる
+    （utils.video のライタはそのまま受け取れる）。
+    """
+
+    DPI = 100
+    TRAIL_COLOR, TRAIL_ALPHA = _hex_to_rgb('#00aaff'), 0.5
+    SCAN_COLOR, SCAN_ALPHA = _hex_to_rgb('#00ffff'), 0.3
+    CAR_COLOR = _hex_to_rgb('#ff0055')
+    EDGE_COLOR = _hex_to_rgb('#ffffff')
+    HUD_COLOR = _hex_to_rgb('#00ff00')
+
+    def __init__(self, map_path, fig_size=8):
+        self.map_img, self.origin, self.resolution = load_map(map_path)
+        self.height, self.width = self.map_img.shape
+        aspect = self.width / self.height
+        self.out_h = int(fig_size * self.DPI)
+        self.out_w = int(fig_size * aspect * self.DPI)
+        # マップ 1 画素あたりの出力画素数
+        self.scale_x = self.out_w / self.width
+        self.scale_y = self.out_h / self.height
+
+        # 背景: imshow(cmap='gray') と同じく最小値〜最大値を 256 段階に正規化し、最近傍で拡大する
+        img = self.map_img.astype(np.float64)
+        span = max(img.max() - img.min(), 1e-12)
+        gray = np.minimum((img - img.min()) / span * 256, 255).astype(np.uint8)
+        rows = np.minimum(((np.arange(self.out_h) + 0.5) / self.scale_y).astype(int), self.height - 1)
+        cols = np.minimum(((np.arange(self.out_w) + 0.5) / self.scale_x).astype(int), self.width - 1)
+        self._base = np.repeat(gray[rows][:, cols][:, :, None], 3, axis=2)  # 背景 + 軌跡
+        self._trail_mask = np.zeros((self.out_h, self.out_w), dtype=bool)
+        self._frame = np.empty_like(self._base)
+        self._last_trail = None
+
+        # 自車マーカー (markersize=8pt, 縁 1pt) のスタンプ
+        pt = self.DPI / 72
+        radius = 4 * pt
+        yy, xx = np.mgrid[-int(radius) - 1:int(radius) + 2, -int(radius) - 1:int(radius) + 2]
+        dist = np.hypot(xx, yy)
+        fill = dist <= radius - pt
+        edge = (dist <= radius) & ~fill
+        self._car_fill = (yy[fill], xx[fill])
+        self._car_edge = (yy[edge], xx[edge])
+
+        # HUD (fontsize=12pt, 行間 1.2, 背景 alpha=0.7)
+        self._font_px = int(round(12 * pt))
+        self._font = _find_monospace_font(self._font_px)
+        self._ascent, self._descent = self._font.getmetrics()
+        self._advance = int(round(self._font.getlength("M")))
+        self._glyphs = {}
+        self._hud_anchor = self._to_canvas(20, 40)
+
+    def world_to_pixel(self, x, y):
+        px = (x - self.origin[0]) / self.resolution
+        py = self.height - (y - self.origin[1]) / self.resolution
+        return px, py
+
+    def _to_canvas(self, px, py):
+        """マップの画素座標 -> 出力画像の画素座標"""
+        return (px + 0.5) * self.scale_x, (py + 0.5) * self.scale_y
+
+    def _in_bounds(self, xs, ys):
+        keep = (xs >= 0) & (xs < self.out_w) & (ys >= 0) & (ys < self.out_h)
+        return xs[keep], ys[keep]
+
+    def _blend(self, buf, xs, ys, color, alpha):
+        xs, ys = self._in_bounds(xs, ys)
+        buf[ys, xs] = (buf[ys, xs] * (1 - alpha) + color * alpha).astype(np.uint8)
+
+    def _paint(self, buf, xs, ys, color):
+        xs, ys = self._in_bounds(xs, ys)
+        buf[ys, xs] = color
+
+    @staticmethod
+    def _line(x0, y0, x1, y1):
+        """(x0, y0)-(x1, y1) を通る画素の座標"""
+        n = int(max(abs(x1 - x0), abs(y1 - y0))) + 1
+        t = np.linspace(0.0, 1.0, n + 1)
+        return np.round(x0 + (x1 - x0) * t).astype(int), np.round(y0 + (y1 - y0) * t).astype(int)
+
+    def _add_trail(self, cx, cy):
+        """軌跡の新しい線分を背景に追記する（同じ画素は 1 度だけ塗り、半透明が重ならないようにする）"""
+        if self._last_trail is not None:
+            xs, ys = self._in_bounds(*self._line(*self._last_trail, cx, cy))
+            new = ~self._trail_mask[ys, xs]
+            xs, ys = xs[new], ys[new]
+            self._trail_mask[ys, xs] = True
+            self._blend(self._base, xs, ys, self.TRAIL_COLOR, self.TRAIL_ALPHA)
+        self._last_trail = (cx, cy)
+
+    def seed_trail(self, xs, ys):
+        """描画済みとみなす軌跡 (ワールド座標) を先に背景へ描く。記録の途中から描画を始めるときに使う"""
+        for cx, cy in zip(*self._to_canvas(*self.world_to_pixel(np.asarray(xs), np.asarray(ys)))):
+            self._add_trail(cx, cy)
+
+    def _draw_arrow(self, buf, cx, cy, theta):
+        """ax.arrow(px, py, dx, dy, head_width=4, head_length=5) と同じ形の矢印"""
+        direction = np.array([np.cos(theta), -np.sin(theta)])  # 画像座標系 (y 軸反転)
+        normal = np.array([-direction[1], direction[0]])
+        scale = np.array([self.scale_x, self.scale_y])
+        start = np.array([cx, cy])
+        end = start + direction * 10 * scale
+        tip = end + direction * 5 * scale
+        corners = np.array([end + normal * 2 * scale, end - normal * 2 * scale, tip])
+
+        # 三角形 (矢じり) を外接矩形内の半平面判定で塗る
+        x_min, y_min = np.floor(corners.min(axis=0)).astype(int)
+        x_max, y_max = np.ceil(corners.max(axis=0)).astype(int)
+        yy, xx = np.mgrid[y_min:y_max + 1, x_min:x_max + 1]
+        a, b, c = corners
+        orient = np.sign((b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])) or 1.0
+        inside = np.ones(xx.shape, dtype=bool)
+        for p, q in ((a, b), (b, c), (c, a)):
+            inside &= ((q[0] - p[0]) * (yy - p[1]) - (q[1] - p[1]) * (xx - p[0])) * orient >= 0
+        self._paint(buf, xx[inside], yy[inside], self.CAR_COLOR)
+        # 軸と矢じりの縁 (白)
+        for a, b in ((start, end), (corners[0], corners[1]), (corners[1], corners[2]), (corners[2], corners[0])):
+            self._paint(buf, *self._line(a[0], a[1], b[0], b[1]), self.EDGE_COLOR)
+
+    def _glyph(self, ch):
+        """文字のアルファマスク (高さ ascent + descent, 幅 1 文字分)。初回のみ PIL で描画してキャッシュする"""
+        mask = self._glyphs.get(ch)
+        if mask is None:
+            from PIL import Image, ImageDraw
+            image = Image.new('L', (self._advance, self._ascent + self._descent), 0)
+            ImageDraw.Draw(image).text((0, self._ascent), ch, fill=255, font=self._font, anchor='ls')
+            mask = np.asarray(image, dtype=np.float32)[:, :, None] / 255
+            self._glyphs[ch] = mask
+        return mask
+
+    def _draw_hud(self, buf, text):
+        lines = text.split("\n")
+        line_h = int(round(self._font_px * 1.2))
+        x, baseline = int(self._hud_anchor[0]), int(self._hud_anchor[1])
+        first_baseline = baseline - (len(lines) - 1) * line_h
+        width = max(len(line) for line in lines) * self._advance
+        pad = int(round(self._font_px * 0.3))
+        y0, y1 = max(first_baseline - self._ascent - pad, 0), min(baseline + self._descent + pad, self.out_h)
+        x0, x1 = max(x - pad, 0), min(x + width + pad, self.out_w)
+
+        # 背景の黒 (alpha=0.7)
+        region = buf[y0:y1, x0:x1]
+        region[:] = (region * 0.3).astype(np.uint8)
+
+        # 等幅フォントなので、キャッシュした文字マスクを横に並べて 1 行ずつ合成する
+        for i, line in enumerate(lines):
+            if not line:
+                continue
+            mask = np.concatenate([self._glyph(ch) for ch in line], axis=1)
+            top = first_baseline + i * line_h - self._ascent
+            # 大きいマップでは HUD の位置が画像の上端に近く、行がはみ出すため、はみ出した分だけマスクを切り取る
+            src_y0, src_y1 = max(0, -top), min(mask.shape[0], self.out_h - top)
+            src_x0, src_x1 = max(0, -x), min(mask.shape[1], self.out_w - x)
+            if src_y0 >= src_y1 or src_x0 >= src_x1:
+                continue
+            target = buf[top + src_y0:top + src_y1, x + src_x0:x + src_x1]
+            alpha = mask[src_y0:src_y1, src_x0:src_x1]
+            target[:] = (target * (1 - alpha) + self.HUD_COLOR * alpha).astype(np.uint8)
+
+    def update(self, car_state, scans, action, reward, step, collisions):
+        car_x, car_y, car_theta, car_vel = car_state
+        cx, cy = self._to_canvas(*self.world_to_pixel(car_x, car_y))
+
+        # 軌跡は背景に追記し、毎フレームはその複製から描き始める
+        self._add_trail(cx, cy)
+        frame = self._frame
+        np.copyto(frame, self._base)
+
+        # LiDAR点群
+        angles = np.linspace(-2.35, 2.35, 1080) + car_theta
+        scan_px, scan_py = self._to_canvas(*self.world_to_pixel(car_x + scans * np.cos(angles),
+                                                                car_y + scans * np.sin(angles)))
+        # scatter(s=1) の点は縁を含めて約 2.8 画素なので、2x2 画素にまとめて塗る
+        sx = np.floor(scan_px - 0.5).astype(int)
+        sy = np.floor(scan_py - 0.5).astype(int)
+        self._blend(frame, np.concatenate([sx, sx + 1, sx, sx + 1]), np.concatenate([sy, sy, sy + 1, sy + 1]),
+                    self.SCAN_COLOR, self.SCAN_ALPHA)
+
+        # 自車の位置と向き
+        ix, iy = int(round(cx)), int(round(cy))
+        self._paint(frame, self._car_fill[1] + ix, self._car_fill[0] + iy, self.CAR_COLOR)
+        self._paint(frame, self._car_edge[1] + ix, self._car_edge[0] + iy, self.EDGE_COLOR)
+        self._draw_arrow(frame, cx, cy, car_theta)
+
+        # HUD
+        info_str = (
+            f"STEP: {step:04d}\n"
+            f"SPD : {car_vel:.2f} m/s\n"
+            f"STR : {action[0]:.2f}\n"
+            f"ACC : {action[1]:.2f}\n"
+            f"RWD : {reward:.2f}\n"
+            f"COL : {collisions}"
+        )
+        self._draw_hud(frame, info_str)
+        return frame
+
+    def close(self):
+        pass
+
+
+RENDERERS = {"matplotlib": MapRenderer, "fast": FastMapRenderer}
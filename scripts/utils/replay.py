@@ -0,0 +1,97 @@
+"""
+走行の記録（ロールアウト）の保存・読み込みと、記録からのフレーム描画
+
+enjoy_wide.py --record で保存した .npz には各ステップの車両状態・生の LiDAR・行動・報酬・終了フラグが入っており、
+方策もシミュレータも動かさずに、描画スタイルやフレーム間隔を変えて何度でも描き直せます。
+
+    from utils.replay import RolloutRecorder, load_rollout, render_frames
+    recorder = RolloutRecorder(config.MAP_PATH)
+    recorder.append(car_state, raw_scan, action, reward, done)
+    recorder.save("gif/run.npz")
+
+    rollout = load_rollout("gif/run.npz")
+    frames = render_frames(rollout, frame_steps=range(0, rollout["steps"], 2), renderer="fast")
+"""
+import numpy as np
+
+from utils.render import RENDERERS
+
+
+class RolloutRecorder:
+    """1 ステップずつ記録を追加し、最後に .npz に保存する"""
+
+    def __init__(self, map_path):
+        self.map_path = map_path
+        self._car_states = []
+        self._scans = []
+        self._actions = []
+        self._rewards = []
+        self._dones = []
+
+    def __len__(self):
+        return len(self._rewards)
+
+    def append(self, car_state, raw_scan, action, reward, done):
+        """
+        Args:
+            car_state: (x, y, yaw, 速度)
+            raw_scan: 生の LiDAR (1080,)
+            action: 方策の出力 [steer, speed]
+            reward: そのステップの報酬
+            done: そのステップで衝突したか
+        """
+        self._car_states.append(np.asarray(car_state, dtype=np.float64))
+        self._scans.append(np.asarray(raw_scan, dtype=np.float32))
+        self._actions.append(np.asarray(action, dtype=np.float32))
+        self._rewards.append(float(reward))
+        self._dones.append(bool(done))
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            map_path=np.array(self.map_path),
+            car_states=np.array(self._car_states).reshape(-1, 4),
+            scans=np.array(self._scans).reshape(-1, 1080),
+            actions=np.array(self._actions).reshape(-1, 2),
+            rewards=np.array(self._rewards, dtype=np.float32),
+            dones=np.array(self._dones, dtype=bool),
+        )
+
+
+def load_rollout(path):
+    """RolloutRecorder.save() で保存した記録を dict で返す（"steps" にステップ数を追加）"""
+    with np.load(path) as data:
+        rollout = {key: data[key] for key in data.files}
+    rollout["map_path"] = str(rollout["map_path"])
+    rollout["steps"] = len(rollout["rewards"])
+    return rollout
+
+
+def render_frames(rollout, frame_steps, renderer="fast", trail_steps=None, map_path=None):
+    """
+    記録の frame_steps 番目の各ステップを描画し、フレーム (H, W, 3) uint8 のリストを返す
+
+    Args:
+        rollout: load_rollout() の返り値
+        frame_steps: 描画するステップ番号（昇順）
+        renderer: utils.render.RENDERERS のキー
+        trail_steps: frame_steps より前に描画済みとみなすステップ番号。軌跡はこれらの位置から始まる
+                     （並列描画で、チャンクの途中から描き始めても通しで描いた場合と同じ軌跡にするため）
+        map_path: 記録と別のマップファイルで描画する場合に指定
+    """
+    view = RENDERERS[renderer](map_path or rollout["map_path"])
+    states = rollout["car_states"]
+    # 画面の衝突回数は、そのステップより前に終了したエピソードの数
+    collisions_before = np.concatenate([[0], np.cumsum(rollout["dones"])])
+    try:
+        if trail_steps is not None and len(trail_steps) > 0:
+            view.seed_trail(states[trail_steps, 0], states[trail_steps, 1])
+        frames = []
+        for step in frame_steps:
+            x, y, yaw, speed = states[step]
+            frame = view.update((x, y, yaw, speed), rollout["scans"][step], rollout["actions"][step],
+                                float(rollout["rewards"][step]), int(step), int(collisions_before[step]))
+            frames.append(np.array(frame))
+        return frames
+    finally:
+        view.close()
@@ -0,0 +1,494 @@
+"""
+TFEvents ファイルを追記分だけ読み進めるストリーミングリーダ
+
+ファイルごとに読み終えたバイト位置を覚えておき、poll() のたびに新しく追記されたレコードだけを解析します。
+スカラーはタグごとに NumPy 配列 (steps, values, wall_times) として取り出せます。
+書き込み途中の末尾レコードは読み飛ばさずに次の poll() で読み直し、check_crc=True ならレコードの CRC-32C を検証します。
+TensorBoard などの依存ライブラリは不要です（google-crc32c / crc32c パッケージがあれば CRC 検証に使います）。
+
+    from utils.tfevents_stream import TFEventsReader
+    reader = TFEventsReader("logs/PPO_1")       # ファイルまたはディレクトリ
+    reader.poll()
+    steps, values, wall_times = reader.scalars("rollout/ep_rew_mean")
+
+    python3 scripts/utils/tfevents_stream.py logs/PPO_1 --follow --interval 10
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# スクリプトとして実行した場合も utils パッケージを import できるようにする（重複して追加しない）
+_SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.append(_SCRIPTS_DIR)
+from utils.read_tfevents import masked_crc32c
+
+ScalarSeries = namedtuple("ScalarSeries", ["steps", "values", "wall_times"])
+
+_HEADER = struct.Struct("<QI")  # データ長 + その masked crc32c
+_DOUBLE = struct.Struct("<d")
+_FLOAT = struct.Struct("<f")
+_CRC = struct.Struct("<I")
+
+EVENT_FILE_PREFIX = "events.out.tfevents"
+
+
+def _crc32c_function():
+    """C 実装の crc32c があればそれを、無ければ read_tfevents.py の pure Python 実装を使う"""
+    try:
+        import google_crc32c
+        return google_crc32c.value
+    except ImportError:
+        pass
+    try:
+        import crc32c
+        return crc32c.crc32c
+    except ImportError:
+        return None
+
+
+def _masked(crc):
+    return (((crc >> 15) | (crc << 17)) + 0xa282ead8) & 0xffffffff
+
+
+_fast_crc32c = _crc32c_function()
+
+
+def _masked_crc(data):
+    if _fast_crc32c is None:
+        return masked_crc32c(data)
+    return _masked(_fast_crc32c(bytes(data)))
+
+
+def _varint(buf, i):
+    """buf[i] から始まる varint を (値, 次の位置) で返す"""
+    b = buf[i]
+    if b < 0x80:  # 1 バイトで収まる値（タグ長・メッセージ長の大半）は分岐 1 回で返す
+        return b, i + 1
+    value = b & 0x7F
+    shift = 7
+    while True:
+        i += 1
+        b = buf[i]
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, i + 1
+        shift += 7
+
+
+def _skip(buf, i, key):
+    """フィールド key の値を読み飛ばし、次の位置を返す"""
+    wire = key & 0x7
+    if wire == 0:
+        return _varint(buf, i)[1]
+    if wire == 1:
+        return i + 8
+    if wire == 2:
+        n, i = _varint(buf, i)
+        return i + n
+    if wire == 5:
+        return i + 4
+    raise ValueError(f"未対応の wire type です: {wire}")
+
+
+_PADDING = 160  # 1 バイト長のタグ (< 128) + 前後のフィールドを読み越しても配列の外に出ない長さ
+_BYTE_OFFSETS = np.arange(8, dtype=np.int64)
+_STEP_BYTES = 5  # step < 2^35 のレコードをまとめて解析する（それ以上は 1 件ずつ解析）
+_VARINT_SHIFTS = 7 * np.arange(_STEP_BYTES, dtype=np.int64)
+
+
+def _gather(arr, positions, width):
+    """各 positions から width バイトずつ取り出した (N, width) 配列"""
+    return arr[positions[:, None] + _BYTE_OFFSETS[:width]]
+
+
+def _parse_scalar_events(arr, starts, ends):
+    """
+    「1 イベントに 1 スカラー」のレコードを全件まとめて解析する
+
+    レイアウト: 09 <wall_time 8B> 10 <step varint> 2a <len> 0a <len> 0a <tag len> <tag> 15 <value 4B>
+    （各長さは 1 バイトの varint）。この形に一致したレコードのマスクと、
+    (タグ番号, steps, values, wall_times, タグ番号 -> タグのバイト列) を返す。
+    """
+    fast = (arr[starts] == 0x09) & (arr[starts + 9] == 0x10)
+    wall_times = np.ascontiguousarray(_gather(arr, starts + 1, 8)).view("<f8")[:, 0]
+
+    # step の varint: 最初に最上位ビットが 0 のバイトまでを 7 ビットずつ連結する
+    raw_step = _gather(arr, starts + 10, _STEP_BYTES)
+    continues = raw_step >= 0x80
+    fast &= ~continues.all(axis=1)
+    step_len = np.argmin(continues, axis=1) + 1
+    digits = np.where(_BYTE_OFFSETS[:_STEP_BYTES] < step_len[:, None], raw_step & 0x7F, 0).astype(np.int64)
+    steps = (digits << _VARINT_SHIFTS).sum(axis=1)
+
+    p = starts + 10 + step_len
+    summary_len, value_len, tag_len = arr[p + 1], arr[p + 3], arr[p + 5]
+    value_pos = p + 6 + tag_len
+    fast &= ((arr[p] == 0x2A) & (arr[p + 2] == 0x0A) & (arr[p + 4] == 0x0A) & (arr[value_pos] == 0x15)
+             & (tag_len < 0x80) & (value_len == tag_len.astype(np.int64) + 7)
+             & (summary_len == value_len.astype(np.int64) + 2) & (value_pos + 5 == ends))
+    values = np.ascontiguousarray(_gather(arr, value_pos + 1, 4)).view("<f4")[:, 0]
+
+    if not fast.any():
+        return fast, None
+    # タグは (長さ, バイト列) の行を np.unique でまとめ、タグ番号に置き換える
+    tag_len = tag_len[fast].astype(np.int64)
+    width = int(tag_len.max())
+    names = arr[(p[fast] + 6)[:, None] + np.arange(width)] * (np.arange(width) < tag_len[:, None])
+    keys = np.ascontiguousarray(np.column_stack([tag_len.astype(np.uint8), names.astype(np.uint8)]))
+    unique, tag_ids = np.unique(keys.view(np.dtype((np.void, width + 1)))[:, 0], return_inverse=True)
+    tag_bytes = [bytes(row)[1:1 + row_len] for row, row_len in
+                 ((u, np.frombuffer(u, dtype=np.uint8)[0]) for u in unique)]
+    return fast, (tag_ids.reshape(-1), steps[fast], values[fast], wall_times[fast], tag_bytes)
+
+
+class _SeriesBuffer:
+    """タグ 1 つ分のスカラーを容量倍増の NumPy 配列に追記する"""
+
+    def __init__(self):
+        self.size = 0
+        self._steps = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0, dtype=np.float32)
+        self._wall_times = np.empty(0, dtype=np.float64)
+
+    def extend(self, steps, values, wall_times):
+        n = self.size + len(steps)
+        if n > len(self._steps):
+            capacity = max(n, 2 * len(self._steps), 64)
+            for name in ("_steps", "_values", "_wall_times"):
+                old = getattr(self, name)
+                new = np.empty(capacity, dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+        self._steps[self.size:n] = steps
+        self._values[self.size:n] = values
+        self._wall_times[self.size:n] = wall_times
+        self.size = n
+
+    def series(self):
+        # 以降の追記は [size:] にしか書かないため、返したビューの中身は変わらない
+        return ScalarSeries(self._steps[:self.size], self._values[:self.size], self._wall_times[:self.size])
+
+
+class EventFileStream:
+    """1 つの event ファイルを、前回読み終えたバイト位置から読み進める"""
+
+    def __init__(self, path, check_crc=False):
+        self.path = path
+        self.check_crc = check_crc
+        self.offset = 0
+        self.records = 0
+        self._series = {}
+        self._tag_names = {}  # タグのバイト列 -> str（毎回 decode しない）
+
+    @classmethod
+    def resume(cls, path, offset, series, check_crc=False):
+        """
+        以前に offset まで読んだ時点のスカラー {タグ: ScalarSeries} から読み進める（キャッシュからの再開用）
+
+        event ファイルは追記のみなので、offset より前は読み直さない。records は再開後に読んだ数だけを数える。
+        """
+        stream = cls(path, check_crc=check_crc)
+        stream.offset = offset
+        for tag, (steps, values, wall_times) in series.items():
+            buffer = stream._series[tag] = _SeriesBuffer()
+            buffer.extend(steps, values, wall_times)
+        return stream
+
+    def _reset(self):
+        self.offset = 0
+        self.records = 0
+        self._series = {}
+
+    def poll(self):
+        """追記されたレコードを解析し、新しく読んだレコード数を返す"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        if size < self.offset:  # ファイルが作り直された
+            self._reset()
+        if size == self.offset:
+            return 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            buf = f.read(size - self.offset)
+
+        pos, data_starts, data_ends = self._frame_records(buf)
+        for tag, (steps, values, wall_times) in self._parse_events(buf, data_starts, data_ends).items():
+            series = self._series.get(tag)
+            if series is None:
+                series = self._series[tag] = _SeriesBuffer()
+            series.extend(steps, values, wall_times)
+        self.offset += pos
+        self.records += len(data_starts)
+        return len(data_starts)
+
+    def _frame_records(self, buf):
+        """buf 内の完全なレコードを探し、(読み終えた位置, データ開始位置のリスト, データ終了位置のリスト) を返す"""
+        pos = 0
+        end = len(buf)
+        data_starts = []
+        data_ends = []
+        view = memoryview(buf)
+        unpack_header = _HEADER.unpack_from
+        while pos + 12 <= end:
+            length, length_crc = unpack_header(buf, pos)
+            data_start = pos + 12
+            data_end = data_start + length
+            if data_end + 4 > end:
+                break  # 書き込み途中のレコードは次の poll() で読む
+            if self.check_crc:
+                if _masked_crc(view[pos:pos + 8]) != length_crc:
+                    raise ValueError(f"{self.path}: offset {self.offset + pos} のヘッダの CRC が一致しません")
+                if _masked_crc(view[data_start:data_end]) != _CRC.unpack_from(buf, data_end)[0]:
+                    raise ValueError(f"{self.path}: offset {self.offset + pos} のデータの CRC が一致しません")
+            data_starts.append(data_start)
+            data_ends.append(data_end)
+            pos = data_end + 4
+        return pos, data_starts, data_ends
+
+    def _parse_events(self, buf, data_starts, data_ends):
+        """
+        レコードを解析し、タグ -> (steps, values, wall_times) をレコード順で返す
+
+        SB3 (SummaryWriter.add_scalar) が書く「1 イベントに 1 スカラー」のレコードは NumPy でまとめて解析し、
+        それ以外の形のレコード（ファイル先頭の file_version など）だけを 1 件ずつ Python で解析する。
+        """
+        if not data_starts:
+            return {}
+        # 形の違うレコードを読むときに末尾を越えないよう、余白を付けてから配列にする
+        arr = np.frombuffer(buf + bytes(_PADDING), dtype=np.uint8)
+        starts = np.array(data_starts, dtype=np.int64)
+        ends = np.array(data_ends, dtype=np.int64)
+        fast, columns = _parse_scalar_events(arr, starts, ends)
+
+        parts = {}
+        if fast.any():
+            records = np.flatnonzero(fast)
+            tag_ids, steps, values, wall_times, tag_bytes = columns
+            for tag_id, raw in enumerate(tag_bytes):
+                tag = self._tag_names.get(raw)
+                if tag is None:
+                    tag = self._tag_names[raw] = raw.decode("utf-8")
+                sel = tag_ids == tag_id
+                parts.setdefault(tag, []).append((records[sel], steps[sel], values[sel], wall_times[sel]))
+
+        slow = {}
+        for record in np.flatnonzero(~fast):
+            self._parse_event(buf, data_starts[record], data_ends[record], record, slow)
+        for tag, lists in slow.items():
+            parts.setdefault(tag, []).append(tuple(np.array(column) for column in lists))
+
+        result = {}
+        for tag, chunks in parts.items():
+            if len(chunks) == 1:
+                _, steps, values, wall_times = chunks[0]
+            else:
+                records, steps, values, wall_times = (np.concatenate(c) for c in zip(*chunks))
+                order = np.argsort(records, kind="stable")
+                steps, values, wall_times = steps[order], values[order], wall_times[order]
+            result[tag] = (steps, values, wall_times)
+        return result
+
+    def _parse_event(self, buf, i, end, record, pending):
+        """
+        Event メッセージから summary の simple_value を取り出して pending に追加する
+
+        Event: 1 = wall_time (double), 2 = step (varint), 5 = summary
+        Summary: 1 = value (repeated) / Value: 1 = tag (string), 2 = simple_value (float)
+        """
+        wall_time = 0.0
+        step = 0
+        summary = None
+        while i < end:
+            key, i = _varint(buf, i)
+            if key == 0x09:
+                wall_time = _DOUBLE.unpack_from(buf, i)[0]
+                i += 8
+            elif key == 0x10:
+                step, i = _varint(buf, i)
+            elif key == 0x2A:
+                n, i = _varint(buf, i)
+                summary = (i, i + n)
+                i += n
+            else:
+                i = _skip(buf, i, key)
+        if summary is None:
+            return
+
+        i, end = summary
+        while i < end:
+            key, i = _varint(buf, i)
+            if key != 0x0A:
+                i = _skip(buf, i, key)
+                continue
+            n, i = _varint(buf, i)
+            value_end = i + n
+            tag = None
+            value = None
+            while i < value_end:
+                key, i = _varint(buf, i)
+                if key == 0x0A:
+                    n, i = _varint(buf, i)
+                    raw = buf[i:i + n]
+                    tag = self._tag_names.get(raw)
+                    if tag is None:
+                        tag = self._tag_names[raw] = raw.decode("utf-8")
+                    i += n
+                elif key == 0x15:
+                    value = _FLOAT.unpack_from(buf, i)[0]
+                    i += 4
+                else:
+                    i = _skip(buf, i, key)
+            if tag is not None and value is not None:
+                lists = pending.get(tag)
+                if lists is None:
+                    lists = pending[tag] = ([], [], [], [])
+                lists[0].append(record)
+                lists[1].append(step)
+                lists[2].append(value)
+                lists[3].append(wall_time)
+
+    def __contains__(self, tag):
+        return tag in self._series
+
+    def tags(self):
+        return sorted(self._series)
+
+    def scalars(self, tag):
+        return self._series[tag].series()
+
+
+class TFEventsReader:
+    """
+    event ファイル、またはそれを含むディレクトリ（再帰的に探す）を追記分だけ読み進める
+
+    ディレクトリの場合は poll() のたびに新しいファイルも探し、同じタグはファイル名順に連結して返す。
+    """
+
+    def __init__(self, path, check_crc=False):
+        self.path = path
+        self.check_crc = check_crc
+        self._streams = {}
+
+    def _find_files(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+        found = []
+        for root, _, files in os.walk(self.path):
+            found.extend(os.path.join(root, name) for name in files if name.startswith(EVENT_FILE_PREFIX))
+        return sorted(found)
+
+    def poll(self):
+        """全ファイルの追記分を読み、新しく読んだレコード数を返す"""
+        records = 0
+        for file_path in self._find_files():
+            stream = self._streams.get(file_path)
+            if stream is None:
+                stream = self._streams[file_path] = EventFileStream(file_path, check_crc=self.check_crc)
+            records += stream.poll()
+        return records
+
+    def follow(self, interval=5.0, stop=None):
+        """interval 秒ごとに poll() し、新しいレコードがあるたびにその数を yield する（stop() が真で終了）"""
+        while stop is None or not stop():
+            records = self.poll()
+            if records:
+                yield records
+            else:
+                time.sleep(interval)
+
+    @property
+    def files(self):
+        return sorted(self._streams)
+
+    def tags(self):
+        return sorted({tag for stream in self._streams.values() for tag in stream.tags()})
+
+    def scalars(self, tag):
+        parts = [self._streams[path].scalars(tag) for path in self.files if tag in self._streams[path]]
+        if not parts:
+            raise KeyError(tag)
+        if len(parts) == 1:
+            return parts[0]
+        return ScalarSeries(*(np.concatenate(columns) for columns in zip(*parts)))
+
+
+def _encode_varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_scalar_event(step, wall_time, values):
+    """{タグ: 値} を 1 つの Event メッセージにする（テスト・ベンチマークでの event ファイル生成用）"""
+    summary = b""
+    for tag, value in values.items():
+        raw = tag.encode("utf-8")
+        item = b"\x0a" + _encode_varint(len(raw)) + raw + b"\x15" + _FLOAT.pack(value)
+        summary += b"\x0a" + _encode_varint(len(item)) + item
+    return (b"\x09" + _DOUBLE.pack(wall_time) + b"\x10" + _encode_varint(step)
+            + b"\x2a" + _encode_varint(len(summary)) + summary)
+
+
+def encode_record(data):
+    """TFRecord の枠（長さ・CRC）を付けたバイト列"""
+    header = struct.pack("<Q", len(data))
+    return header + _CRC.pack(_masked_crc(header)) + data + _CRC.pack(_masked_crc(data))
+
+
+def print_summary(reader, tags=None):
+    for tag in tags or reader.tags():
+        steps, values, _ = reader.scalars(tag)
+        if len(values) == 0:
+            continue
+        print(f"\n【{tag}】")
+        print(f"  記録ステップ数: {len(values)}")
+        print(f"  初期値: {values[0]:.4f} (step={steps[0]})")
+        print(f"  最終値: {values[-1]:.4f} (step={steps[-1]})")
+        print(f"  最大値: {values.max():.4f}")
+        print(f"  最小値: {values.min():.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TFEvents を追記分だけ読み進めるリーダ')
+    parser.add_argument('path', type=str, help='event ファイル、またはログディレクトリ')
+    parser.add_argument('--tags', type=str, nargs='+', default=None, help='表示するタグ（省略時はすべて）')
+    parser.add_argument('--follow', action='store_true', help='追記を待ち続け、新しい値を表示する')
+    parser.add_argument('--interval', type=float, default=5.0, help='--follow で追記を確認する間隔 (秒)')
+    parser.add_argument('--check-crc', action='store_true', help='レコードの CRC-32C を検証する')
+    args = parser.parse_args()
+
+    reader = TFEventsReader(args.path, check_crc=args.check_crc)
+    start = time.perf_counter()
+    records = reader.poll()
+    print(f"{len(reader.files)} ファイル, {records} レコードを {time.perf_counter() - start:.2f} 秒で読み込みました")
+    print(f"取得できたメトリクス数: {len(reader.tags())}")
+    print_summary(reader, args.tags)
+    if not args.follow:
+        return
+
+    print(f"\n--- 追記を待っています ({args.interval} 秒ごと, Ctrl+C で終了) ---")
+    try:
+        for records in reader.follow(args.interval):
+            latest = []
+            for tag in args.tags or reader.tags():
+                if tag in reader.tags():
+                    steps, values, _ = reader.scalars(tag)
+                    latest.append(f"{tag}={values[-1]:.4f} (step={steps[-1]})")
+            print(f"+{records} レコード: " + ", ".join(latest))
+    except KeyboardInterrupt:
+        print("\n終了しました。")
+
+
+if __name__ == '__main__':
+    main()
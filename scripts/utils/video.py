@@ -0,0 +1,236 @@
+"""
+フレームを 1 枚ずつ GIF / MP4 に書き出すストリーミングライタ
+
+フレームをすべてメモリに溜めてから imageio.mimsave する代わりに、生成されたフレームを
+その場でエンコードしてファイルへ書き込みます（メモリ使用量はフレーム数に依存しません）。
+
+    encoder="stream" : 呼び出し元のスレッドでエンコードする
+    encoder="thread" : バックグラウンドスレッドでエンコードする（キューの長さで上限を決め、描画と並行して進む）
+    encoder="buffer" : 従来どおり全フレームを保持し、close() で imageio.mimsave する（比較用）
+
+    from utils.video import open_frame_writer
+    with open_frame_writer("gif/output.mp4", fps=25, encoder="thread") as writer:
+        for frame in frames:
+            writer.append(frame)
+"""
+import queue
+import threading
+
+import numpy as np
+
+ENCODERS = ("stream", "thread", "buffer")
+
+
+class FrameWriter:
+    """ライタ共通の基底クラス（append(frame) / close() を実装し、with 文で使える）"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class GifFrameEncoder:
+    """
+    フレームを GIF のバイト列に 1 枚ずつ変換する
+
+    各フレームは適応パレット（フレームごとのローカルカラーテーブル）で 256 色に減色する。
+    Pillow の save_all と同様に、2 枚目以降は前のフレームから変化した矩形だけを書き込み、
+    矩形内で変化していない画素は透過色にする（保持するのは直前の 1 フレームのみ）。
+    prev を渡すと、そのフレームの続きとして差分から書き始める（ヘッダは出力しない）。
+    """
+
+    _TRANSPARENT = 255  # 減色は 255 色までにして、最後の番号を透過色に使う
+    TRAILER = b';'
+
+    def __init__(self, fps=25, loop=0, prev=None):
+        self._duration = int(round(1000 / fps))
+        self._loop = loop
+        self._prev = None if prev is None else np.array(prev)
+
+    def _changed_region(self, frame):
+        """直前のフレームから変化した矩形 (x0, y0, x1, y1) を返す"""
+        changed = np.any(frame != self._prev, axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if len(rows) == 0:
+            return 0, 0, 1, 1  # 変化なし: 1 画素だけ書いて表示時間を進める
+        cols = np.flatnonzero(changed[rows[0]:rows[-1] + 1].any(axis=0))
+        return cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+    def encode(self, frame):
+        from PIL import GifImagePlugin, Image
+
+        frame = np.ascontiguousarray(frame)
+        if self._prev is None:
+            image = Image.fromarray(frame).convert('P', palette=Image.Palette.ADAPTIVE)
+            header, _ = GifImagePlugin.getheader(image, info={'loop': self._loop, 'duration': self._duration})
+            data = GifImagePlugin.getdata(image, duration=self._duration, include_color_table=True, disposal=1)
+            self._prev = frame.copy()
+            return b''.join(header + data)
+
+        x0, y0, x1, y1 = self._changed_region(frame)
+        region = frame[y0:y1, x0:x1]
+        image = Image.fromarray(region).quantize(colors=self._TRANSPARENT)
+        indices = np.asarray(image)
+        unchanged = np.all(region == self._prev[y0:y1, x0:x1], axis=2)
+        if unchanged.any():
+            indices = indices.copy()
+            indices[unchanged] = self._TRANSPARENT
+            # 透過色の番号がカラーテーブルに収まるよう、パレットを 256 色分に広げる
+            palette = image.getpalette()
+            image = Image.fromarray(indices)  # putpalette で 'L' から 'P' になる
+            image.putpalette(palette + [0] * (768 - len(palette)))
+        data = GifImagePlugin.getdata(image, offset=(int(x0), int(y0)), duration=self._duration,
+                                      include_color_table=True, disposal=1, transparency=self._TRANSPARENT)
+        np.copyto(self._prev, frame)
+        return b''.join(data)
+
+
+class GifStreamWriter(FrameWriter):
+    """GifFrameEncoder でフレームを 1 枚ずつ GIF ファイルに追記する"""
+
+    def __init__(self, path, fps=25, loop=0):
+        self.path = path
+        self._encoder = GifFrameEncoder(fps=fps, loop=loop)
+        self._file = None  # 最初のフレームで開く（フレームが無ければファイルを作らない）
+        self.frames = 0
+
+    def append(self, frame):
+        self.append_encoded(self._encoder.encode(frame), 1)
+
+    def append_encoded(self, data, frames):
+        """
+        別の GifFrameEncoder（別プロセスなど）でエンコード済みのバイト列を追記する
+
+        data は先頭から続くフレーム列（最初のデータのみヘッダを含む）でなければならない。
+        """
+        if self._file is None:
+            self._file = open(self.path, 'wb')
+        self._file.write(data)
+        self.frames += frames
+
+    def close(self):
+        if self._file is None or self._file.closed:
+            return
+        self._file.write(GifFrameEncoder.TRAILER)
+        self._file.close()
+
+
+class Mp4StreamWriter(FrameWriter):
+    """imageio-ffmpeg のパイプにフレームを 1 枚ずつ送る"""
+
+    def __init__(self, path, fps=25, quality=8):
+        self.path = path
+        self._fps = fps
+        self._quality = quality
+        self._writer = None  # 最初のフレームで ffmpeg を起動する
+        self.frames = 0
+
+    def append(self, frame):
+        if self._writer is None:
+            import imageio
+            self._writer = imageio.get_writer(self.path, fps=self._fps, quality=self._quality, macro_block_size=16)
+        self._writer.append_data(np.asarray(frame))
+        self.frames += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class BufferedWriter(FrameWriter):
+    """全フレームを保持して最後にまとめて保存する（変更前の enjoy_wide.py と同じ動作）"""
+
+    def __init__(self, path, fps=25):
+        self.path = path
+        self._fps = fps
+        self._frames = []
+        self.frames = 0
+
+    def append(self, frame):
+        self._frames.append(np.array(frame))
+        self.frames += 1
+
+    def close(self):
+        import imageio
+        if not self._frames:
+            return
+        if self.path.lower().endswith('.mp4'):
+            imageio.mimsave(self.path, self._frames, fps=self._fps, quality=8, macro_block_size=16)
+        else:
+            imageio.mimsave(self.path, self._frames, duration=int(round(1000 / self._fps)))
+        self._frames = []
+
+
+class ThreadedWriter(FrameWriter):
+    """
+    別のライタをバックグラウンドスレッドで動かす
+
+    append() はフレームをコピーしてキューに入れるだけで戻る。キューが一杯のときは空くまで待つため、
+    メモリ上に残るフレームは最大 queue_size 枚。エンコード中の例外は次の append() / close() で送出する。
+    """
+
+    _STOP = object()
+
+    def __init__(self, writer, queue_size=16):
+        self.path = writer.path
+        self._writer = writer
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def frames(self):
+        return self._writer.frames
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is self._STOP:
+                return
+            if self._error is None:
+                try:
+                    self._writer.append(frame)
+                except Exception as e:  # 呼び出し元のスレッドで送出する
+                    self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"フレームのエンコードに失敗しました: {self._error}") from self._error
+
+    def append(self, frame):
+        self._raise_error()
+        # 呼び出し元が同じバッファを再利用しても壊れないようにコピーしてから渡す
+        self._queue.put(np.array(frame))
+
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._writer.close()
+        self._raise_error()
+
+
+def open_frame_writer(path, fps=25, encoder="stream", queue_size=16):
+    """
+    path の拡張子 (.gif / .mp4) に応じたライタを返す
+
+    frame は (H, W, 3) の uint8 配列。
+    """
+    if encoder not in ENCODERS:
+        raise ValueError(f"未対応の encoder です: {encoder} (選択肢: {ENCODERS})")
+    if encoder == "buffer":
+        writer = BufferedWriter(path, fps)
+    elif path.lower().endswith('.mp4'):
+        writer = Mp4StreamWriter(path, fps)
+    else:
+        writer = GifStreamWriter(path, fps)
+    if encoder == "thread":
+        writer = ThreadedWriter(writer, queue_size)
+    return writer
+
@@ -3,7 +3,6 @@ import sys
 import subprocess
 import time
 import numpy as np
-from stable_baselines3 import PPO
 
 # 基準ディレクトリの設定
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,7 +14,9 @@ from PIL import Image
 
 # config をインポート
 sys.path.append(os.path.join(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from src.map_index import MapIndex
 
 # ---- マップ読み込み ----
 map_yaml = config.MAP_PATH + ".yaml"
@@ -30,6 +32,9 @@ img = Image.open(img_path)
 map_img = np.array(img)
 height, width = map_img.shape
 
+# 壁までの距離（距離場）。初回のみ計算してマップの隣にキャッシュされる
+map_index = MapIndex.load(config.MAP_PATH)
+
 
 def world_to_pixel(x, y):
     """ワールド座標 → ピクセル座標"""
@@ -51,14 +56,31 @@ all_poses = config.START_POSES if config.START_POSE_RANDOMIZE else [config.START
 colors = plt.cm.hsv(np.linspace(0, 0.9, len(all_poses)))
 arrow_len = 8   # ピクセル単位の矢印長さ
 
+# START_POSE_SAMPLING を使う場合にサンプリングされうる位置の例（小さな矢印）
+if config.START_POSE_SAMPLING:
+    samples = map_index.sample_poses(300, config.START_MIN_CLEARANCE, np.random.RandomState(0),
+                                     yaw_noise=config.START_YAW_NOISE)
+    spx, spy = world_to_pixel(samples[:, 0], samples[:, 1])
+    ax.quiver(spx, spy, np.cos(samples[:, 2]), -np.sin(samples[:, 2]), color='#00ff88', alpha=0.6,
+              scale=40, width=0.002, zorder=4)
+    print(f"サンプリング対象のセル: {map_index.num_valid_cells(config.START_MIN_CLEARANCE)} "
+          f"(壁まで {config.START_MIN_CLEARANCE} m 以上)")
+
 legend_patches = []
 for i, pose in enumerate(all_poses):
     x, y, yaw = pose
     px, py = world_to_pixel(x, y)
     c = colors[i]
 
+    # 壁までの距離が足りない位置は × で示す
+    clearance = map_index.clearance_at(x, y)
+    valid = clearance >= config.START_MIN_CLEARANCE
+    if not valid:
+        print(f"警告: #{i} ({x}, {y}) は壁まで {clearance:.2f} m しかありません "
+              f"(START_MIN_CLEARANCE = {config.START_MIN_CLEARANCE} m)")
+
     # 点
-    ax.plot(px, py, 'o', color=c, markersize=10, markeredgecolor='white', zorder=5)
+    ax.plot(px, py, 'o' if valid else 'X', color=c, markersize=10, markeredgecolor='white', zorder=5)
 
     # 向きの矢印
     dx =  arrow_len * np.cos(yaw)
@@ -69,7 +91,7 @@ for i, pose in enumerate(all_poses):
 
     # ラベル（座標 & yaw）
     ax.text(px + 3, py - 12,
-            f"#{i}  ({x:.1f},{y:.1f})  yaw={yaw:.2f}",
+            f"#{i}  ({x:.1f},{y:.1f})  yaw={yaw:.2f}  d={clearance:.2f}m",
             color=c, fontsize=9, fontfamily='monospace')
 
     legend_patches.append(
@@ -8,7 +8,9 @@ from PIL import Image
 # 共通モジュールから config を読み込む
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from src.map_index import MapIndex
 
 def view_spawn():
     map_yaml_path = config.MAP_PATH + ".yaml"
@@ -73,13 +75,18 @@ def view_spawn():
     
     # Check bounds
     if 0 <= px < width and 0 <= py < height:
-        pixel_value = img_arr[int(py), int(px)]
-        # Assuming PGM: 255=white(free), 0=black(occupied), 205=unknown
-        status = "UNKNOWN/OBSTACLE"
-        if pixel_value > 250: status = "FREE SPACE (SAFE)"
-        elif pixel_value < 10: status = "OBSTACLE (COLLISION)"
+        # 1 ピクセルの値ではなく、壁・未知領域までの距離（距離場）で判定する
+        map_index = MapIndex.load(map_yaml_path[:-len(".yaml")])
+        clearance = map_index.clearance_at(start_x, start_y)
+        status = "OBSTACLE/UNKNOWN (COLLISION)"
+        if clearance >= config.START_MIN_CLEARANCE: status = "FREE SPACE (SAFE)"
+        elif clearance > 0: status = "TOO CLOSE TO WALL"
         
-        print(f"Location Status: {status} (Pixel Value: {pixel_value})")
+        print(f"Location Status: {status} (Clearance: {clearance:.2f} m, required: {config.START_MIN_CLEARANCE} m)")
+        
+        # Draw clearance circle
+        ax.add_patch(plt.Circle((px, py), config.START_MIN_CLEARANCE / resolution, fill=False,
+                                color='g' if clearance >= config.START_MIN_CLEARANCE else 'r'))
         
         # Draw Point
         ax.plot(px, py, 'ro', markersize=10, label='Start')
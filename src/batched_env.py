@@ -0,0 +1,295 @@
+"""
+1 つの f110 シミュレータで K 台の車両を同時に走らせるバッチ環境
+
+F1TenthRL を K 個並べる代わりに、f110 シミュレータの複数エージェント機能を使って
+K 台を 1 回の sim.step で進めます。LiDAR の前処理（ダウンサンプリング・残差・正規化）は
+(K, 1080) の配列に対してまとめて行うため、車両ごとの Python オーバーヘッドがありません。
+
+各車両は独立したエピソードとして扱い、他の車両は LiDAR に映らず、車両同士の衝突も判定しません。
+衝突した車両だけを個別にリセットします（Stable Baselines3 の VecEnv と同じ自動リセット規約）。
+
+    from src.batched_env import BatchedF1TenthRL
+    env = BatchedF1TenthRL(config.MAP_PATH, num_cars=16, seed=0)
+    model = PPO("MlpPolicy", env)
+"""
+import gym
+import numpy as np
+from dataclasses import replace
+from time import perf_counter_ns
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from src.env_config import EnvConfig, load_env_config
+from src.rewards import RewardConfig, calculate_reward_batch, load_reward_config, uses_track
+from src.lidar_kernel import downsample_into, normalization_params, process_lidar
+from src.map_index import MapIndex
+from src.profiling import StageProfiler
+from src.track import ProgressTracker, Track
+
+
+def _isolate_agents(sim):
+    """
+    シミュレータ上の車両同士の相互作用を無効化する
+
+    f110 シミュレータは他車を LiDAR に映り込ませ、車両間の接触を衝突として扱う。
+    独立した K 個のエピソードとして使うため、他車位置を常に空にし、
+    車両間衝突の判定を壁との衝突判定だけに置き換える。
+    """
+    no_opponents = np.empty((0, 3))
+
+    def check_collision():
+        sim.collisions = np.zeros((sim.num_agents, ))
+        sim.collision_idx = -1 * np.ones((sim.num_agents, ))
+
+    sim.check_collision = check_collision
+    for agent in sim.agents:
+        agent.opp_poses = no_opponents
+        agent.update_opp_poses = lambda opp_poses, agent=agent: setattr(agent, 'opp_poses', no_opponents)
+
+
+class BatchedF1TenthRL(VecEnv):
+    """
+    K 台の車両を 1 つのシミュレータで動かす VecEnv
+
+    観測・アクション空間は F1TenthRL と同一のため、
+    F1TenthRL で学習したモデルをそのまま使用できます（逆も同様）。
+    """
+
+    def __init__(self, map_path: str, num_cars: int, seed: int = None, reward_config: RewardConfig = None,
+                 profiler: StageProfiler = None, env_config: EnvConfig = None):
+        """
+        Args:
+            map_path: マップファイルのパス（拡張子なし）
+            num_cars: 同時に走らせる車両数 K
+            seed: スタート位置選択用の乱数シード
+            reward_config: 報酬パラメータ。None の場合は env_config.reward を使う（max_speed は env_config.max_speed になる）。
+            profiler: src.profiling.StageProfiler。指定すると reset / step_wait の各段階の実行時間を
+                      K 台分まとめて記録する（F1TenthRL と同じステージ名）。
+            env_config: 観測・行動・スタート位置・報酬の設定（K 台で共通）。None の場合は config.py から作る。
+        """
+        # f110_gym の import（f110-v0 の登録）は重いため、環境を生成するときまで遅らせる
+        import f110_gym  # noqa: F401
+        self.env = gym.make('f110-v0', map=map_path, map_ext='.pgm', num_agents=num_cars)
+        self.sim = self.env.sim
+        _isolate_agents(self.sim)
+
+        env_config = env_config if env_config is not None else load_env_config()
+        if reward_config is not None:
+            env_config = replace(env_config, reward=reward_config)
+        self.env_config = env_config
+
+        self.lidar_size = env_config.lidar_size
+        self.state_size = 2 if env_config.include_vehicle_state else 0
+        self.residual_size = self.lidar_size if env_config.include_lidar_residual else 0
+        total_obs_size = self.lidar_size + self.residual_size + self.state_size
+
+        self.prev_lidar = np.zeros((num_cars, self.lidar_size))
+        self._cur_lidar = np.zeros((num_cars, self.lidar_size))
+        self._lidar_tmp = np.empty((num_cars, self.lidar_size))
+        self._lidar_params = normalization_params(
+            env_config.normalize_observations, env_config.lidar_mean, env_config.lidar_std,
+            env_config.lidar_residual_mean, env_config.lidar_residual_std)
+        self._state_mean = np.asarray(env_config.vehicle_state_mean, dtype=np.float64)
+        self._state_std = np.asarray(env_config.vehicle_state_std, dtype=np.float64)
+        self.prev_xy = np.zeros((num_cars, 2))
+        self._actions = np.zeros((num_cars, 2), dtype=np.float32)
+        self.reward_config = env_config.reward
+        self.map_index = MapIndex.load(map_path) if env_config.start_pose_sampling else None
+        self.map_path = map_path
+        self.progress = None
+        self.profiler = profiler
+
+        action_space = spaces.Box(low=-1.0, high=1.0, shape=(2,), dtype=np.float32)
+        observation_space = spaces.Box(low=-30, high=30, shape=(total_obs_size,), dtype=np.float32)
+        super().__init__(num_cars, observation_space, action_space)
+        self.seed(seed)
+        self._init_track()
+
+    def seed(self, seed=None):
+        self._pose_rng = np.random.RandomState(seed) if seed is not None else np.random
+        if seed is not None:
+            # LiDAR のノイズの乱数も車両 i ごとに seed + i から作り直す（F1TenthRL.seed と同じ）
+            for i, agent in enumerate(self.env.sim.agents):
+                agent.scan_rng = np.random.default_rng(seed + i)
+        return [seed + i if seed is not None else None for i in range(self.num_envs)]
+
+    def reload_reward_config(self, reward_config: RewardConfig = None):
+        """報酬パラメータを差し替える（F1TenthRL.reload_reward_config と同じ）"""
+        reward_config = reward_config if reward_config is not None else load_reward_config(reload_module=True)
+        self.env_config = replace(self.env_config, reward=reward_config)
+        self.reward_config = self.env_config.reward
+        self._init_track()
+        return self.reward_config
+
+    def enable_profiling(self):
+        """F1TenthRL.enable_profiling と同じ"""
+        if self.profiler is None:
+            self.profiler = StageProfiler()
+
+    def profile_snapshot(self):
+        """F1TenthRL.profile_snapshot と同じ（env_method では 2 台目以降は空の結果を返す）"""
+        return self.profiler.snapshot() if self.profiler is not None else None
+
+    def _init_track(self):
+        """報酬設定が中心線を使う場合は全車両の進みの追跡を始める（F1TenthRL._init_track と同じ）"""
+        if self.progress is None and uses_track(self.reward_config):
+            self.progress = ProgressTracker(Track.load(self.map_path, start_pose=self.env_config.start_pose), self.num_envs)
+
+    def _sample_poses(self, n):
+        """スタート位置を n 個選ぶ (n, 3)"""
+        cfg = self.env_config
+        if self.map_index is not None:
+            return self.map_index.sample_poses(n, cfg.start_min_clearance, self._pose_rng,
+                                               yaw_noise=cfg.start_yaw_noise)
+        if cfg.start_pose_randomize and len(cfg.start_poses) > 0:
+            idx = self._pose_rng.randint(len(cfg.start_poses), size=n)
+            return np.asarray(cfg.start_poses, dtype=np.float64)[idx]
+        return np.tile(np.asarray(cfg.start_pose, dtype=np.float64), (n, 1))
+
+    def _downsample(self, scans):
+        """(n, 1080) -> (n, lidar_size)"""
+        return downsample_into(scans, np.empty((len(scans), self.lidar_size)),
+                               self.env_config.lidar_downsample_factor)
+
+    def _get_obs(self, scans, cars=None):
+        """
+        車両の観測をまとめて計算する
+
+        Args:
+            scans: 生の LiDAR (len(cars), 1080)
+            cars: 車両インデックスの配列。None の場合は全車両（バッファを入れ替えるだけでコピーしない）
+        """
+        cfg = self.env_config
+        n = self.num_envs if cars is None else len(cars)
+        obs = np.empty((n, self.observation_space.shape[0]), dtype=np.float32)
+        lidar_end = self.lidar_size
+        residual_end = lidar_end + self.residual_size
+
+        if cars is None:
+            prev, cur, tmp = self.prev_lidar, self._cur_lidar, self._lidar_tmp
+        else:
+            prev, cur, tmp = self.prev_lidar[cars], np.empty((n, self.lidar_size)), None
+        process_lidar(scans, prev, cur, obs[:, :lidar_end], obs[:, lidar_end:residual_end],
+                      cfg.lidar_downsample_factor, self._lidar_params, tmp)
+        if cars is None:
+            self.prev_lidar, self._cur_lidar = cur, prev
+        else:
+            self.prev_lidar[cars] = cur
+
+        if cfg.include_vehicle_state:
+            agents = self.sim.agents if cars is None else [self.sim.agents[i] for i in cars]
+            states = np.array([agent.state for agent in agents])
+            state_arr = np.empty((n, 2), dtype=np.float32)
+            state_arr[:, 0] = states[:, 3] / cfg.max_speed
+            state_arr[:, 1] = states[:, 2]
+            if cfg.normalize_observations:
+                obs[:, residual_end:] = (state_arr - self._state_mean) / self._state_std
+            else:
+                obs[:, residual_end:] = state_arr
+        return obs
+
+    def _reset_cars(self, cars):
+        """
+        指定した車両だけを新しいスタート位置に戻し、初期 LiDAR を返す
+
+        シミュレータ全体の reset は全車両を巻き戻してしまうため、
+        車両単位で状態を初期化し、その位置のスキャンを直接取得する。
+        """
+        poses = self._sample_poses(len(cars))
+        scans = np.empty((len(cars), 1080))
+        for j, (car, pose) in enumerate(zip(cars, poses)):
+            agent = self.sim.agents[car]
+            agent.reset(pose)
+            self.sim.agent_poses[car, :] = pose
+            self.sim.collisions[car] = 0.
+            scans[j] = agent.scan_simulator.scan(pose, agent.scan_rng)
+        self.prev_xy[cars] = poses[:, :2]
+        self.prev_lidar[cars] = self._downsample(scans)
+        if self.progress is not None:
+            self.progress.reset(poses[:, 0], poses[:, 1], cars)
+        return scans
+
+    def reset(self):
+        profiler = self.profiler
+        if profiler is not None:
+            t0 = perf_counter_ns()
+        poses = self._sample_poses(self.num_envs)
+        result = self.env.reset(poses=poses)
+        raw_obs = result[0] if isinstance(result, tuple) else result
+
+        scans = np.asarray(raw_obs['scans'], dtype=np.float64)
+        downsample_into(scans, self.prev_lidar, self.env_config.lidar_downsample_factor)
+        self.prev_xy[:] = poses[:, :2]
+        if self.progress is not None:
+            self.progress.reset(poses[:, 0], poses[:, 1])
+        obs = self._get_obs(scans)
+        if profiler is not None:
+            profiler.record("env.reset", perf_counter_ns() - t0)
+        return obs
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 2)
+
+    def step_wait(self):
+        profiler = self.profiler
+        if profiler is not None:
+            t0 = perf_counter_ns()
+        actions = self._actions
+        cfg = self.env_config
+        steer = actions[:, 0] * cfg.steer_sensitivity
+        speed = cfg.min_speed + (actions[:, 1] + 1.0) * (cfg.max_speed - cfg.min_speed) / 2.0
+
+        raw_obs, _, _, _ = self.env.step(np.stack([steer, speed], axis=1))
+        scans = np.asarray(raw_obs['scans'], dtype=np.float64)
+        dones = np.asarray(raw_obs['collisions'], dtype=bool)
+        cur_xy = np.stack([raw_obs['poses_x'], raw_obs['poses_y']], axis=1)
+        if profiler is not None:
+            t1 = perf_counter_ns()
+            profiler.record("env.step/sim", t1 - t0)
+
+        track_progress = lateral_ratio = None
+        if self.progress is not None:
+            track_progress = self.progress.update(cur_xy[:, 0], cur_xy[:, 1])
+            lateral_ratio = self.progress.lateral_ratio()
+        rewards = calculate_reward_batch(scans, actions, dones, speed, self.prev_xy, cur_xy,
+                                         self.reward_config, track_progress, lateral_ratio).astype(np.float32)
+        self.prev_xy[:] = cur_xy
+        if profiler is not None:
+            t2 = perf_counter_ns()
+            profiler.record("env.step/reward", t2 - t1)
+
+        obs = self._get_obs(scans)
+        infos = [{} for _ in range(self.num_envs)]
+        if profiler is not None:
+            t3 = perf_counter_ns()
+            profiler.record("env.step/obs", t3 - t2)
+
+        done_cars = np.flatnonzero(dones)
+        if len(done_cars) > 0:
+            for car in done_cars:
+                infos[car]['terminal_observation'] = obs[car].copy()
+            reset_scans = self._reset_cars(done_cars)
+            # リセット直後は前ステップ = 現在値のため残差は 0 になる
+            obs[done_cars] = self._get_obs(reset_scans, done_cars)
+            if profiler is not None:
+                profiler.record("env.step/reset_cars", perf_counter_ns() - t3)
+
+        if profiler is not None:
+            profiler.record("env.step", perf_counter_ns() - t0)
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.env.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,130 @@
+"""
+環境の設定（観測・行動・スタート位置・報酬）
+
+F1TenthRL / BatchedF1TenthRL は scripts/config.py のモジュール変数を直接読まず、生成時に受け取った
+EnvConfig だけを使います。config.py は既定値を与えるだけなので、設定の異なる環境
+（ダウンサンプリング率・速度制限・スタート位置など）を 1 つのプロセスや 1 つの VecEnv に並べられます。
+
+    from dataclasses import replace
+    from src.env_config import load_env_config
+    base = load_env_config()                           # config.py の値
+    fast = replace(base, max_speed=3.5)                # 報酬の速度の正規化 (reward.max_speed) も 3.5 になる
+    env = F1TenthRL(config.MAP_PATH, env_config=fast)
+
+EnvConfig は変更できない（frozen）ため、値を変えるときは dataclasses.replace で新しく作ります。
+
+マップは EnvConfig に含めず、環境の map_path で指定します。f110 の LiDAR のスキャナ（RaceCar.scan_simulator）は
+クラス変数でプロセス内の全車両が共有するため、1 つのプロセスで同時に使えるマップは 1 つだけです
+（後から作った環境のマップで上書きされます）。
+"""
+from dataclasses import dataclass, field, replace
+from typing import Tuple
+
+from src.rewards import RewardConfig, _import_config, load_reward_config
+
+LIDAR_BEAMS = 1080
+
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """F1TenthRL の設定。既定値は config.py の初期値と同じ"""
+    # 観測
+    lidar_downsample_factor: int = 2
+    include_vehicle_state: bool = True
+    include_lidar_residual: bool = True
+    normalize_observations: bool = True
+    lidar_mean: float = 4.555
+    lidar_std: float = 3.894
+    lidar_residual_mean: float = -0.012
+    lidar_residual_std: float = 0.096
+    vehicle_state_mean: Tuple[float, float] = (0.528, 0.003)  # [vel, steer]
+    vehicle_state_std: Tuple[float, float] = (0.107, 0.115)
+    # 行動（[-1, 1] の行動からステアリング・速度への変換）
+    steer_sensitivity: float = 1.0
+    min_speed: float = 1.0
+    max_speed: float = 2.5
+    # スタート位置 [x, y, yaw]
+    start_pose: Tuple[float, float, float] = (3.0, 4.0, 0.0)
+    start_pose_randomize: bool = True
+    start_poses: Tuple[Tuple[float, float, float], ...] = ()
+    start_pose_sampling: bool = False
+    start_min_clearance: float = 0.3
+    start_yaw_noise: float = 0.2
+    # 報酬（reward.max_speed は上の max_speed に合わせて置き換える）
+    reward: RewardConfig = field(default_factory=RewardConfig)
+
+    def __post_init__(self):
+        # 速度制限は行動の変換と報酬の速度の正規化で同じ値を使うため、max_speed だけを正とする
+        if self.reward.max_speed != self.max_speed:
+            object.__setattr__(self, "reward", replace(self.reward, max_speed=self.max_speed))
+
+    @property
+    def lidar_size(self):
+        """ダウンサンプリング後の LiDAR の次元"""
+        return LIDAR_BEAMS // self.lidar_downsample_factor
+
+    @property
+    def obs_size(self):
+        """観測ベクトルの次元 [LiDAR | 残差 | 車両状態]"""
+        return (self.lidar_size * (2 if self.include_lidar_residual else 1)
+                + (2 if self.include_vehicle_state else 0))
+
+    def preprocess(self):
+        """観測の前処理に使う値を JSON に保存できる形で返す（export_policy.py / ObservationPreprocessor 用）"""
+        return {
+            "lidar_downsample_factor": int(self.lidar_downsample_factor),
+            "include_lidar_residual": bool(self.include_lidar_residual),
+            "include_vehicle_state": bool(self.include_vehicle_state),
+            "normalize_observations": bool(self.normalize_observations),
+            "lidar_mean": float(self.lidar_mean),
+            "lidar_std": float(self.lidar_std),
+            "lidar_residual_mean": float(self.lidar_residual_mean),
+            "lidar_residual_std": float(self.lidar_residual_std),
+            "vehicle_state_mean": [float(v) for v in self.vehicle_state_mean],
+            "vehicle_state_std": [float(v) for v in self.vehicle_state_std],
+            "max_speed": float(self.max_speed),
+            "min_speed": float(self.min_speed),
+            "steer_sensitivity": float(self.steer_sensitivity),
+        }
+
+
+def _floats(values):
+    return tuple(float(v) for v in values)
+
+
+def load_env_config(reload_module: bool = False, **overrides) -> EnvConfig:
+    """
+    scripts/config.py の値から EnvConfig を作る
+
+    Args:
+        reload_module: True の場合は config.py をディスクから再読み込みする
+        overrides: 上書きするフィールド（例: normalize_observations=False）
+
+    Returns:
+        EnvConfig: 新しく作成した設定
+    """
+    config = _import_config(reload_module)
+    env_config = EnvConfig(
+        lidar_downsample_factor=int(config.LIDAR_DOWNSAMPLE_FACTOR),
+        include_vehicle_state=bool(config.INCLUDE_VEHICLE_STATE),
+        include_lidar_residual=bool(config.INCLUDE_LIDAR_RESIDUAL),
+        normalize_observations=bool(config.NORMALIZE_OBSERVATIONS),
+        lidar_mean=float(config.LIDAR_MEAN),
+        lidar_std=float(config.LIDAR_STD),
+        lidar_residual_mean=float(config.LIDAR_RESIDUAL_MEAN),
+        lidar_residual_std=float(config.LIDAR_RESIDUAL_STD),
+        vehicle_state_mean=_floats(config.VEHICLE_STATE_MEAN),
+        vehicle_state_std=_floats(config.VEHICLE_STATE_STD),
+        steer_sensitivity=float(config.STEER_SENSITIVITY),
+        min_speed=float(config.MIN_SPEED),
+        max_speed=float(config.MAX_SPEED),
+        start_pose=_floats(config.START_POSE),
+        start_pose_randomize=bool(config.START_POSE_RANDOMIZE),
+        start_poses=tuple(_floats(pose) for pose in config.START_POSES),
+        start_pose_sampling=bool(config.START_POSE_SAMPLING),
+        start_min_clearance=float(config.START_MIN_CLEARANCE),
+        start_yaw_noise=float(config.START_YAW_NOISE),
+        # reload_module の場合は上で読み直した config.py をそのまま使う
+        reward=load_reward_config(),
+    )
+    return replace(env_config, **overrides) if overrides else env_config
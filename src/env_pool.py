@@ -0,0 +1,224 @@
+"""
+非同期の環境プール（envpool の send / recv 方式）
+
+SubprocVecEnv などの同期的な VecEnv は、N 個すべての環境が step を終えるまで待つため、
+1 つの環境の reset（シミュレータの再初期化）や遅い step が他の環境をすべて止めてしまいます。
+AsyncEnvPool では、N 個の環境のうち先に終わった M 個（batch_size）の結果だけを recv() で受け取り、
+その M 個への行動を send() で送ります。残りの環境は受け取りを待たずに step を続けます。
+
+    from src.env_pool import AsyncEnvPool
+    from src.vec_env import make_env
+    pool = AsyncEnvPool([make_env(config.MAP_PATH, rank, seed=0) for rank in range(16)], batch_size=8)
+    pool.async_reset()
+    while True:
+        obs, rewards, dones, infos, env_ids = pool.recv()
+        pool.send(policy(obs), env_ids)
+
+- recv() の結果は env_ids の順に並ぶ。ロールアウトは env_ids ごとに分けて保存すれば、
+  環境ごとの軌跡（GAE の計算など）が混ざらない。
+- エピソードが終わった環境はワーカー内で自動的に reset する。dones[i] が True のとき、obs[i] は
+  reset 後の観測で、infos[i]['terminal_observation'] が終了時の観測（SB3 の VecEnv と同じ）。
+- stats() でワーカーの稼働率（step / reset に使った時間の割合）と steps/sec を確認できる。
+  batch_size = N にすると同期的な VecEnv と同じ動き（全環境がそろうまで待つ）になる。
+
+F1TenthRL（gym 0.23 の API）も gymnasium の API の環境も動かせます。
+"""
+import multiprocessing as mp
+import time
+from multiprocessing.connection import wait
+
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+
+def _reset(env):
+    result = env.reset()
+    return result[0] if isinstance(result, tuple) else result
+
+
+def _worker(remote, parent_remote, env_fn_wrapper):
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    remote.send((env.observation_space, env.action_space))
+    try:
+        while True:
+            cmd, data = remote.recv()
+            start = time.perf_counter_ns()
+            if cmd == "step":
+                result = env.step(data)
+                if len(result) == 5:
+                    obs, reward, terminated, truncated, info = result
+                    done = terminated or truncated
+                else:
+                    obs, reward, done, info = result
+                if done:
+                    info["terminal_observation"] = obs
+                    obs = _reset(env)
+                remote.send((obs, reward, done, info, time.perf_counter_ns() - start))
+            elif cmd == "reset":
+                obs = _reset(env)
+                remote.send((obs, 0.0, False, {}, time.perf_counter_ns() - start))
+            elif cmd == "env_method":
+                remote.send(getattr(env, data[0])(*data[1], **data[2]))
+            elif cmd == "close":
+                env.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"未対応のコマンドです: {cmd}")
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class AsyncEnvPool:
+    """
+    1 環境 1 プロセスで動かし、先に終わった batch_size 個の環境の結果から受け取る環境プール
+
+    SubprocVecEnv と同じく env_fns（環境を返す関数のリスト）から作る。
+    """
+
+    def __init__(self, env_fns, batch_size: int = None, start_method: str = None):
+        """
+        Args:
+            env_fns: 環境を生成する関数のリスト（ワーカープロセス内で呼ばれる）
+            batch_size: recv() で一度に受け取る環境数 M（1 <= M <= N）。None の場合は N（同期的な動き）
+            start_method: multiprocessing の開始方法。None の場合は forkserver（使えなければ spawn）
+        """
+        self.num_envs = len(env_fns)
+        self.batch_size = self.num_envs if batch_size is None else batch_size
+        if not 1 <= self.batch_size <= self.num_envs:
+            raise ValueError(f"batch_size は 1 以上 {self.num_envs} 以下を指定してください: {batch_size}")
+        self.closed = False
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_envs)])
+        self.processes = []
+        for work_remote, remote, env_fn in zip(work_remotes, self.remotes, env_fns):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, CloudpickleWrapper(env_fn)), daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+        self.observation_space, self.action_space = [remote.recv() for remote in self.remotes][0]
+
+        self._env_ids = {remote: env_id for env_id, remote in enumerate(self.remotes)}
+        # 行動を送ってまだ結果を受け取っていない環境 -> 送ったコマンド ("step" / "reset")
+        self._running = {}
+        # 結果は届いているが、まだ recv() で返していない環境 -> 結果
+        self._ready = {}
+        self._start_time = None
+        self._busy_ns = 0
+        self._steps = 0
+
+    def async_reset(self):
+        """
+        すべての環境を reset する。観測は recv() で受け取る（reset の結果は dones = False）
+
+        step 中の環境は終わるまで待ち、受け取っていない結果は捨てる。
+        """
+        for env_id in list(self._running):
+            self._receive(env_id)
+        self._ready.clear()
+        for env_id in range(self.num_envs):
+            self.remotes[env_id].send(("reset", None))
+            self._running[env_id] = "reset"
+        self._start_time = time.perf_counter()
+        self._busy_ns = 0
+        self._steps = 0
+
+    def reset(self):
+        """すべての環境を reset し、env_id 順の観測 (N, obs_dim) を返す"""
+        self.async_reset()
+        results = {env_id: self._receive(env_id) for env_id in range(self.num_envs)}
+        return np.stack([results[env_id][0] for env_id in range(self.num_envs)])
+
+    def send(self, actions, env_ids):
+        """
+        env_ids の環境に行動を送る（結果を待たずに戻る）
+
+        Args:
+            actions: 行動 (len(env_ids), act_dim)
+            env_ids: 行動を送る環境の番号。recv() で受け取った（step 中でない）環境であること
+        """
+        env_ids = [int(env_id) for env_id in env_ids]
+        actions = np.asarray(actions)
+        if len(actions) != len(env_ids):
+            raise ValueError(f"actions ({len(actions)}) と env_ids ({len(env_ids)}) の数が一致しません")
+        self._check_idle(env_ids)
+        for env_id, action in zip(env_ids, actions):
+            self.remotes[env_id].send(("step", action))
+            self._running[env_id] = "step"
+
+    def recv(self):
+        """
+        先に終わった batch_size 個の環境の結果を受け取る
+
+        Returns:
+            tuple: (obs (M, obs_dim), rewards (M,), dones (M,), infos (長さ M のリスト), env_ids (M,))
+                   env_ids の昇順に並ぶ
+        """
+        if len(self._ready) + len(self._running) < self.batch_size:
+            raise RuntimeError("recv() の前に、受け取る環境数 (batch_size) 分の send() / async_reset() が必要です")
+        while len(self._ready) < self.batch_size:
+            for remote in wait([self.remotes[env_id] for env_id in self._running]):
+                env_id = self._env_ids[remote]
+                self._ready[env_id] = self._receive(env_id)
+        # 届いた順に M 個取り出す（番号の小さい環境ばかりが選ばれて他の環境が待たされないように）
+        env_ids = sorted(list(self._ready)[:self.batch_size])
+        results = [self._ready.pop(env_id) for env_id in env_ids]
+        obs, rewards, dones, infos = zip(*results)
+        return (np.stack(obs), np.array(rewards, dtype=np.float32), np.array(dones, dtype=bool), list(infos),
+                np.array(env_ids, dtype=np.int64))
+
+    def step(self, actions, env_ids):
+        """send() と recv() をまとめて行う"""
+        self.send(actions, env_ids)
+        return self.recv()
+
+    def stats(self):
+        """
+        async_reset() からの集計を返す
+
+        Returns:
+            dict: steps（受け取った step の数）、elapsed [s]、steps_per_sec、
+                  utilization（全ワーカーの時間のうち step / reset に使った割合 0〜1）
+        """
+        elapsed = time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+        return {
+            "steps": self._steps,
+            "elapsed": elapsed,
+            "steps_per_sec": self._steps / elapsed if elapsed > 0 else 0.0,
+            "utilization": self._busy_ns * 1e-9 / (elapsed * self.num_envs) if elapsed > 0 else 0.0,
+        }
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """環境のメソッドを呼ぶ（step 中の環境には呼べない）"""
+        indices = range(self.num_envs) if indices is None else indices
+        self._check_idle(indices)
+        for env_id in indices:
+            self.remotes[env_id].send(("env_method", (method_name, method_args, method_kwargs)))
+        return [self.remotes[env_id].recv() for env_id in indices]
+
+    def close(self):
+        if self.closed:
+            return
+        for env_id in list(self._running):
+            self._receive(env_id)
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _receive(self, env_id):
+        obs, reward, done, info, busy_ns = self.remotes[env_id].recv()
+        if self._running.pop(env_id) == "step":
+            self._steps += 1
+        self._busy_ns += busy_ns
+        return obs, reward, done, info
+
+    def _check_idle(self, env_ids):
+        busy = sorted(set(env_ids) & (set(self._running) | set(self._ready)))
+        if busy:
+            raise ValueError(f"結果を受け取っていない環境があります: {busy}")
@@ -3,18 +3,30 @@ F1Tenth Gym Environment Wrapper for Reinforcement Learning
 
 このモジュールは、F1Tenth Gymシミュレータをラップし、
 Stable Baselines3で使用可能なGym環境を提供します。
+設定は生成時に渡す EnvConfig（src/env_config.py）から読み、config.py のモジュール変数は参照しません。
 """
 
 import gym
-import f110_gym
 import numpy as np
-import sys
-import os
+from dataclasses import replace
+from time import perf_counter_ns
 
-# scriptsディレクトリからconfigをimportできるようにパスを追加
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
-import config
-from src.rewards import calculate_reward
+from src.env_config import EnvConfig, load_env_config
+from src.rewards import RewardConfig, calculate_reward, calculate_reward_batch, load_reward_config, uses_track
+from src.lidar_kernel import downsample_into, normalization_params, process_lidar
+from src.map_index import MapIndex
+from src.profiling import StageProfiler
+from src.track import ProgressTracker, Track
+
+
+class _HeldScan:
+    """RaceCar.scan_simulator の代わりに置き、レイキャストせずに直前の LiDAR をそのまま返すスキャナ"""
+
+    def __init__(self):
+        self.scans = None
+
+    def scan(self, pose, rng, std_dev=0.01):
+        return self.scans
 
 
 class F1TenthRL(gym.Env):
@@ -25,28 +37,70 @@ class F1TenthRL(gym.Env):
     ステアリングと速度の2次元連続アクションを出力します。
     """
     
-    def __init__(self, map_path: str):
+    def __init__(self, map_path: str, seed: int = None, reward_config: RewardConfig = None,
+                 share_obs_buffer: bool = False, trajectory_log=None, track: Track = None,
+                 profiler: StageProfiler = None, include_raw_scan: bool = True, action_repeat: int = 1,
+                 env_config: EnvConfig = None):
         """
         Args:
-            map_path: マップファイルのパス（拡張子なし）
+            map_path: マップファイルのパス（拡張子なし）。f110 の LiDAR のスキャナはプロセス内で共有されるため、
+                      1 つのプロセスで異なるマップの環境を同時に使うことはできない。
+            seed: スタート位置選択用の乱数シード。None の場合は np.random のグローバル状態を使用。
+                  並列環境ではワーカーごとに異なる値を渡すこと。
+            reward_config: 報酬パラメータ。None の場合は env_config.reward を使う（max_speed は env_config.max_speed になる）。
+            share_obs_buffer: True の場合、reset/step は内部の観測バッファをコピーせずに返す。
+                              返り値は次の reset/step で上書きされるため、受け取ってすぐ消費する
+                              呼び出し側（評価ループなど）でのみ使用すること。VecEnv には渡さない。
+            trajectory_log: src.trajlog.TrajectoryWriter。指定すると reset / step ごとに
+                            車両状態・行動・報酬・LiDAR をステップ単位で記録する。
+            track: src.track.Track。指定すると中心線に沿った進み・横ずれを追跡し、info に
+                   'track_progress' / 'lateral_offset' を入れる。None でも報酬設定が中心線を使う場合は
+                   マップから読み込む。
+            profiler: src.profiling.StageProfiler。指定すると step / reset の各段階の実行時間を記録する
+                      （None の場合は計測しない）。
+            include_raw_scan: False の場合は info に生の LiDAR ('raw_scan', 1080 点) を入れない。
+                              info を使わない学習用の並列環境で、プロセス間で送るデータ量を減らす。
+            action_repeat: 1 回の step で同じ行動を保つ物理 tick 数 k。LiDAR のレイキャストは最後の tick だけ行い、
+                           途中の tick の壁との衝突はマップの距離場で判定する。報酬は tick ごとの報酬の合計。
+            env_config: 観測・行動・スタート位置・報酬の設定。None の場合は config.py から作る。
         """
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat は 1 以上を指定してください: {action_repeat}")
         super(F1TenthRL, self).__init__()
+        # f110_gym の import（f110-v0 の登録）は重いため、環境を生成するときまで遅らせる
+        import f110_gym  # noqa: F401
         self.env = gym.make('f110-v0', map=map_path, map_ext='.pgm', num_agents=1)
+        self.seed(seed)
+        env_config = env_config if env_config is not None else load_env_config()
+        if reward_config is not None:
+            env_config = replace(env_config, reward=reward_config)
+        self.env_config = env_config
+        self.reward_config = env_config.reward
+        self.trajectory_log = trajectory_log
+        # スタート位置のサンプリングと action_repeat の衝突判定にはマップの距離場を使う（初回のみ計算してキャッシュ）
+        self.map_index = MapIndex.load(map_path) if env_config.start_pose_sampling or action_repeat > 1 else None
+        self.map_path = map_path
+        self.profiler = profiler
+        self.include_raw_scan = include_raw_scan
+        self.track = track
+        self.progress = None
+        self._init_track()
+        self._init_action_repeat(action_repeat)
         
         # 観測空間の計算
         # 1. LiDAR: 1080 -> ダウンサンプリング
-        self.lidar_size = 1080 // config.LIDAR_DOWNSAMPLE_FACTOR
+        self.lidar_size = env_config.lidar_size
         
         # 2. 車両状態: [速度, ステアリング] (2次元)
-        self.state_size = 2 if config.INCLUDE_VEHICLE_STATE else 0
+        self.state_size = 2 if env_config.include_vehicle_state else 0
         
         # 3. LiDAR残差: 現在と前ステップの差分 (同次元)
-        self.residual_size = self.lidar_size if config.INCLUDE_LIDAR_RESIDUAL else 0
+        self.residual_size = self.lidar_size if env_config.include_lidar_residual else 0
         
         total_obs_size = self.lidar_size + self.residual_size + self.state_size
         
-        # 前ステップのLiDAR（Δ=0で初期化）
-        self.prev_lidar = np.zeros(self.lidar_size, dtype=np.float32)
+        # 観測バッファ（毎ステップ確保せず、固定スライスへ直接書き込む）
+        self._init_obs_buffers(total_obs_size, share_obs_buffer)
 
         # 前ステップの車両位置（走行距離報酬用）
         self.prev_x = 0.0
@@ -68,59 +122,197 @@ class F1TenthRL(gym.Env):
             dtype=np.float32
         )
 
+    def seed(self, seed=None):
+        """
+        スタート位置選択と LiDAR のノイズの乱数ストリームを初期化する
+
+        f110 は車両ごとの scan_rng で LiDAR にノイズを加えるため、これもシードから作り直す。
+        作り直さないと前のエピソードの続きの乱数になり、同じシードでも実行順によって観測が変わる。
+
+        Args:
+            seed: 乱数シード。None の場合はスタート位置に np.random のグローバル状態を共有し、
+                  LiDAR のノイズの乱数はそのまま使い続ける。
+        """
+        self._pose_rng = np.random.RandomState(seed) if seed is not None else np.random
+        if seed is not None:
+            self.env.sim.agents[0].scan_rng = np.random.default_rng(seed)
+        return [seed]
+
+    def reload_reward_config(self, reward_config: RewardConfig = None):
+        """
+        報酬パラメータを差し替える（学習中のホットリロード用）
+
+        速度の正規化に使う max_speed は env_config.max_speed のまま変わらない。
+
+        Args:
+            reward_config: 新しい報酬パラメータ。None の場合は config.py をディスクから再読み込みする。
+
+        Returns:
+            RewardConfig: 以降のステップで使用する設定
+        """
+        reward_config = reward_config if reward_config is not None else load_reward_config(reload_module=True)
+        self.env_config = replace(self.env_config, reward=reward_config)
+        self.reward_config = self.env_config.reward
+        self._init_track()
+        return self.reward_config
+
+    def enable_profiling(self):
+        """step / reset の実行時間の計測を始める（VecEnv.env_method からワーカー内で呼ぶ用）"""
+        if self.profiler is None:
+            self.profiler = StageProfiler()
+
+    def profile_snapshot(self):
+        """これまでの計測結果を返して計測をやり直す。計測していない場合は None"""
+        return self.profiler.snapshot() if self.profiler is not None else None
+
+    def _init_track(self):
+        """報酬設定が中心線を使う場合はコースを読み込み（初回のみ計算してキャッシュ）、進みの追跡を始める"""
+        if self.track is None and uses_track(self.reward_config):
+            self.track = Track.load(self.map_path, start_pose=self.env_config.start_pose)
+        if self.track is not None and self.progress is None:
+            self.progress = ProgressTracker(self.track)
+
+    def _init_action_repeat(self, action_repeat: int):
+        """
+        action_repeat 用の状態を用意する
+
+        途中の tick の衝突は、車体を前後方向に並べた 3 つの円（半径 = 車幅 / 2）で近似し、
+        いずれかの中心で壁までの距離が半径未満なら衝突とみなす。
+        """
+        self.action_repeat = action_repeat
+        params = self.env.sim.params
+        self._car_radius = params['width'] / 2.0
+        self._collision_offsets = np.array([-1.0, 0.0, 1.0]) * (params['length'] - params['width']) / 2.0
+        self._held_scan = _HeldScan()
+        # 各 tick の後の位置（0 行目は step 開始時の位置）
+        self._substep_xy = np.empty((action_repeat + 1, 2))
+        self._substep_progress = np.empty(action_repeat)
+        self._substep_lateral = np.empty(action_repeat)
+
+    @property
+    def step_dt(self):
+        """1 回の step で進む sim 時間 [s]（action_repeat 個の物理 tick）"""
+        return self.env.timestep * self.action_repeat
+
+    def _substep_without_scan(self, steer, speed):
+        """
+        LiDAR を計算せずに物理だけ 1 tick 進め、壁と衝突したかを返す
+
+        f110 の RaceCar.update_pose は tick ごとに scan_simulator で 1080 本のレイキャストを行うため、
+        その間だけ直前の LiDAR を返す _HeldScan に差し替える。f110 の衝突判定（iTTC）は LiDAR を使うので、
+        代わりにマップの距離場で判定する。
+        """
+        sim = self.env.sim
+        agent = sim.agents[0]
+        car_class = type(agent)
+        scanner = car_class.scan_simulator
+        car_class.scan_simulator = self._held_scan
+        try:
+            agent.update_pose(steer, speed)
+        finally:
+            car_class.scan_simulator = scanner
+        state = agent.state
+        sim.agent_poses[0, :] = (state[0], state[1], state[4])
+        self.env.current_time += self.env.timestep
+
+        cos, sin = np.cos(state[4]), np.sin(state[4])
+        clearance = self.map_index.clearance_at(state[0] + self._collision_offsets * cos,
+                                                state[1] + self._collision_offsets * sin)
+        return bool(np.min(clearance) < self._car_radius)
+
+    def _scan_now(self):
+        """現在の姿勢で LiDAR を 1 回計算する（途中の tick で衝突したときの最後の観測用）"""
+        agent = self.env.sim.agents[0]
+        state = agent.state
+        return type(agent).scan_simulator.scan(np.array([state[0], state[1], state[4]]), agent.scan_rng)
+
+    def _init_obs_buffers(self, total_obs_size: int, share_obs_buffer: bool = False):
+        """
+        観測計算用のバッファを確保する
+
+        obs は [LiDAR | 残差 | 車両状態] の順に並んだ float32 配列で、各ブロックは固定のビュー。
+        ダウンサンプリング後の LiDAR は 2 面のバッファを交互に使い（ピンポン）、
+        片方を「前ステップ」、もう片方を「現在」として扱うことでコピーを省く。
+        """
+        self.share_obs_buffer = share_obs_buffer
+        self._obs_buf = np.zeros(total_obs_size, dtype=np.float32)
+        residual_end = self.lidar_size + self.residual_size
+        self._lidar_view = self._obs_buf[:self.lidar_size]
+        self._residual_view = self._obs_buf[self.lidar_size:residual_end]
+        self._state_view = self._obs_buf[residual_end:]
+
+        # 前ステップのLiDAR（Δ=0で初期化）。_prev_idx 側が前ステップ、反対側が現在
+        self._lidar_bufs = np.zeros((2, self.lidar_size))
+        self._prev_idx = 0
+        # 正規化の中間値（float64 で計算してから float32 のビューへ書き込む）
+        self._lidar_tmp = np.empty(self.lidar_size)
+        cfg = self.env_config
+        self._lidar_params = normalization_params(
+            cfg.normalize_observations, cfg.lidar_mean, cfg.lidar_std,
+            cfg.lidar_residual_mean, cfg.lidar_residual_std)
+        self._state_raw = np.empty(2, dtype=np.float32)
+        self._state_tmp = np.empty(2)
+        self._state_mean = np.asarray(cfg.vehicle_state_mean, dtype=np.float64)
+        self._state_std = np.asarray(cfg.vehicle_state_std, dtype=np.float64)
+
+    @property
+    def prev_lidar(self):
+        """前ステップのダウンサンプリング済みLiDAR"""
+        return self._lidar_bufs[self._prev_idx]
+
+    def _downsample_into(self, scans, out):
+        """LiDARデータのダウンサンプリング (最小値を取る) を out に書き込む"""
+        downsample_into(scans, out, self.env_config.lidar_downsample_factor)
+
     def _get_obs(self, raw_obs):
         """
         生の観測データを加工して返す
+
+        すべての計算は事前確保したバッファ上で行い、ステップごとの配列確保を行わない。
         """
-        # LiDARデータのダウンサンプリング (平均または最小値を取る)
+        cfg = self.env_config
         scans = raw_obs['scans'][0]
-        downsampled = scans.reshape(self.lidar_size, config.LIDAR_DOWNSAMPLE_FACTOR).min(axis=1)
-        
-        # ΔLiDAR（残差）の計算
-        delta_lidar = downsampled - self.prev_lidar
-        
-        # 現在値を次ステップの「前値」として保存
-        self.prev_lidar = downsampled.copy()
-        
-        parts = [downsampled]
-        
-        if config.INCLUDE_LIDAR_RESIDUAL:
-            parts.append(delta_lidar)
-        
-        if config.INCLUDE_VEHICLE_STATE:
+        prev = self._lidar_bufs[self._prev_idx]
+        cur = self._lidar_bufs[1 - self._prev_idx]
+
+        # ダウンサンプリング・ΔLiDAR（残差）・正規化を 1 回でまとめて計算
+        process_lidar(scans, prev, cur, self._lidar_view, self._residual_view,
+                      cfg.lidar_downsample_factor, self._lidar_params, self._lidar_tmp)
+
+        # 現在値を次ステップの「前値」にする（バッファを入れ替えるだけでコピーしない）
+        self._prev_idx = 1 - self._prev_idx
+
+        if cfg.include_vehicle_state:
             # 現在の車両状態を取得 [速度, ステアリング]
             state = self.env.sim.agents[0].state
-            vel = state[3] / config.MAX_SPEED
-            steer = state[2]
-            parts.append(np.array([vel, steer], dtype=np.float32))
-
-        if config.NORMALIZE_OBSERVATIONS:
-            norm_parts = []
-            # LiDAR 正規化
-            lidar_norm = (downsampled - config.LIDAR_MEAN) / config.LIDAR_STD
-            norm_parts.append(lidar_norm)
-            if config.INCLUDE_LIDAR_RESIDUAL:
-                delta_norm = (delta_lidar - config.LIDAR_RESIDUAL_MEAN) / config.LIDAR_RESIDUAL_STD
-                norm_parts.append(delta_norm)
-            if config.INCLUDE_VEHICLE_STATE:
-                state_arr = np.array([vel, steer], dtype=np.float32)
-                state_norm = (state_arr - config.VEHICLE_STATE_MEAN) / config.VEHICLE_STATE_STD
-                norm_parts.append(state_norm)
-            obs = np.concatenate(norm_parts).astype(np.float32)
-        else:
-            obs = np.concatenate(parts).astype(np.float32)
+            self._state_raw[0] = state[3] / cfg.max_speed
+            self._state_raw[1] = state[2]
+            if cfg.normalize_observations:
+                np.subtract(self._state_raw, self._state_mean, out=self._state_tmp)
+                np.divide(self._state_tmp, self._state_std, out=self._state_view)
+            else:
+                self._state_view[:] = self._state_raw
 
-        return obs
+        if self.share_obs_buffer:
+            return self._obs_buf
+        return self._obs_buf.copy()
 
     def reset(self):
         """
         環境をリセットし、初期観測を返す
         """
-        # スタート位置の選択（ランダム化 or 固定）
-        if config.START_POSE_RANDOMIZE and len(config.START_POSES) > 0:
-            pose = config.START_POSES[np.random.randint(len(config.START_POSES))]
+        profiler = self.profiler
+        if profiler is not None:
+            t0 = perf_counter_ns()
+        # スタート位置の選択（サンプリング or ランダム化 or 固定）
+        cfg = self.env_config
+        if cfg.start_pose_sampling and self.map_index is not None:
+            pose = self.map_index.sample_poses(1, cfg.start_min_clearance, self._pose_rng,
+                                               yaw_noise=cfg.start_yaw_noise)[0]
+        elif cfg.start_pose_randomize and len(cfg.start_poses) > 0:
+            pose = cfg.start_poses[self._pose_rng.randint(len(cfg.start_poses))]
         else:
-            pose = config.START_POSE
+            pose = cfg.start_pose
         sx, sy, syaw = pose
         initial_poses = np.array([[sx, sy, syaw]])
 
@@ -128,24 +320,68 @@ class F1TenthRL(gym.Env):
         raw_obs = result[0] if isinstance(result, tuple) else result
 
         # 初期状態のLiDARを取得してprev_lidarをセット
-        scans = raw_obs['scans'][0]
-        self.prev_lidar = scans.reshape(self.lidar_size, config.LIDAR_DOWNSAMPLE_FACTOR).min(axis=1)
+        self._downsample_into(raw_obs['scans'][0], self._lidar_bufs[self._prev_idx])
+        self._held_scan.scans = raw_obs['scans'][0]
 
         # 前位置をリセット
         self.prev_x = sx
         self.prev_y = sy
+        if self.progress is not None:
+            self.progress.reset(sx, sy)
+
+        if self.trajectory_log is not None:
+            self.trajectory_log.start_episode()
 
-        return self._get_obs(raw_obs)
+        processed_obs = self._get_obs(raw_obs)
+        if profiler is not None:
+            profiler.record("env.reset", perf_counter_ns() - t0)
+        return processed_obs
 
     def step(self, action):
         """
         1ステップ実行
+
+        action_repeat > 1 の場合は同じ行動で物理を action_repeat tick 進め、LiDAR は最後の tick でだけ計算する。
+        途中の tick で衝突した場合はそこでエピソードを終える。報酬は tick ごとの報酬の合計で、
+        LiDAR を使う項は最後の tick の LiDAR で、走行距離・中心線の進みの項は tick ごとの移動量で計算する。
+
+        profiler がある場合は env.step（全体）と、その内訳の sim（シミュレータ）/ reward（中心線の追跡を含む）/
+        obs（観測の計算と走行ログの記録）の実行時間を記録する。
         """
-        steer = action[0] * config.STEER_SENSITIVITY
-        speed = config.MIN_SPEED + (action[1] + 1.0) * (config.MAX_SPEED - config.MIN_SPEED) / 2.0
-        
-        obs, _, done, info = self.env.step(np.array([[steer, speed]]))
+        profiler = self.profiler
+        if profiler is not None:
+            t0 = perf_counter_ns()
+        cfg = self.env_config
+        steer = action[0] * cfg.steer_sensitivity
+        speed = cfg.min_speed + (action[1] + 1.0) * (cfg.max_speed - cfg.min_speed) / 2.0
+
+        substeps = 0
+        collided = False
+        if self.action_repeat > 1:
+            xy = self._substep_xy
+            xy[0] = self.prev_x, self.prev_y
+            for _ in range(self.action_repeat - 1):
+                collided = self._substep_without_scan(steer, speed)
+                state = self.env.sim.agents[0].state
+                substeps += 1
+                xy[substeps] = state[0], state[1]
+                if self.progress is not None:
+                    self._substep_progress[substeps - 1] = self.progress.update(state[0], state[1])
+                    self._substep_lateral[substeps - 1] = self.progress.lateral_ratio()
+                if collided:
+                    break
+        if collided:
+            obs = {'scans': self._scan_now()[None]}
+            done = True
+            info = {}
+        else:
+            obs, _, done, info = self.env.step(np.array([[steer, speed]]))
+            substeps += 1
         raw_scans = obs['scans'][0]
+        self._held_scan.scans = raw_scans
+        if profiler is not None:
+            t1 = perf_counter_ns()
+            profiler.record("env.step/sim", t1 - t0)
 
         # 現在位置を取得
         state = self.env.sim.agents[0].state
@@ -154,14 +390,63 @@ class F1TenthRL(gym.Env):
         # 報酬計算に前位置を渡す
         if info is None:
             info = {}
-        info['raw_scan'] = raw_scans
-        reward = calculate_reward(raw_scans, action, done, speed, self.prev_x, self.prev_y, cur_x, cur_y)
+        if self.include_raw_scan:
+            info['raw_scan'] = raw_scans
+        track_progress = lateral_ratio = None
+        if self.progress is not None and not collided:
+            track_progress = self.progress.update(cur_x, cur_y)
+            lateral_ratio = self.progress.lateral_ratio()
+        if self.action_repeat == 1:
+            reward = calculate_reward(raw_scans, action, done, speed, self.prev_x, self.prev_y, cur_x, cur_y,
+                                      reward_config=self.reward_config, track_progress=track_progress,
+                                      lateral_ratio=lateral_ratio)
+        else:
+            reward, track_progress = self._substep_reward(raw_scans, action, done, speed, substeps, collided,
+                                                          cur_x, cur_y, track_progress, lateral_ratio)
+        if self.progress is not None:
+            info['track_progress'] = track_progress
+            info['lateral_offset'] = float(self.progress.offset[0])
+        if profiler is not None:
+            t2 = perf_counter_ns()
+            profiler.record("env.step/reward", t2 - t1)
 
         # 前位置を更新
         self.prev_x = cur_x
         self.prev_y = cur_y
 
+        if self.trajectory_log is not None:
+            # state[2]: ステアリング角, state[3]: 速度, state[4]: yaw
+            self.trajectory_log.append(cur_x, cur_y, state[4], state[3], state[2], action, reward, done, raw_scans)
+
         processed_obs = self._get_obs(obs)
+        if profiler is not None:
+            t3 = perf_counter_ns()
+            profiler.record("env.step/obs", t3 - t2)
+            profiler.record("env.step", t3 - t0)
 
         return processed_obs, float(reward), bool(done), info
 
+    def _substep_reward(self, raw_scans, action, done, speed, substeps, collided, cur_x, cur_y,
+                        track_progress, lateral_ratio):
+        """
+        action_repeat の substeps 個の tick の報酬の合計と、中心線に沿った進みの合計を返す
+
+        LiDAR を計算していない途中の tick には最後の tick の LiDAR を使う。衝突した tick は衝突の報酬になる。
+        """
+        xy = self._substep_xy
+        if not collided:
+            xy[substeps] = cur_x, cur_y
+        progress = lateral = None
+        if self.progress is not None:
+            progress = self._substep_progress[:substeps]
+            lateral = self._substep_lateral[:substeps]
+            if not collided:
+                progress[-1] = track_progress
+                lateral[-1] = lateral_ratio
+        dones = np.zeros(substeps, dtype=bool)
+        dones[-1] = done
+        rewards = calculate_reward_batch(
+            np.broadcast_to(raw_scans, (substeps, len(raw_scans))), np.broadcast_to(action, (substeps, 2)),
+            dones, np.full(substeps, speed), xy[:substeps], xy[1:substeps + 1], self.reward_config,
+            progress, lateral)
+        return rewards.sum(), (float(progress.sum()) if progress is not None else None)
@@ -0,0 +1,151 @@
+"""
+LiDAR 前処理カーネル
+
+ダウンサンプリング（最小値プーリング）・残差・正規化を 1 回の走査でまとめて計算します。
+Numba がインストールされていればコンパイル済みカーネルを、なければ NumPy 実装を使用します
+（選択は最初の呼び出し時に 1 度だけ行い、環境変数 F1_LIDAR_KERNEL=numpy で NumPy 実装を強制できます）。
+Numba の import は重いため、このモジュールの import 時には行いません。
+
+入力は 1 本のスキャン (1080,) でも、複数環境分のバッチ (N, 1080) でも構いません。
+どちらの実装も同じ入力に対してビット単位で同じ結果を返します。
+
+    from src.lidar_kernel import process_lidar
+    process_lidar(scans, prev, cur, lidar_out, residual_out, factor, params)
+"""
+import os
+
+import numpy as np
+
+
+def normalization_params(normalize: bool, lidar_mean: float, lidar_std: float,
+                         residual_mean: float, residual_std: float) -> tuple:
+    """
+    process_lidar() に渡す正規化パラメータを返す。
+
+    正規化しない場合は (x - 0) / 1 となる値を返す（x と厳密に一致する）。
+    """
+    if normalize:
+        return (float(lidar_mean), float(lidar_std), float(residual_mean), float(residual_std))
+    return (0.0, 1.0, 0.0, 1.0)
+
+
+# 1 本のスキャンでは、これ以下の factor ならストライド付きビュー同士の np.minimum、
+# これより大きい factor なら reshape した短い軸での np.minimum.reduce の方が速い。
+# バッチ (N, 1080) では常にストライド版の方が速い（bench_lidar_kernel.py で計測）
+_STRIDED_MAX_FACTOR = 8
+
+
+def downsample_into(scans, out, factor: int):
+    """
+    最小値プーリングで (..., 1080) -> (..., 1080 // factor) に縮約し、out に書き込む。
+
+    reshape(-1, factor).min(axis=-1) と同じ結果を返す。バッチ入力または factor が小さい場合は
+    ストライド付きビュー同士の np.minimum (factor - 1 回) で求める。
+    """
+    if factor == 1:
+        np.copyto(out, scans)
+    elif factor <= _STRIDED_MAX_FACTOR or scans.ndim > 1:
+        np.minimum(scans[..., 0::factor], scans[..., 1::factor], out=out)
+        for offset in range(2, factor):
+            np.minimum(out, scans[..., offset::factor], out=out)
+    else:
+        blocks = scans.reshape(scans.shape[:-1] + (out.shape[-1], factor))
+        np.minimum.reduce(blocks, axis=-1, out=out)
+    return out
+
+
+def process_lidar_numpy(scans, prev, cur, lidar_out, residual_out, factor: int, params: tuple, tmp=None):
+    """
+    NumPy 実装。引数は process_lidar() を参照。
+    """
+    lidar_mean, lidar_std, residual_mean, residual_std = params
+    if tmp is None:
+        tmp = np.empty(cur.shape)
+    downsample_into(scans, cur, factor)
+    # float32 の出力へ書く前に float64 のまま割り算するため、中間値は tmp で受ける
+    np.subtract(cur, lidar_mean, out=tmp)
+    np.divide(tmp, lidar_std, out=lidar_out)
+    if residual_out.shape[-1] > 0:
+        np.subtract(cur, prev, out=tmp)
+        np.subtract(tmp, residual_mean, out=tmp)
+        np.divide(tmp, residual_std, out=residual_out)
+
+
+def _build_numba_kernel():
+    """Numba で fused カーネルをコンパイルする。Numba が使えない場合は None。"""
+    if os.environ.get("F1_LIDAR_KERNEL", "").lower() == "numpy":
+        return None
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit(cache=True)
+    def _kernel(scans, prev, cur, lidar_out, residual_out, factor,
+                lidar_mean, lidar_std, residual_mean, residual_std):
+        n, size = cur.shape
+        with_residual = residual_out.shape[1] > 0
+        for k in range(n):
+            for i in range(size):
+                base = i * factor
+                m = scans[k, base]
+                for j in range(1, factor):
+                    v = scans[k, base + j]
+                    # NaN は np.minimum と同様に伝播させる
+                    if v < m or v != v:
+                        m = v
+                cur[k, i] = m
+                lidar_out[k, i] = (m - lidar_mean) / lidar_std
+                if with_residual:
+                    residual_out[k, i] = ((m - prev[k, i]) - residual_mean) / residual_std
+
+    def process_lidar_numba(scans, prev, cur, lidar_out, residual_out, factor, params, tmp=None):
+        """Numba 実装。引数は process_lidar() を参照。"""
+        if scans.ndim == 1:
+            scans, prev, cur = scans[None, :], prev[None, :], cur[None, :]
+            lidar_out, residual_out = lidar_out[None, :], residual_out[None, :]
+        _kernel(scans, prev, cur, lidar_out, residual_out, factor, *params)
+
+    return process_lidar_numba
+
+
+_UNRESOLVED = object()
+_numba_kernel = _UNRESOLVED
+
+
+def _get_numba_kernel():
+    """Numba カーネルを返す（初回のみ構築する）。Numba が使えない場合は None。"""
+    global _numba_kernel
+    if _numba_kernel is _UNRESOLVED:
+        _numba_kernel = _build_numba_kernel()
+    return _numba_kernel
+
+
+def __getattr__(name):
+    # process_lidar_numba / BACKEND は参照されたときに初めて Numba を import して決める
+    if name == "process_lidar_numba":
+        return _get_numba_kernel()
+    if name == "BACKEND":
+        return "numba" if _get_numba_kernel() is not None else "numpy"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def process_lidar(scans, prev, cur, lidar_out, residual_out, factor: int, params: tuple, tmp=None):
+    """
+    最小値プーリング・残差・正規化をまとめて計算する。
+
+    Args:
+        scans: 生の LiDAR (1080,) または (N, 1080)
+        prev: 前ステップのダウンサンプリング済み LiDAR (L,) / (N, L)。読み取りのみ
+        cur: 今回のダウンサンプリング結果の書き込み先 (L,) / (N, L)
+        lidar_out: 正規化済み LiDAR の書き込み先 (L,) / (N, L)（観測バッファのビューを想定）
+        residual_out: 正規化済み残差の書き込み先 (L,) / (N, L)。残差を使わない場合は長さ 0 のビュー
+        factor: LIDAR_DOWNSAMPLE_FACTOR（1080 の約数）
+        params: normalization_params() の返り値
+        tmp: NumPy 実装が使う float64 の作業領域 (cur と同じ形状)。None の場合は毎回確保する
+    """
+    kernel = _get_numba_kernel()
+    if kernel is not None:
+        kernel(scans, prev, cur, lidar_out, residual_out, factor, params)
+    else:
+        process_lidar_numpy(scans, prev, cur, lidar_out, residual_out, factor, params, tmp)
@@ -0,0 +1,244 @@
+"""
+マップの距離場と空きセルの索引（スポーン位置の検証・サンプリング用）
+
+占有格子（PGM）から、各セルの「最も近い壁までの距離 [m]」（ユークリッド距離変換）と、
+空きセルを距離の小さい順に並べた索引を 1 度だけ計算し、マップの隣に <マップ名>.mapindex.npz としてキャッシュします。
+キャッシュは PGM / YAML の内容のハッシュで判定するので、マップを描き直すと自動で作り直されます。
+
+    from src.map_index import MapIndex
+    index = MapIndex.load(config.MAP_PATH)
+    index.clearance_at(3.0, 4.0)                 # 壁までの距離 [m]（地図の外・壁の中は 0）
+    index.is_valid_pose(3.0, 4.0, 0.4)           # 1 ピクセルではなく、半径 0.4 m 以内に壁が無いか
+    poses = index.sample_poses(5000, 0.4, rng)   # (5000, 3) の [x, y, yaw]（向きはコースに沿った方向）
+
+距離変換は scipy があれば scipy.ndimage を、なければ NumPy 実装を使います（結果は同じ）。
+"""
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".mapindex.npz"
+
+# PGM の画素値がこれより大きいセルを空きとみなす（255=空き, 205=未知, 0=壁。view_spawn.py と同じ基準）
+FREE_THRESHOLD = 250
+
+# コースの向きを推定するときに周囲の勾配を平均する半径 [m]
+TANGENT_WINDOW = 0.5
+
+
+def _read_map(map_path):
+    """マップの YAML・PGM を読み込み、(画像 (H, W), origin, resolution, 内容のハッシュ) を返す"""
+    # 環境の import を軽く保つため、マップを読むときだけ import する
+    import hashlib
+    import yaml
+    from PIL import Image
+
+    with open(map_path + ".yaml", "rb") as f:
+        yaml_bytes = f.read()
+    map_conf = yaml.safe_load(yaml_bytes)
+    img_path = os.path.join(os.path.dirname(map_path), map_conf["image"])
+    with open(img_path, "rb") as f:
+        img_bytes = f.read()
+    with Image.open(img_path) as img:
+        map_img = np.array(img)
+
+    digest = hashlib.sha1()
+    for part in (f"{FORMAT_VERSION}:{FREE_THRESHOLD}:{TANGENT_WINDOW}".encode(), yaml_bytes, img_bytes):
+        digest.update(part)
+    return map_img, map_conf["origin"], float(map_conf["resolution"]), digest.hexdigest()
+
+
+def _edt_numpy(free):
+    """
+    空きセル (True) から最も近い非空きセルまでの距離 [セル] を返す（NumPy 実装）
+
+    列方向の 1 次元距離 g を前後 2 回の走査で求めたあと、行方向に d²(x) = min_k g(x±k)² + k² を
+    k を 1 つずつ増やしながら更新する。k² が全体の最大値を超えたら以降は更新されないので打ち切る
+    （計算量は セル数 × 最大距離）。
+    """
+    height, width = free.shape
+    g = np.where(free, float(height + width), 0.0)
+    for row in range(1, height):
+        np.minimum(g[row], g[row - 1] + 1.0, out=g[row])
+    for row in range(height - 2, -1, -1):
+        np.minimum(g[row], g[row + 1] + 1.0, out=g[row])
+
+    g2 = g * g
+    d2 = g2.copy()
+    k = 1
+    while k < width and k * k < d2.max():
+        np.minimum(d2[:, k:], g2[:, :-k] + k * k, out=d2[:, k:])
+        np.minimum(d2[:, :-k], g2[:, k:] + k * k, out=d2[:, :-k])
+        k += 1
+    return np.sqrt(d2)
+
+
+def distance_transform(free):
+    """空きセルから最も近い非空きセルまでのユークリッド距離 [セル]（scipy があれば scipy を使う）"""
+    try:
+        from scipy.ndimage import distance_transform_edt
+    except ImportError:
+        return _edt_numpy(free)
+    return distance_transform_edt(free)
+
+
+def _box_sum(a, radius):
+    """(2 * radius + 1) 四方の窓の和（累積和で計算。窓がはみ出す部分は 0 とみなす）"""
+    size = 2 * radius + 1
+    # 先頭に 0 を 1 つ余分に足しておくと、累積和の差がそのまま窓の和になる
+    padded = np.pad(a, (radius + 1, radius))
+    c = padded.cumsum(axis=0)
+    rows = c[size:] - c[:-size]
+    c = rows.cumsum(axis=1)
+    return c[:, size:] - c[:, :-size]
+
+
+def _tangent_angles(distance, radius):
+    """
+    各セルでのコースに沿った向き [rad]（ワールド座標。逆向きの 2 方向のどちらか）
+
+    距離場の勾配は壁の法線方向を向くので、周囲の勾配の構造テンソルの主軸を法線とし、それに直交する向きを返す。
+    通路の中央では勾配が左右で打ち消し合うが、構造テンソルは符号によらないため向きが定まる。
+    """
+    grad_row, grad_col = np.gradient(distance)
+    # 画像の行はワールドの -y 方向
+    gx, gy = grad_col, -grad_row
+    jxx = _box_sum(gx * gx, radius)
+    jxy = _box_sum(gx * gy, radius)
+    jyy = _box_sum(gy * gy, radius)
+    normal = 0.5 * np.arctan2(2.0 * jxy, jxx - jyy)
+    return (normal + np.pi / 2).astype(np.float32)
+
+
+class MapIndex:
+    """
+    マップの距離場と空きセルの索引
+
+    Attributes:
+        clearance: (H, W) float32。各セルの中心から最も近い壁までの距離 [m]（壁・未知のセルは 0）
+        tangent: (H, W) float32。各セルでのコースに沿った向き [rad]
+        free_cells: 空きセルのフラットなインデックス（clearance の小さい順）
+        free_clearance: free_cells の各セルの clearance（昇順）
+        key: マップ（PGM / YAML）の内容のハッシュ。このマップから作る他のキャッシュの判定に使う
+    """
+
+    def __init__(self, clearance, tangent, origin, resolution, key=None):
+        self.clearance = clearance
+        self.tangent = tangent
+        self.origin = origin
+        self.resolution = resolution
+        self.key = key
+        self.height, self.width = clearance.shape
+
+        flat = clearance.ravel()
+        cells = np.flatnonzero(flat > 0)
+        order = np.argsort(flat[cells], kind="stable")
+        self.free_cells = cells[order].astype(np.int32)
+        self.free_clearance = flat[self.free_cells]
+
+    @classmethod
+    def build(cls, map_path):
+        """マップから距離場を計算する（キャッシュを使わない）"""
+        map_img, origin, resolution, key = _read_map(map_path)
+        return cls._from_image(map_img, origin, resolution, key)
+
+    @classmethod
+    def _from_image(cls, map_img, origin, resolution, key=None):
+        free = map_img > FREE_THRESHOLD
+        distance = distance_transform(free)
+        radius = max(1, int(round(TANGENT_WINDOW / resolution)))
+        return cls((distance * resolution).astype(np.float32), _tangent_angles(distance, radius),
+                   [float(v) for v in origin[:2]], resolution, key)
+
+    @classmethod
+    def load(cls, map_path, cache_dir=None):
+        """
+        キャッシュがあれば読み込み、無いか古ければ計算して保存する
+
+        Args:
+            map_path: マップファイルのパス（拡張子なし）
+            cache_dir: キャッシュの保存先。None の場合はマップと同じディレクトリ。
+                       書き込めない場合は保存せずに計算結果だけを返す。
+        """
+        map_img, origin, resolution, key = _read_map(map_path)
+        cache_path = os.path.join(cache_dir or os.path.dirname(map_path),
+                                  os.path.basename(map_path) + CACHE_SUFFIX)
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if str(data["key"]) == key:
+                    return cls(data["clearance"], data["tangent"], [float(v) for v in origin[:2]], resolution, key)
+
+        index = cls._from_image(map_img, origin, resolution, key)
+        tmp_path = cache_path + ".tmp.npz"
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            np.savez(tmp_path, key=key, clearance=index.clearance, tangent=index.tangent)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return index
+
+    def world_to_cell(self, x, y):
+        """ワールド座標 -> (行, 列)。地図の外の座標も範囲外のインデックスのまま返す"""
+        col = np.floor((np.asarray(x, dtype=np.float64) - self.origin[0]) / self.resolution).astype(np.int64)
+        row = np.floor(self.height - (np.asarray(y, dtype=np.float64) - self.origin[1]) / self.resolution).astype(np.int64)
+        return row, col
+
+    def cell_to_world(self, row, col):
+        """(行, 列) -> セル中心のワールド座標"""
+        x = self.origin[0] + (np.asarray(col) + 0.5) * self.resolution
+        y = self.origin[1] + (self.height - np.asarray(row) - 0.5) * self.resolution
+        return x, y
+
+    def clearance_at(self, x, y):
+        """ワールド座標での壁までの距離 [m]（地図の外は 0）。x, y は配列でもよい"""
+        row, col = self.world_to_cell(x, y)
+        inside = (row >= 0) & (row < self.height) & (col >= 0) & (col < self.width)
+        result = np.zeros(np.shape(inside), dtype=np.float32)
+        result[inside] = self.clearance[row[inside], col[inside]]
+        return result if result.ndim else float(result)
+
+    def is_valid_pose(self, x, y, min_clearance):
+        """半径 min_clearance [m] 以内に壁・未知のセルが無いか"""
+        return np.asarray(self.clearance_at(x, y)) >= min_clearance
+
+    def num_valid_cells(self, min_clearance):
+        """壁までの距離が min_clearance 以上の空きセルの数"""
+        return len(self.free_cells) - int(np.searchsorted(self.free_clearance, min_clearance, side="left"))
+
+    def sample_poses(self, n, min_clearance, rng=None, yaw="tangent", yaw_noise=0.0):
+        """
+        壁までの距離が min_clearance 以上のセルから、スタート位置を一様に n 個選ぶ
+
+        Args:
+            n: 個数
+            min_clearance: 壁までの最小距離 [m]
+            rng: np.random.RandomState（None の場合は np.random）
+            yaw: "tangent" ならコースに沿った 2 方向のどちらか、"random" なら一様な向き
+            yaw_noise: 向きに加える一様ノイズの幅 [rad]（±yaw_noise）
+
+        Returns:
+            (n, 3) の [x, y, yaw]（位置はセルの中心）
+        """
+        rng = rng if rng is not None else np.random
+        start = int(np.searchsorted(self.free_clearance, min_clearance, side="left"))
+        if start >= len(self.free_cells):
+            raise ValueError(f"壁までの距離が {min_clearance} m 以上の空きセルがありません "
+                             f"(最大 {float(self.clearance.max()):.2f} m)")
+        cells = self.free_cells[rng.randint(start, len(self.free_cells), size=n)]
+        row, col = np.divmod(cells, self.width)
+
+        poses = np.empty((n, 3))
+        poses[:, 0], poses[:, 1] = self.cell_to_world(row, col)
+        if yaw == "tangent":
+            poses[:, 2] = self.tangent.ravel()[cells] + np.pi * rng.randint(2, size=n)
+        elif yaw == "random":
+            poses[:, 2] = rng.uniform(-np.pi, np.pi, size=n)
+        else:
+            raise ValueError(f"yaw は 'tangent' か 'random' を指定してください: {yaw!r}")
+        if yaw_noise > 0:
+            poses[:, 2] += rng.uniform(-yaw_noise, yaw_noise, size=n)
+        # [-π, π) に揃える
+        poses[:, 2] = (poses[:, 2] + np.pi) % (2 * np.pi) - np.pi
+        return poses
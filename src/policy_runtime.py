@@ -0,0 +1,170 @@
+"""
+NumPy だけで動く PPO 方策の推論ランタイム
+
+scripts/export_policy.py が書き出した .npz（決定論的アクターの重みと観測の正規化定数）を読み込み、
+stable-baselines3 / torch を import せずに model.predict(obs, deterministic=True) と同じ行動を計算します。
+実機（Jetson）のブリッジノードのように、起動時間とメモリを抑えたい用途向けです。
+
+    from src.policy_runtime import NumpyPolicy, ObservationPreprocessor
+    policy = NumpyPolicy.load("models/my_model_actor.npz")
+    pre = ObservationPreprocessor.from_policy(policy)
+    obs = pre.reset(scans, speed, steer)
+    action, _ = policy.predict(obs)
+"""
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+
+def save_policy_npz(path, hidden_weights, hidden_biases, action_weight, action_bias,
+                    activation, action_low, action_high, preprocess):
+    """
+    決定論的アクターを .npz に保存する
+
+    Args:
+        path: 保存先
+        hidden_weights / hidden_biases: 隠れ層の重み (out, in) とバイアス (out,) のリスト（入力側から順に）
+        action_weight / action_bias: 出力層 (action_dim, hidden) / (action_dim,)
+        activation: 隠れ層の活性化関数名 ("tanh" / "relu")
+        action_low / action_high: 行動空間の範囲（predict と同様にこの範囲へクリップする）
+        preprocess: 観測前処理の定数（config.py の値）を入れた dict
+    """
+    if activation not in _ACTIVATIONS:
+        raise ValueError(f"未対応の活性化関数です: {activation} (選択肢: {sorted(_ACTIVATIONS)})")
+    arrays = {}
+    for i, (w, b) in enumerate(zip(hidden_weights, hidden_biases)):
+        arrays[f"hidden_{i}_weight"] = np.asarray(w, dtype=np.float32)
+        arrays[f"hidden_{i}_bias"] = np.asarray(b, dtype=np.float32)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "num_hidden": len(hidden_weights),
+        "activation": activation,
+        "preprocess": preprocess,
+    }
+    np.savez(
+        path,
+        action_weight=np.asarray(action_weight, dtype=np.float32),
+        action_bias=np.asarray(action_bias, dtype=np.float32),
+        action_low=np.asarray(action_low, dtype=np.float32),
+        action_high=np.asarray(action_high, dtype=np.float32),
+        meta=np.array(json.dumps(meta)),
+        **arrays,
+    )
+
+
+class NumpyPolicy:
+    """
+    決定論的アクター（MLP + 出力層 + クリップ）の NumPy 実装
+
+    重みは転置済み (in, out) で保持し、predict は (obs_dim,) でも (N, obs_dim) でも受け付ける。
+    """
+
+    def __init__(self, hidden_weights, hidden_biases, action_weight, action_bias,
+                 activation, action_low, action_high, preprocess=None):
+        self._layers = [(np.ascontiguousarray(w.T), b) for w, b in zip(hidden_weights, hidden_biases)]
+        self._action_w = np.ascontiguousarray(action_weight.T)
+        self._action_b = action_bias
+        self._activation = _ACTIVATIONS[activation]
+        self.activation = activation
+        self.action_low = action_low
+        self.action_high = action_high
+        self.preprocess = preprocess or {}
+        self.obs_dim = self._layers[0][0].shape[0] if self._layers else self._action_w.shape[0]
+
+    @classmethod
+    def load(cls, path):
+        """export_policy.py が書き出した .npz を読み込む"""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["format_version"] != FORMAT_VERSION:
+                raise ValueError(f"未対応のフォーマットです: {meta['format_version']}")
+            hidden_weights = [data[f"hidden_{i}_weight"] for i in range(meta["num_hidden"])]
+            hidden_biases = [data[f"hidden_{i}_bias"] for i in range(meta["num_hidden"])]
+            return cls(hidden_weights, hidden_biases, data["action_weight"], data["action_bias"],
+                       meta["activation"], data["action_low"], data["action_high"], meta["preprocess"])
+
+    def forward(self, obs):
+        """クリップ前の行動（ガウス方策の平均）を返す"""
+        x = np.asarray(obs, dtype=np.float32)
+        for w, b in self._layers:
+            x = self._activation(x @ w + b)
+        return x @ self._action_w + self._action_b
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        """
+        stable-baselines3 の model.predict(obs, deterministic=True) と同じ形式で行動を返す
+
+        Returns:
+            (action, None)
+        """
+        action = np.clip(self.forward(obs), self.action_low, self.action_high)
+        return action, None
+
+
+class ObservationPreprocessor:
+    """
+    生の LiDAR と車両状態から、F1TenthRL._get_obs と同じ観測ベクトルを作る
+
+    正規化定数などは .npz に保存された学習時の config.py の値を使う。
+    """
+
+    def __init__(self, preprocess: dict):
+        # 方策だけを使う場合に Numba の import（起動時間・メモリ）を避けるため、ここで読み込む
+        from src.lidar_kernel import downsample_into, normalization_params, process_lidar
+
+        self._downsample_into = downsample_into
+        self._process_lidar = process_lidar
+        self.factor = preprocess["lidar_downsample_factor"]
+        self.include_residual = preprocess["include_lidar_residual"]
+        self.include_state = preprocess["include_vehicle_state"]
+        self.normalize = preprocess["normalize_observations"]
+        self.max_speed = preprocess["max_speed"]
+        self.state_mean = np.asarray(preprocess["vehicle_state_mean"])
+        self.state_std = np.asarray(preprocess["vehicle_state_std"])
+        self._params = normalization_params(
+            self.normalize, preprocess["lidar_mean"], preprocess["lidar_std"],
+            preprocess["lidar_residual_mean"], preprocess["lidar_residual_std"])
+
+        self.lidar_size = 1080 // self.factor
+        residual_size = self.lidar_size if self.include_residual else 0
+        self.obs_dim = self.lidar_size + residual_size + (2 if self.include_state else 0)
+        self._obs = np.zeros(self.obs_dim, dtype=np.float32)
+        self._lidar_view = self._obs[:self.lidar_size]
+        self._residual_view = self._obs[self.lidar_size:self.lidar_size + residual_size]
+        self._state_view = self._obs[self.lidar_size + residual_size:]
+        self._prev = np.zeros(self.lidar_size)
+        self._cur = np.zeros(self.lidar_size)
+        self._tmp = np.empty(self.lidar_size)
+
+    @classmethod
+    def from_policy(cls, policy: NumpyPolicy):
+        pre = cls(policy.preprocess)
+        if pre.obs_dim != policy.obs_dim:
+            raise ValueError(f"観測次元が一致しません: 前処理 {pre.obs_dim} / 方策 {policy.obs_dim} "
+                             "(エクスポート時の config.py が学習時と異なる可能性があります)")
+        return pre
+
+    def reset(self, scans, speed: float, steer: float):
+        """エピソード開始時の観測（残差 0）を返す"""
+        self._downsample_into(np.asarray(scans, dtype=np.float64), self._prev, self.factor)
+        return self(scans, speed, steer)
+
+    def __call__(self, scans, speed: float, steer: float):
+        """1 ステップ分の観測を返す（返り値は内部バッファのため、次の呼び出しで上書きされる）"""
+        self._process_lidar(np.asarray(scans, dtype=np.float64), self._prev, self._cur,
+                            self._lidar_view, self._residual_view, self.factor, self._params, self._tmp)
+        self._prev, self._cur = self._cur, self._prev
+        if self.include_state:
+            state = np.array([speed / self.max_speed, steer], dtype=np.float32)
+            if self.normalize:
+                self._state_view[:] = (state - self.state_mean) / self.state_std
+            else:
+                self._state_view[:] = state
+        return self._obs
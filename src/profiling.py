@@ -0,0 +1,122 @@
+"""
+ステージ単位の実行時間プロファイラ
+
+F1TenthRL.step / reset の各段階（sim・報酬・観測の計算）や方策推論の実行時間を
+time.perf_counter_ns で測り、ステージごとのストリーミングヒストグラムに積み上げます。
+ヒストグラムは 1 オクターブを SUBBINS 個に分けた対数ビンで、サンプルを保持せずに
+p50 / p95 / p99 を相対誤差 約 2% で求められます。pickle でき、別プロセスの結果と合算できます。
+
+    from src.profiling import StageProfiler, format_summary
+    profiler = StageProfiler()
+    env = F1TenthRL(config.MAP_PATH, profiler=profiler)
+    ...
+    print(format_summary(profiler.summary()))
+
+プロファイラを渡さない環境は計測を一切行いません（ステップごとに profiler の None 判定をするだけ）。
+"""
+import math
+
+# 1 オクターブ（2 倍）あたりのビン数。ビン幅は 2^(1/16) ≈ 4.4% で、ビンの中央を返すので誤差は約 2.2%
+SUBBINS = 16
+
+
+class StreamingHistogram:
+    """実行時間 [ns] の対数ビンのヒストグラム（件数・合計・最小・最大も保持する）"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = math.inf
+        self.max_ns = 0
+
+    def add(self, ns):
+        b = int(math.log2(ns) * SUBBINS) if ns > 1 else 0
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.count += 1
+        self.total_ns += ns
+        if ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        for b, n in other.counts.items():
+            self.counts[b] = self.counts.get(b, 0) + n
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.min_ns = min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+        return self
+
+    def quantile(self, q):
+        """q 分位点 [ns]（nearest-rank）。サンプルが無い場合は NaN"""
+        if self.count == 0:
+            return math.nan
+        rank = max(1, math.ceil(q * self.count))
+        if rank == 1:
+            return self.min_ns
+        if rank >= self.count:
+            return self.max_ns
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank:
+                break
+        value = 2.0 ** ((b + 0.5) / SUBBINS)
+        return min(max(value, self.min_ns), self.max_ns)
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else math.nan
+
+
+class StageProfiler:
+    """ステージ名 -> StreamingHistogram（ステージは最初に記録した順に並ぶ）"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage, ns):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = StreamingHistogram()
+        hist.add(ns)
+
+    def merge(self, other):
+        """別の StageProfiler（別プロセスの結果など）を合算する"""
+        for stage, hist in other.stages.items():
+            self.stages.setdefault(stage, StreamingHistogram()).merge(hist)
+        return self
+
+    def snapshot(self):
+        """これまでの計測結果を返し、計測をやり直す"""
+        result = StageProfiler()
+        result.stages, self.stages = self.stages, {}
+        return result
+
+    def summary(self):
+        """ステージごとの {count, mean_us, p50_us, p95_us, p99_us, max_us, total_sec}"""
+        return {
+            stage: {
+                "count": hist.count,
+                "mean_us": hist.mean_ns / 1e3,
+                "p50_us": hist.quantile(0.50) / 1e3,
+                "p95_us": hist.quantile(0.95) / 1e3,
+                "p99_us": hist.quantile(0.99) / 1e3,
+                "max_us": hist.max_ns / 1e3,
+                "total_sec": hist.total_ns / 1e9,
+            }
+            for stage, hist in self.stages.items()
+        }
+
+
+def format_summary(summary):
+    """summary() の結果を表にした文字列"""
+    width = max([len(stage) for stage in summary] + [5])
+    lines = [f"{'stage':<{width}} {'count':>9} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'total':>9}",
+             f"{'':<{width}} {'':>9} {'[us]':>9} {'[us]':>9} {'[us]':>9} {'[us]':>9} {'[s]':>9}"]
+    for stage, s in summary.items():
+        lines.append(f"{stage:<{width}} {s['count']:9d} {s['mean_us']:9.1f} {s['p50_us']:9.1f} "
+                     f"{s['p95_us']:9.1f} {s['p99_us']:9.1f} {s['total_sec']:9.2f}")
+    return "\n".join(lines)
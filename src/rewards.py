@@ -2,7 +2,8 @@
 報酬計算モジュール
 
 config.py から分離した報酬ロジックを集約します。
-calculate_reward() が唯一のエントリーポイントです。
+1 ステップ分は calculate_reward()、複数環境分をまとめて計算する場合は
+calculate_reward_batch() を使用します（両者の結果はビット単位で一致します）。
 
 テスト時は RewardConfig を使ってパラメータをモックできます:
     from src.rewards import RewardConfig, calculate_reward
@@ -10,12 +11,15 @@ calculate_reward() が唯一のエントリーポイントです。
     r = calculate_reward(scans, action, done, speed, reward_config=cfg)
 """
 from dataclasses import dataclass, field
+import importlib
+import os
+import sys
 import numpy as np
 
 
-@dataclass
+@dataclass(frozen=True)
 class RewardConfig:
-    """報酬計算に必要なハイパーパラメータをまとめた設定クラス。"""
+    """報酬計算に必要なハイパーパラメータをまとめた設定クラス（変更不可。値を変えるときは dataclasses.replace）。"""
     reward_collision: float = -2000.0
     reward_survival: float = 0.02
     reward_front_weight: float = 3.0
@@ -23,16 +27,43 @@ class RewardConfig:
     reward_centrality_weight: float = 0.5
     reward_distance_weight: float = 1.0
     reward_progress_weight: float = 2.0
+    # コースの中心線に沿った進み（src/track.py）の報酬と、中心線からの横ずれのペナルティ。
+    # 0 の場合は中心線を使わない（track_progress / lateral_ratio を渡しても無視する）
+    reward_track_progress_weight: float = 0.0
+    reward_lateral_weight: float = 0.0
     max_speed: float = 2.5
 
 
-def _load_default_config() -> RewardConfig:
-    """scripts/config.py からデフォルト設定を読み込む。"""
-    import sys
-    import os
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+# config.py から読み込んだ RewardConfig のキャッシュ（load_reward_config() で更新）
+_default_config = None
+
+
+def _import_config(reload_module: bool = False):
+    """scripts/config.py を import する。sys.path への追加は初回のみ行う。"""
+    if _SCRIPTS_DIR not in sys.path:
+        sys.path.append(_SCRIPTS_DIR)
     import config
-    return RewardConfig(
+    if reload_module:
+        config = importlib.reload(config)
+    return config
+
+
+def load_reward_config(reload_module: bool = False) -> RewardConfig:
+    """
+    scripts/config.py から RewardConfig を作り直してキャッシュを更新する。
+
+    Args:
+        reload_module: True の場合は config.py をディスクから再読み込みする
+                       （学習中に config.py を書き換えた場合の反映用）。
+
+    Returns:
+        RewardConfig: 新しく作成した設定
+    """
+    global _default_config
+    config = _import_config(reload_module)
+    _default_config = RewardConfig(
         reward_collision=config.REWARD_COLLISION,
         reward_survival=config.REWARD_SURVIVAL,
         reward_front_weight=config.REWARD_FRONT_WEIGHT,
@@ -40,8 +71,23 @@ def _load_default_config() -> RewardConfig:
         reward_centrality_weight=config.REWARD_CENTRALITY_WEIGHT,
         reward_distance_weight=config.REWARD_DISTANCE_WEIGHT,
         reward_progress_weight=config.REWARD_PROGRESS_WEIGHT,
+        reward_track_progress_weight=config.REWARD_TRACK_PROGRESS_WEIGHT,
+        reward_lateral_weight=config.REWARD_LATERAL_WEIGHT,
         max_speed=config.MAX_SPEED,
     )
+    return _default_config
+
+
+def _load_default_config() -> RewardConfig:
+    """キャッシュ済みのデフォルト設定を返す（初回のみ config.py から読み込む）。"""
+    if _default_config is None:
+        return load_reward_config()
+    return _default_config
+
+
+def uses_track(cfg: RewardConfig) -> bool:
+    """報酬の計算にコースの中心線（track_progress / lateral_ratio）が必要か"""
+    return cfg.reward_track_progress_weight != 0.0 or cfg.reward_lateral_weight != 0.0
 
 
 def calculate_reward(
@@ -54,6 +100,8 @@ def calculate_reward(
     cur_x: float = 0.0,
     cur_y: float = 0.0,
     reward_config: RewardConfig = None,
+    track_progress: float = None,
+    lateral_ratio: float = None,
 ) -> float:
     """
     1ステップ分の報酬を計算して返す。
@@ -65,8 +113,10 @@ def calculate_reward(
         current_speed: 現在の車の速度 (m/s)
         prev_x, prev_y: 前ステップの位置
         cur_x, cur_y: 現在の位置
-        reward_config: 報酬パラメータ。None の場合は config.py から自動読み込み。
+        reward_config: 報酬パラメータ。None の場合は config.py から読み込んだキャッシュを使用。
                        テスト時は RewardConfig オブジェクトを渡すことでモック可能。
+        track_progress: 前ステップからの中心線に沿った進み [m]（src.track.ProgressTracker.update の値）
+        lateral_ratio: 中心線からの |横ずれ| / コース半幅（0 = 中心線上、1 = 壁際）
 
     Returns:
         float: 報酬値
@@ -107,9 +157,104 @@ def calculate_reward(
     progress = np.sqrt((cur_x - prev_x) ** 2 + (cur_y - prev_y) ** 2)
     reward += progress * cfg.reward_progress_weight * progress_scale
 
+    # 5b. 中心線に沿った進み・横ずれ（逆走や同じ場所での旋回では進みが増えない）
+    if track_progress is not None:
+        reward += track_progress * cfg.reward_track_progress_weight * progress_scale
+    if lateral_ratio is not None:
+        reward -= lateral_ratio * cfg.reward_lateral_weight
+
     # 6. ステアリング安定性（条件付き）
     if front_dist > 5.0:
         reward += (1.0 - abs(action[0])) * 0.2
     reward += cfg.reward_survival
 
     return reward
+
+
+# LiDAR のセクター境界（calculate_reward のスライスに対応）
+#   right = [340:380], front = [350:730], left = [700:740], 全体 = [0:1080]
+# 境界で区切った 7 区間の最小値を 1 回の reduceat で求め、各セクターはその組み合わせで得る
+_SECTOR_BOUNDS = np.array([0, 340, 350, 380, 700, 730, 740])
+
+
+def calculate_reward_batch(
+    scans,
+    actions,
+    dones,
+    speeds,
+    prev_xy,
+    cur_xy,
+    cfg: RewardConfig = None,
+    track_progress=None,
+    lateral_ratio=None,
+) -> np.ndarray:
+    """
+    N 環境分の報酬をまとめて計算して返す。
+
+    calculate_reward() と同じ式を分岐なし（np.where）で配列に適用するため、
+    同じ入力に対して calculate_reward() とビット単位で一致する値を返す。
+
+    Args:
+        scans: LiDARの距離データ (N, 1080)
+        actions: AIの出力 (N, 2) [ステアリング, 速度]
+        dones: 衝突判定フラグ (N,)
+        speeds: 現在の車の速度 (N,) (m/s)
+        prev_xy: 前ステップの位置 (N, 2)
+        cur_xy: 現在の位置 (N, 2)
+        cfg: 報酬パラメータ。None の場合は config.py から読み込んだキャッシュを使用。
+        track_progress: 中心線に沿った進み (N,) [m]（calculate_reward と同じ。省略可）
+        lateral_ratio: |横ずれ| / コース半幅 (N,)（省略可）
+
+    Returns:
+        np.ndarray: 報酬値 (N,)
+    """
+    cfg = cfg if cfg is not None else _load_default_config()
+    scans = np.asarray(scans)
+    actions = np.asarray(actions)
+    speeds = np.asarray(speeds)
+    prev_xy = np.asarray(prev_xy)
+    cur_xy = np.asarray(cur_xy)
+
+    # 区間最小値: [0:340], [340:350], [350:380], [380:700], [700:730], [730:740], [740:]
+    seg = np.minimum.reduceat(scans, _SECTOR_BOUNDS, axis=1)
+    front_dist = np.minimum(np.minimum(seg[:, 2], seg[:, 3]), seg[:, 4])
+    right_dist = np.minimum(seg[:, 1], seg[:, 2])
+    left_dist = np.minimum(seg[:, 4], seg[:, 5])
+    min_dist = seg.min(axis=1)
+
+    # 1. 前方空間報酬
+    reward = (front_dist / 30.0) * cfg.reward_front_weight
+
+    # 2. 速度報酬 / コーナー前ペナルティ
+    speed_factor = speeds / cfg.max_speed
+    speed_term = speed_factor * cfg.reward_speed_weight
+    near = front_dist < 2.0
+    mid = ~near & (front_dist < 4.0)
+    reward = np.where(near, reward - speed_term * 1.0,
+                      np.where(mid, reward + speed_term * 0.1, reward + speed_term))
+    progress_scale = np.where(near, 0.0, np.where(mid, 0.3, 1.0))
+
+    # 3. 壁接近ペナルティ
+    reward = np.where(min_dist < 1.0,
+                      reward - cfg.reward_distance_weight * (1.0 - (min_dist / 1.0)),
+                      reward)
+
+    # 4. 中央維持報酬
+    centrality = 1.0 - np.abs(left_dist - right_dist) / (left_dist + right_dist + 1e-6)
+    reward = reward + centrality * cfg.reward_centrality_weight
+
+    # 5. 走行距離報酬
+    progress = np.sqrt((cur_xy[:, 0] - prev_xy[:, 0]) ** 2 + (cur_xy[:, 1] - prev_xy[:, 1]) ** 2)
+    reward = reward + progress * cfg.reward_progress_weight * progress_scale
+
+    # 5b. 中心線に沿った進み・横ずれ
+    if track_progress is not None:
+        reward = reward + np.asarray(track_progress) * cfg.reward_track_progress_weight * progress_scale
+    if lateral_ratio is not None:
+        reward = reward - np.asarray(lateral_ratio) * cfg.reward_lateral_weight
+
+    # 6. ステアリング安定性
+    reward = np.where(front_dist > 5.0, reward + (1.0 - np.abs(actions[:, 0])) * 0.2, reward)
+    reward = reward + cfg.reward_survival
+
+    return np.where(np.asarray(dones, dtype=bool), cfg.reward_collision, reward)
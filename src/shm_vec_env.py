@@ -0,0 +1,274 @@
+"""
+共有メモリで観測を受け渡すマルチプロセス VecEnv
+
+SubprocVecEnv は毎ステップ、観測・報酬・終了フラグ・info を pickle してパイプで送ります。
+SharedMemoryVecEnv では、行動・観測・報酬・終了フラグ（と必要なら生の LiDAR）を
+multiprocessing.shared_memory 上の NumPy 配列として親とワーカーで共有し、ワーカーはそこへ直接書き込みます。
+パイプを通るのは短い制御メッセージだけで、info はエピソードが終わったステップ（まれ）にだけ送ります。
+
+    from src.vec_env import make_vec_env
+    env = make_vec_env(config.MAP_PATH, num_envs=16, backend="shm", seed=0)
+
+F1TenthRL（gym 0.23 の API）も gymnasium の API の環境も動かせます。各ステップの info は
+終了したステップ以外は空で（raw_scans=True の場合は 'raw_scan' だけが入る）、
+終了したステップでは環境の info に 'terminal_observation' を加えたものになります。
+"""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+from src.vec_env import resolve_seed
+
+SCAN_SIZE = 1080
+
+_STEP = ("step", None)
+
+
+class _RemoteError:
+    """ワーカーで env_method / get_attr / set_attr が送出した例外（親プロセスで送出し直す）"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _layout(num_envs, obs_dim, act_dim, raw_scans):
+    """共有メモリ上の配列の並び: 名前 -> (オフセット [byte], 形状, dtype)"""
+    arrays = [
+        ("actions", (num_envs, act_dim), np.float32),
+        ("obs", (num_envs, obs_dim), np.float32),
+        ("terminal_obs", (num_envs, obs_dim), np.float32),
+        ("rewards", (num_envs,), np.float32),
+        ("dones", (num_envs,), np.bool_),
+    ]
+    if raw_scans:
+        arrays.append(("scans", (num_envs, SCAN_SIZE), np.float64))
+    layout = {}
+    offset = 0
+    for name, shape, dtype in arrays:
+        layout[name] = (offset, shape, dtype)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += (size + 63) // 64 * 64
+    return layout, offset
+
+
+def _views(shm, layout):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()}
+
+
+def _box(space):
+    """gym / gymnasium の Box を gymnasium の Box にする（SB3 は gymnasium の空間を前提とする）"""
+    return spaces.Box(low=space.low, high=space.high, shape=space.shape, dtype=space.dtype)
+
+
+def _reset(env):
+    result = env.reset()
+    return result[0] if isinstance(result, tuple) else result
+
+
+def _worker(remote, parent_remote, env_fn_wrapper, index):
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    remote.send((_box(env.observation_space), _box(env.action_space)))
+    shm_name, layout = remote.recv()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _views(shm, layout)
+    action = views["actions"][index]
+    obs_out = views["obs"][index]
+    terminal_out = views["terminal_obs"][index]
+    rewards, dones = views["rewards"], views["dones"]
+    scan_out = views["scans"][index] if "scans" in views else None
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                result = env.step(action.copy())
+                if len(result) == 5:
+                    obs, reward, terminated, truncated, info = result
+                    done = terminated or truncated
+                else:
+                    obs, reward, done, info = result
+                if scan_out is not None:
+                    scan_out[:] = info.pop('raw_scan')
+                rewards[index] = reward
+                dones[index] = done
+                if done:
+                    terminal_out[:] = obs
+                    obs_out[:] = _reset(env)
+                    info.pop('raw_scan', None)
+                    remote.send(info)
+                else:
+                    obs_out[:] = obs
+                    remote.send(None)
+            elif cmd == "reset":
+                obs_out[:] = _reset(env)
+                remote.send(None)
+            elif cmd in ("env_method", "get_attr", "set_attr"):
+                # 例外でワーカーが終了すると親はパイプの EOFError しか受け取れないため、例外を送り返す
+                # （gym 0.23 の環境には render_mode が無く、VecEnv.__init__ の get_attr が AttributeError になる）
+                try:
+                    if cmd == "env_method":
+                        result = getattr(env, data[0])(*data[1], **data[2])
+                    elif cmd == "get_attr":
+                        result = getattr(env, data)
+                    else:
+                        result = setattr(env, data[0], data[1])
+                except Exception as e:
+                    result = _RemoteError(e)
+                remote.send(result)
+            elif cmd == "close":
+                env.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"未対応のコマンドです: {cmd}")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del action, obs_out, terminal_out, rewards, dones, scan_out, views
+        shm.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    1 環境 1 プロセスで動かし、ステップごとのデータを共有メモリで受け渡す VecEnv
+
+    SubprocVecEnv と同じく env_fns（環境を返す関数のリスト）から作る。観測は Box（1 次元）のみ対応。
+    """
+
+    def __init__(self, env_fns, raw_scans: bool = False, start_method: str = None):
+        """
+        Args:
+            env_fns: 環境を生成する関数のリスト（ワーカープロセス内で呼ばれる）
+            raw_scans: True の場合、環境の info['raw_scan'] (1080,) も共有メモリで受け渡し、
+                       各ステップの info['raw_scan'] に入れる（次の step で上書きされるビュー）。
+                       環境は info['raw_scan'] を返す設定で作ること。
+            start_method: multiprocessing の開始方法。None の場合は forkserver（使えなければ spawn）
+        """
+        self.waiting = False
+        self.closed = False
+        num_envs = len(env_fns)
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(num_envs)])
+        self.processes = []
+        self._shm = None
+        for index, (work_remote, remote, env_fn) in enumerate(zip(work_remotes, self.remotes, env_fns)):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, CloudpickleWrapper(env_fn), index),
+                                  daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        try:
+            observation_space, action_space = [remote.recv() for remote in self.remotes][0]
+            if len(observation_space.shape) != 1 or len(action_space.shape) != 1:
+                raise ValueError("SharedMemoryVecEnv は 1 次元の Box の観測・行動のみ対応しています")
+            layout, size = _layout(num_envs, observation_space.shape[0], action_space.shape[0], raw_scans)
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._buffers = _views(self._shm, layout)
+            for remote in self.remotes:
+                remote.send((self._shm.name, layout))
+            super().__init__(num_envs, observation_space, action_space)
+        except BaseException:
+            # 初期化に失敗した場合もワーカーを止め、共有メモリを残さない
+            self._abort()
+            raise
+
+    def _abort(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        self._buffers = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+        self.closed = True
+
+    def seed(self, seed=None):
+        """
+        ワーカー i の環境のスタート位置の乱数を seed + i で初期化する（F1TenthRL.seed）
+
+        seed が None の場合も基準シードを新しく決めて配り、ワーカーどうしで乱数の列がそろわないようにする。
+        """
+        seed = resolve_seed(seed)
+        seeds = [seed + i for i in range(self.num_envs)]
+        for remote, env_seed in zip(self.remotes, seeds):
+            remote.send(("env_method", ("seed", (env_seed,), {})))
+        for remote in self.remotes:
+            remote.recv()
+        return seeds
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+        return self._buffers["obs"].copy()
+
+    def step_async(self, actions):
+        self._buffers["actions"][:] = np.asarray(actions, dtype=np.float32).reshape(self._buffers["actions"].shape)
+        for remote in self.remotes:
+            remote.send(_STEP)
+        self.waiting = True
+
+    def step_wait(self):
+        messages = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        buffers = self._buffers
+        infos = [{} if info is None else info for info in messages]
+        for i, info in enumerate(messages):
+            if info is not None:
+                info["terminal_observation"] = buffers["terminal_obs"][i].copy()
+        if "scans" in buffers:
+            for info, scan in zip(infos, buffers["scans"]):
+                info['raw_scan'] = scan
+        # 観測は次の step で上書きされるため、SB3 が保持できるようにコピーして返す
+        return buffers["obs"].copy(), buffers["rewards"].copy(), buffers["dones"].copy(), infos
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._buffers = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # 呼び出し側が info['raw_scan'] のビューを持っている場合はプロセスの終了時に解放される
+            pass
+        self._shm.unlink()
+        self.closed = True
+
+    def _send_to(self, indices, cmd, data):
+        targets = [self.remotes[i] for i in self._get_indices(indices)]
+        for remote in targets:
+            remote.send((cmd, data))
+        results = [remote.recv() for remote in targets]
+        for result in results:
+            if isinstance(result, _RemoteError):
+                raise result.error
+        return results
+
+    def get_attr(self, attr_name, indices=None):
+        return self._send_to(indices, "get_attr", attr_name)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._send_to(indices, "set_attr", (attr_name, value))
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._send_to(indices, "env_method", (method_name, method_args, method_kwargs))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,272 @@
+"""
+ハイパーパラメータ探索（sweep）の探索空間・試行の記録・ASHA による打ち切り
+
+探索空間は config.py の変数名をキーにした JSON で書きます。値は分布の指定か、候補のリスト（choice と同じ）です。
+
+    {
+        "LEARNING_RATE": {"loguniform": [1e-5, 1e-3]},
+        "PPO_ENT_COEF": {"uniform": [0.0, 0.02]},
+        "NET_ARCH": [[64, 64], [128, 128], [256, 256]],
+        "REWARD_FRONT_WEIGHT": {"uniform": [1.0, 5.0]}
+    }
+
+試行は学習ステップ数の段（rung: min_steps, min_steps * eta, ..., max_steps）ごとに評価し、
+各段で評価済みの試行のうち上位 1 / eta に入ったものだけを次の段へ進めます（非同期の successive halving, ASHA）。
+全試行がそろうのを待たないため、ワーカーが空くたびに「昇格できる試行」か「新しい試行」をすぐ割り当てられます。
+
+試行の設定と各段の評価結果は JSON（SweepStore）に結果が出るたびに書き出すため、
+sweep を途中で止めても、同じ出力先で再実行すれば評価済みの段をやり直さずに続きから再開します。
+学習と評価の実行は scripts/sweep.py が行い、このモジュールは gym / stable-baselines3 を import しません。
+"""
+import json
+import math
+import os
+from dataclasses import fields, replace
+
+import numpy as np
+
+from src.env_config import EnvConfig
+from src.rewards import RewardConfig
+
+STORE_VERSION = 1
+
+# PPO のコンストラクタ引数になる探索パラメータ（config.py の変数名 -> PPO の引数名）
+PPO_PARAMS = {
+    "LEARNING_RATE": "learning_rate",
+    "PPO_ENT_COEF": "ent_coef",
+    "NET_ARCH": "net_arch",
+}
+
+_ENV_FIELDS = {f.name for f in fields(EnvConfig)} - {"reward"}
+_REWARD_FIELDS = {f.name for f in fields(RewardConfig)}
+
+
+def sample_params(space, rng):
+    """
+    探索空間から 1 組のパラメータを選ぶ
+
+    Args:
+        space: {変数名: 分布} の dict。分布は {"uniform": [lo, hi]} / {"loguniform": [lo, hi]} /
+               {"int": [lo, hi]}（両端を含む）/ {"choice": [...]} / 候補のリスト
+        rng: np.random.Generator
+
+    Returns:
+        dict: JSON に保存できる値だけを持つ {変数名: 値}
+    """
+    params = {}
+    for name in sorted(space):
+        spec = space[name]
+        if isinstance(spec, list):
+            spec = {"choice": spec}
+        if not isinstance(spec, dict) or len(spec) != 1:
+            raise ValueError(f"{name} の分布の指定が不正です: {spec!r}")
+        (kind, arg), = spec.items()
+        if kind == "choice":
+            if not arg:
+                raise ValueError(f"{name} の候補が空です")
+            params[name] = arg[int(rng.integers(len(arg)))]
+        elif kind == "uniform":
+            params[name] = float(rng.uniform(arg[0], arg[1]))
+        elif kind == "loguniform":
+            if arg[0] <= 0 or arg[1] <= 0:
+                raise ValueError(f"{name} の loguniform の範囲は正の値にしてください: {arg}")
+            params[name] = float(math.exp(rng.uniform(math.log(arg[0]), math.log(arg[1]))))
+        elif kind == "int":
+            params[name] = int(rng.integers(arg[0], arg[1] + 1))
+        else:
+            raise ValueError(f"{name} の分布 {kind!r} には対応していません（uniform / loguniform / int / choice）")
+    return params
+
+
+def trial_settings(params, env_config: EnvConfig):
+    """
+    探索パラメータを PPO の引数と EnvConfig に振り分ける
+
+    PPO_PARAMS にある変数は PPO の引数に、EnvConfig / RewardConfig のフィールド名を大文字にした変数
+    （MAX_SPEED, START_POSE_SAMPLING, REWARD_FRONT_WEIGHT など）は env_config を置き換えた新しい設定になる。
+    MAX_SPEED は行動の変換と報酬の速度の正規化の両方に使う。
+
+    Returns:
+        (dict, EnvConfig): PPO に渡す引数（指定されたものだけ）と、この試行の環境の設定
+    """
+    ppo_kwargs, env_overrides, reward_overrides = {}, {}, {}
+    for name, value in params.items():
+        key = name.lower()
+        if name in PPO_PARAMS:
+            ppo_kwargs[PPO_PARAMS[name]] = value
+        elif key in _ENV_FIELDS or key in _REWARD_FIELDS:
+            if key in _ENV_FIELDS:
+                env_overrides[key] = _freeze(value)
+            if key in _REWARD_FIELDS:
+                reward_overrides[key] = value
+        else:
+            raise ValueError(f"探索できないパラメータです: {name}")
+    reward = replace(env_config.reward, **reward_overrides)
+    return ppo_kwargs, replace(env_config, reward=reward, **env_overrides)
+
+
+def _freeze(value):
+    """JSON のリスト（入れ子を含む）を EnvConfig のフィールドに使えるタプルにする"""
+    return tuple(_freeze(v) for v in value) if isinstance(value, list) else value
+
+
+def rung_budgets(min_steps, max_steps, eta):
+    """各段の学習ステップ数 [min_steps, min_steps * eta, ..., max_steps]"""
+    if eta < 2:
+        raise ValueError(f"eta は 2 以上を指定してください: {eta}")
+    if not 0 < min_steps <= max_steps:
+        raise ValueError(f"0 < min_steps <= max_steps にしてください: {min_steps}, {max_steps}")
+    budgets = []
+    budget = min_steps
+    while budget < max_steps:
+        budgets.append(int(budget))
+        budget *= eta
+    budgets.append(int(max_steps))
+    return budgets
+
+
+class SweepStore:
+    """
+    sweep の設定と試行ごとの結果を 1 つの JSON に保存する
+
+    trials は {試行番号: {"params": ..., "results": [段 0 の結果, 段 1 の結果, ...], "error": ...}}。
+    書き込みは一時ファイルから os.replace で置き換えるため、途中で止めても壊れたファイルは残らない。
+    """
+
+    def __init__(self, path, settings, trials=None):
+        self.path = path
+        self.settings = settings
+        self.trials = trials if trials is not None else {}
+
+    @classmethod
+    def open(cls, path, settings):
+        """
+        path の記録を読み込む（無ければ新しく作る）
+
+        Raises:
+            ValueError: 既存の記録の設定（探索空間・段・評価指標など）が settings と異なる場合
+        """
+        # タプルなどを JSON から読んだ値と比べられる形にそろえる
+        settings = json.loads(json.dumps(settings))
+        if not os.path.exists(path):
+            store = cls(path, settings)
+            store.save()
+            return store
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != STORE_VERSION:
+            raise ValueError(f"対応していない sweep の記録です: {path}")
+        if data["settings"] != settings:
+            changed = sorted(k for k in set(data["settings"]) | set(settings)
+                             if data["settings"].get(k) != settings.get(k))
+            raise ValueError(f"{path} は別の設定の sweep です（異なる項目: {', '.join(changed)}）")
+        trials = {int(tid): trial for tid, trial in data["trials"].items()}
+        return cls(path, settings, trials)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": STORE_VERSION, "settings": self.settings,
+                       "trials": {str(tid): trial for tid, trial in sorted(self.trials.items())}}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def add_trial(self, params):
+        trial_id = len(self.trials)
+        self.trials[trial_id] = {"params": params, "results": []}
+        self.save()
+        return trial_id
+
+    def record(self, trial_id, rung, result):
+        """段 rung の評価結果を記録する（同じ段を再実行した場合は上書き）"""
+        results = self.trials[trial_id]["results"]
+        if rung > len(results):
+            raise ValueError(f"試行 {trial_id} の段 {rung - 1} の結果がありません")
+        del results[rung:]
+        results.append(result)
+        self.save()
+
+    def record_error(self, trial_id, rung, message):
+        """試行が失敗したことを記録する（以降は昇格も再実行もしない）"""
+        self.trials[trial_id]["error"] = {"rung": rung, "message": message}
+        self.save()
+
+
+class AshaScheduler:
+    """
+    非同期の successive halving で次に実行する (試行番号, 段) を決める
+
+    段 k の結果が n 個あるとき、その上位 floor(n / eta) 個に入った試行を段 k + 1 へ昇格させる。
+    空いたワーカーには、上の段の昇格を優先し、無ければ未実行の試行・新しい試行を割り当てる。
+    """
+
+    def __init__(self, store: SweepStore, space, budgets, eta, max_trials, metric, maximize=True, seed=0):
+        self.store = store
+        self.space = space
+        self.budgets = budgets
+        self.eta = eta
+        self.max_trials = max_trials
+        self.metric = metric
+        self.maximize = maximize
+        self.seed = seed
+
+    def score(self, result):
+        """大きいほど良い値にした評価指標（指標が無い結果は最下位）"""
+        value = result["metrics"].get(self.metric)
+        if value is None or math.isnan(value):
+            return -math.inf
+        return value if self.maximize else -value
+
+    def promotable(self, rung, running=()):
+        """段 rung から昇格できる試行番号（良い順）"""
+        scored = [(self.score(trial["results"][rung]), tid) for tid, trial in self.store.trials.items()
+                  if len(trial["results"]) > rung]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        top = scored[:len(scored) // self.eta]
+        return [tid for _, tid in top
+                if len(self.store.trials[tid]["results"]) == rung + 1
+                and "error" not in self.store.trials[tid] and tid not in running]
+
+    def next_job(self, running=()):
+        """
+        次に実行する (試行番号, 段)。実行できるものが無ければ None
+
+        running: 実行中の試行番号（同じ試行を同時に 2 つ実行しない）
+        """
+        for rung in reversed(range(len(self.budgets) - 1)):
+            candidates = self.promotable(rung, running)
+            if candidates:
+                return candidates[0], rung + 1
+        # 中断で結果の出なかった試行を先にやり直す
+        for tid, trial in sorted(self.store.trials.items()):
+            if not trial["results"] and "error" not in trial and tid not in running:
+                return tid, 0
+        if len(self.store.trials) < self.max_trials:
+            # 試行番号ごとに乱数を決めるため、再開しても同じパラメータ列になる
+            rng = np.random.default_rng([self.seed, len(self.store.trials)])
+            return self.store.add_trial(sample_params(self.space, rng)), 0
+        return None
+
+    def status(self, trial_id, running=()):
+        """
+        試行の状態（running / completed / failed / stopped / pending）
+
+        stopped は最後の段まで進んでいない試行（試行が増えて順位の枠が広がれば、あとから昇格する場合がある）。
+        """
+        trial = self.store.trials[trial_id]
+        if trial_id in running:
+            return "running"
+        if "error" in trial:
+            return "failed"
+        if len(trial["results"]) == len(self.budgets):
+            return "completed"
+        return "stopped" if trial["results"] else "pending"
+
+    def leaderboard(self):
+        """到達した段の高い順、同じ段では評価指標の良い順に並べた (試行番号, 最後の結果) のリスト"""
+        rows = [(tid, trial["results"][-1]) for tid, trial in self.store.trials.items() if trial["results"]]
+        rows.sort(key=lambda row: (-len(self.store.trials[row[0]]["results"]), -self.score(row[1]), row[0]))
+        return rows
+
+    def total_steps(self):
+        """全試行の学習ステップ数の合計"""
+        return sum(trial["results"][-1]["steps"] for trial in self.store.trials.values() if trial["results"])
@@ -0,0 +1,521 @@
+"""
+コースの中心線と、位置 -> 走行距離（弧長）・横方向のずれの参照表
+
+マップの空き領域を細線化して中心線を取り出し、各空きセルに「最も近い中心線上の点」を対応づけた格子を
+1 度だけ作って、マップの隣に <マップ名>.track.npz としてキャッシュします（src/map_index.py の距離場を利用）。
+位置の問い合わせはセルの参照 1 回と内積だけなので O(1) で、配列でまとめて問い合わせることもできます。
+
+    from src.track import Track, ProgressTracker
+    track = Track.load(config.MAP_PATH, start_pose=config.START_POSE)
+    s, offset, half_width = track.project(x, y)   # 弧長 [m]・左を正とする横ずれ [m]・その地点のコース半幅 [m]
+    tracker = ProgressTracker(track)
+    tracker.reset(x0, y0)
+    delta = tracker.update(x, y)                    # 前回からの進み [m]（周回コースではスタート地点をまたいでも連続）
+
+周回コースでは start_pose に最も近い中心線上の点を弧長 0 とし、start_pose の向きを進行方向とします。
+"""
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+from src.map_index import MapIndex
+
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".track.npz"
+
+# 中心線を平滑化する移動平均の幅 [m]（細線化で生じる 1 セル単位の段差を消す）
+SMOOTHING = 0.3
+
+_NEIGHBORS_8 = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def _largest_component(mask):
+    """8 近傍で連結な True の領域のうち最大のものを返す"""
+    height, width = mask.shape
+    flat = mask.ravel()
+    label = np.zeros(flat.shape, dtype=np.int32)
+    best, best_size = 0, 0
+    current = 0
+    for seed in np.flatnonzero(flat):
+        if label[seed]:
+            continue
+        current += 1
+        label[seed] = current
+        queue = deque([seed])
+        size = 0
+        while queue:
+            cell = queue.popleft()
+            size += 1
+            row, col = divmod(int(cell), width)
+            for dr, dc in _NEIGHBORS_8:
+                r, c = row + dr, col + dc
+                if 0 <= r < height and 0 <= c < width:
+                    n = r * width + c
+                    if flat[n] and not label[n]:
+                        label[n] = current
+                        queue.append(n)
+        if size > best_size:
+            best, best_size = current, size
+    return (label == best).reshape(mask.shape)
+
+
+def thin(mask):
+    """
+    Zhang-Suen の細線化（幅 1 セルの 8 連結な骨格を返す）
+
+    各反復で、境界上にあって消しても連結性が変わらないセルをまとめて消す（NumPy のシフトで一括判定）。
+    """
+    img = np.pad(mask, 1).astype(np.uint8)
+    while True:
+        changed = False
+        for step in (0, 1):
+            p2, p3, p4 = img[:-2, 1:-1], img[:-2, 2:], img[1:-1, 2:]
+            p5, p6, p7 = img[2:, 2:], img[2:, 1:-1], img[2:, :-2]
+            p8, p9 = img[1:-1, :-2], img[:-2, :-2]
+            ring = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+            count = sum(p.astype(np.int32) for p in ring[:-1])
+            transitions = sum(((a == 0) & (b == 1)).astype(np.int32) for a, b in zip(ring[:-1], ring[1:]))
+            if step == 0:
+                side = (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0)
+            else:
+                side = (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)
+            remove = (img[1:-1, 1:-1] == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & side
+            if remove.any():
+                img[1:-1, 1:-1][remove] = 0
+                changed = True
+        if not changed:
+            return img[1:-1, 1:-1].astype(bool)
+
+
+def _skeleton_graph(skeleton):
+    """骨格のセル (N, 2) と、8 近傍の隣接リストを返す"""
+    cells = np.argwhere(skeleton)
+    index = {(int(r), int(c)): i for i, (r, c) in enumerate(cells)}
+    neighbors = [[index[(r + dr, c + dc)] for dr, dc in _NEIGHBORS_8 if (r + dr, c + dc) in index]
+                 for r, c in index]
+    return cells, neighbors
+
+
+def _bfs(neighbors, root, alive=None):
+    """root からの BFS。(距離, 親) を返す（到達しないノードは距離 -1）"""
+    dist = [-1] * len(neighbors)
+    parent = [-1] * len(neighbors)
+    dist[root] = 0
+    queue = deque([root])
+    while queue:
+        u = queue.popleft()
+        for v in neighbors[u]:
+            if dist[v] < 0 and (alive is None or alive[v]):
+                dist[v] = dist[u] + 1
+                parent[v] = u
+                queue.append(v)
+    return dist, parent
+
+
+def _path_to(parent, node):
+    path = []
+    while node >= 0:
+        path.append(node)
+        node = parent[node]
+    return path[::-1]
+
+
+def _prune_spurs(neighbors):
+    """次数 1 以下のノードを繰り返し消し、閉路に乗っているノードだけを残す"""
+    degree = [len(n) for n in neighbors]
+    alive = [True] * len(neighbors)
+    queue = deque(i for i, d in enumerate(degree) if d <= 1)
+    while queue:
+        u = queue.popleft()
+        if not alive[u]:
+            continue
+        alive[u] = False
+        for v in neighbors[u]:
+            if alive[v]:
+                degree[v] -= 1
+                if degree[v] <= 1:
+                    queue.append(v)
+    return alive
+
+
+def _trace_centerline(skeleton, clearance):
+    """
+    骨格から中心線のセル列を取り出す。(セルの配列 (M, 2), 周回コースか) を返す
+
+    枝を刈り込んだ後に残る閉路のうち、コース幅が最も広い点 p0 を通る最大の閉路を周回路とする
+    （p0 からの BFS 木で、根の別々の枝に属する 2 点を結ぶ辺が閉路を作る。両端の深さの和が最大の辺を選ぶ）。
+    閉路が骨格の大部分を占めない場合（コースが周回していない）は、骨格の最長経路を使う。
+    """
+    cells, neighbors = _skeleton_graph(skeleton)
+    if len(cells) < 3:
+        raise ValueError("コースの骨格が取り出せませんでした（空き領域が小さすぎます）")
+
+    alive = _prune_spurs(neighbors)
+    core = [i for i in range(len(cells)) if alive[i]]
+    if core:
+        p0 = max(core, key=lambda i: clearance[cells[i][0], cells[i][1]])
+        dist, parent = _bfs(neighbors, p0, alive)
+        branch = [-1] * len(cells)
+        for u in sorted(core, key=lambda i: dist[i]):
+            if dist[u] > 0:
+                branch[u] = u if parent[u] == p0 else branch[parent[u]]
+        best, best_depth = None, -1
+        for u in core:
+            for v in neighbors[u]:
+                if (alive[v] and parent[u] != v and parent[v] != u and branch[u] != branch[v]
+                        and branch[u] >= 0 and branch[v] >= 0 and dist[u] + dist[v] > best_depth):
+                    best, best_depth = (u, v), dist[u] + dist[v]
+        if best is not None and best_depth + 1 >= max(8, len(core) // 2):
+            u, v = best
+            loop = _path_to(parent, u) + _path_to(parent, v)[:0:-1]
+            return cells[loop], True
+
+    # 周回していない: 任意の点から最も遠い点 a、a から最も遠い点 b を結ぶ経路（木の直径）
+    dist, _ = _bfs(neighbors, 0)
+    a = int(np.argmax(dist))
+    dist, parent = _bfs(neighbors, a)
+    return cells[_path_to(parent, int(np.argmax(dist)))], False
+
+
+def _smooth_and_resample(points, closed, window, spacing):
+    """移動平均で平滑化し、spacing 間隔で等間隔に打ち直す"""
+    if window > 1 and len(points) > window:
+        kernel = np.ones(window) / window
+        half = window // 2
+        if closed:
+            padded = np.concatenate([points[-half:], points, points[:half]])
+        else:
+            padded = np.concatenate([np.repeat(points[:1], half, 0), points, np.repeat(points[-1:], half, 0)])
+        points = np.stack([np.convolve(padded[:, k], kernel, mode="valid") for k in range(2)], axis=1)
+
+    path = np.concatenate([points, points[:1]]) if closed else points
+    seg = np.hypot(*np.diff(path, axis=0).T)
+    cum = np.concatenate([[0.0], np.cumsum(seg)])
+    length = cum[-1]
+    n = max(int(round(length / spacing)), 3)
+    s = np.arange(n) * (length / n) if closed else np.linspace(0.0, length, n)
+    resampled = np.stack([np.interp(s, cum, path[:, k]) for k in range(2)], axis=1)
+    return resampled, length
+
+
+def _nearest_point_grid(component, seeds, seed_points):
+    """
+    空き領域の各セルに、空き領域内を通って最も近い中心線上の点の番号を割り当てる（多始点 BFS）
+
+    ユークリッド距離で最も近い点を選ぶと、薄い壁の向こう側の中心線に割り当てられることがあるため、
+    空き領域の中だけを辿る。到達しないセルは -1。
+    """
+    height, width = component.shape
+    flat = component.ravel()
+    nearest = np.full(flat.shape, -1, dtype=np.int32)
+    queue = deque()
+    for cell, point in zip(seeds, seed_points):
+        if nearest[cell] < 0:
+            nearest[cell] = point
+            queue.append(int(cell))
+    while queue:
+        cell = queue.popleft()
+        row, col = divmod(cell, width)
+        point = nearest[cell]
+        for dr, dc in _NEIGHBORS_8:
+            r, c = row + dr, col + dc
+            if 0 <= r < height and 0 <= c < width:
+                n = r * width + c
+                if flat[n] and nearest[n] < 0:
+                    nearest[n] = point
+                    queue.append(n)
+    return nearest.reshape(component.shape)
+
+
+class Track:
+    """
+    コースの中心線と、位置から弧長・横ずれを求める参照表
+
+    Attributes:
+        points: (M, 2) 中心線上の点（ほぼ resolution 間隔）
+        s: (M,) 各点の弧長 [m]
+        tangent: (M, 2) 各点での進行方向の単位ベクトル
+        half_width: (M,) 各点での壁までの距離 [m]
+        length: 中心線の長さ [m]（周回コースでは 1 周の長さ）
+        closed: 周回コースか
+        nearest: (H, W) int32。各セルに対応づけた中心線上の点の番号（コース外は -1）
+    """
+
+    def __init__(self, points, s, tangent, half_width, length, closed, nearest, origin, resolution):
+        self.points = points
+        self.s = s
+        self.tangent = tangent
+        self.half_width = half_width
+        self.length = float(length)
+        self.closed = bool(closed)
+        self.nearest = nearest
+        self.origin = origin
+        self.resolution = resolution
+        self.height, self.width = nearest.shape
+        # project_point() 用に Python の値で持っておく（1 点ごとの NumPy 配列の生成を避ける）
+        self._rows = [tuple(v) for v in np.column_stack([points, s, tangent, half_width]).tolist()]
+
+    @classmethod
+    def build(cls, map_index, start_pose=None):
+        """MapIndex の距離場から中心線と参照表を作る（キャッシュを使わない）"""
+        component = _largest_component(map_index.clearance > 0)
+        skeleton = thin(component)
+        cells, closed = _trace_centerline(skeleton, map_index.clearance)
+
+        resolution = map_index.resolution
+        xs, ys = map_index.cell_to_world(cells[:, 0], cells[:, 1])
+        window = max(1, int(round(SMOOTHING / resolution)) | 1)
+        points, length = _smooth_and_resample(np.stack([xs, ys], axis=1), closed, window, resolution)
+
+        if start_pose is not None:
+            x, y, yaw = start_pose[:3]
+            tangent = _tangents(points, closed)
+            start = int(np.argmin(np.hypot(points[:, 0] - x, points[:, 1] - y)))
+            if tangent[start] @ np.array([np.cos(yaw), np.sin(yaw)]) < 0:
+                points = points[::-1]
+                start = len(points) - 1 - start
+            if closed:
+                points = np.roll(points, -start, axis=0)
+        elif closed and _signed_area(points) < 0:
+            # start_pose が無い場合は反時計回りを進行方向とする
+            points = points[::-1]
+
+        tangent = _tangents(points, closed)
+        seg = np.hypot(*np.diff(points, axis=0).T)
+        s = np.concatenate([[0.0], np.cumsum(seg)])
+        if closed:
+            length = s[-1] + np.hypot(*(points[0] - points[-1]))
+        else:
+            length = s[-1]
+
+        rows, cols = map_index.world_to_cell(points[:, 0], points[:, 1])
+        rows = np.clip(rows, 0, map_index.height - 1)
+        cols = np.clip(cols, 0, map_index.width - 1)
+        half_width = map_index.clearance[rows, cols].astype(np.float64)
+        nearest = _nearest_point_grid(component, rows * map_index.width + cols, np.arange(len(points)))
+        return cls(points, s, tangent, half_width, length, closed, nearest, map_index.origin, resolution)
+
+    @classmethod
+    def load(cls, map_path, start_pose=None, cache_dir=None):
+        """
+        キャッシュがあれば読み込み、無いか古ければ作って保存する
+
+        Args:
+            map_path: マップファイルのパス（拡張子なし）
+            start_pose: [x, y, yaw]。弧長 0 の位置と進行方向を決める（None なら反時計回り）
+            cache_dir: キャッシュの保存先（MapIndex.load と同じ。None の場合はマップと同じディレクトリ）
+        """
+        map_index = MapIndex.load(map_path, cache_dir)
+        pose_key = "none" if start_pose is None else ",".join(f"{float(v):.6f}" for v in start_pose[:3])
+        key = f"{FORMAT_VERSION}:{map_index.key}:{pose_key}:{SMOOTHING}"
+        cache_path = os.path.join(cache_dir or os.path.dirname(map_path), os.path.basename(map_path) + CACHE_SUFFIX)
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if str(data["key"]) == key:
+                    return cls(data["points"], data["s"], data["tangent"], data["half_width"],
+                               float(data["length"]), bool(data["closed"]), data["nearest"],
+                               map_index.origin, map_index.resolution)
+
+        track = cls.build(map_index, start_pose)
+        tmp_path = cache_path + ".tmp.npz"
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            np.savez(tmp_path, key=key, points=track.points, s=track.s, tangent=track.tangent,
+                     half_width=track.half_width, length=track.length, closed=track.closed, nearest=track.nearest)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return track
+
+    def project(self, x, y):
+        """
+        位置を中心線に射影する（x, y は配列でもよい）
+
+        Returns:
+            (弧長 [m], 横ずれ [m]（進行方向に対して左が正）, その地点のコース半幅 [m])。
+            コース外の位置はすべて NaN。周回コースの弧長は [0, length) に収める。
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        col = np.floor((x - self.origin[0]) / self.resolution).astype(np.int64)
+        row = np.floor(self.height - (y - self.origin[1]) / self.resolution).astype(np.int64)
+        inside = (row >= 0) & (row < self.height) & (col >= 0) & (col < self.width)
+        idx = np.where(inside, self.nearest[np.where(inside, row, 0), np.where(inside, col, 0)], -1)
+        on_track = idx >= 0
+        i = np.where(on_track, idx, 0)
+
+        dx = x - self.points[i, 0]
+        dy = y - self.points[i, 1]
+        tx, ty = self.tangent[i, 0], self.tangent[i, 1]
+        s = self.s[i] + tx * dx + ty * dy
+        if self.closed:
+            s = s % self.length
+        offset = tx * dy - ty * dx
+        nan = np.float64(np.nan)
+        return np.where(on_track, s, nan), np.where(on_track, offset, nan), np.where(on_track, self.half_width[i], nan)
+
+    def project_point(self, x, y):
+        """project() の 1 点版。Python の float で計算するため、1 台分を毎ステップ問い合わせる場合に速い"""
+        col = math.floor((x - self.origin[0]) / self.resolution)
+        row = math.floor(self.height - (y - self.origin[1]) / self.resolution)
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return math.nan, math.nan, math.nan
+        i = self.nearest[row, col]
+        if i < 0:
+            return math.nan, math.nan, math.nan
+        px, py, s, tx, ty, half_width = self._rows[i]
+        dx, dy = x - px, y - py
+        s += tx * dx + ty * dy
+        if self.closed:
+            s %= self.length
+        return s, tx * dy - ty * dx, half_width
+
+
+def _tangents(points, closed):
+    """各点での進行方向の単位ベクトル（中心差分）"""
+    if closed:
+        diff = np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)
+    else:
+        diff = np.gradient(points, axis=0)
+    return diff / np.maximum(np.hypot(diff[:, 0], diff[:, 1]), 1e-12)[:, None]
+
+
+def _signed_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+class ProgressTracker:
+    """
+    1 台または複数台の車両のコース上の進みを追跡する
+
+    update() は前回位置からの弧長の差を返す。周回コースでは差を (-length/2, length/2] に折り返すので、
+    スタート地点をまたいでも連続した値になる（逆走は負）。コース外の位置では 0 を返し、前回の弧長を保つ。
+
+    Attributes:
+        s: 各車両の最新の弧長 [m]
+        total: reset() からの進みの合計 [m]
+        offset, half_width: 最後の update() での横ずれ [m] とコース半幅 [m]（コース外は NaN）
+    """
+
+    def __init__(self, track, num=1):
+        self.track = track
+        self.s = np.zeros(num)
+        self.total = np.zeros(num)
+        self.offset = np.zeros(num)
+        self.half_width = np.ones(num)
+
+    def reset(self, x, y, index=None):
+        """
+        車両を (x, y) から走り始めたことにする
+
+        Args:
+            index: 対象の車両番号（配列も可）。None の場合は全車両
+        """
+        index = slice(None) if index is None else index
+        s, offset, half_width = self.track.project(x, y)
+        self.s[index] = np.where(np.isnan(s), 0.0, s)
+        self.total[index] = 0.0
+        self.offset[index] = offset
+        self.half_width[index] = half_width
+
+    def update(self, x, y):
+        """全車両の新しい位置を渡し、前回からの進み [m] を返す（車両 1 台なら float）"""
+        if len(self.s) == 1 and np.ndim(x) == 0:
+            return self._update_one(float(x), float(y))
+        s, offset, half_width = self.track.project(x, y)
+        delta = s - self.s
+        if self.track.closed:
+            half = self.track.length / 2
+            delta = (delta + half) % self.track.length - half
+        on_track = ~np.isnan(s)
+        delta = np.where(on_track, delta, 0.0)
+        self.s = np.where(on_track, s, self.s)
+        self.total += delta
+        self.offset[:] = offset
+        self.half_width[:] = half_width
+        return delta if len(self.s) > 1 else float(delta.reshape(-1)[0])
+
+    def _update_one(self, x, y):
+        s, offset, half_width = self.track.project_point(x, y)
+        self.offset[0] = offset
+        self.half_width[0] = half_width
+        if math.isnan(s):
+            return 0.0
+        delta = s - self.s[0]
+        if self.track.closed:
+            half = self.track.length / 2
+            delta = (delta + half) % self.track.length - half
+        self.s[0] = s
+        self.total[0] += delta
+        return delta
+
+    def lateral_ratio(self):
+        """最後の update() での |横ずれ| / コース半幅（0 = 中心線上、1 = 壁際。コース外は 1）"""
+        if len(self.s) == 1:
+            ratio = abs(self.offset[0]) / max(self.half_width[0], 1e-6)
+            return 1.0 if math.isnan(ratio) else float(ratio)
+        ratio = np.abs(self.offset) / np.maximum(self.half_width, 1e-6)
+        return np.where(np.isnan(ratio), 1.0, ratio)
+
+
+class LapTimer:
+    """
+    周回コースのスタート/ゴールライン（弧長 0 = Track.load の start_pose）の通過時刻からラップタイムを計る
+
+    ProgressTracker の進みの合計だけを見るため、1 ステップあたりの計算は数回の float 演算で済む。
+    ラインの通過時刻はステップ間の線形補間で求める。通過したラインを逆走して戻り、再び通過しても
+    数え直さない。ライン上（start_tolerance 以内）から走り出した場合はスタート時刻を
+    最初の通過とし、それ以外では最初の通過までを計測しない（アウトラップ）。
+
+    Attributes:
+        crossings: ラインを通過した時刻 [s] のリスト
+        lap_times: 完了した各周の時間 [s]（crossings の差）
+    """
+
+    def __init__(self, tracker, index=0, start_tolerance=0.5):
+        if not tracker.track.closed:
+            raise ValueError("周回していないコースではラップタイムを計測できません")
+        self.tracker = tracker
+        self.index = index
+        self.start_tolerance = start_tolerance
+        self.length = tracker.track.length
+        self.reset()
+
+    def reset(self, t=0.0):
+        """tracker.reset() の直後に呼び、時刻 t から計測を始める"""
+        base = float(self.tracker.s[self.index])
+        if base > self.length - self.start_tolerance:
+            base -= self.length
+        self._base = base
+        self._prev_position = base
+        self._prev_t = t
+        self._next_gate = self.length
+        self.crossings = [t] if abs(base) < self.start_tolerance else []
+        self.lap_times = []
+
+    def update(self, t):
+        """tracker.update() の後に呼び、この呼び出しでラインを通過した回数を返す"""
+        position = self._base + self.tracker.total[self.index]
+        crossed = 0
+        while position >= self._next_gate:
+            frac = (self._next_gate - self._prev_position) / (position - self._prev_position)
+            t_cross = self._prev_t + frac * (t - self._prev_t)
+            if self.crossings:
+                self.lap_times.append(t_cross - self.crossings[-1])
+            self.crossings.append(t_cross)
+            self._next_gate += self.length
+            crossed += 1
+        self._prev_position = position
+        self._prev_t = t
+        return crossed
+
+    @property
+    def laps(self):
+        return len(self.lap_times)
+
+    @property
+    def best_lap(self):
+        return min(self.lap_times) if self.lap_times else None
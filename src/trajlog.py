@@ -0,0 +1,216 @@
+"""
+ステップ単位の走行ログ（列指向のバイナリ形式）
+
+1 つのログはディレクトリで、列ごとに生のバイナリファイル（<列名>.bin）と列の型を書いた meta.json を置きます。
+書き込みは chunk_size 行ずつ各ファイルの末尾へ追記するだけなので、長時間の評価でもメモリ使用量は一定です。
+読み込みは np.memmap で行い、数 GB のログでもエピソードやステップ範囲を切り出した部分だけがディスクから読まれます。
+
+    from src.trajlog import TrajectoryWriter, TrajectoryLog
+    with TrajectoryWriter("logs/eval.traj", scan_downsample=4) as log:
+        env = F1TenthRL(map_path, trajectory_log=log)   # reset / step ごとに自動で記録される
+        ...
+
+    log = TrajectoryLog("logs/eval.traj")
+    ep = log.episode(3)            # 列名 -> memmap のスライス
+    ep["x"], ep["scans"]
+    log.steps(1000, 2000)["reward"]
+"""
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# 列名 -> (dtype, 1 行あたりの形状)。scans の幅はダウンサンプリング後のビーム数で決まる
+_SCALAR_COLUMNS = {
+    "episode": ("int32", ()),
+    "x": ("float32", ()),
+    "y": ("float32", ()),
+    "yaw": ("float32", ()),
+    "velocity": ("float32", ()),
+    "steer": ("float32", ()),
+    "action": ("float32", (2,)),
+    "reward": ("float32", ()),
+    "done": ("bool", ()),
+}
+SCAN_BEAMS = 1080
+
+
+def _column_path(path, name):
+    return os.path.join(path, f"{name}.bin")
+
+
+class TrajectoryWriter:
+    """
+    追記専用のチャンク書き込み
+
+    append() は事前確保したチャンクバッファの 1 行に書き込むだけで、chunk_size 行たまるごとに
+    各列のファイルへ追記する。close() されずに終了しても、書き出し済みのチャンクまでは読み込める。
+    """
+
+    def __init__(self, path, record_scans=True, scan_downsample=1, chunk_size=1024):
+        """
+        Args:
+            path: ログのディレクトリ（既存のログがある場合は上書きする）
+            record_scans: LiDAR を float16 で記録するか
+            scan_downsample: LiDAR を何ビームごとに 1 つにまとめるか（観測と同じく最小値を取る）
+            chunk_size: 何行ごとにファイルへ書き出すか
+        """
+        if SCAN_BEAMS % scan_downsample != 0:
+            raise ValueError(f"scan_downsample は {SCAN_BEAMS} の約数を指定してください: {scan_downsample}")
+        self.path = path
+        self.scan_downsample = scan_downsample
+        self.chunk_size = chunk_size
+        self.columns = dict(_SCALAR_COLUMNS)
+        if record_scans:
+            self.columns["scans"] = ("float16", (SCAN_BEAMS // scan_downsample,))
+
+        os.makedirs(path, exist_ok=True)
+        self._buffers = {name: np.zeros((chunk_size,) + shape, dtype=dtype)
+                         for name, (dtype, shape) in self.columns.items()}
+        self._files = {name: open(_column_path(path, name), "wb") for name in self.columns}
+        self._write_meta(closed=False)
+
+        self._scan_tmp = np.empty(SCAN_BEAMS // scan_downsample)
+        self._fill = 0
+        self.rows = 0
+        self.episode = 0
+        self._episode_rows = 0
+
+    def _write_meta(self, closed):
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "columns": {name: {"dtype": dtype, "shape": list(shape)} for name, (dtype, shape) in self.columns.items()},
+            "scan_downsample": self.scan_downsample,
+            "rows": self.rows if closed else None,
+            "closed": closed,
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def start_episode(self):
+        """以降の行を新しいエピソードとして記録する（F1TenthRL.reset から呼ばれる）"""
+        if self._episode_rows > 0:
+            self.episode += 1
+            self._episode_rows = 0
+
+    def append(self, x, y, yaw, velocity, steer, action, reward, done, scan=None):
+        """1 ステップ分を記録する（F1TenthRL.step から呼ばれる）"""
+        i = self._fill
+        b = self._buffers
+        b["episode"][i] = self.episode
+        b["x"][i] = x
+        b["y"][i] = y
+        b["yaw"][i] = yaw
+        b["velocity"][i] = velocity
+        b["steer"][i] = steer
+        b["action"][i] = action
+        b["reward"][i] = reward
+        b["done"][i] = done
+        if "scans" in b and scan is not None:
+            if self.scan_downsample > 1:
+                # reshape(-1, k).min(axis=1) と同じ値。ずらしたスライスの np.minimum の方が 1 行あたり数倍速い
+                k = self.scan_downsample
+                np.minimum(scan[0::k], scan[1::k], out=self._scan_tmp)
+                for j in range(2, k):
+                    np.minimum(self._scan_tmp, scan[j::k], out=self._scan_tmp)
+                b["scans"][i] = self._scan_tmp
+            else:
+                b["scans"][i] = scan
+        self._fill += 1
+        self._episode_rows += 1
+        if self._fill == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """バッファにたまった行をファイルへ追記する"""
+        if self._fill == 0:
+            return
+        for name, f in self._files.items():
+            f.write(self._buffers[name][:self._fill].tobytes())
+            f.flush()
+        self.rows += self._fill
+        self._fill = 0
+
+    def close(self):
+        if not self._files:
+            return
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        self._write_meta(closed=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class TrajectoryLog:
+    """
+    np.memmap による読み込み
+
+    各列は (rows,) + 形状 の memmap で、スライスした部分だけがディスクから読まれる。
+    行数は列ファイルのサイズから求めるため、書き込み中・異常終了したログも書き出し済みの行まで読める。
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"未対応のログ形式です: format_version={meta['format_version']}")
+        self.path = path
+        self.scan_downsample = meta["scan_downsample"]
+        self.columns = {name: (np.dtype(spec["dtype"]), tuple(spec["shape"]))
+                        for name, spec in meta["columns"].items()}
+
+        # 全列で揃っている行数（書き込み途中のチャンクは含めない）
+        self.rows = min(os.path.getsize(_column_path(path, name)) // (dtype.itemsize * int(np.prod(shape)))
+                        for name, (dtype, shape) in self.columns.items())
+        self._arrays = {}
+        self._episode_bounds = None
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        """列全体の memmap（読み込み専用）"""
+        array = self._arrays.get(name)
+        if array is None:
+            dtype, shape = self.columns[name]
+            if self.rows == 0:
+                array = np.empty((0,) + shape, dtype=dtype)  # 空のファイルは memmap できない
+            else:
+                array = np.memmap(_column_path(self.path, name), dtype=dtype, mode="r",
+                                  shape=(self.rows,) + shape)
+            self._arrays[name] = array
+        return array
+
+    def steps(self, start, stop, columns=None):
+        """ステップ範囲 [start, stop) の各列（列名 -> memmap のスライス）"""
+        return {name: self[name][start:stop] for name in (columns or self.columns)}
+
+    @property
+    def episode_bounds(self):
+        """各エピソードの [開始行, 終了行) を並べた (num_episodes, 2) 配列"""
+        if self._episode_bounds is None:
+            episode = self["episode"]
+            # episode 列（4 バイト/行）だけを読み、値が変わる行を境界とする
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(episode)) + 1]) if self.rows else np.zeros(0, int)
+            stops = np.append(starts[1:], self.rows)
+            self._episode_bounds = np.stack([starts, stops], axis=1)
+        return self._episode_bounds
+
+    @property
+    def num_episodes(self):
+        return len(self.episode_bounds)
+
+    def episode(self, index, columns=None):
+        """index 番目 (0 始まり) のエピソードの各列"""
+        start, stop = self.episode_bounds[index]
+        return self.steps(start, stop, columns)
@@ -0,0 +1,136 @@
+"""
+並列環境（VecEnv）構築ユーティリティ
+
+F1TenthRL を N 個生成し、Stable Baselines3 の VecEnv にまとめます。
+各環境はワーカー番号ごとに異なるシードを持つため（seed を指定しない場合も親プロセスで基準シードを決める）、
+スタート位置の選択が環境間で同期することはありません。
+backend="batched" の場合は 1 つのシミュレータで N 台を走らせる BatchedF1TenthRL を、
+backend="shm" の場合はステップごとのデータを共有メモリで受け渡す SharedMemoryVecEnv を返します。
+
+    from src.vec_env import make_vec_env
+    env = make_vec_env(config.MAP_PATH, num_envs=8, backend="subproc", seed=0)
+
+env_config に EnvConfig のリストを渡すと、環境ごとに異なる設定（速度制限・スタート位置など）で学習できます。
+観測の次元はすべての環境でそろえる必要があります。マップは map_path の 1 つを全環境で共有します。
+
+    base = load_env_config()
+    configs = [replace(base, max_speed=v) for v in (2.0, 2.5, 3.0, 3.5)]
+    env = make_vec_env(config.MAP_PATH, num_envs=4, backend="subproc", env_config=configs)
+
+このモジュール自体は軽量で、VEC_BACKENDS だけを参照する場合（argparse の選択肢など）は
+gym / stable-baselines3 を import しません。
+"""
+VEC_BACKENDS = ("dummy", "subproc", "batched", "shm")
+
+
+def resolve_seed(seed: int = None) -> int:
+    """
+    基準シードを返す。None の場合は OS の乱数から新しい基準シードを作る。
+
+    シードを固定しない環境は np.random のグローバル状態を使うが、fork / forkserver で起動したワーカーは
+    親と同じ状態を引き継ぐため、全ワーカーが同じスタート位置の列を引いてしまう。
+    親プロセスで一度だけ基準シードを決めて seed + i を配ることで、ワーカーごとに異なる列にする。
+    """
+    if seed is not None:
+        return seed
+    import numpy as np
+    # seed + i が RandomState の範囲（2**32 未満）に収まるよう 31 bit にする
+    return int(np.random.SeedSequence().generate_state(1)[0] >> 1)
+
+
+def make_env(map_path: str, rank: int, seed: int = None, **env_kwargs):
+    """
+    ワーカー rank 番目の F1TenthRL を生成する関数を返す。
+
+    SubprocVecEnv は関数を子プロセスへ渡して実行するため、
+    環境そのものではなく生成関数を返します。
+
+    Args:
+        map_path: マップファイルのパス（拡張子なし）
+        rank: ワーカー番号 (0 始まり)
+        seed: 基準シード。None の場合はシードを固定しない。
+        env_kwargs: F1TenthRL に渡すその他の引数
+
+    Returns:
+        callable: 引数なしで F1TenthRL を返す関数
+    """
+    def _init():
+        from src.f1_env import F1TenthRL
+
+        env_seed = seed + rank if seed is not None else None
+        return F1TenthRL(map_path, seed=env_seed, **env_kwargs)
+    return _init
+
+
+def _resolve_env_configs(env_config, num_envs: int):
+    """env_config（None / EnvConfig / リスト）を環境ごとの EnvConfig のリストにする"""
+    from src.env_config import load_env_config
+
+    if env_config is None:
+        # 子プロセスで config.py を読み直さないよう、親プロセスで一度だけ作って全環境に渡す
+        env_config = load_env_config()
+    if not isinstance(env_config, (list, tuple)):
+        return [env_config] * num_envs
+    if len(env_config) != num_envs:
+        raise ValueError(f"env_config の数 ({len(env_config)}) が num_envs ({num_envs}) と一致しません")
+    obs_sizes = sorted({cfg.obs_size for cfg in env_config})
+    if len(obs_sizes) > 1:
+        raise ValueError(f"env_config の観測の次元がそろっていません: {obs_sizes}")
+    return list(env_config)
+
+
+def make_vec_env(map_path: str, num_envs: int = 1, backend: str = "dummy", seed: int = None,
+                 raw_scan: bool = False, action_repeat: int = 1, env_config=None):
+    """
+    N 個の F1TenthRL をまとめた VecEnv を返す。
+
+    Args:
+        map_path: マップファイルのパス（拡張子なし）
+        num_envs: 並列に動かす環境数
+        backend: "dummy"（同一プロセスで逐次実行）、"subproc"（ワーカープロセスで並列実行）、
+                 "batched"（1 つのシミュレータで N 台を同時に実行）、
+                 "shm"（ワーカープロセスで並列実行し、観測などを共有メモリで受け渡す）
+        seed: 基準シード。ワーカー i には seed + i が割り当てられる。
+              None の場合は実行ごとに異なる基準シードを親プロセスで決める（resolve_seed）。
+        raw_scan: True の場合は各ステップの info に生の LiDAR ('raw_scan') を入れる。
+                  学習では使わないため、既定ではプロセス間で送らないよう省く（batched は常に入れない）。
+        action_repeat: 1 回の step で同じ行動を保つ物理 tick 数（F1TenthRL の action_repeat。batched は 1 のみ）
+        env_config: 全環境で共通の EnvConfig、または環境ごとの EnvConfig のリスト（長さ num_envs）。
+                    None の場合は config.py から一度だけ作る。batched は全車両で共通の設定のみ。
+
+    Returns:
+        VecEnv
+    """
+    if backend not in VEC_BACKENDS:
+        raise ValueError(f"未対応の backend です: {backend} (選択肢: {VEC_BACKENDS})")
+    if num_envs < 1:
+        raise ValueError(f"num_envs は 1 以上を指定してください: {num_envs}")
+
+    env_configs = _resolve_env_configs(env_config, num_envs)
+    seed = resolve_seed(seed)
+
+    # gym / f110_gym / stable-baselines3 は重いため、使う backend の分だけここで import する
+    if backend == "batched":
+        if action_repeat != 1:
+            raise ValueError(f"backend='batched' は action_repeat に対応していません: {action_repeat}")
+        if any(cfg != env_configs[0] for cfg in env_configs):
+            raise ValueError("backend='batched' は環境ごとに異なる env_config に対応していません")
+        from src.batched_env import BatchedF1TenthRL
+        return BatchedF1TenthRL(map_path, num_cars=num_envs, seed=seed, env_config=env_configs[0])
+
+    if backend == "shm":
+        from src.shm_vec_env import SharedMemoryVecEnv
+        # ワーカーは観測をすぐ共有メモリへ書き写すため、環境の観測バッファをコピーせずに返させる
+        env_fns = [make_env(map_path, rank, seed, share_obs_buffer=True, include_raw_scan=raw_scan,
+                            action_repeat=action_repeat, env_config=env_configs[rank])
+                   for rank in range(num_envs)]
+        return SharedMemoryVecEnv(env_fns, raw_scans=raw_scan)
+
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+    env_fns = [make_env(map_path, rank, seed, include_raw_scan=raw_scan, action_repeat=action_repeat,
+                        env_config=env_configs[rank])
+               for rank in range(num_envs)]
+    if backend == "subproc":
+        return SubprocVecEnv(env_fns)
+    return DummyVecEnv(env_fns)